@@ -1,22 +1,6 @@
-import autogen
+import importlib
 import os
-from .base_agent import MyBaseAgent
-from .conversable_agent import MyConversableAgent
-from .student_agent import StudentAgent
-from .knowledge_tracer_agent import KnowledgeTracerAgent
-from .teacher_agent import TeacherAgent
-from .tutor_agent import TutorAgent
-from .problem_generator_agent import ProblemGeneratorAgent
-from .solution_verifier_agent import SolutionVerifierAgent
-from .programmer_agent import ProgrammerAgent
-from .code_runner_agent import CodeRunnerAgent
-from .learner_model_agent import LearnerModelAgent
-from .level_adapter_agent import LevelAdapterAgent
-from .motivator_agent import MotivatorAgent
-from .gamification_agent import GamificationAgent
-from .mastery_agent import MasteryAgent
-
-from src.Models.llm_config import gpt3_config
+from collections.abc import Mapping
 from enum import Enum
 
 os.environ["AUTOGEN_USE_DOCKER"] = "False"
@@ -36,50 +20,124 @@ class AgentKeys(Enum):
     MOTIVATOR = 'motivator'
     GAMIFICATION = 'gamification'
     MASTERY = 'mastery'  # Added MASTERY key
+    POST_ANSWER = 'post_answer'  # optional FanOutStage of the learner model, level adapter and motivator
 
-# Agents
-student = StudentAgent()
-knowledge_tracer = KnowledgeTracerAgent()
-teacher = TeacherAgent()
-tutor = TutorAgent()
-problem_generator = ProblemGeneratorAgent()
-solution_verifier = SolutionVerifierAgent()
-programmer = ProgrammerAgent()
-code_runner = CodeRunnerAgent()
-learner_model = LearnerModelAgent()
-level_adapter = LevelAdapterAgent()
-motivator = MotivatorAgent()
-gamification = GamificationAgent(name="GamificationAgent")
-mastery = MasteryAgent()  # Added MasteryAgent instance
-
-agents_dict = {
-    AgentKeys.STUDENT.value: student,
-    AgentKeys.KNOWLEDGE_TRACER.value: knowledge_tracer,
-    AgentKeys.TEACHER.value: teacher,
-    AgentKeys.TUTOR.value: tutor,
-    AgentKeys.PROBLEM_GENERATOR.value: problem_generator,
-    AgentKeys.SOLUTION_VERIFIER.value: solution_verifier,
-    AgentKeys.PROGRAMMER.value: programmer,
-    AgentKeys.CODE_RUNNER.value: code_runner,
-    AgentKeys.LEARNER_MODEL.value: learner_model,
-    AgentKeys.LEVEL_ADAPTER.value: level_adapter,
-    AgentKeys.MOTIVATOR.value: motivator,
-    AgentKeys.GAMIFICATION.value: gamification,
-    AgentKeys.MASTERY.value: mastery  # Added MasteryAgent to agents_dict
+# Agent key -> (module, class, agent name, constructor kwargs).
+# Modules are only imported when an agent of that class is first built,
+# so importing this module does not pull in autogen, openai or the taxonomy.
+AGENT_REGISTRY = {
+    AgentKeys.STUDENT.value: (".student_agent", "StudentAgent", "StudentAgent", {}),
+    AgentKeys.KNOWLEDGE_TRACER.value: (".knowledge_tracer_agent", "KnowledgeTracerAgent", "KnowledgeTracerAgent", {}),
+    AgentKeys.TEACHER.value: (".teacher_agent", "TeacherAgent", "TeacherAgent", {}),
+    AgentKeys.TUTOR.value: (".tutor_agent", "TutorAgent", "TutorAgent", {}),
+    AgentKeys.PROBLEM_GENERATOR.value: (".problem_generator_agent", "ProblemGeneratorAgent", "ProblemGeneratorAgent", {}),
+    AgentKeys.SOLUTION_VERIFIER.value: (".solution_verifier_agent", "SolutionVerifierAgent", "SolutionVerifierAgent", {}),
+    AgentKeys.PROGRAMMER.value: (".programmer_agent", "ProgrammerAgent", "ProgrammerAgent", {}),
+    AgentKeys.CODE_RUNNER.value: (".code_runner_agent", "CodeRunnerAgent", "CodeRunnerAgent", {}),
+    AgentKeys.LEARNER_MODEL.value: (".learner_model_agent", "LearnerModelAgent", "LearnerModelAgent", {}),
+    AgentKeys.LEVEL_ADAPTER.value: (".level_adapter_agent", "LevelAdapterAgent", "LevelAdapterAgent", {}),
+    AgentKeys.MOTIVATOR.value: (".motivator_agent", "MotivatorAgent", "MotivatorAgent", {}),
+    AgentKeys.GAMIFICATION.value: (".gamification_agent", "GamificationAgent", "GamificationAgent", {"name": "GamificationAgent"}),
+    AgentKeys.MASTERY.value: (".mastery_agent", "MasteryAgent", "MasteryAgent", {}),  # Added MasteryAgent
 }
 
-agents_dict_by_name = {
-    "StudentAgent": student,
-    "KnowledgeTracerAgent": knowledge_tracer,
-    "TeacherAgent": teacher,
-    "TutorAgent": tutor,
-    "ProblemGeneratorAgent": problem_generator,
-    "SolutionVerifierAgent": solution_verifier,
-    "ProgrammerAgent": programmer,
-    "CodeRunnerAgent": code_runner,
-    "LearnerModelAgent": learner_model,
-    "LevelAdapterAgent": level_adapter,
-    "MotivatorAgent": motivator,
-    "GamificationAgent": gamification,
-    "MasteryAgent": mastery  # Added MasteryAgent to agents_dict_by_name
+# Agent classes, also resolved on first access
+AGENT_CLASSES = {
+    "MyBaseAgent": ".base_agent",
+    "MyConversableAgent": ".conversable_agent",
+    **{class_name: module for module, class_name, _, _ in AGENT_REGISTRY.values()},
 }
+
+agent_names = {key: name for key, (_, _, name, _) in AGENT_REGISTRY.items()}
+agent_keys_by_name = {name: key for key, name in agent_names.items()}
+
+
+def get_agent_class(class_name: str):
+    module = importlib.import_module(AGENT_CLASSES[class_name], __package__)
+    return getattr(module, class_name)
+
+
+def create_agent(key: str, **kwargs):
+    """Build a new agent for an AgentKeys value"""
+    _, class_name, _, default_kwargs = AGENT_REGISTRY[key]
+    return get_agent_class(class_name)(**{**default_kwargs, **kwargs})
+
+
+def create_agents(work_dir: str = None) -> dict:
+    """
+    Create an independent set of agents keyed by AgentKeys values.
+    Each learner session gets its own set so chat state is never shared.
+
+    :param work_dir: directory for the code runner, "coding" when None
+    """
+    agents = {}
+    for key in AGENT_REGISTRY:
+        if key == AgentKeys.CODE_RUNNER.value:
+            agents[key] = create_agent(key, work_dir=work_dir or "coding")
+        else:
+            agents[key] = create_agent(key)
+    return agents
+
+def get_agents_by_name(agents: dict) -> dict:
+    return {agent.name: agent for agent in agents.values()}
+
+
+class LazyAgentMapping(Mapping):
+    """Read-only mapping whose agents are built on first access"""
+
+    def __init__(self, get, keys):
+        self._get = get
+        self._keys = tuple(keys)
+
+    def __getitem__(self, key):
+        if key not in self._keys:
+            raise KeyError(key)
+        return self._get(key)
+
+    def __contains__(self, key):
+        # Membership tests must not build the agent
+        return key in self._keys
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+
+# Agents shared by the single-learner apps, built one at a time on first use
+_shared_agents = {}
+
+
+def get_agent(key: str):
+    """The shared agent for an AgentKeys value"""
+    agent = _shared_agents.get(key)
+    if agent is None:
+        agent = _shared_agents[key] = create_agent(key)
+    return agent
+
+
+agents_dict = LazyAgentMapping(get_agent, AGENT_REGISTRY)
+agents_dict_by_name = LazyAgentMapping(lambda name: get_agent(agent_keys_by_name[name]), agent_keys_by_name)
+
+
+def __getattr__(name):
+    # Module attributes such as agents.tutor or agents.MasteryAgent
+    if name in AGENT_REGISTRY:
+        return get_agent(name)
+    if name in AGENT_CLASSES:
+        return get_agent_class(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Star imports keep getting every agent, explicit imports only build what they name
+__all__ = [
+    "AgentKeys",
+    "agents_dict",
+    "agents_dict_by_name",
+    "create_agent",
+    "create_agents",
+    "get_agent",
+    *AGENT_CLASSES,
+    *AGENT_REGISTRY,
+]
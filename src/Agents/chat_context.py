@@ -0,0 +1,226 @@
+import asyncio
+import logging
+from functools import lru_cache
+
+from openai import AsyncOpenAI
+
+from src import globals
+from src.Models.llm_config import gpt3_config_list
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except ImportError:  # tiktoken is optional, token counts are estimated without it
+    _encoding = None
+
+
+# Senders whose messages an agent needs to do its job. Agents not listed see every sender.
+# The message an agent replies to is always kept, whoever sent it.
+RELEVANT_SENDERS = {
+    "ProblemGeneratorAgent": {"TeacherAgent", "TutorAgent", "LevelAdapterAgent", "StudentAgent"},
+    "SolutionVerifierAgent": {"ProblemGeneratorAgent", "StudentAgent", "TutorAgent"},
+    "ProgrammerAgent": {"ProblemGeneratorAgent", "StudentAgent", "SolutionVerifierAgent", "TutorAgent"},
+    "LearnerModelAgent": {"StudentAgent", "ProblemGeneratorAgent", "SolutionVerifierAgent", "LevelAdapterAgent", "TutorAgent"},
+    "LevelAdapterAgent": {"StudentAgent", "ProblemGeneratorAgent", "SolutionVerifierAgent", "LearnerModelAgent", "TutorAgent"},
+    "MotivatorAgent": {"StudentAgent", "SolutionVerifierAgent", "LevelAdapterAgent", "TutorAgent"},
+}
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+
+@lru_cache(maxsize=4096)
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    if _encoding is None:
+        return len(text) // 4 + 1
+    return len(_encoding.encode(text))
+
+
+def message_tokens(message: dict) -> int:
+    content = message.get("content")
+    # Every message carries a few tokens of role/name framing
+    return count_tokens(content if isinstance(content, str) else str(content or "")) + 4
+
+
+def tool_call_ids(message: dict) -> set:
+    return {call.get("id") for call in message.get("tool_calls") or ()}
+
+
+def tool_response_ids(message: dict) -> set:
+    if message.get("role") != "tool":
+        return set()
+    if "tool_responses" in message:
+        return {response.get("tool_call_id") for response in message["tool_responses"]}
+    return {message.get("tool_call_id")}
+
+
+def drop_unpaired_tool_messages(messages: list) -> list:
+    """
+    Drop the tool results whose call is not in messages, and the tool calls whose results are not.
+    OpenAI rejects a request holding either. The last message, the one being replied to, is kept as is.
+    """
+    called = set().union(*map(tool_call_ids, messages[:-1]))
+    answered = set().union(*map(tool_response_ids, messages))
+    kept = []
+    for message in messages[:-1]:
+        if tool_response_ids(message) - called:
+            continue
+        calls = message.get("tool_calls")
+        if calls and not tool_call_ids(message) <= answered:
+            calls = [call for call in calls if call.get("id") in answered]
+            if not calls and not message.get("content"):
+                continue
+            message = {key: value for key, value in message.items() if key != "tool_calls"}
+            if calls:
+                message["tool_calls"] = calls
+        kept.append(message)
+    kept.append(messages[-1])
+    return kept
+
+
+_summary_client = None
+
+
+async def summarize_with_llm(previous_summary: str, messages: list) -> str:
+    """Fold messages into the running summary with a small model"""
+    global _summary_client
+    if _summary_client is None:
+        _summary_client = AsyncOpenAI()
+    transcript = "\n".join(f"{message.get('name', message.get('role'))}: {message.get('content')}" for message in messages)
+    response = await _summary_client.chat.completions.create(
+        model=gpt3_config_list[0]['model'],
+        messages=[
+            {"role": "system", "content": "You keep a compact memory of a math tutoring session."},
+            {"role": "user", "content": f"""
+            Update the summary with the new conversation turns.
+            Keep the topic, the lessons given, the problems asked, whether the student answered them correctly,
+            and the current difficulty level. Use at most {globals.CONTEXT_SUMMARY_MAX_WORDS} words.
+
+            Current summary:
+            {previous_summary or '(empty)'}
+
+            New turns:
+            {transcript}
+            """},
+        ],
+        temperature=0,
+    )
+    return response.choices[0].message.content
+
+
+class ChatContextManager:
+    """
+    Caps the prompt each agent of a CustomGroupChat receives.
+
+    Before every reply the agent's messages are reduced to the senders it needs
+    (RELEVANT_SENDERS) and then to the newest messages that fit in max_tokens.
+    Turns that fall out of the window are folded into a rolling summary by a
+    background task, and the summary is put in front of the window. The summary
+    is never awaited on the reply path, so the latency of a turn stays flat.
+    """
+
+    def __init__(self, max_tokens=None, keep_recent=None, summarize_every=None,
+                 relevant_senders=None, summarize=summarize_with_llm):
+        """
+        :param max_tokens: prompt budget per reply, excluding the system message
+        :param keep_recent: number of newest group chat messages never folded into the summary
+        :param summarize_every: number of messages that have to pile up before a summary update
+        :param relevant_senders: agent name -> senders it needs, RELEVANT_SENDERS by default
+        :param summarize: async callable (previous_summary, messages) -> summary, None to disable
+        """
+        self.max_tokens = max_tokens if max_tokens is not None else globals.CONTEXT_MAX_TOKENS
+        self.keep_recent = keep_recent if keep_recent is not None else globals.CONTEXT_KEEP_RECENT
+        self.summarize_every = summarize_every if summarize_every is not None else globals.CONTEXT_SUMMARIZE_EVERY
+        self.relevant_senders = relevant_senders if relevant_senders is not None else RELEVANT_SENDERS
+        self.summarize = summarize
+
+        self.groupchat = None
+        self.summary = ""
+        self.summarized_count = 0
+        self._summary_task = None
+        self.logger = logging.getLogger(__name__)
+
+    def attach(self, groupchat):
+        """Register the reply hook on every agent of the group chat"""
+        self.groupchat = groupchat
+        groupchat.subscribe(self._on_message_appended)
+        for agent in groupchat.agents:
+            agent.register_hook("process_all_messages_before_reply", self._make_hook(agent.name))
+        return self
+
+    def build_context(self, agent_name: str, messages: list) -> list:
+        """The messages agent_name replies to, within the token budget"""
+        if not messages:
+            return messages
+        relevant = self.relevant_senders.get(agent_name)
+        agent_names = {agent.name for agent in self.groupchat.agents} if self.groupchat else set()
+
+        summary_message = {"role": "user", "content": SUMMARY_PREFIX + self.summary} if self.summary else None
+        budget = self.max_tokens - (message_tokens(summary_message) if summary_message else 0)
+
+        # Walk back from the newest message. The last one is what the agent replies to.
+        selected = [messages[-1]]
+        budget -= message_tokens(messages[-1])
+        answered_calls = tool_response_ids(messages[-1])
+        truncated = False
+        for message in reversed(messages[:-1]):
+            name = message.get("name")
+            # Messages from outside the agent set (restored summaries, the manager) are always relevant.
+            # So is the call of a tool result already selected.
+            if relevant is not None and name in agent_names and name not in relevant \
+                    and not answered_calls & tool_call_ids(message):
+                continue
+            tokens = message_tokens(message)
+            if tokens > budget:
+                truncated = True
+                break
+            selected.append(message)
+            answered_calls |= tool_response_ids(message)
+            budget -= tokens
+        selected.reverse()
+
+        selected = drop_unpaired_tool_messages(selected)
+        if summary_message and truncated:
+            selected.insert(0, summary_message)
+        return selected
+
+    def _make_hook(self, agent_name):
+        def process_all_messages_before_reply(messages):
+            return self.build_context(agent_name, messages)
+        return process_all_messages_before_reply
+
+    ##################################################
+    # Rolling summary
+    ##################################################
+    def _on_message_appended(self, message):
+        message_tokens(message)  # warm the token count cache off the reply path
+        if len(self.groupchat.messages) < self.summarized_count:
+            # The chat was reset
+            self.summary = ""
+            self.summarized_count = 0
+        foldable = len(self.groupchat.messages) - self.keep_recent - self.summarized_count
+        if self.summarize is not None and foldable >= self.summarize_every:
+            self.schedule_summary()
+
+    def schedule_summary(self):
+        if self._summary_task is not None and not self._summary_task.done():
+            return self._summary_task
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+        self._summary_task = loop.create_task(self._update_summary())
+        return self._summary_task
+
+    async def _update_summary(self):
+        end = len(self.groupchat.messages) - self.keep_recent
+        messages = self.groupchat.messages[self.summarized_count:end]
+        if not messages:
+            return
+        try:
+            self.summary = await self.summarize(self.summary, messages)
+            self.summarized_count = end
+            self.logger.info(f"Summarized {end} messages into {count_tokens(self.summary)} tokens")
+        except Exception as e:
+            self.logger.error(f"Error summarizing chat history: {str(e)}")
@@ -18,9 +18,12 @@
 
 
 
+import getpass
 from typing import Dict
+from src.Agents.verdicts import is_correct
 from src.KnowledgeGraphs.math_graph import KnowledgeGraph
-import src.KnowledgeGraphs.math_taxonomy as mt
+from src.KnowledgeGraphs.topic_graph import get_topic_graph
+from src.KnowledgeGraphs.mastery_frontier import MasteryFrontier, get_leaf_frontier_index
 
 
 class FSM:
@@ -88,7 +91,7 @@ class FSM:
         
 
 class FSMGraphTracerConsole:
-    def __init__(self, agents: Dict):
+    def __init__(self, agents: Dict, student_id: str = None):
         self.agents = agents
         self.current_state = "Initial"
         
@@ -97,30 +100,22 @@ class FSMGraphTracerConsole:
         self.knowledge_tracer = self.agents["knowledge_tracer"]
         self.problem_generator = self.agents["problem_generator"]
         self.solution_verifier = self.agents["solution_verifier"]
+        # Answers are traced per learner, the StudentAgent is the same for all of them
+        self.student_id = student_id or getpass.getuser()
 
         # Build knowledge graph
         # self.node_name = None
         # self.kg =   KnowledgeGraph()
         # self.kg.build_dag_from_dict(mt.subsubsub_topics)
 
-        # Replace the subsubsub_topics "key" with an integer denoting level of difficulty
-        # Each dictionary value is a list. Flatten it and increment the key
-        # TODO: Update this code in graph_builder.py
-        self.skill_level = 0
-        self.kg = {}
-        i = 0  # Start with a counter at 0
-        for key, value_list in mt.subsubsub_topics.items():
-            for value in value_list:
-                self.kg[i] = value  
-                i += 1 
-        
+        # Leaf topics in taxonomy order, indexed by skill level
+        self.topic_graph = get_topic_graph()
+        self.kg = self.topic_graph.leaf_names
+
         # pick a graph edge - start with Algebra
-        for key, value in self.kg.items():
-            if value.startswith("Algebra"):
-                self.skill_level = key
-                break
-            else:
-                self.skill_level = 0 
+        self.skill_level = self.topic_graph.first_leaf_position("Algebra")
+        # Topics unlock along the prerequisite DAG, the leaves before Algebra count as known
+        self.frontier = MasteryFrontier(get_leaf_frontier_index(), mastered=self.kg[:self.skill_level])
 
     
     def next_speaker_selector(self):
@@ -148,15 +143,22 @@ class FSMGraphTracerConsole:
             return self.solution_verifier
         
         if self.current_state == "VerifySolution":
-            self.knowledge_tracer.send(f"{self.student_response} is the Students response to {self.pg_response}. Is the Student's answer correct? Answer yes or no", recipient=self.solution_verifier, request_reply=True)
-            self.verifier_answer = self.solution_verifier.last_message()["content"]
-            self.was_correct = True if "Yes" in self.verifier_answer else False            
+            self.knowledge_tracer.send(f"{self.student_response} is the Students response to {self.pg_response}. Is the Student's answer correct? End with your verdict", recipient=self.solution_verifier, request_reply=True)
+            self.verifier_message = self.solution_verifier.last_message()
+            self.verifier_answer = self.verifier_message["content"]
+            self.was_correct = is_correct(self.verifier_message)
             self.current_state = "AdaptLevel"
             return self.knowledge_tracer
         
         if self.current_state == "AdaptLevel":
-            if self.was_correct:
-                self.skill_level += 1
+            # Move on once the knowledge tracer estimates the topic is mastered, not after one correct answer
+            topic = self.kg[self.skill_level]
+            self.knowledge_tracer.record_answer(self.student_id, topic, self.was_correct)
+            if self.knowledge_tracer.is_mastered(self.student_id, topic):
+                self.frontier.set_mastered(topic)
+                next_topic = self.frontier.next_topic()
+                if next_topic is not None:
+                    self.skill_level = self.kg.index(next_topic)
                 print("The next topic is", self.kg[self.skill_level])
             else:
                 print("Better to practice a little more")
@@ -168,7 +170,7 @@ class FSMGraphTracerConsole:
             return None
 
 class FSMGraphTracerGUI:
-    def __init__(self, agents: Dict):
+    def __init__(self, agents: Dict, student_id: str = None):
         self.agents = agents
         self.groupchat_manager = None
         self.reactive_chat = None
@@ -179,30 +181,22 @@ class FSMGraphTracerGUI:
         self.knowledge_tracer = self.agents["knowledge_tracer"]
         self.problem_generator = self.agents["problem_generator"]
         self.solution_verifier = self.agents["solution_verifier"]
+        # Answers are traced per learner, the StudentAgent is the same for all of them
+        self.student_id = student_id or getpass.getuser()
 
         # Build knowledge graph
         # self.node_name = None
         # self.kg =   KnowledgeGraph()
         # self.kg.build_dag_from_dict(mt.subsubsub_topics)
 
-        # Replace the subsubsub_topics "key" with an integer denoting level of difficulty
-        # Each dictionary value is a list. Flatten it and increment the key
-        # TODO: Update this code in graph_builder.py
-        self.skill_level = 0
-        self.kg = {}
-        i = 0  # Start with a counter at 0
-        for key, value_list in mt.subsubsub_topics.items():
-            for value in value_list:
-                self.kg[i] = value  
-                i += 1 
+        # Leaf topics in taxonomy order, indexed by skill level
+        self.topic_graph = get_topic_graph()
+        self.kg = self.topic_graph.leaf_names
 
         # pick a graph edge - start with Algebra
-        for key, value in self.kg.items():
-            if value.startswith("Algebra"):
-                self.skill_level = key
-                break
-            else:
-                self.skill_level = 0 
+        self.skill_level = self.topic_graph.first_leaf_position("Algebra")
+        # Topics unlock along the prerequisite DAG, the leaves before Algebra count as known
+        self.frontier = MasteryFrontier(get_leaf_frontier_index(), mastered=self.kg[:self.skill_level])
 
 
 
@@ -258,12 +252,19 @@ class FSMGraphTracerGUI:
             #self.knowledge_tracer.send(f"{self.student_response} is the Students response to {self.pg_response}. Is the Student's answer correct? Answer yes or no", recipient=self.solution_verifier, request_reply=True)
             #self.verifier_answer = self.solution_verifier.last_message()["content"]
             #self.was_correct = True if "Yes" in self.verifier_answer else False            
+            self.was_correct = is_correct(groupchat.messages[-1])
             self.current_state = "AdaptLevel"
             return self.knowledge_tracer
         
         elif self.current_state == "AdaptLevel":
-            if self.was_correct:
-                self.skill_level += 1
+            # Move on once the knowledge tracer estimates the topic is mastered, not after one correct answer
+            topic = self.kg[self.skill_level]
+            self.knowledge_tracer.record_answer(self.student_id, topic, self.was_correct)
+            if self.knowledge_tracer.is_mastered(self.student_id, topic):
+                self.frontier.set_mastered(topic)
+                next_topic = self.frontier.next_topic()
+                if next_topic is not None:
+                    self.skill_level = self.kg.index(next_topic)
                 print("The next topic is", self.kg[self.skill_level])
             else:
                 print("Better to practice a little more")
@@ -46,8 +46,8 @@
     # Teacher: Start the next lesson at the Student's request
 
 from typing import Dict
+from src.Agents.verdicts import is_correct
 from src.KnowledgeGraphs.math_graph import KnowledgeGraph
-import src.KnowledgeGraphs.math_taxonomy as mt
 from src.Agents.telugu_teaching_agent import TeluguTeachingAgent
 class FSM:
     def __init__(self, agents: Dict):
@@ -150,9 +150,10 @@ class FSMGraphTracerConsole:
             return self.solution_verifier
         
         if self.current_state == "VerifySolution":
-            self.knowledge_tracer.send(f"{self.student_response} is the Students response to {self.pg_response}. Is the Student's answer correct? Answer yes or no", recipient=self.solution_verifier, request_reply=True)
-            self.verifier_answer = self.solution_verifier.last_message()["content"]
-            self.was_correct = True if "Yes" in self.verifier_answer else False            
+            self.knowledge_tracer.send(f"{self.student_response} is the Students response to {self.pg_response}. Is the Student's answer correct? End with your verdict", recipient=self.solution_verifier, request_reply=True)
+            self.verifier_message = self.solution_verifier.last_message()
+            self.verifier_answer = self.verifier_message["content"]
+            self.was_correct = is_correct(self.verifier_message)
             self.current_state = "AdaptLevel"
             return self.knowledge_tracer
         
@@ -1,5 +1,11 @@
 ##################### Code Runner #########################
+import asyncio
+
+import autogen
+
 from .conversable_agent import MyConversableAgent
+from .verdicts import verdict_instructions
+from src import globals
 from src.Models.llm_config import gpt3_config
 
 class CodeRunnerAgent(MyConversableAgent):  
@@ -32,13 +38,31 @@ You are an AutoGen agent designed to run Python code snippets and visualize the
     * If the code requires user input, clearly prompt the user and incorporate their input into the execution.
     * If the visualization requires specific configurations or preferences, ask the user for guidance. 
 
-"""
-    def __init__(self, **kwargs):
+""" + verdict_instructions("CodeRunnerAgent")
+    def __init__(self, work_dir="coding", **kwargs):
+        code_execution_config = kwargs.pop('code_execution_config', None)
+        if code_execution_config is None:
+            code_execution_config = self.default_code_execution_config(work_dir)
         super().__init__(
             name="CodeRunnerAgent",
-            code_execution_config={"work_dir": "coding"},
+            code_execution_config=code_execution_config,
             human_input_mode="NEVER",
             system_message=kwargs.pop('system_message', self.system_message),
             description=kwargs.pop('description',self.description),
             **kwargs
-        )
\ No newline at end of file
+        )
+        if isinstance(code_execution_config, dict) and "executor" in code_execution_config:
+            # Runs wait in a thread rather than on the event loop every session shares
+            self.register_reply([autogen.Agent, None], CodeRunnerAgent.a_execute_code_reply, ignore_async_in_sync_chat=True)
+
+    async def a_execute_code_reply(self, messages=None, sender=None, config=None):
+        """autogen's code execution reply, run in a worker thread"""
+        return await asyncio.to_thread(self._generate_code_execution_reply_using_executor, messages, sender)
+
+    @staticmethod
+    def default_code_execution_config(work_dir):
+        """Warm sandbox workers, or a new local interpreter per snippet when globals.CODE_EXECUTOR is 'local'"""
+        if globals.CODE_EXECUTOR == 'sandbox':
+            from src.Tools.sandbox_code_executor import SandboxCodeExecutor
+            return {"executor": SandboxCodeExecutor(work_dir=work_dir)}
+        return {"work_dir": work_dir}
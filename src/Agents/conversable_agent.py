@@ -8,7 +8,7 @@ from typing import Callable, Any
 
 from autogen.cache.cache import AbstractCache
 from src import globals
-from src.Models.llm_config import gpt3_config, gpt4_config
+from src.Models.llm_config import gpt3_config, gpt4_config, streaming_config
 
 from .base_agent import MyBaseAgent
 
@@ -28,17 +28,26 @@ class MyConversableAgent(autogen.ConversableAgent, MyBaseAgent):
 
         self.groupchat_manager = None
         self.reactive_chat = None
+
+    def enable_streaming(self):
+        """Stream this agent's completions to the IOStream of the running chat, for UIs that show them"""
+        if not self.llm_config or self.llm_config.get("stream"):
+            return
+        self.llm_config = streaming_config(self.llm_config)
+        self.client = autogen.OpenAIWrapper(**self.llm_config)
  
     async def a_get_human_input(self, prompt: str) -> str:
-        self.groupchat_manager.chat_interface.send(prompt, user="System", respond=False) 
+        manager = self.groupchat_manager
+        manager.chat_interface.send(prompt, user="System", respond=False) 
 
-        if globals.input_future is None or globals.input_future.done():
-            globals.input_future = asyncio.Future()
+        # The future belongs to the manager so each learner session waits on its own input
+        if manager.input_future is None or manager.input_future.done():
+            manager.input_future = asyncio.Future()
 
-        await globals.input_future
+        await manager.input_future
 
-        input_value = globals.input_future.result()
-        globals.input_future = None
+        input_value = manager.input_future.result()
+        manager.input_future = None
         return input_value
 
     async def a_initiate_chat(self, recipient: autogen.ConversableAgent, clear_history: bool = False, message: str | Callable[..., Any] | None = None, **kwargs) -> autogen.ChatResult:
@@ -95,7 +104,7 @@ class MyConversableAgent(autogen.ConversableAgent, MyBaseAgent):
         #############################
         self.reactive_chat.update_learn_tab(recipient=recipient, messages=messages, sender=sender, config=config)
         self.reactive_chat.update_dashboard()                          
-        self.reactive_chat.update_progress(contents=last_content,user=recipient.name)   
+        # update_progress is subscribed to the LevelAdapterAgent's verdicts by the ReactiveChat
         #self.reactive_chat.promptC.update_prompt_tab(recipient=recipient, messages=messages, sender=sender, config=config)     
         #Note: do not call update_model_tab. The button takes care of that.
 
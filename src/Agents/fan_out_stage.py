@@ -0,0 +1,61 @@
+##################### Fan-out Stage #########################
+import logging
+
+import autogen
+
+from src import globals
+from src.FSMs.fan_out import gather_stages
+from .conversable_agent import MyConversableAgent
+
+
+class FanOutStage(MyConversableAgent):
+    """
+    Group chat speaker standing for agents whose replies do not depend on each other.
+
+    stages lists the members in the order they run, an entry that is a list of agents
+    runs its members concurrently from the same chat history. When the FSM selects the
+    stage, every reply joins the group chat under its member's name in stage and member
+    order, whatever order they finished in. Members still running after timeout seconds
+    are cancelled and skipped. The stage's own reply only names the members that replied.
+    """
+
+    def __init__(self, name, stages, timeout=None, **kwargs):
+        self.stages = [list(stage) if isinstance(stage, (list, tuple)) else [stage] for stage in stages]
+        self.members = [member for stage in self.stages for member in stage]
+        super().__init__(
+            name=name,
+            llm_config=False,
+            human_input_mode="NEVER",
+            description=kwargs.pop('description', f"Runs {', '.join(member.name for member in self.members)}."),
+            **kwargs
+        )
+        self.timeout = timeout if timeout is not None else globals.FSM_FAN_OUT_TIMEOUT_SECONDS
+        self.register_reply([autogen.Agent, None], FanOutStage.a_fan_out_reply, ignore_async_in_sync_chat=True)
+
+    async def a_fan_out_reply(self, messages=None, sender=None, config=None):
+        manager = sender
+        replied = await gather_stages(self.stages,
+                                      lambda member: self._a_member_reply(member, manager),
+                                      lambda member, reply: self._a_publish(manager, member, reply),
+                                      self.timeout)
+        if not replied:
+            logging.warning(f"{self.name}: no member replied within {self.timeout}s")
+            return True, f"No reply from {', '.join(member.name for member in self.members)} this time."
+        # Every member reply is already in the chat, the stage only closes its turn
+        return True, f"{', '.join(member.name for member in replied)} replied."
+
+    async def _a_member_reply(self, member, manager):
+        # The member's panel hook would show the same message once per member, the stage's own hook shows it
+        exclude = [member.autogen_reply_func] if hasattr(member, 'autogen_reply_func') else []
+        return await member.a_generate_reply(sender=manager, exclude=exclude)
+
+    async def _a_publish(self, manager, member, reply):
+        """Add a member's reply to the group chat the way the manager adds a speaker's reply"""
+        await member.a_send(reply, manager, request_reply=False, silent=True)
+        message = manager.last_message(member)
+        manager.groupchat.append(message, member)
+        for agent in manager.groupchat.agents:
+            if agent is not member and agent is not self:
+                await manager.a_send(message, agent, request_reply=False, silent=True)
+        if self.reactive_chat is not None:
+            self.reactive_chat.update_learn_tab(recipient=member, messages=[message], sender=manager, config=None)
@@ -1,27 +1,70 @@
 import autogen
 import asyncio
-import json
-import os
 from typing import Optional, List, Dict
 import panel as pn
 from src import globals
-from src.Agents.agents import agents_dict_by_name
 import src.UI.avatar as avatar
+from src.Tools.chat_history_log import ChatHistoryLog
+from src.Agents.message_index import MessageIndex
+from src.Agents.verdicts import VERDICT_FORMATS, attach_verdict, strip_verdict
 import logging
+import textwrap
 
 
 class CustomGroupChat(autogen.GroupChat):
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, context_manager=None, **kwargs):
         super().__init__(*args,**kwargs)
+        self._append_listeners = []
+        # Set by the manager while it restores the history, listeners only follow new messages
+        self.restoring = False
+
+        # Per-sender offsets and counters, so FSM conditions and dashboards never scan the history
+        self.message_index = MessageIndex(self)
+
+        # Optional ChatContextManager capping the prompt of every agent turn
+        self.context_manager = context_manager
+        if context_manager is not None:
+            context_manager.attach(self)
 
     def get_messages(self):
         return self.messages
+
+    def subscribe(self, listener, sender: str = None):
+        """
+        Call listener(message) after every message appended to the chat, only those of sender when given.
+        Messages restored from the history log are not announced.
+        """
+        self._append_listeners.append((listener, sender))
+
+    def append(self, message, speaker):
+        super().append(message, speaker)
+        self.message_index.sync()
+        message = self.messages[-1]
+        if message.get('name') in VERDICT_FORMATS:
+            # Parsed once here, FSM conditions and progress widgets read message['verdict']
+            attach_verdict(message)
+        if self.restoring:
+            return
+        for listener, sender in self._append_listeners:
+            if sender is None or message.get('name') == sender:
+                listener(message)
+
+    def reset(self):
+        super().reset()
+        self.message_index.clear()
+
+    def last_message_from(self, name: str):
+        """The last message sent by name in O(1), None when it never spoke"""
+        return self.message_index.last_from(name)
+
+    def message_count(self, role: str = None, name: str = None) -> int:
+        return self.message_index.message_count(role=role, name=name)
     
 
 
 
 class CustomGroupChatManager(autogen.GroupChatManager):
-    def __init__(self, groupchat, filename="chat_history.json", *args, **kwargs):
+    def __init__(self, groupchat, filename="chat_history.json", isolated=False, *args, **kwargs):
         super().__init__(groupchat=groupchat, *args, **kwargs)
         
         # Re-register the reply to use the overridden method.
@@ -37,6 +80,29 @@ class CustomGroupChatManager(autogen.GroupChatManager):
         self.filename = filename
         self.chat_interface = None
 
+        # Each message is appended to the history log as soon as it joins the chat
+        self.history_log = ChatHistoryLog(filename,
+                                          fsync_every=globals.CHAT_LOG_FSYNC_EVERY,
+                                          fsync_interval=globals.CHAT_LOG_FSYNC_INTERVAL,
+                                          compact_stale_lines=globals.CHAT_LOG_COMPACT_STALE_LINES)
+        self.persisted_count = 0
+        self._restoring = False
+
+        # A windowed restore loads only the end of the log: history_start is the index of the
+        # first restored message in groupchat.messages, history_start_offset its byte offset in the log
+        self.history_start = 0
+        self.history_start_offset = 0
+        self.display_start_offset = 0  # byte offset of the oldest message shown in the chat panel
+        if isinstance(groupchat, CustomGroupChat):
+            groupchat.subscribe(self._on_message_appended)
+
+        # An isolated manager (one per learner session) keeps its own human input state
+        # instead of the process-wide one in src/globals.py
+        self.isolated = isolated
+        self._input_future = None
+        self._initiate_chat_task_created = None
+        self.chat_task = None  # task running the chat, cancelled when the learner session closes
+
     async def a_run_chat(self, *args, **kwargs):
         try: 
             await super().a_run_chat(**kwargs)
@@ -48,49 +114,124 @@ class CustomGroupChatManager(autogen.GroupChatManager):
         return True, None
             
 
-    def get_messages_from_json(self, filename=None):
+    def get_messages_from_json(self, filename=None, window=None):
+        """
+        Restore the chat history into the groupchat.
+        With a window only the last `window` messages are restored, preceded by a summary of
+        the messages just before them, so the restore cost does not grow with the history.
+        """
         if filename is None:
             filename = self.filename
-        try:
-            print('Getting JSON file:', filename)
-            with open(filename, "r") as f:
-                self.messages_from_json = self.messages_from_string(f.read())
-                # Strip termination message and restore chat history
-                if self.messages_from_json:
-                    #if self.messages_from_json[-1].get("content","").strip()==globals.IS_TERMINATION_MSG:
-                    if self.messages_from_json[-1].get("content","")==globals.IS_TERMINATION_MSG:
-                        self.messages_from_json.pop()
-                    # Resume the chat from where it leaft off
-                    # FIXME: Resume is not working correctly.
-                    # See: https://github.com/microsoft/autogen/discussions/2301
-                    # self.resume(self.messages_from_json, globals.IS_TERMINATION_MSG)
-                    # Append the chats
-                    for msg in self.messages_from_json:
-                        self.groupchat.append(message=msg, speaker=agents_dict_by_name[msg['name']])                    
-                return self.messages_from_json
-        except FileNotFoundError:
+        history_log = self.history_log if filename == self.filename else ChatHistoryLog(filename)
+        if not history_log.exists():
             print("No previous chat history found. Starting a new conversation.")
             return []  # Return an empty list
 
-    
+        print('Getting chat history:', history_log.path)
+        older_messages = []
+        if window is None:
+            self.messages_from_json = list(history_log.read())
+            start_offset = 0
+        else:
+            self.messages_from_json, start_offset = history_log.read_tail(window)
+            older_messages, _ = history_log.read_tail(globals.CHAT_RESTORE_SUMMARY_MESSAGES, end=start_offset)
+
+        # Strip termination message and restore chat history
+        if self.messages_from_json:
+            #if self.messages_from_json[-1].get("content","").strip()==globals.IS_TERMINATION_MSG:
+            if self.messages_from_json[-1].get("content","")==globals.IS_TERMINATION_MSG:
+                self.messages_from_json.pop()
+                history_log.stale_lines += 1
+            # Resume the chat from where it leaft off
+            # FIXME: Resume is not working correctly.
+            # See: https://github.com/microsoft/autogen/discussions/2301
+            # self.resume(self.messages_from_json, globals.IS_TERMINATION_MSG)
+            # Append the chats
+            restored_from = len(self.groupchat.messages)
+            self._restoring = self.groupchat.restoring = True
+            try:
+                if older_messages:
+                    self.groupchat.append(message={"role": "user", "content": self.summarize_messages(older_messages)}, speaker=self)
+                history_start = len(self.groupchat.messages)
+                for msg in self.messages_from_json:
+                    self.groupchat.append(message=msg, speaker=self.groupchat.agent_by_name(msg['name']))                    
+            finally:
+                self._restoring = self.groupchat.restoring = False
+            if window is not None:
+                # The agents only see the summary and the bounded window, never the whole history
+                self.share_messages_with_agents(self.groupchat.messages[restored_from:])
+
+            if history_log is self.history_log:
+                # Restored messages are already in the log
+                self.history_start = history_start
+                self.history_start_offset = start_offset
+                self.display_start_offset = start_offset
+                self.persisted_count = len(self.groupchat.messages)
+        return self.messages_from_json
+
+    def share_messages_with_agents(self, messages):
+        """Add restored messages to every agent's conversation with this manager"""
+        for agent in self.groupchat.agents:
+            for message in messages:
+                if message.get("name") != agent.name:
+                    self.send(message, agent, request_reply=False, silent=True)
+
+    def summarize_messages(self, messages) -> str:
+        """Short digest of messages that are left out of the restored window"""
+        lines = [
+            f"- {message.get('name', message.get('role'))}: "
+            f"{textwrap.shorten(str(message.get('content') or ''), width=globals.CHAT_RESTORE_SUMMARY_CHARS, placeholder='...')}"
+            for message in messages
+        ]
+        return "Summary of the earlier conversation (older messages are not shown):\n" + "\n".join(lines)
+
+    @property
+    def has_earlier_messages(self) -> bool:
+        return self.display_start_offset > 0
+
+    def load_earlier_messages(self, chat_interface: pn.chat.ChatInterface, page_size: int = None) -> int:
+        """Prepend the page of history before the oldest message shown. Returns the number of messages loaded."""
+        if not self.has_earlier_messages:
+            return 0
+        messages, start = self.history_log.read_tail(page_size or globals.CHAT_HISTORY_PAGE_SIZE, end=self.display_start_offset)
+        self.display_start_offset = start if messages else 0
+        chat_interface.objects = [self._history_chat_message(message) for message in messages] + list(chat_interface.objects)
+        return len(messages)
+
+    def _history_chat_message(self, message) -> pn.chat.ChatMessage:
+        avatars = getattr(self, "avatars", avatar.avatar)
+        return pn.chat.ChatMessage(strip_verdict(message["content"]), user=message["role"], avatar=avatars.get(message["role"], None))
+
+    def _on_message_appended(self, message):
+        if not self._restoring:
+            self.persist_new_messages()
+
+    def persist_new_messages(self):
+        """Append the messages not yet in the history log"""
+        messages = self.groupchat.messages
+        if len(messages) < self.persisted_count:
+            # The chat was reset, the live history starts over after the history before the restored window
+            self.history_start = 0
+            self.display_start_offset = self.history_start_offset
+            self.history_log.compact(messages, keep_bytes=self.history_start_offset)
+        elif self.history_log.needs_compaction():
+            # The log holds many lines outside the live history, the reader skips a few of them cheaper
+            # than rewriting the history after every torn line. History before the restored window is kept.
+            self.history_log.compact(messages[self.history_start:], keep_bytes=self.history_start_offset)
+        else:
+            self.history_log.append(messages[self.persisted_count:])
+        self.persisted_count = len(messages)
+
     def save_messages_to_json(self, filename=None):
-        if filename is None:
-            filename = self.filename
-        
-        # Get previous history
-        # old_messages = self.get_messages_from_json(filename)
-        
-        # Check if the file exists and delete it
-        if os.path.exists(filename):
-            os.remove(filename)
-            print(f"Deleted existing file: {filename}")
+        if filename is not None and filename != self.filename:
+            # Snapshot of the whole chat into another history file
+            ChatHistoryLog(filename).compact(self.groupchat.messages)
+            print(f"Chat history saved to: {filename}")
+            return
 
-        # Save the chat history to the file
-        #chat_history = old_messages + self.groupchat.messages  # merge the lists
-        chat_history = self.groupchat.messages
-        with open(filename, 'w') as f:
-            json.dump(chat_history, f, indent=4)
-        print(f"Chat history saved to: {filename}")
+        self.persist_new_messages()
+        self.history_log.sync()
+        print(f"Chat history saved to: {self.history_log.path}")
 
 
     # TODO: Consider moving the writes to the chat panel to reactive_chat
@@ -98,7 +239,8 @@ class CustomGroupChatManager(autogen.GroupChatManager):
                                              initial_message: str = None,
                                              avatars=None,
                                              filename: str = None, 
-                                             chat_interface: pn.chat.ChatInterface = None):
+                                             chat_interface: pn.chat.ChatInterface = None,
+                                             window: int = None):
         if initial_message is None:
             self.initial_message = "Welcome to the Adaptive Math Tutor! How can I help you today?"
         else:
@@ -110,17 +252,15 @@ class CustomGroupChatManager(autogen.GroupChatManager):
             self.avatars = avatars
 
 
-        chat_history_messages = self.get_messages_from_json(filename=filename)
-        # Send the chat history to the panel interface
+        # With a window only the most recent messages are restored, for UIs that load older pages on request
+        chat_history_messages = self.get_messages_from_json(filename=filename, window=window)
+        # Send the chat history to the panel interface in a single update
         if chat_history_messages:        
-            for message in chat_history_messages:
-                if globals.IS_TERMINATION_MSG not in message:
-                    chat_interface.send(
-                        message["content"],
-                        user=message["role"], 
-                        avatar=self.avatars.get(message["role"], None),  
-                        respond=False
-                    )
+            chat_interface.objects = list(chat_interface.objects) + [
+                self._history_chat_message(message)
+                for message in chat_history_messages
+                if globals.IS_TERMINATION_MSG not in message
+            ]
             chat_interface.send("Time to continue your studies!", user="System", respond=False)
         else:
             chat_interface.send(self.initial_message, user="System", respond=False)
@@ -128,7 +268,8 @@ class CustomGroupChatManager(autogen.GroupChatManager):
  
     async def delayed_initiate_chat(self, agent, recipient, message):
         logging.debug("CustomGroupChatManager: delayed_initiate_chat started")
-        globals.initiate_chat_task_created = True
+        self.initiate_chat_task_created = True
+        self.chat_task = asyncio.current_task()
         #await asyncio.sleep(1)
         try:
             logging.debug(f"agent={agent.name}, recipient={recipient}, message={message}") 
@@ -148,4 +289,26 @@ class CustomGroupChatManager(autogen.GroupChatManager):
     
     @chat_interface.setter
     def chat_interface(self, chat_interface: pn.chat.ChatInterface):
-        self._chat_interface = chat_interface
\ No newline at end of file
+        self._chat_interface = chat_interface
+
+    @property
+    def input_future(self) -> asyncio.Future:
+        return self._input_future if self.isolated else globals.input_future
+
+    @input_future.setter
+    def input_future(self, input_future: asyncio.Future):
+        if self.isolated:
+            self._input_future = input_future
+        else:
+            globals.input_future = input_future
+
+    @property
+    def initiate_chat_task_created(self) -> bool:
+        return self._initiate_chat_task_created if self.isolated else globals.initiate_chat_task_created
+
+    @initiate_chat_task_created.setter
+    def initiate_chat_task_created(self, created: bool):
+        if self.isolated:
+            self._initiate_chat_task_created = created
+        else:
+            globals.initiate_chat_task_created = created
@@ -1,8 +1,11 @@
+import getpass
 from typing import Dict
+from src.Agents.verdicts import is_correct
 import pprint
-import src.KnowledgeGraphs.math_taxonomy as mt
+from src.KnowledgeGraphs.topic_graph import get_topic_graph
+from src.KnowledgeGraphs.mastery_frontier import MasteryFrontier, get_leaf_frontier_index
 class FSMGraphTracerConsole:
-    def __init__(self, agents: Dict):
+    def __init__(self, agents: Dict, student_id: str = None):
         self.agents = agents
         self.groupchat_manager = None
         self.current_state = "Initial"
@@ -12,15 +15,15 @@ class FSMGraphTracerConsole:
         self.knowledge_tracer = self.agents["knowledge_tracer"]
         self.problem_generator = self.agents["problem_generator"]
         self.solution_verifier = self.agents["solution_verifier"]
+        # Answers are traced per learner, the StudentAgent is the same for all of them
+        self.student_id = student_id or getpass.getuser()
         
-        # Build knowledge graph
+        # Build knowledge graph: leaf topics in taxonomy order, indexed by skill level
         self.skill_level = 0
-        self.kg = {}
-        i = 0  # Start with a counter at 0
-        for key, value_list in mt.subsubsub_topics.items():
-            for value in value_list:
-                self.kg[i] = value  
-                i += 1 
+        self.topic_graph = get_topic_graph()
+        self.kg = self.topic_graph.leaf_names
+        # Topics unlock along the prerequisite DAG
+        self.frontier = MasteryFrontier(get_leaf_frontier_index())
     def register_groupchat_manager(self, groupchat_manager):
         self.groupchat_manager = groupchat_manager
     def next_speaker_selector(self, last_speaker=None, groupchat=None):
@@ -28,13 +31,15 @@ class FSMGraphTracerConsole:
         
         if self.current_state == "Initial":
             # Ask the student which concept they want to learn
-            concepts = list(self.kg.values())
+            concepts = list(self.kg)
             print("Available concepts:")
             for idx, concept in enumerate(concepts):
                 print(f"{idx + 1}. {concept}")
             
             concept_choice = int(input("Enter the number of the concept you want to learn: ")) - 1
             self.skill_level = concept_choice
+            # The concepts before the chosen one count as known
+            self.frontier = MasteryFrontier(get_leaf_frontier_index(), mastered=[self.kg[position] for position in range(self.skill_level)])
             print(f"You chose: {self.kg[self.skill_level]}")
             self.current_state = "GenerateFirstQuestion"
             return self.knowledge_tracer
@@ -55,11 +60,13 @@ class FSMGraphTracerConsole:
         
         if self.current_state == "VerifySolution":
             # Verify the student's answer
-            self.knowledge_tracer.send(f"{self.student_response} is the student's response to {self.pg_response}. Is the student's answer correct? Answer yes or no", recipient=self.solution_verifier, request_reply=True)
+            self.knowledge_tracer.send(f"{self.student_response} is the student's response to {self.pg_response}. Is the student's answer correct? End with your verdict", recipient=self.solution_verifier, request_reply=True)
             pp = pprint.PrettyPrinter(indent=4)
             pp.pprint(self.groupchat_manager.groupchat.get_messages())     
-            self.verifier_answer = self.groupchat_manager.groupchat.get_messages()[-1]['content']
-            self.was_correct = "Yes" in self.verifier_answer
+            self.verifier_message = self.groupchat_manager.groupchat.get_messages()[-1]
+            self.verifier_answer = self.verifier_message["content"]
+            self.was_correct = is_correct(self.verifier_message)
+            self.knowledge_tracer.record_answer(self.student_id, self.kg[self.skill_level], self.was_correct)
             
             # Only allow the student to proceed if they gave the correct answer
             if self.was_correct:
@@ -71,12 +78,14 @@ class FSMGraphTracerConsole:
             return self.knowledge_tracer
         
         if self.current_state == "AdaptLevel":
-            # Adapt the difficulty level and move to the next question if the student was correct
-            if self.was_correct:
-                self.skill_level += 1
-                if self.skill_level >= len(self.kg):
+            # Move on once the knowledge tracer estimates the topic is mastered, not after one correct answer
+            if self.knowledge_tracer.is_mastered(self.student_id, self.kg[self.skill_level]):
+                self.frontier.set_mastered(self.kg[self.skill_level])
+                next_topic = self.frontier.next_topic()
+                if next_topic is None:
                     print("Congratulations! You have completed all concepts.")
                     return None
+                self.skill_level = self.kg.index(next_topic)
                 print(f"The next topic is {self.kg[self.skill_level]}")
             else:
                 print("Let's try again with another question on the same topic.")
@@ -1,6 +1,12 @@
 ##################### Knowledge Tracer #########################
+import asyncio
+import logging
 from typing import Dict
 from .conversable_agent import MyConversableAgent
+from src.Models.bkt import get_default_tracer
+from src.Models.dkt import history_from_events
+from src.Models.dkt_server import get_default_dkt_server
+from src.Tools.event_store import get_default_event_store
 
 class KnowledgeTracerAgent(MyConversableAgent):
     description =   """
@@ -18,7 +24,7 @@ class KnowledgeTracerAgent(MyConversableAgent):
             Use this information to provide insights into the StudentAgent's strengths and areas for improvement. 
             Your goal is to ensure a holistic view of the StudentAgent's capabilities, supporting informed and personalized learning decisions.
             """
-    def __init__(self, **kwargs):
+    def __init__(self, tracer=None, dkt_server=None, event_store=None, **kwargs):
         super().__init__(
                 name="KnowledgeTracerAgent",
                 human_input_mode="NEVER",
@@ -26,12 +32,90 @@ class KnowledgeTracerAgent(MyConversableAgent):
                 description=kwargs.pop('description',self.description),
                 **kwargs
             )
-    
-    def request_insights(self, goal_name: str, completion_percentage: float) -> Dict[str, str]:
+        # Bayesian Knowledge Tracing state of every student, shared across the process by default
+        self.tracer = tracer if tracer is not None else get_default_tracer()
+        # LSTM knowledge tracer over each student's activity history, None until a model is exported
+        self.dkt_server = dkt_server if dkt_server is not None else get_default_dkt_server()
+        self.event_store = event_store if event_store is not None else get_default_event_store()
+        # Activity history of each student, rebuilt from the event store the first time they answer after a restart
+        self.histories = {}
+        # Latest DKT P(next answer correct) of each student, updated after every traced answer
+        self.predictions = {}
+        self.logger = logging.getLogger(__name__)
+
+    def record_answer(self, student_id: str, skill: str, correct: bool,
+                      activity_type: str = 'quiz', time_spent: float = 0.0) -> float:
+        """
+        Trace one graded answer. Returns the student's P(known) of the skill afterwards.
+        Inside an event loop the DKT prediction of the student's next answer is refreshed in the background.
+        """
+        self.get_history(student_id).append((activity_type, int(correct), time_spent))
+        if self.event_store is not None:
+            # time_spent is in minutes, like the activity logs the DKT model is trained on
+            self.event_store.append(student_id, skill, correct, latency_ms=time_spent * 60000 if time_spent else None,
+                                    source=self.name)
+        mastery = float(self.tracer.update([student_id], [skill], [correct])[0])
+        self._refresh_prediction(student_id)
+        return mastery
+
+    def get_history(self, student_id: str) -> list:
+        """The student's (activity_type, outcome, time_spent) history, loaded from the event store once"""
+        history = self.histories.get(student_id)
+        if history is None:
+            history = []
+            if self.event_store is not None:
+                history = history_from_events(self.event_store.scan(student_id=student_id, source=self.name))
+            self.histories[student_id] = history
+        return history
+
+    def _refresh_prediction(self, student_id: str):
+        if self.dkt_server is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # console FSMs run without an event loop, predict_correct() can still be awaited directly
+
+        def store(task):
+            if task.cancelled():
+                return
+            if task.exception() is not None:
+                self.logger.error(f"DKT prediction failed for {student_id}: {str(task.exception())}")
+            else:
+                self.predictions[student_id] = task.result()
+
+        loop.create_task(self.predict_correct(student_id)).add_done_callback(store)
+
+    async def predict_correct(self, student_id: str):
+        """
+        P(the student's next answer is correct) from the DKT model, None without a model.
+        Concurrent calls for different students are answered by one batched forward pass.
+        """
+        if self.dkt_server is None:
+            return None
+        return await self.dkt_server.predict(student_id, self.get_history(student_id))
+
+    def get_mastery(self, student_id: str, skill: str) -> float:
+        return float(self.tracer.mastery([student_id], [skill])[0])
+
+    def is_mastered(self, student_id: str, skill: str) -> bool:
+        return self.get_mastery(student_id, skill) >= self.tracer.mastery_threshold
+
+    def request_insights(self, goal_name: str, completion_percentage: float, student_id: str = None) -> Dict[str, str]:
+        # With a student to trace, the estimated mastery of the goal replaces the completion percentage
+        if student_id is not None and goal_name in self.tracer.skill_ids:
+            completion_percentage = min(100, 100 * self.get_mastery(student_id, goal_name) / self.tracer.mastery_threshold)
+
         # Example performance-based adjustment logic
         if completion_percentage >= 80:
-            return {"adjustment": "Consider reducing focus on this topic and increase focus on more challenging areas."}
+            insights = {"adjustment": "Consider reducing focus on this topic and increase focus on more challenging areas."}
         elif completion_percentage >= 50:
-            return {"adjustment": "Maintain current study focus and consider adjusting based on additional assessments."}
+            insights = {"adjustment": "Maintain current study focus and consider adjusting based on additional assessments."}
         else:
-            return {"adjustment": "Increase focus on this topic and consider additional practice sessions."}
+            insights = {"adjustment": "Increase focus on this topic and consider additional practice sessions."}
+
+        # The DKT model's outlook on the student's next answer, once one was predicted
+        prediction = self.predictions.get(student_id) if student_id is not None else None
+        if prediction is not None:
+            insights["next_answer"] = f"Estimated chance the next answer is correct: {prediction:.0%}"
+        return insights
@@ -1,5 +1,6 @@
 ##################### Level Adapter #########################
 from .conversable_agent import MyConversableAgent
+from .verdicts import verdict_instructions
 
 class LevelAdapterAgent(MyConversableAgent):
     description = """
@@ -14,7 +15,7 @@ class LevelAdapterAgent(MyConversableAgent):
             Monitor the StudentAgent's performance and analyze their responses to assess their skill level. 
             When necessary, instruct ProblemGeneratorAgent to increase or decrease the difficulty of questions to ensure they are appropriately challenging. 
             Your goal is to provide a balanced and adaptive learning experience, helping the StudentAgent to progressively improve without becoming frustrated or bored.
-            """
+            """ + verdict_instructions("LevelAdapterAgent")
     def __init__(self, **kwargs):
         super().__init__(
             name="LevelAdapterAgent",
@@ -1,13 +1,38 @@
 from .conversable_agent import MyConversableAgent
-from src.KnowledgeGraphs.math_taxonomy import (
-    topics_and_subtopics,
-    subsub_topics,
-    subsubsub_topics,
-    topic_colors
-)
+from src import globals
+from src.KnowledgeGraphs.topic_graph import get_topic_graph
+from src.Tools.llm_cache import get_default_cache
+from src.Tools.question_bank import get_default_question_bank
+from src.Tools.answer_checker import check_answer, SOURCE_LLM
+from src.Models.bkt import get_default_tracer
+from src.Tools.event_store import get_default_event_store
+import asyncio
 import logging
+import time
+from collections import OrderedDict
+from autogen.io import IOStream
 from openai import AsyncOpenAI  # Changed to AsyncOpenAI
 
+class LearnerState:
+    """Question, score and difficulty state of one learner of the MasteryAgent"""
+
+    def __init__(self):
+        self.current_topic = None
+        self.current_subtopic = None
+        self.questions_asked = 0
+        self.correct_answers = 0
+        self.performance_history = {}
+        self.adaptive_difficulty = 1.0
+        self.last_evaluation = None
+        self.question_asked_at = None
+
+
+def _learner_attribute(name: str):
+    """Agent attribute kept on the state of the anonymous learner, for callers without a student_id"""
+    return property(lambda self: getattr(self.learner(), name),
+                    lambda self, value: setattr(self.learner(), name, value))
+
+
 class MasteryAgent(MyConversableAgent):
     description = """
     MasteryAgent is a specialized AI tutor focused on mathematics education.
@@ -24,7 +49,19 @@ class MasteryAgent(MyConversableAgent):
     4. Track student progress and adapt difficulty accordingly
     """
 
-    def __init__(self, **kwargs):
+    completion_model = "gpt-4"
+    completion_temperature = 0.7
+
+    current_topic = _learner_attribute('current_topic')
+    current_subtopic = _learner_attribute('current_subtopic')
+    questions_asked = _learner_attribute('questions_asked')
+    correct_answers = _learner_attribute('correct_answers')
+    performance_history = _learner_attribute('performance_history')
+    adaptive_difficulty = _learner_attribute('adaptive_difficulty')
+    last_evaluation = _learner_attribute('last_evaluation')
+    question_asked_at = _learner_attribute('question_asked_at')
+
+    def __init__(self, response_cache=None, question_bank=None, tracer=None, event_store=None, **kwargs):
         super().__init__(
             name=kwargs.pop('name', "MasteryAgent"),
             human_input_mode=kwargs.pop('human_input_mode', "NEVER"),
@@ -41,15 +78,62 @@ class MasteryAgent(MyConversableAgent):
         # Initialize AsyncOpenAI client
         self.client = AsyncOpenAI()
 
-    async def ask_question(self, topic: str, subtopic: str = None) -> str:
-        """Generate a math question"""
+        # Completions are shared across students through a process-wide cache
+        self.response_cache = response_cache if response_cache is not None else get_default_cache()
+
+        # Pre-generated questions so a test can start without waiting on the LLM
+        self.question_bank = question_bank if question_bank is not None else get_default_question_bank()
+
+        # Mastery is estimated with Bayesian Knowledge Tracing of the student's answers.
+        # The agent serves every learner of the process, callers pass the student_id of their session.
+        self.tracer = tracer if tracer is not None else get_default_tracer()
+
+        # Every graded answer is appended to the shared attempt event store
+        self.event_store = event_store if event_store is not None else get_default_event_store()
+
+    async def ask_question(self, topic: str, subtopic: str = None, student_id: str = None) -> str:
+        """Generate a math question for student_id, taken from the question bank when one is ready"""
         try:
-            self.current_topic = topic
-            self.current_subtopic = subtopic
-            self.questions_asked += 1
+            learner = self.learner(student_id)
+            learner.current_topic = topic
+            learner.current_subtopic = subtopic
+            learner.questions_asked += 1
+            learner.question_asked_at = time.monotonic()
             
-            difficulty = self._get_difficulty_level()
-            prompt = f"""Generate a {difficulty} level math question about {topic}
+            difficulty = self._get_difficulty_level(student_id)
+            completion = None
+            if self.question_bank is not None:
+                completion = self.question_bank.pop(topic, subtopic, difficulty, generate=self._generate_banked_question)
+
+            if completion is None:
+                completion = await self._get_completion(self._build_question_prompt(topic, subtopic, difficulty))
+                self.logger.info(f"Generated question for {topic}/{subtopic}")
+            else:
+                self.logger.info(f"Served banked question for {topic}/{subtopic}")
+            return completion
+            
+        except Exception as e:
+            self.logger.error(f"Error generating question: {str(e)}")
+            raise
+
+    def prefetch_questions(self, topic: str, subtopic: str = None, student_id: str = None):
+        """Start filling the question pool for a topic before student_id begins the test"""
+        if self.question_bank is not None:
+            self.question_bank.schedule_refill(topic, subtopic, self._get_difficulty_level(student_id), generate=self._generate_banked_question)
+
+    def warm_question_bank(self, topics: list = None, difficulties: tuple = ("basic", "intermediate", "advanced")) -> list:
+        """Pre-generate question pools for the taxonomy topics (all topics when None)"""
+        if self.question_bank is None:
+            return []
+        topics_and_subtopics = {topic: self.topic_graph.children(topic) for topic in self.topics}
+        return self.question_bank.warm(topics_and_subtopics, difficulties, topics=topics, generate=self._generate_banked_question)
+
+    async def _generate_banked_question(self, topic: str, subtopic: str, difficulty: str) -> str:
+        """Generate a question for the question bank. Every banked question must be distinct."""
+        return await self._get_completion(self._build_question_prompt(topic, subtopic, difficulty), bypass_cache=True)
+
+    def _build_question_prompt(self, topic: str, subtopic: str, difficulty: str) -> str:
+        return f"""Generate a {difficulty} level math question about {topic}
             {f'focusing on {subtopic}' if subtopic else ''}.
             
             Format exactly as:
@@ -64,19 +148,26 @@ class MasteryAgent(MyConversableAgent):
             3. Include relevant formulas
             4. Match the {difficulty} difficulty level
             """
-            
-            completion = await self._get_completion(prompt)
-            self.logger.info(f"Generated question for {topic}/{subtopic}")
-            return completion
-            
-        except Exception as e:
-            self.logger.error(f"Error generating question: {str(e)}")
-            raise
 
-    async def evaluate_answer(self, question: str, student_answer: str, correct_answer: str) -> tuple:
+    async def evaluate_answer(self, question: str, student_answer: str, correct_answer: str, student_id: str = None) -> tuple:
         """Evaluate student's answer"""
+        result = await self.grade_answer(question, student_answer, correct_answer, student_id=student_id)
+        return result['is_correct'], result['feedback']
+
+    async def grade_answer(self, question: str, student_answer: str, correct_answer: str, student_id: str = None) -> dict:
+        """
+        Grade an answer, trying the local answer checker before the LLM.
+        The answer is traced for student_id, untraced without one.
+        Returns the check_answer() result with 'feedback' and the verdict 'source' filled in.
+        """
         try:
-            prompt = f"""
+            # sympy may take a while, the event loop serves the other learners meanwhile
+            result = await asyncio.to_thread(check_answer, student_answer, correct_answer)
+            if result['is_correct'] is not None:
+                result['feedback'] = self._format_local_feedback(result)
+                self.logger.info(f"Answer graded locally ({result['source']}): {result['is_correct']}")
+            else:
+                prompt = f"""
             Evaluate this math answer:
             Question: {question}
             Student Answer: {student_answer}
@@ -91,78 +182,131 @@ class MasteryAgent(MyConversableAgent):
             Keep the response clear and constructive.
             """
             
-            evaluation = await self._get_completion(prompt)
-            is_correct = evaluation.lower().startswith('correct')
+                # Feedback depends on the student's answer, so always ask for a fresh evaluation
+                evaluation = await self._get_completion(prompt, bypass_cache=True, stream=True)
+                result['is_correct'] = evaluation.lower().startswith('correct')
+                result['source'] = SOURCE_LLM
+                result['feedback'] = evaluation
             
-            self._update_performance_tracking(is_correct)
-            return is_correct, evaluation
+            self.learner(student_id).last_evaluation = result
+            self._update_performance_tracking(result['is_correct'], student_id)
+            return result
             
         except Exception as e:
             self.logger.error(f"Error evaluating answer: {str(e)}")
             raise
 
-    async def _get_completion(self, prompt: str) -> str:
-        """Get completion from OpenAI with proper async handling"""
+    def _format_local_feedback(self, result: dict) -> str:
+        """Feedback text for an answer graded without the LLM"""
+        if result['is_correct']:
+            return f"Correct! Your answer {result['student']} matches the expected answer."
+        return f"Incorrect. The expected answer is {result['expected']}. Review the worked solution and try the next question."
+
+    async def _get_completion(self, prompt: str, bypass_cache: bool = False, stream: bool = False) -> str:
+        """
+        Get completion from OpenAI, served from the response cache when possible.
+        With stream=True the chunks are also printed to the IOStream of the running chat.
+        """
         try:
-            response = await self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": self.system_message},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7
-            )
-            return response.choices[0].message.content
+            if bypass_cache or self.response_cache is None:
+                return await self._request_completion(prompt, stream=stream)
+
+            key = self.response_cache.make_key(self.completion_model, self.system_message, prompt, self.completion_temperature)
+            return await self.response_cache.get_or_create(key, lambda: self._request_completion(prompt, stream=stream))
         except Exception as e:
             self.logger.error(f"Error getting completion: {str(e)}")
             raise
 
+    async def _request_completion(self, prompt: str, stream: bool = False) -> str:
+        """Send the chat completion request upstream"""
+        stream = stream and globals.STREAM_RESPONSES
+        response = await self.client.chat.completions.create(
+            model=self.completion_model,
+            messages=[
+                {"role": "system", "content": self.system_message},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=self.completion_temperature,
+            stream=stream
+        )
+        if not stream:
+            return response.choices[0].message.content
+
+        # Same protocol as autogen's streaming clients: one flushed print per chunk
+        iostream = IOStream.get_default()
+        chunks = []
+        async for chunk in response:
+            content = chunk.choices[0].delta.content if chunk.choices else None
+            if content:
+                chunks.append(content)
+                iostream.print(content, end="", flush=True)
+        return "".join(chunks)
+
+    def get_cache_stats(self) -> dict:
+        """Get hit/miss counters of the response cache"""
+        if self.response_cache is None:
+            return {}
+        return self.response_cache.get_stats()
+
     def _init_state(self):
         """Initialize agent state"""
-        self.current_topic = None
-        self.current_subtopic = None
-        self.questions_asked = 0
-        self.correct_answers = 0
         self.mastery_threshold = 0.8
-        self.performance_history = {}
-        self.adaptive_difficulty = 1.0
+        # The agent is shared by every session, each learner keeps their own questions and difficulty
+        self.learners = OrderedDict()
+
+    def learner(self, student_id: str = None) -> LearnerState:
+        """State of student_id, the least recently seen learner is dropped past MASTERY_MAX_LEARNERS"""
+        learner = self.learners.get(student_id)
+        if learner is None:
+            learner = self.learners[student_id] = LearnerState()
+            if len(self.learners) > globals.MASTERY_MAX_LEARNERS:
+                self.learners.popitem(last=False)
+        else:
+            self.learners.move_to_end(student_id)
+        return learner
 
     def _init_topic_hierarchy(self):
-        """Initialize topic hierarchy from taxonomy"""
-        self.topics = list(topics_and_subtopics.keys())
-        self.topic_hierarchy = {
-            'topics': topics_and_subtopics,
-            'subtopics': subsub_topics,
-            'subsubtopics': subsubsub_topics
-        }
+        """Initialize topic hierarchy from the shared taxonomy index"""
+        self.topic_graph = get_topic_graph()
+        self.topics = [self.topic_graph.names[root] for root in self.topic_graph.roots]
 
     def _setup_logging(self):
         """Set up logging configuration"""
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(logging.INFO)
 
-    def _get_difficulty_level(self) -> str:
-        """Get current difficulty level description"""
-        if self.adaptive_difficulty < 0.8:
+    def _get_difficulty_level(self, student_id: str = None) -> str:
+        """Get current difficulty level description of student_id"""
+        adaptive_difficulty = self.learner(student_id).adaptive_difficulty
+        if adaptive_difficulty < 0.8:
             return "basic"
-        elif self.adaptive_difficulty < 1.2:
+        elif adaptive_difficulty < 1.2:
             return "intermediate"
         return "advanced"
 
-    def _update_performance_tracking(self, is_correct: bool):
-        """Update performance tracking and adjust difficulty"""
+    def _update_performance_tracking(self, is_correct: bool, student_id: str = None):
+        """Update performance tracking and adjust difficulty of student_id"""
+        learner = self.learner(student_id)
         if is_correct:
-            self.correct_answers += 1
+            learner.correct_answers += 1
         
+        skill = self._traced_skill(learner)
+        if skill is not None and student_id is not None:
+            self.tracer.update([student_id], [skill], [is_correct])
+        if self.event_store is not None and student_id is not None:
+            latency_ms = (time.monotonic() - learner.question_asked_at) * 1000 if learner.question_asked_at is not None else None
+            self.event_store.append(student_id, learner.current_subtopic or learner.current_topic, is_correct,
+                                    latency_ms=latency_ms, difficulty=learner.adaptive_difficulty, source=self.name)
+
         # Update performance history
-        if self.current_topic not in self.performance_history:
-            self.performance_history[self.current_topic] = {
+        if learner.current_topic not in learner.performance_history:
+            learner.performance_history[learner.current_topic] = {
                 'attempts': 0,
                 'correct': 0,
                 'recent_scores': []
             }
             
-        history = self.performance_history[self.current_topic]
+        history = learner.performance_history[learner.current_topic]
         history['attempts'] += 1
         if is_correct:
             history['correct'] += 1
@@ -173,29 +317,35 @@ class MasteryAgent(MyConversableAgent):
             history['recent_scores'].pop(0)
             
         # Adjust difficulty if needed
-        self._adjust_difficulty(history['recent_scores'])
+        self._adjust_difficulty(learner, history['recent_scores'])
 
-    def _adjust_difficulty(self, recent_scores: list):
-        """Adjust question difficulty based on recent performance"""
+    def _adjust_difficulty(self, learner: LearnerState, recent_scores: list):
+        """Adjust question difficulty of learner based on recent performance"""
         if len(recent_scores) >= 3:
             recent_performance = sum(recent_scores[-3:]) / 3
             
             if recent_performance > 0.8:  # Consistently good
-                self.adaptive_difficulty = min(1.5, self.adaptive_difficulty + 0.1)
+                learner.adaptive_difficulty = min(1.5, learner.adaptive_difficulty + 0.1)
             elif recent_performance < 0.6:  # Consistently struggling
-                self.adaptive_difficulty = max(0.5, self.adaptive_difficulty - 0.1)
+                learner.adaptive_difficulty = max(0.5, learner.adaptive_difficulty - 0.1)
+
+    def _traced_skill(self, learner: LearnerState):
+        """The taxonomy topic the learner's current questions are about, None when it is not traced"""
+        skill = learner.current_subtopic or learner.current_topic
+        return skill if skill in self.tracer.skill_ids else None
 
     def get_subtopics_for_topic(self, topic: str) -> list:
         """Get available subtopics for a given topic"""
-        return self.topic_hierarchy['topics'].get(topic, [])
+        return list(self.topic_graph.children(topic)) if topic in self.topic_graph else []
 
     def get_subsubtopics_for_subtopic(self, subtopic: str) -> list:
         """Get available sub-subtopics for a given subtopic"""
-        return self.topic_hierarchy['subtopics'].get(subtopic, [])
+        return list(self.topic_graph.children(subtopic)) if subtopic in self.topic_graph else []
 
-    def get_mastery_status(self) -> dict:
-        """Get current mastery status"""
-        if self.questions_asked == 0:
+    def get_mastery_status(self, student_id: str = None) -> dict:
+        """Get current mastery status of student_id, with their traced mastery when given"""
+        learner = self.learner(student_id)
+        if learner.questions_asked == 0:
             return {
                 'status': 'No questions attempted',
                 'mastery_achieved': False,
@@ -203,20 +353,29 @@ class MasteryAgent(MyConversableAgent):
                 'progress': 0
             }
         
-        correct_ratio = self.correct_answers / self.questions_asked
+        correct_ratio = learner.correct_answers / learner.questions_asked
+        skill = self._traced_skill(learner)
+        if skill is not None and student_id is not None:
+            mastery_probability = float(self.tracer.mastery([student_id], [skill])[0])
+            mastery_achieved = mastery_probability >= self.tracer.mastery_threshold
+        else:
+            mastery_probability = None
+            mastery_achieved = correct_ratio >= self.mastery_threshold
         return {
-            'topic': self.current_topic,
-            'subtopic': self.current_subtopic,
-            'questions_attempted': self.questions_asked,
-            'correct_answers': self.correct_answers,
+            'topic': learner.current_topic,
+            'subtopic': learner.current_subtopic,
+            'questions_attempted': learner.questions_asked,
+            'correct_answers': learner.correct_answers,
             'current_mastery': correct_ratio * 100,
-            'mastery_achieved': correct_ratio >= self.mastery_threshold,
+            'mastery_achieved': mastery_achieved,
+            'mastery_probability': mastery_probability,
             'progress': (correct_ratio / self.mastery_threshold) * 100,
-            'difficulty_level': self._get_difficulty_level()
+            'difficulty_level': self._get_difficulty_level(student_id)
         }
 
-    def reset_for_new_topic(self):
-        """Reset state for a new topic"""
-        self.questions_asked = 0
-        self.correct_answers = 0
-        self.adaptive_difficulty = 1.0
+    def reset_for_new_topic(self, student_id: str = None):
+        """Reset state of student_id for a new topic"""
+        learner = self.learner(student_id)
+        learner.questions_asked = 0
+        learner.correct_answers = 0
+        learner.adaptive_difficulty = 1.0
@@ -0,0 +1,73 @@
+from collections import Counter, deque
+
+
+class MessageIndex:
+    """
+    Index over the messages of a group chat, kept up to date as messages are appended.
+
+    Per sender it keeps a ring of the offsets of its latest messages, so the last
+    message of an agent is found in O(1) instead of scanning the history backwards,
+    and it counts the messages per role and per sender. Messages appended to
+    chat.messages directly (or removed by a reset) are picked up by sync(), which
+    every query calls first.
+    """
+
+    def __init__(self, chat, ring_size: int = 32):
+        """
+        :param chat: object whose .messages list is indexed, e.g. a CustomGroupChat
+        :param ring_size: offsets remembered per sender
+        """
+        self.chat = chat
+        self.ring_size = ring_size
+        self.clear()
+
+    def clear(self):
+        self.count = 0
+        self.sender_offsets = {}
+        self.sender_counts = Counter()
+        self.role_counts = Counter()
+
+    def sync(self) -> list:
+        """Index the messages added since the last call. Returns the chat's message list."""
+        messages = self.chat.messages
+        if len(messages) < self.count:
+            # The history was reset or truncated
+            self.clear()
+        for offset in range(self.count, len(messages)):
+            self._add(messages[offset], offset)
+        self.count = len(messages)
+        return messages
+
+    def _add(self, message, offset: int):
+        name = message.get('name')
+        offsets = self.sender_offsets.get(name)
+        if offsets is None:
+            offsets = self.sender_offsets[name] = deque(maxlen=self.ring_size)
+        offsets.append(offset)
+        self.sender_counts[name] += 1
+        self.role_counts[message.get('role')] += 1
+
+    def last(self):
+        """The last message of the chat, None when it is empty"""
+        messages = self.sync()
+        return messages[-1] if messages else None
+
+    def last_from(self, name: str):
+        """The last message sent by name, None when it never spoke"""
+        messages = self.sync()
+        offsets = self.sender_offsets.get(name)
+        return messages[offsets[-1]] if offsets else None
+
+    def recent_from(self, name: str) -> list:
+        """The latest messages of name (at most ring_size), oldest first"""
+        messages = self.sync()
+        return [messages[offset] for offset in self.sender_offsets.get(name, ())]
+
+    def message_count(self, role: str = None, name: str = None) -> int:
+        """Number of messages, only those of a role or of a sender when given"""
+        self.sync()
+        if role is not None:
+            return self.role_counts[role]
+        if name is not None:
+            return self.sender_counts[name]
+        return self.count
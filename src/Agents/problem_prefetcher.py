@@ -0,0 +1,146 @@
+import asyncio
+import logging
+
+from src import globals
+from src.Agents.verdicts import difficulty_change
+
+# Difficulty branch of the level adapter -> instruction for the candidate next problem
+PREFETCH_INSTRUCTIONS = {
+    'increase': "Write the next problem on the same topic, a little harder than your last one. Reply with the problem only.",
+    'decrease': "Write the next problem on the same topic, a little easier than your last one. Reply with the problem only.",
+}
+
+
+class ProblemPrefetcher:
+    """
+    Drafts the next problem for every difficulty branch while the student answers.
+
+    As soon as a question of the problem generator joins the group chat, one candidate
+    per branch of PREFETCH_INSTRUCTIONS is generated in the background. The verdict of
+    the level adapter commits the candidate of its difficulty change and cancels the
+    others ('keep' or no verdict discards them all). The next turn of the problem
+    generator replies with the committed candidate instead of calling the LLM, and the
+    FSM skips the lesson that would otherwise come first.
+    """
+
+    def __init__(self, agent, generate=None, wait_seconds=None, level_adapter_name="LevelAdapterAgent"):
+        """
+        :param agent: the ProblemGeneratorAgent
+        :param generate: async callable (branch, messages) -> problem, the agent's LLM by default
+        :param wait_seconds: how long the agent's turn waits for a committed candidate still being generated
+        :param level_adapter_name: agent whose verdicts pick the branch
+        """
+        self.agent = agent
+        self.generate = generate or self._a_generate_with_agent
+        self.wait_seconds = wait_seconds if wait_seconds is not None else globals.PREFETCH_WAIT_SECONDS
+        self.level_adapter_name = level_adapter_name
+
+        self.groupchat = None
+        self._candidates = {}  # branch -> task
+        self._committed = None
+
+        self.hits = 0
+        self.misses = 0
+        self.discarded = 0
+        self.logger = logging.getLogger(__name__)
+
+    def attach(self, groupchat):
+        """Follow a CustomGroupChat and answer the problem generator's turns with committed candidates"""
+        import autogen
+        self.groupchat = groupchat
+        groupchat.subscribe(self.on_problem, sender=self.agent.name)
+        groupchat.subscribe(self.on_level_adapter, sender=self.level_adapter_name)
+        self.agent.register_reply([autogen.Agent, None], self.a_prefetched_reply, ignore_async_in_sync_chat=True)
+        return self
+
+    ##################################################
+    # Group chat listeners
+    ##################################################
+    def on_problem(self, message):
+        self.start(self._history())
+
+    def on_level_adapter(self, message):
+        branch = difficulty_change(message)
+        if branch in self._candidates:
+            self.commit(branch)
+        else:
+            self.discard()
+
+    ##################################################
+    # Candidates
+    ##################################################
+    def start(self, messages: list):
+        """Drop the current candidates and draft new ones replying to messages"""
+        self.discard()
+        self._committed = self._cancel(self._committed)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Nothing to overlap with outside an async chat
+            return
+        self._candidates = {branch: loop.create_task(self.generate(branch, messages)) for branch in PREFETCH_INSTRUCTIONS}
+
+    def commit(self, branch: str):
+        """Keep the candidate of branch, cancel the others"""
+        self._committed = self._candidates.pop(branch, None)
+        self.discard()
+
+    def discard(self):
+        for task in self._candidates.values():
+            self._cancel(task)
+        self._candidates = {}
+
+    def _cancel(self, task):
+        if task is not None:
+            task.cancel()
+            self.discarded += 1
+        return None
+
+    def has_committed(self) -> bool:
+        """Whether a next problem is ready or still being generated for the decided branch"""
+        task = self._committed
+        return task is not None and not (task.done() and (task.cancelled() or task.exception() is not None))
+
+    async def take(self):
+        """The committed candidate, None when there is none or it failed or took longer than wait_seconds"""
+        task, self._committed = self._committed, None
+        if task is None or task.cancelled():
+            return None
+        try:
+            return await asyncio.wait_for(task, self.wait_seconds)
+        except Exception as e:
+            self.logger.error(f"Prefetched problem not available: {str(e) or type(e).__name__}")
+            return None
+
+    async def a_prefetched_reply(self, recipient, messages=None, sender=None, config=None):
+        problem = await self.take()
+        if not problem:
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        return True, problem
+
+    ##################################################
+    # Generation
+    ##################################################
+    def _history(self) -> list:
+        """The group chat as the problem generator sees it"""
+        return [{'role': 'assistant' if message.get('name') == self.agent.name else 'user',
+                 'name': message.get('name'), 'content': message.get('content')}
+                for message in self.groupchat.messages]
+
+    async def _a_generate_with_agent(self, branch: str, messages: list):
+        prompt = messages + [{'role': 'user', 'content': PREFETCH_INSTRUCTIONS[branch]}]
+        # The agent's hooks (e.g. the ChatContextManager budget) apply as on its own turns
+        prompt = self.agent.process_all_messages_before_reply(prompt)
+        final, reply = await self.agent.a_generate_oai_reply(messages=prompt)
+        if isinstance(reply, dict):
+            reply = reply.get('content')
+        return reply if final else None
+
+    def get_stats(self) -> dict:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'discarded': self.discarded,
+        }
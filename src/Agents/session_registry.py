@@ -0,0 +1,192 @@
+import logging
+import os
+import threading
+import time
+
+from src import globals
+from src.Agents.agents import create_agents
+from src.Agents.chat_context import ChatContextManager
+from src.Agents.chat_manager_fsms import FSM
+from src.Agents.group_chat_manager_agent import CustomGroupChat, CustomGroupChatManager
+
+
+class SessionLimitError(RuntimeError):
+    """Raised when a new learner session would exceed the registry's cap"""
+
+
+class LearnerSession:
+    """Everything one learner's chat needs: agents, FSM, group chat and its manager"""
+
+    def __init__(self, session_id: str, agents_dict: dict, fsm, groupchat, manager):
+        self.session_id = session_id
+        self.agents_dict = agents_dict
+        self.fsm = fsm
+        self.groupchat = groupchat
+        self.manager = manager
+        self.view = None  # UI objects the app attaches to the session
+        self.document = None  # browser document showing the view, a view is never shared between documents
+        self._document_lock = threading.Lock()
+        self.created_at = time.monotonic()
+        self.last_active = self.created_at
+
+    def claim(self, document) -> bool:
+        """Attach the session to a browser document, False when another document already shows it"""
+        with self._document_lock:
+            if self.document is not None and self.document is not document:
+                return False
+            self.document = document
+            return True
+
+    def release(self, document):
+        with self._document_lock:
+            if self.document is document:
+                self.document = None
+
+    def touch(self):
+        self.last_active = time.monotonic()
+
+    def idle_seconds(self, now: float = None) -> float:
+        return (now if now is not None else time.monotonic()) - self.last_active
+
+    def is_connected(self) -> bool:
+        """True while a browser document that has not been destroyed still shows the session"""
+        document = self.document
+        if document is None:
+            return False
+        session_context = getattr(document, 'session_context', None)
+        return session_context is None or not getattr(session_context, 'destroyed', False)
+
+    def close(self):
+        """Stop the running chat, save it and release a learner still waiting on input"""
+        task = self.manager.chat_task
+        if task is not None and not task.done():
+            # Sessions may be closed from the eviction thread, the task belongs to the server's event loop
+            loop = task.get_loop()
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(task.cancel)
+        future = self.manager.input_future
+        if future is not None and not future.done():
+            future.cancel()
+        if self.groupchat.messages:
+            self.manager.save_messages_to_json()
+        self.manager.history_log.close()
+
+
+def create_session(session_id: str, history_path: str = None, work_dir: str = None) -> LearnerSession:
+    """Build an isolated agent set, FSM, CustomGroupChat and CustomGroupChatManager"""
+    agents_dict = create_agents(work_dir=work_dir)
+    fsm = FSM(agents_dict)
+
+    groupchat = CustomGroupChat(agents=list(agents_dict.values()),
+                                messages=[],
+                                max_round=globals.MAX_ROUNDS,
+                                send_introductions=True,
+                                speaker_selection_method=fsm.next_speaker_selector,
+                                context_manager=ChatContextManager()
+                                )
+
+    manager = CustomGroupChatManager(groupchat=groupchat,
+                                     filename=history_path or f"{session_id}.json",
+                                     isolated=True,
+                                     is_termination_msg=lambda x: x.get("content", "").rstrip().find("TERMINATE") >= 0)
+
+    for agent in groupchat.agents:
+        agent.groupchat_manager = manager
+
+    return LearnerSession(session_id, agents_dict, fsm, groupchat, manager)
+
+
+class SessionRegistry:
+    """
+    Learner sessions of one server process, keyed by session id.
+
+    Sessions idle for longer than idle_timeout are evicted (their chat history is
+    saved first) unless a browser tab still shows them, and at most max_sessions
+    exist at any time.
+    """
+
+    def __init__(self, max_sessions=None, idle_timeout=None, history_dir=None, factory=create_session):
+        """
+        :param max_sessions: cap on concurrent sessions
+        :param idle_timeout: seconds without activity before a session is evicted
+        :param history_dir: directory holding one chat history file and code work dir per session
+        :param factory: callable (session_id, history_path, work_dir) -> LearnerSession
+        """
+        self.max_sessions = max_sessions if max_sessions is not None else globals.MAX_SESSIONS
+        self.idle_timeout = idle_timeout if idle_timeout is not None else globals.SESSION_IDLE_TIMEOUT
+        self.history_dir = history_dir if history_dir is not None else globals.SESSION_HISTORY_DIR
+        self.factory = factory
+
+        self.sessions = {}
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def __contains__(self, session_id):
+        return session_id in self.sessions
+
+    def get(self, session_id: str):
+        session = self.sessions.get(session_id)
+        if session is not None:
+            session.touch()
+        return session
+
+    def get_or_create(self, session_id: str) -> LearnerSession:
+        """Return the learner's session, creating it if needed. Raises SessionLimitError when full."""
+        with self._lock:
+            session = self.sessions.get(session_id)
+            if session is not None:
+                session.touch()
+                return session
+
+            evicted = self._evict_idle_locked(time.monotonic())
+            if len(self.sessions) >= self.max_sessions:
+                raise SessionLimitError(f"All {self.max_sessions} learner sessions are in use")
+
+            os.makedirs(self.history_dir, exist_ok=True)
+            session = self.factory(
+                session_id,
+                history_path=os.path.join(self.history_dir, f"{session_id}.json"),
+                work_dir=os.path.join(self.history_dir, "coding", session_id),
+            )
+            self.sessions[session_id] = session
+
+        self._close_sessions(evicted)
+        self.logger.info(f"Created session {session_id} ({len(self.sessions)}/{self.max_sessions})")
+        return session
+
+    def remove(self, session_id: str):
+        with self._lock:
+            session = self.sessions.pop(session_id, None)
+        if session is not None:
+            self._close_sessions([session])
+
+    def evict_idle(self) -> list:
+        """Close every disconnected session idle for longer than idle_timeout. Returns the evicted session ids."""
+        with self._lock:
+            evicted = self._evict_idle_locked(time.monotonic())
+        self._close_sessions(evicted)
+        return [session.session_id for session in evicted]
+
+    def close_all(self):
+        with self._lock:
+            sessions = list(self.sessions.values())
+            self.sessions.clear()
+        self._close_sessions(sessions)
+
+    def _evict_idle_locked(self, now: float) -> list:
+        idle = [session for session in self.sessions.values()
+                if session.idle_seconds(now) > self.idle_timeout and not session.is_connected()]
+        for session in idle:
+            del self.sessions[session.session_id]
+        return idle
+
+    def _close_sessions(self, sessions):
+        for session in sessions:
+            try:
+                session.close()
+                self.logger.info(f"Closed session {session.session_id}")
+            except Exception as e:
+                self.logger.error(f"Error closing session {session.session_id}: {str(e)}")
@@ -1,5 +1,6 @@
 ##################### Solution Verifier #########################
 from .conversable_agent import MyConversableAgent
+from .verdicts import verdict_instructions
 
 class SolutionVerifierAgent(MyConversableAgent):
     description = """
@@ -11,7 +12,7 @@ class SolutionVerifierAgent(MyConversableAgent):
     system_message = """
             You are SolutionVerifierAgent, an agent responsible for checking a StudentAgent's answers to questions. 
             You verify the accuracy of each answer by comparing it to the correct solution. 
-            """
+            """ + verdict_instructions("SolutionVerifierAgent")
     def __init__(self, **kwargs):
         super().__init__(
                 name="SolutionVerifierAgent",
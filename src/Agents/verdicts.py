@@ -0,0 +1,84 @@
+import json
+import re
+
+VERDICT_KEY = 'verdict'
+
+# Agent name -> JSON verdict the agent ends its replies with
+VERDICT_FORMATS = {
+    'SolutionVerifierAgent': '{"correct": true|false}',
+    'CodeRunnerAgent': '{"success": true|false}',
+    'CodeRunnerVerifierAgent': '{"success": true|false}',
+    'LevelAdapterAgent': '{"correct": true|false, "difficulty": "increase"|"decrease"|"keep"}',
+}
+
+DIFFICULTY_CHANGES = ('increase', 'decrease', 'keep')
+
+# A JSON object closing the reply, optionally inside a code fence
+_TRAILING_JSON = re.compile(r'(\{[^{}]*\})\s*(?:```)?\s*$')
+_OPENING_FENCE = re.compile(r'```\w*\s*$')
+# Header of autogen's code execution replies, e.g. "exitcode: 1 (execution failed)"
+_EXITCODE = re.compile(r'exitcode: (-?\d+)')
+
+
+def verdict_instructions(name: str) -> str:
+    """System message sentence asking agent name for its verdict"""
+    return f"End every reply with one line holding only your verdict as JSON, formatted as {VERDICT_FORMATS[name]}."
+
+
+def parse_verdict(content) -> dict:
+    """
+    Verdict of a reply: the exit code of a code execution reply, otherwise its trailing JSON object.
+    Only known keys with valid values are kept, {} when the reply has no verdict.
+    """
+    if not isinstance(content, str):
+        return {}
+    # The program's own output can end with any JSON, the exit code decides
+    match = _EXITCODE.match(content)
+    if match:
+        return {'success': int(match.group(1)) == 0}
+    match = _TRAILING_JSON.search(content)
+    if match:
+        try:
+            fields = json.loads(match.group(1))
+        except ValueError:
+            fields = None
+        if isinstance(fields, dict):
+            verdict = {key: fields[key] for key in ('correct', 'success') if isinstance(fields.get(key), bool)}
+            if fields.get('difficulty') in DIFFICULTY_CHANGES:
+                verdict['difficulty'] = fields['difficulty']
+            return verdict
+    return {}
+
+
+def strip_verdict(content):
+    """The reply as the student should see it, without the verdict JSON it ends with"""
+    if not isinstance(content, str) or _EXITCODE.match(content):
+        return content
+    match = _TRAILING_JSON.search(content)
+    if match is None or not parse_verdict(match.group(1)):
+        return content
+    # Also drop the opening fence when the verdict was fenced
+    return _OPENING_FENCE.sub('', content[:match.start()]).rstrip()
+
+
+def attach_verdict(message: dict) -> dict:
+    """Parse the verdict of a message once and keep it on the message under VERDICT_KEY"""
+    verdict = message.get(VERDICT_KEY)
+    if verdict is None:
+        verdict = message[VERDICT_KEY] = parse_verdict(message.get('content'))
+    return verdict
+
+
+def is_correct(message) -> bool:
+    """Whether a verifier or level adapter message judged the answer correct"""
+    return bool(message) and attach_verdict(message).get('correct', False)
+
+
+def code_succeeded(message) -> bool:
+    """Whether a code runner message reports a successful run"""
+    return bool(message) and attach_verdict(message).get('success', False)
+
+
+def difficulty_change(message):
+    """'increase', 'decrease' or 'keep' from a level adapter message, None without a verdict"""
+    return attach_verdict(message).get('difficulty') if message else None
@@ -1,27 +1,37 @@
+import os
+import sys
+import numpy as np
 import pandas as pd
-from tensorflow.keras.models import load_model
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
 
-# Load model and validation data
-model = load_model('saved_model.h5')
-df = pd.read_csv('data/synthetic_student_data.csv')
+# Run from the repository root: python "src/Deprecated/LSTM Knowledge Tracer/evaluate.py"
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..'))
+from src import globals
+from src.Models.dkt import FEATURES, DKTModel, encode_history
 
-# Preprocess validation data (similar to train.py)
-activity_type_mapping = {'quiz': 0, 'homework': 1, 'lecture': 2}
-df['activity_type'] = df['activity_type'].map(activity_type_mapping)
+# Load the exported model and validation data, no TensorFlow needed
+model = DKTModel.load(globals.DKT_MODEL_PATH)
+df = pd.read_csv('data/synthetic_student_data.csv', usecols=['student_id', 'date'] + list(FEATURES))
+df = df.sort_values(['student_id', 'date'])
 
+# Preprocess validation data (same as train.py)
 sequences = []
 labels = []
-for student_id, group in df.groupby('student_id'):
-    sequence = group[['activity_type', 'outcome', 'time_spent']].values
-    sequences.append(sequence)
-    labels.append(group['outcome'].iloc[-1])
+for student_id, group in df.groupby('student_id', sort=False):
+    if len(group) < 2:
+        continue
+    sequence = encode_history(group[list(FEATURES)].itertuples(index=False, name=None))
+    sequences.append(sequence[:-1])
+    labels.append(int(sequence[-1, FEATURES.index('outcome')]))
 
-X_val = pad_sequences(sequences, dtype='float32', padding='post')
+if os.path.exists('validation_ids.npy'):
+    val_ids = np.load('validation_ids.npy')
+    sequences = [sequences[i] for i in val_ids]
+    labels = [labels[i] for i in val_ids]
 y_val = labels
 
-# Evaluate the model
-y_pred = model.predict(X_val)
+# Evaluate the model, one forward pass per length bucket
+y_pred = model.predict(sequences)
 y_pred = (y_pred > 0.5).astype(int)
 
 accuracy = accuracy_score(y_val, y_pred)
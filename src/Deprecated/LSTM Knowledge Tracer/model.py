@@ -1,10 +1,12 @@
 import tensorflow as tf
 from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, Dense, Dropout
+from tensorflow.keras.layers import LSTM, Dense, Dropout, Masking
 
-def create_model(input_shape):
+def create_model(num_features):
     model = Sequential()
-    model.add(LSTM(128, input_shape=input_shape, return_sequences=True))
+    # Variable length input, padded steps of a length bucket are all zeros and skipped
+    model.add(Masking(mask_value=0.0, input_shape=(None, num_features)))
+    model.add(LSTM(128, return_sequences=True))
     model.add(Dropout(0.2))
     model.add(LSTM(64, return_sequences=False))
     model.add(Dropout(0.2))
@@ -1,34 +1,51 @@
-import pandas as pd
+import os
+import sys
 import numpy as np
-from tensorflow.keras.preprocessing.sequence import pad_sequences
+import pandas as pd
 from sklearn.model_selection import train_test_split
 from model import create_model
 
-# Load and preprocess data
-df = pd.read_csv('data/synthetic_student_data.csv')
+# Run from the repository root: python "src/Deprecated/LSTM Knowledge Tracer/train.py"
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..'))
+from src import globals
+from src.Models.dkt import FEATURES, DKTModel, encode_history, length_buckets, pad_batch
 
-# Convert categorical data to numerical
-activity_type_mapping = {'quiz': 0, 'homework': 1, 'lecture': 2}
-df['activity_type'] = df['activity_type'].map(activity_type_mapping)
+BATCH_SIZE = 64
+EPOCHS = 10
 
-# Prepare sequences
+# Load and preprocess data
+df = pd.read_csv('data/synthetic_student_data.csv', usecols=['student_id', 'date'] + list(FEATURES))
+df = df.sort_values(['student_id', 'date'])
+
+# Each student's history up to the last activity predicts the outcome of the last activity
 sequences = []
 labels = []
-for student_id, group in df.groupby('student_id'):
-    sequence = group[['activity_type', 'outcome', 'time_spent']].values
-    sequences.append(sequence)
-    labels.append(group['outcome'].iloc[-1])
-
-# Pad sequences
-sequences = pad_sequences(sequences, dtype='float32', padding='post')
+for student_id, group in df.groupby('student_id', sort=False):
+    if len(group) < 2:
+        continue
+    sequence = encode_history(group[list(FEATURES)].itertuples(index=False, name=None))
+    sequences.append(sequence[:-1])
+    labels.append(sequence[-1, FEATURES.index('outcome')])
+labels = np.array(labels, dtype=np.float32)
 
 # Train/test split
-X_train, X_val, y_train, y_val = train_test_split(sequences, labels, test_size=0.2, random_state=42)
+train_ids, val_ids = train_test_split(np.arange(len(sequences)), test_size=0.2, random_state=42)
+
+def batches(ids, shuffle):
+    """Batches of similar length, padded to their own longest sequence instead of the global one"""
+    buckets = length_buckets([len(sequences[i]) for i in ids], BATCH_SIZE)
+    while True:
+        for bucket in np.random.permutation(len(buckets)) if shuffle else range(len(buckets)):
+            indices = ids[buckets[bucket]]
+            x, _ = pad_batch(sequences, indices)
+            yield x, labels[indices]
 
 # Create and train the model
-input_shape = (X_train.shape[1], X_train.shape[2])
-model = create_model(input_shape)
-model.fit(X_train, np.array(y_train), epochs=10, batch_size=64, validation_data=(X_val, np.array(y_val)))
+model = create_model(len(FEATURES))
+model.fit(batches(train_ids, shuffle=True), steps_per_epoch=-(-len(train_ids) // BATCH_SIZE), epochs=EPOCHS,
+          validation_data=batches(val_ids, shuffle=False), validation_steps=-(-len(val_ids) // BATCH_SIZE))
 
-# Save the model
+# Save the model, and export its weights for the NumPy runtime of src/Models/dkt.py
 model.save('saved_model.h5')
+DKTModel.from_keras(model).save(globals.DKT_MODEL_PATH)
+np.save('validation_ids.npy', val_ids)
@@ -0,0 +1,79 @@
+"""
+Compare the transitions-based TeachMeFSM with the precompiled CompiledTeachMeFSM.
+
+    python -m src.FSMs.benchmark_fsm [--turns 100000] [--instances 1000]
+
+Measures the cost of building one FSM (one per learner session) and of one
+next_speaker_selector() call (one per group chat turn). Agents are plain strings
+and the group chat is a stub, so only the FSM itself is timed.
+"""
+import argparse
+import logging
+import time
+
+from src.Agents.agents import AgentKeys
+from src.FSMs.fsm_teach_me import FSM_BACKENDS
+
+
+class _StubGroupChat:
+    def __init__(self):
+        self.messages = [{"name": "CodeRunnerAgent", "content": "exitcode: 0 (execution succeeded)"}]
+
+    def get_messages(self):
+        return self.messages
+
+
+class _StubGroupChatManager:
+    def __init__(self):
+        self.groupchat = _StubGroupChat()
+
+
+def make_fsm(fsm_class):
+    fsm = fsm_class({key.value: key.value for key in AgentKeys})
+    fsm.register_groupchat_manager(_StubGroupChatManager())
+    return fsm
+
+
+def time_construction(fsm_class, instances: int) -> float:
+    """Seconds per FSM built"""
+    start = time.perf_counter()
+    for _ in range(instances):
+        make_fsm(fsm_class)
+    return (time.perf_counter() - start) / instances
+
+
+def time_turns(fsm_class, turns: int) -> float:
+    """Seconds per next_speaker_selector() call"""
+    fsm = make_fsm(fsm_class)
+    groupchat = fsm.groupchat_manager.groupchat
+    start = time.perf_counter()
+    for _ in range(turns):
+        fsm.next_speaker_selector(None, groupchat)
+    return (time.perf_counter() - start) / turns
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=100000)
+    parser.add_argument("--instances", type=int, default=1000)
+    args = parser.parse_args()
+
+    # The FSM logs every transition, which would dominate the timings
+    logging.disable(logging.CRITICAL)
+
+    results = {}
+    for backend, fsm_class in FSM_BACKENDS.items():
+        results[backend] = (time_construction(fsm_class, args.instances), time_turns(fsm_class, args.turns))
+
+    print(f"{'backend':<12} {'construct (us)':>15} {'turn (us)':>10}")
+    for backend, (construct, turn) in results.items():
+        print(f"{backend:<12} {construct * 1e6:>15.1f} {turn * 1e6:>10.2f}")
+
+    baseline_construct, baseline_turn = results['transitions']
+    compiled_construct, compiled_turn = results['compiled']
+    print(f"\ncompiled speedup: construction x{baseline_construct / compiled_construct:.1f}, "
+          f"turn x{baseline_turn / compiled_turn:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import asyncio
+import logging
+
+
+async def gather_replies(calls, timeout: float) -> list:
+    """
+    Await the coroutines of calls concurrently and return their results in the order of calls.
+
+    Calls still running timeout seconds after the start are cancelled. Cancelled and
+    failed calls give None, so one slow or broken agent never holds up the others.
+    """
+    tasks = [asyncio.ensure_future(call) for call in calls]
+    if not tasks:
+        return []
+    done, pending = await asyncio.wait(tasks, timeout=timeout)
+    for task in pending:
+        task.cancel()
+    if pending:
+        # Let the cancelled calls unwind before their results are read
+        await asyncio.gather(*pending, return_exceptions=True)
+        logging.warning(f"gather_replies(): {len(pending)} of {len(tasks)} calls timed out after {timeout}s")
+
+    results = []
+    for task in tasks:
+        if task in pending or task.cancelled():
+            results.append(None)
+        elif task.exception() is not None:
+            logging.error(f"gather_replies(): call failed: {str(task.exception())}")
+            results.append(None)
+        else:
+            results.append(task.result())
+    return results
+
+
+async def gather_stages(stages, reply, publish, timeout: float) -> list:
+    """
+    Run stages one after the other and the members of a stage concurrently.
+
+    reply(member) is awaited for every member of a stage, then publish(member, content)
+    for each reply in member order, so a later stage sees the replies of the earlier
+    ones. All stages share the timeout. Returns the members that replied, in order.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    replied = []
+    for members in stages:
+        replies = await gather_replies([reply(member) for member in members], max(0, deadline - loop.time()))
+        for member, content in zip(members, replies):
+            if content is not None:
+                await publish(member, content)
+                replied.append(member)
+    return replied
@@ -2,7 +2,10 @@ import logging
 from transitions import Machine
 from transitions.core import MachineError
 from enum import Enum
+from src import globals
 from src.Agents.agents import AgentKeys
+from src.Agents.message_index import MessageIndex
+from src.Agents.verdicts import code_succeeded, difficulty_change
 
 # Set up logging configuration
 #logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
@@ -46,6 +49,44 @@ exit_callbacks = {
      # Add mappings for the rest of the states...
 }
 
+#######################################################
+# TRANSITIONS
+########################################################
+# Every transition is fired by the 'advance' trigger:
+# (source, dest, conditions, unless, after).
+# For one source state the first transition whose conditions hold is taken.
+TRANSITIONS = (
+    (FSMStates.AWAITING_TOPIC, FSMStates.PRESENTING_LESSON, (), (), 'set_teacher'),
+    (FSMStates.PRESENTING_LESSON, FSMStates.AWAITING_PROBLEM, (), (), 'set_problem_generator'),
+    (FSMStates.AWAITING_PROBLEM, FSMStates.AWAITING_ANSWER, (), (), 'set_student'),
+    (FSMStates.AWAITING_ANSWER, FSMStates.VERIFYING_ANSWER, (), (), 'set_solution_verifier'),
+    (FSMStates.VERIFYING_ANSWER, FSMStates.WRITING_PROGRAM, (), (), 'set_programmer'),
+    (FSMStates.WRITING_PROGRAM, FSMStates.RUNNING_CODE, (), (), 'set_code_runner'),
+    (FSMStates.RUNNING_CODE, FSMStates.VERIFYING_CODE, (), (), 'set_code_runner_verifier'),
+
+    # Back to WRITING_PROGRAM if the code does not execute
+    (FSMStates.VERIFYING_CODE, FSMStates.WRITING_PROGRAM, (), ('code_is_correct',), 'increment_attempts_and_set_programmer'),
+
+    # On to UPDATING_MODEL if the code executes and is correct, or if too many attempts to execute it failed.
+    # The latter is a punt because it means the LLM did not generate runnable python code
+    # With a post-answer fan-out stage, UPDATING_MODEL runs the learner model, level adapter
+    # and motivator at once and the lesson follows, otherwise they take a turn each
+    (FSMStates.VERIFYING_CODE, FSMStates.UPDATING_MODEL, ('has_post_answer_stage', 'code_is_correct_or_too_many_execution_attempts'), (), 'set_post_answer_stage'),
+    (FSMStates.VERIFYING_CODE, FSMStates.UPDATING_MODEL, ('code_is_correct_or_too_many_execution_attempts',), (), 'set_learner_model'),
+
+    (FSMStates.UPDATING_MODEL, FSMStates.AWAITING_PROBLEM, ('has_post_answer_stage', 'has_prefetched_problem'), (), 'set_problem_generator'),
+    (FSMStates.UPDATING_MODEL, FSMStates.PRESENTING_LESSON, ('has_post_answer_stage',), (), 'set_teacher'),
+    (FSMStates.UPDATING_MODEL, FSMStates.ADAPTING_LEVEL, (), (), 'set_level_adapter'),
+    (FSMStates.ADAPTING_LEVEL, FSMStates.MOTIVATING, (), (), 'set_motivator'),
+
+    # TODO: Consider whether to only go to the teacher if level increases
+    # (FSMStates.MOTIVATING, FSMStates.AWAITING_PROBLEM, (), ('adapter_agent_says_increase_difficulty',), 'set_problem_generator'),
+    # The next problem, prefetched for the level adapter's decision, is presented right away
+    (FSMStates.MOTIVATING, FSMStates.AWAITING_PROBLEM, ('has_prefetched_problem',), (), 'set_problem_generator'),
+    (FSMStates.MOTIVATING, FSMStates.PRESENTING_LESSON, (), (), 'set_teacher'),
+)
+
+
 class TeachMeFSM:
     def __init__(self, agents, max_code_execution_attempts=3):
         self.agents = agents
@@ -55,7 +96,11 @@ class TeachMeFSM:
         self.run_attempts = 0  # Counter for code running attempts
         self.current_state_enum = FSMStates.AWAITING_TOPIC
         self.previous_state_enum = None
+        self.prefetcher = None  # optional ProblemPrefetcher
+
+        self._build_machine()
 
+    def _build_machine(self):
         # Define states
         states = [state.value for state in FSMStates]
 
@@ -76,110 +121,15 @@ class TeachMeFSM:
         #####################################################
         # TRANSITIONS
         #####################################################
-        # Define transitions
-        self.machine.add_transition(
-            trigger='advance',
-            source=FSMStates.AWAITING_TOPIC.value,
-            dest=FSMStates.PRESENTING_LESSON.value,
-            after='set_teacher'
-        )
-
-        self.machine.add_transition(
-            trigger='advance',
-            source=FSMStates.PRESENTING_LESSON.value,
-            dest=FSMStates.AWAITING_PROBLEM.value,
-            after='set_problem_generator'
-        )
-
-        self.machine.add_transition(
-            trigger='advance',
-            source=FSMStates.AWAITING_PROBLEM.value,
-            dest=FSMStates.AWAITING_ANSWER.value,
-            after='set_student'
-        )
-
-        self.machine.add_transition(
-            trigger='advance',
-            source=FSMStates.AWAITING_ANSWER.value,
-            dest=FSMStates.VERIFYING_ANSWER.value,
-            after='set_solution_verifier'
-        )
-
-        self.machine.add_transition(
-            trigger='advance',
-            source=FSMStates.VERIFYING_ANSWER.value,
-            dest=FSMStates.WRITING_PROGRAM.value,
-            after='set_programmer'
-        )
-
-        self.machine.add_transition(
-            trigger='advance',
-            source=FSMStates.WRITING_PROGRAM.value,
-            dest=FSMStates.RUNNING_CODE.value,
-            after='set_code_runner'
-        )
-
-        # Transition from RUNNING_CODE to VERIFYING_CODE
-        self.machine.add_transition(
-            trigger='advance',
-            source=FSMStates.RUNNING_CODE.value,
-            dest=FSMStates.VERIFYING_CODE.value,
-            after='set_code_runner_verifier'
-        )
-
- 
-        # Transition from VERIFYING_CODE to WRITING_PROGRAM if code does not execute
-        self.machine.add_transition(
-            trigger='advance',
-            source=FSMStates.VERIFYING_CODE.value,
-            dest=FSMStates.WRITING_PROGRAM.value,  
-            unless='code_is_correct',
-            after='increment_attempts_and_set_programmer'
-        )
-
-       # Transition from VERIFYING_CODE to UPDATING_MODEL if too many attempts to execute code fail
-            # This is a punt because it means the LLM did not generate runnable python code
-       # Transition from VERIFYING_CODE to UPDATING_MODEL if code executes and is correct
-        self.machine.add_transition(
-            trigger='advance',
-            source=FSMStates.VERIFYING_CODE.value,
-            dest=FSMStates.UPDATING_MODEL.value,
-            conditions='code_is_correct_or_too_many_execution_attempts',
-            after='set_learner_model'
-        )
-
- 
-        self.machine.add_transition(
-            trigger='advance',
-            source=FSMStates.UPDATING_MODEL.value,
-            dest=FSMStates.ADAPTING_LEVEL.value,
-            after='set_level_adapter'
-        )
-
-        self.machine.add_transition(
-            trigger='advance',
-            source=FSMStates.ADAPTING_LEVEL.value,
-            dest=FSMStates.MOTIVATING.value,
-            after='set_motivator'
-        )
-
-        # Transitions from 'motivating' state with conditions
-        # TODO: Consider whether to only go to the teacher if level increases
-        # self.machine.add_transition(
-        #     trigger='advance',
-        #     source=FSMStates.MOTIVATING.value,
-        #     dest=FSMStates.AWAITING_PROBLEM.value,
-        #     unless='adapter_agent_says_increase_difficulty',
-        #     after='set_problem_generator'
-        # )
-
-        self.machine.add_transition(
-            trigger='advance',
-            source=FSMStates.MOTIVATING.value,
-            dest=FSMStates.PRESENTING_LESSON.value,
-            #conditions='adapter_agent_says_increase_difficulty',
-            after='set_teacher'
-        )
+        for source, dest, conditions, unless, after in TRANSITIONS:
+            self.machine.add_transition(
+                trigger='advance',
+                source=source.value,
+                dest=dest.value,
+                conditions=list(conditions),
+                unless=list(unless),
+                after=after
+            )
 
 
 
@@ -270,6 +220,14 @@ class TeachMeFSM:
             self.next_agent = None   # DEBUG
         self.on_enter_state()
 
+    def set_post_answer_stage(self):
+        try:
+            self.next_agent = self.agents[AgentKeys.POST_ANSWER.value]
+            logging.debug(f"set_post_answer_stage(): Next agent set to 'post_answer'")
+        except KeyError as e:
+            logging.error(f"Agent not found: {e}")
+        self.on_enter_state()
+
     def set_level_adapter(self):
         try:
             self.next_agent = self.agents[AgentKeys.LEVEL_ADAPTER.value]
@@ -304,6 +262,12 @@ class TeachMeFSM:
         logging.info("reset_attempts(): Run attempts reset to 0")
 
     # Conditions
+    def has_post_answer_stage(self):
+        return AgentKeys.POST_ANSWER.value in self.agents
+
+    def has_prefetched_problem(self):
+        return self.prefetcher is not None and self.prefetcher.has_committed()
+
     # def code_is_correct(self):
     #     """
     #     Check if the code run was successful by analyzing the groupchat_manager messages.
@@ -331,15 +295,18 @@ class TeachMeFSM:
         if not hasattr(self, 'groupchat_manager') or not self.groupchat_manager:
             logging.error("Groupchat manager not registered or is None.")
             
-        # Get all message history from the groupchat manager
-        all_messages = self.groupchat_manager.groupchat.get_messages()
-        
         # Get the latest message from the groupchat manager to ensure accuracy
-        if all_messages:
-            last_message = all_messages[-1]
+        index = self._message_index()
+        if index is not None:
+            last_message = index.last()
+        else:
+            all_messages = self.groupchat_manager.groupchat.get_messages()
+            last_message = all_messages[-1] if all_messages else None
+
+        if last_message:
             logging.info(f"Evaluating message from sender '{last_message['name']}': {last_message['content']}")
-            if ( "code executed successfully" in last_message['content']):
-                logging.info("Code run succeeded with exit code 0.")
+            if code_succeeded(last_message):
+                logging.info("Code run succeeded.")
                 return True
 
         # If no successful message is found, return False
@@ -366,24 +333,30 @@ class TeachMeFSM:
  
     def adapter_agent_says_increase_difficulty(self):
         last_level_adapter_message = None
-        # Iterate through the messages backwards
-        messages = self.groupchat_manager.groupchat.get_messages()
-        for message in reversed(messages):
-            if message['name'] == 'LevelAdapterAgent':
-                last_level_adapter_message = message
-                break  # Stop once the first match is found
+        index = self._message_index()
+        if index is not None:
+            last_level_adapter_message = index.last_from('LevelAdapterAgent')
+        else:
+            # Iterate through the messages backwards
+            for message in reversed(self.groupchat_manager.groupchat.get_messages()):
+                if message['name'] == 'LevelAdapterAgent':
+                    last_level_adapter_message = message
+                    break  # Stop once the first match is found
 
         # Check if a message was found and print it
         if last_level_adapter_message:
             logging.info(f"Last level_adapter message:  {last_level_adapter_message}")
-            if "increasing the difficulty" in last_level_adapter_message["content"]:
+            if difficulty_change(last_level_adapter_message) == 'increase':
                 return True
         
         logging.info("No messages from level_adapter found.")
-        print("\n\n messages \n\n", messages)
-        
         return False
 
+    def _message_index(self):
+        """The MessageIndex of the group chat, None for chats without one"""
+        index = getattr(self.groupchat_manager.groupchat, 'message_index', None)
+        return index if isinstance(index, MessageIndex) else None
+
     # Handle invalid transitions within next_speaker_selector
     def next_speaker_selector(self, last_speaker, groupchat):
         self.last_speaker = last_speaker
@@ -418,4 +391,82 @@ class TeachMeFSM:
 
 
     def register_groupchat_manager(self, groupchat_manager):
-        self.groupchat_manager = groupchat_manager
\ No newline at end of file
+        self.groupchat_manager = groupchat_manager
+
+    def register_prefetcher(self, prefetcher):
+        self.prefetcher = prefetcher
+
+
+#######################################################
+# COMPILED BACKEND
+########################################################
+def compile_transition_table(fsm_class, transitions=TRANSITIONS):
+    """
+    Compile transitions into a static table for fsm_class:
+    state value -> tuple of (dest value, conditions, unless, on_exit, on_enter, after),
+    where conditions, unless and after are the unbound methods of fsm_class.
+    """
+    table = {}
+    for source, dest, conditions, unless, after in transitions:
+        table.setdefault(source.value, []).append((
+            dest.value,
+            tuple(getattr(fsm_class, name) for name in conditions),
+            tuple(getattr(fsm_class, name) for name in unless),
+            exit_callbacks.get(source),
+            entry_callbacks.get(dest),
+            getattr(fsm_class, after),
+        ))
+    return {state: tuple(rows) for state, rows in table.items()}
+
+
+class CompiledTeachMeFSM(TeachMeFSM):
+    """
+    TeachMeFSM without a transitions.Machine.
+
+    The transition table is compiled once when the class is defined and shared by
+    every instance, so building an FSM per session only sets a few attributes and
+    advance() is a dict lookup plus direct calls of the condition and action methods.
+    It follows the same rules as the Machine: the first transition of the current
+    state whose conditions hold is taken, and MachineError is raised when the state
+    has none, so next_speaker_selector() behaves the same with either backend.
+    """
+
+    TRANSITION_TABLE = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Subclasses may override conditions or actions
+        cls.TRANSITION_TABLE = compile_transition_table(cls)
+
+    def _build_machine(self):
+        self.machine = None
+        self.state = FSMStates.AWAITING_TOPIC.value
+
+    def advance(self):
+        rows = self.TRANSITION_TABLE.get(self.state)
+        if rows is None:
+            raise MachineError(f"Can't trigger event advance from state {self.state}!")
+
+        for dest, conditions, unless, on_exit, on_enter, after in rows:
+            if all(condition(self) for condition in conditions) and not any(condition(self) for condition in unless):
+                if on_exit:
+                    on_exit()
+                self.state = dest
+                if on_enter:
+                    on_enter()
+                after(self)
+                return True
+        return False
+
+
+CompiledTeachMeFSM.TRANSITION_TABLE = compile_transition_table(CompiledTeachMeFSM)
+
+FSM_BACKENDS = {
+    'transitions': TeachMeFSM,
+    'compiled': CompiledTeachMeFSM,
+}
+
+
+def create_teach_me_fsm(agents, backend=None, **kwargs):
+    """Build a TeachMeFSM with the backend named in globals.FSM_BACKEND unless one is given"""
+    return FSM_BACKENDS[backend or globals.FSM_BACKEND](agents, **kwargs)
@@ -3,6 +3,7 @@ from transitions import Machine
 from transitions.core import MachineError
 from enum import Enum
 import src.Agents.telugu_agents as agents
+from src.Agents.verdicts import difficulty_change
 
 
 #######################################################
@@ -238,12 +239,10 @@ class TeachMeFSM:
         # Check if a message was found and print it
         if last_level_adapter_message:
             logging.info(f"Last level_adapter message:  {last_level_adapter_message}")
-            if "increasing the difficulty" in last_level_adapter_message["content"]:
+            if difficulty_change(last_level_adapter_message) == 'increase':
                 return True
         
         logging.info("No messages from level_adapter found.")
-        print("\n\n messages \n\n", messages)
-        
         return False
 
     # Handle invalid transitions within next_speaker_selector
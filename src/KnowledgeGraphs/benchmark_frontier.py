@@ -0,0 +1,91 @@
+"""
+Compare next-topic selection by rescanning the prerequisites with the incremental MasteryFrontier.
+
+    python -m src.KnowledgeGraphs.benchmark_frontier [--students 1000] [--steps 300] [--forget 0.1]
+
+Every simulated student repeatedly masters its next topic and, with probability
+--forget, loses the mastery of a random topic. The topics are the leaves of the
+math taxonomy with the subtopic prerequisites lifted to them (leaf_prerequisites).
+Both strategies replay the same decisions and must pick the same topics.
+"""
+import argparse
+import random
+import time
+
+import src.KnowledgeGraphs.math_taxonomy as mt
+from src.KnowledgeGraphs.mastery_frontier import FrontierIndex, MasteryFrontier, leaf_prerequisites
+from src.KnowledgeGraphs.topic_graph import get_topic_graph
+
+
+class RescanFrontier:
+    """Baseline: scan every topic in topological order on each query"""
+
+    def __init__(self, index: FrontierIndex):
+        self.topics = index.topics
+        self.prerequisites = {topic: [] for topic in index.topics}
+        for node, topic in enumerate(index.topics):
+            for successor in index.successors(node):
+                self.prerequisites[index.topics[successor]].append(topic)
+        self.mastered = set()
+
+    def set_mastered(self, topic, mastered=True):
+        if mastered:
+            self.mastered.add(topic)
+        else:
+            self.mastered.discard(topic)
+
+    def next_topic(self):
+        for topic in self.topics:
+            if topic not in self.mastered and all(prerequisite in self.mastered for prerequisite in self.prerequisites[topic]):
+                return topic
+        return None
+
+
+def simulate(make_frontier, students: int, steps: int, forget: float, seed: int):
+    """Run the simulation, returning (seconds, topics picked)"""
+    rng = random.Random(seed)
+    picked = []
+    elapsed = 0.0
+    for _ in range(students):
+        mastered = []
+        start = time.perf_counter()
+        frontier = make_frontier()
+        for _ in range(steps):
+            topic = frontier.next_topic()
+            if topic is None:
+                break
+            picked.append(topic)
+            frontier.set_mastered(topic, True)
+            mastered.append(topic)
+            if rng.random() < forget:
+                forgotten = mastered.pop(rng.randrange(len(mastered)))
+                frontier.set_mastered(forgotten, False)
+        elapsed += time.perf_counter() - start
+    return elapsed, picked
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--steps", type=int, default=300)
+    parser.add_argument("--forget", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    index = FrontierIndex(*leaf_prerequisites(mt.topic_prerequisites, get_topic_graph()))
+    print(f"{len(index)} leaf topics, {len(index.successor_ids)} prerequisite edges, "
+          f"{args.students} students x {args.steps} steps")
+
+    results = {}
+    for name, make_frontier in (("rescan", lambda: RescanFrontier(index)),
+                                ("incremental", lambda: MasteryFrontier(index))):
+        results[name] = simulate(make_frontier, args.students, args.steps, args.forget, args.seed)
+        print(f"{name:<12} {results[name][0]:8.3f}s")
+
+    if results["rescan"][1] != results["incremental"][1]:
+        raise SystemExit("The strategies picked different topics")
+    print(f"\nincremental speedup: x{results['rescan'][0] / results['incremental'][0]:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import os
 import math
 import src.KnowledgeGraphs.math_taxonomy as mt
+from src.KnowledgeGraphs.topic_graph import TopicGraph
 
 def calculate_radius_for_spacing(num_points, individual_radius, separation_factor=1.5, additional_radius=0.0):
     """
@@ -74,6 +75,7 @@ def generate_gephi_gdf(topics_and_subtopics, subsub_topics, subsubsub_topics,
                        main_topic_coords, subtopic_coords, subsub_topic_coords, subsubsub_topic_coords, 
                        individual_radius_main_topics, individual_radius_subtopics, individual_radius_subsub_topics, individual_radius_subsubsub_topics, 
                        topic_colors):
+    topic_graph = TopicGraph.from_taxonomy(topics_and_subtopics, subsub_topics, subsubsub_topics)
     gdf_content = "nodedef>name VARCHAR,label VARCHAR,width DOUBLE,x DOUBLE,y DOUBLE,color VARCHAR\n"
 
     # Add nodes for main topics with coordinates, width, and color
@@ -90,8 +92,7 @@ def generate_gephi_gdf(topics_and_subtopics, subsub_topics, subsubsub_topics,
         
    # Add nodes for subsub topics with correct color based on main topic
     for subtopic_key, subsub_list in subsub_topics.items():
-        # Extract the main topic name from the subtopic key
-        main_topic_key = subtopic_key.split('->')[0]
+        main_topic_key = topic_graph.root(subtopic_key)
         color = f"\"{topic_colors.get(main_topic_key, '255,255,255')}\""
 
         for subsub_topic in subsub_list:
@@ -100,7 +101,7 @@ def generate_gephi_gdf(topics_and_subtopics, subsub_topics, subsubsub_topics,
 
     # Add nodes for subsubsub topics with correct color based on main topic
     for subsub_topic_key, subsubsub_list in subsubsub_topics.items():
-        main_topic_key = subsub_topic_key.split('->')[0]
+        main_topic_key = topic_graph.root(subsub_topic_key)
         color = f"\"{topic_colors.get(main_topic_key, '255,255,255')}\""
 
         for subsubsub_topic in subsubsub_list:
@@ -1,40 +1,152 @@
+"""
+Synthetic student activity sequences for knowledge tracing.
+
+    python -m src.KnowledgeGraphs.data_generation [--students 10000] [--seed 0]
+        [--output data/synthetic_student_data.csv] [--format csv|parquet] [--chunk-students 5000]
+        [--parameters-output data/synthetic_bkt_parameters.csv]
+
+Each student works through the leaves of the math taxonomy in order, starting at
+a random leaf and moving on with probability ADVANCE_PROBABILITY after every
+activity. Outcomes follow Bayesian Knowledge Tracing with per-skill parameters
+drawn from the seed, so fitted tracers can be checked against the ground truth
+written by --parameters-output.
+
+Students are generated in chunks: every chunk is synthesized as (students x steps)
+NumPy blocks and written before the next one starts, so memory stays bounded by
+--chunk-students however many interactions are generated. CSV chunks are appended
+to one file, Parquet chunks (pyarrow required) are written as part files of the
+--output directory. The output is the same for a given seed and chunk size.
+"""
+import argparse
+import os
+from datetime import datetime
+
 import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
 
 # Parameters for synthetic data generation
 num_students = 10000
-num_activities = 200
 activity_types = ['quiz', 'homework', 'lecture']
 start_date = datetime(2023, 1, 1)
 end_date = datetime(2023, 6, 30)
+MIN_GAP_DAYS, MAX_GAP_DAYS = 1, 5  # days between two activities of a student
+ADVANCE_PROBABILITY = 0.15  # chance of moving on to the next skill after an activity
+COLUMNS = ['student_id', 'skill_id', 'skill', 'activity_type', 'outcome', 'time_spent', 'date']
+
+
+def skill_parameters(num_skills: int, seed: int) -> dict:
+    """Ground truth BKT parameters of every skill, arrays indexed by skill position"""
+    rng = np.random.default_rng([seed, 0])
+    return {
+        'p_learn': rng.uniform(0.05, 0.3, num_skills),
+        'p_guess': rng.uniform(0.1, 0.3, num_skills),
+        'p_slip': rng.uniform(0.05, 0.15, num_skills),
+    }
+
+
+def generate_chunk(first_student: int, students: int, skill_ids, skill_names, parameters, seed: int, chunk: int):
+    """Synthesize the activities of students [first_student, first_student + students) as one DataFrame"""
+    rng = np.random.default_rng([seed, chunk + 1])
+    num_skills = len(skill_ids)
+    total_days = (end_date - start_date).days
+    max_steps = total_days // MIN_GAP_DAYS + 1
+
+    # Activity days: cumulative random gaps, each student stops at end_date
+    gaps = rng.integers(MIN_GAP_DAYS, MAX_GAP_DAYS, (students, max_steps))
+    gaps[:, 0] = 0
+    days = np.cumsum(gaps, axis=1)
+    valid = days < total_days
+
+    # Skill practiced at each step, in taxonomy order from a random starting leaf
+    advance = rng.random((students, max_steps)) < ADVANCE_PROBABILITY
+    advance[:, 0] = False
+    skills = (rng.integers(0, num_skills, students)[:, None] + np.cumsum(advance, axis=1)) % num_skills
+
+    # BKT over time, vectorized across the chunk: known[student, skill]
+    initial_skill = rng.uniform(0, 1, students)
+    known = rng.random((students, num_skills)) < initial_skill[:, None]
+    outcome = np.empty((students, max_steps), dtype=np.int8)
+    rows = np.arange(students)
+    draws = rng.random((2, students, max_steps))
+    for step in range(max_steps):
+        skill = skills[:, step]
+        state = known[rows, skill]
+        correct = np.where(state, draws[0, :, step] > parameters['p_slip'][skill],
+                           draws[0, :, step] < parameters['p_guess'][skill])
+        outcome[:, step] = correct
+        known[rows, skill] = state | (draws[1, :, step] < parameters['p_learn'][skill])
+
+    student_rows, steps = np.nonzero(valid)
+    skill_positions = skills[student_rows, steps]
+    return pd.DataFrame({
+        'student_id': first_student + student_rows,
+        'skill_id': np.asarray(skill_ids)[skill_positions],
+        'skill': pd.Categorical.from_codes(skill_positions, skill_names),
+        'activity_type': pd.Categorical.from_codes(rng.integers(0, len(activity_types), len(steps)), activity_types),
+        'outcome': outcome[student_rows, steps],
+        'time_spent': rng.uniform(5, 60, len(steps)).round(2),  # minutes
+        'date': np.datetime64(start_date, 'D') + days[student_rows, steps].astype('timedelta64[D]'),
+    }, columns=COLUMNS)
+
+
+def generate_chunks(students: int = num_students, chunk_students: int = 5000, seed: int = 0, topic_graph=None):
+    """Yield DataFrame chunks of interactions, skills are the leaves of the taxonomy TopicGraph"""
+    if topic_graph is None:
+        from src.KnowledgeGraphs.topic_graph import get_topic_graph
+        topic_graph = get_topic_graph()
+    skill_ids, skill_names = topic_graph.leaves, topic_graph.leaf_names
+    parameters = skill_parameters(len(skill_ids), seed)
+    for chunk, first_student in enumerate(range(0, students, chunk_students)):
+        yield generate_chunk(first_student, min(chunk_students, students - first_student),
+                             skill_ids, skill_names, parameters, seed, chunk)
+
+
+def write_chunks(chunks, output: str, output_format: str = 'csv') -> int:
+    """Write chunks as they are generated, returns the number of interactions"""
+    rows = 0
+    if output_format == 'parquet':
+        os.makedirs(output, exist_ok=True)
+        for chunk, frame in enumerate(chunks):
+            frame.to_parquet(os.path.join(output, f'part-{chunk:05d}.parquet'), index=False)
+            rows += len(frame)
+        return rows
+
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f'{output}.tmp'
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        for chunk, frame in enumerate(chunks):
+            frame.to_csv(f, index=False, header=chunk == 0)
+            rows += len(frame)
+    os.replace(tmp_path, output)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=num_students)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--chunk-students', type=int, default=5000)
+    parser.add_argument('--format', choices=('csv', 'parquet'), default='csv')
+    parser.add_argument('--output', default=None, help='CSV file, or directory of Parquet parts')
+    parser.add_argument('--parameters-output', default=None, help='write the ground truth BKT parameters here')
+    args = parser.parse_args()
+    output = args.output or ('data/synthetic_student_data.csv' if args.format == 'csv' else 'data/synthetic_student_data')
+
+    rows = write_chunks(generate_chunks(args.students, args.chunk_students, args.seed), output, args.format)
+    print(f'Wrote {rows} interactions of {args.students} students to {output}')
+
+    if args.parameters_output:
+        from src.KnowledgeGraphs.topic_graph import get_topic_graph
+        from src.Models.bkt import write_parameter_table
+        skill_names = get_topic_graph().leaf_names
+        parameters = skill_parameters(len(skill_names), args.seed)
+        # initial_skill is uniform on [0, 1], so the population prior of every skill is 0.5
+        write_parameter_table(args.parameters_output, {
+            skill: {'p_init': 0.5, **{name: float(values[position]) for name, values in parameters.items()}}
+            for position, skill in enumerate(skill_names)})
+
 
-# Function to generate random dates
-def random_date(start, end):
-    return start + timedelta(seconds=np.random.randint(0, int((end - start).total_seconds())))
-
-# Initialize student profiles
-students = [{'student_id': i, 'initial_skill': np.random.uniform(0, 1)} for i in range(num_students)]
-
-# Generate synthetic sequences
-data = []
-for student in students:
-    current_skill = student['initial_skill']
-    student_id = student['student_id']
-    date = start_date
-    while date < end_date:
-        activity_type = np.random.choice(activity_types)
-        score = np.clip(current_skill + np.random.normal(0, 0.1), 0, 1)
-        time_spent = np.random.uniform(5, 60)
-        data.append({
-            'student_id': student_id,
-            'activity_type': activity_type,
-            'outcome': 1 if score > 0.5 else 0,
-            'time_spent': time_spent,
-            'date': date
-        })
-        date += timedelta(days=np.random.randint(1, 5))
-
-# Create a DataFrame
-df = pd.DataFrame(data)
-df.to_csv('data/synthetic_student_data.csv', index=False)
+if __name__ == '__main__':
+    main()
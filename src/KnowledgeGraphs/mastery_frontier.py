@@ -0,0 +1,177 @@
+import heapq
+from array import array
+from functools import lru_cache
+from types import MappingProxyType
+
+
+class FrontierIndex:
+    """
+    Immutable prerequisite structure shared by every student's MasteryFrontier.
+
+    Topics are numbered in topological order (ties broken by taxonomy order), so a
+    smaller id is always an earlier topic. Successors are stored CSR style and the
+    number of prerequisites of each topic is kept in an int array that a student's
+    frontier copies as its counters.
+    """
+
+    def __init__(self, topics, prerequisites):
+        """
+        :param topics: topics in taxonomy order
+        :param prerequisites: topic -> list of its direct prerequisites
+        """
+        position = {topic: index for index, topic in enumerate(topics)}
+        successors = {topic: [] for topic in topics}
+        counts = dict.fromkeys(topics, 0)
+        for topic, topic_prerequisites in prerequisites.items():
+            for prerequisite in topic_prerequisites:
+                if prerequisite not in position or topic not in position:
+                    raise ValueError(f"Unknown topic in prerequisite {prerequisite} -> {topic}")
+                successors[prerequisite].append(topic)
+                counts[topic] += 1
+
+        # Kahn's algorithm, taking the earliest topic of the taxonomy among the ready ones
+        remaining = dict(counts)
+        ready = [position[topic] for topic in topics if remaining[topic] == 0]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            topic = topics[heapq.heappop(ready)]
+            order.append(topic)
+            for successor in successors[topic]:
+                remaining[successor] -= 1
+                if remaining[successor] == 0:
+                    heapq.heappush(ready, position[successor])
+        if len(order) != len(topics):
+            raise ValueError("Prerequisites contain a cycle")
+
+        self.topics = tuple(order)
+        self.ids = MappingProxyType({topic: node for node, topic in enumerate(order)})
+
+        successor_offsets, successor_ids = array("i", [0]), array("i")
+        for topic in order:
+            successor_ids.extend(sorted(self.ids[successor] for successor in successors[topic]))
+            successor_offsets.append(len(successor_ids))
+        self.successor_offsets = successor_offsets
+        self.successor_ids = successor_ids
+        self.prerequisite_counts = array("i", (counts[topic] for topic in order))
+
+    @classmethod
+    def from_knowledge_graph(cls, knowledge_graph):
+        """Index the prerequisite DAG of a KnowledgeGraph built with build_prerequisite_dag()"""
+        graph = knowledge_graph.graph
+        topics = sorted(graph.nodes, key=lambda topic: graph.nodes[topic].get('difficulty', 0))
+        return cls(topics, {topic: list(graph.predecessors(topic)) for topic in topics})
+
+    def __len__(self):
+        return len(self.topics)
+
+    def __contains__(self, topic):
+        return topic in self.ids
+
+    def successors(self, node: int):
+        return self.successor_ids[self.successor_offsets[node]:self.successor_offsets[node + 1]]
+
+
+class MasteryFrontier:
+    """
+    The topics one student can work on next, maintained incrementally.
+
+    Each topic keeps a counter of prerequisites not mastered yet. Flipping the
+    mastery of a topic only touches the counters of its successors, O(out-degree),
+    and unlocked topics sit in a heap keyed by topological id, so next_topic() is
+    O(1) amortized. Entries that got mastered or locked again are dropped lazily
+    when they reach the top of the heap.
+    """
+
+    def __init__(self, index: FrontierIndex, mastered=()):
+        self.index = index
+        self.missing = array("i", index.prerequisite_counts)
+        self.mastered = bytearray(len(index))
+        self._queued = bytearray(len(index))
+        self._heap = []
+        for node, count in enumerate(self.missing):
+            if count == 0:
+                self._push(node)
+        for topic in mastered:
+            self.set_mastered(topic, True)
+
+    def set_mastered(self, topic: str, mastered: bool = True) -> bool:
+        """Record a change of mastery. Returns False for topics outside the index."""
+        node = self.index.ids.get(topic)
+        if node is None:
+            return False
+        if self.mastered[node] == mastered:
+            return True
+
+        self.mastered[node] = mastered
+        step = -1 if mastered else 1
+        missing = self.missing
+        for successor in self.index.successors(node):
+            missing[successor] += step
+            if missing[successor] == 0 and not self.mastered[successor]:
+                self._push(successor)
+        if not mastered and missing[node] == 0:
+            self._push(node)
+        return True
+
+    def is_mastered(self, topic: str) -> bool:
+        return bool(self.mastered[self.index.ids[topic]])
+
+    def is_unlocked(self, topic: str) -> bool:
+        node = self.index.ids[topic]
+        return self._available(node)
+
+    def next_topic(self):
+        """The earliest unlocked topic that is not mastered, None when there is none"""
+        heap = self._heap
+        while heap and not self._available(heap[0]):
+            self._queued[heapq.heappop(heap)] = 0
+        return self.index.topics[heap[0]] if heap else None
+
+    def frontier(self) -> list:
+        """All unlocked topics that are not mastered, in topological order"""
+        return [self.index.topics[node] for node in sorted(self._heap) if self._available(node)]
+
+    def _available(self, node: int) -> bool:
+        return self.missing[node] == 0 and not self.mastered[node]
+
+    def _push(self, node: int):
+        if not self._queued[node]:
+            self._queued[node] = 1
+            heapq.heappush(self._heap, node)
+
+
+def leaf_prerequisites(topic_prerequisites, topic_graph, level=1):
+    """
+    Lift subtopic prerequisites to the leaf topics of a TopicGraph.
+    The leaves under a topic of the given depth are learned in taxonomy order, and the
+    first of them needs the last leaf of each prerequisite topic.
+
+    :return: (leaf topics in taxonomy order, leaf -> list of its prerequisites)
+    """
+    prerequisites = {}
+    for topic, topic_leaves in ((topic, topic_graph.leaves_under(topic))
+                                for topic in topic_graph.names if topic_graph.depth(topic) == level):
+        if not topic_leaves:
+            continue
+        prerequisites[topic_leaves[0]] = [topic_graph.leaves_under(prerequisite)[-1]
+                                          for prerequisite in topic_prerequisites.get(topic, ())]
+        for previous, leaf in zip(topic_leaves, topic_leaves[1:]):
+            prerequisites[leaf] = [previous]
+    return topic_graph.leaf_names, prerequisites
+
+
+@lru_cache(maxsize=None)
+def get_frontier_index() -> FrontierIndex:
+    """FrontierIndex of the math_taxonomy subtopics and their prerequisites, built once per process"""
+    import src.KnowledgeGraphs.math_taxonomy as mt
+    topics = [subtopic for subtopics in mt.topics_and_subtopics.values() for subtopic in subtopics]
+    return FrontierIndex(topics, mt.topic_prerequisites)
+
+
+@lru_cache(maxsize=None)
+def get_leaf_frontier_index() -> FrontierIndex:
+    """FrontierIndex of the taxonomy leaves the tracer FSMs teach, built once per process"""
+    import src.KnowledgeGraphs.math_taxonomy as mt
+    from src.KnowledgeGraphs.topic_graph import get_topic_graph
+    return FrontierIndex(*leaf_prerequisites(mt.topic_prerequisites, get_topic_graph()))
@@ -2,7 +2,6 @@ import networkx as nx
 import matplotlib.pyplot as plt
 import os
 import math
-import src.KnowledgeGraphs.math_taxonomy as mt
 import scipy
 
 
@@ -10,12 +9,20 @@ class KnowledgeGraph:
     def __init__(self):
         self.graph = nx.DiGraph()  # Directed graph to represent progression
 
+        # Scheduling caches, filled by build_prerequisite_dag
+        self.topological_order = ()
+        self.topological_rank = {}
+        self.prerequisite_counts = {}
+        self.entry_topics = ()
+
     def add_topic(self, topic_name, difficulty):
         self.graph.add_node(topic_name, difficulty=difficulty)
+        self.topological_order = ()
 
     def add_prerequisite(self, topic_from, topic_to):
         """Add a directed edge indicating that topic_from is a prerequisite for topic_to"""
         self.graph.add_edge(topic_from, topic_to)
+        self.topological_order = ()
 
     def get_next_topics(self, current_topic):
         """Returns topics that directly follow the current topic"""
@@ -27,6 +34,7 @@ class KnowledgeGraph:
     
     def build_dag_from_dict(self, topics_dict):
         self.graph = nx.DiGraph()
+        self.topological_order = ()
 
         # Previous node variable to keep track of the last node added
         # This will help in linking the sequential nodes across different keys
@@ -47,11 +55,84 @@ class KnowledgeGraph:
                 prev_node = child
         return
 
+    def build_prerequisite_dag(self, prerequisites=None, topics=None):
+        """
+        Build the prerequisite DAG: an edge A -> B means A has to be mastered before B.
+
+        :param prerequisites: topic -> list of its prerequisites, math_taxonomy.topic_prerequisites by default
+        :param topics: topics in taxonomy order, every subtopic of math_taxonomy by default.
+                       The position of a topic is its difficulty and breaks ties in the topological order.
+        """
+        import src.KnowledgeGraphs.math_taxonomy as mt
+        if prerequisites is None:
+            prerequisites = mt.topic_prerequisites
+        if topics is None:
+            topics = [subtopic for subtopics in mt.topics_and_subtopics.values() for subtopic in subtopics]
+
+        graph = nx.DiGraph()
+        for difficulty_level, topic in enumerate(topics, start=1):
+            graph.add_node(topic, difficulty=difficulty_level)
+        for topic, topic_prerequisites in prerequisites.items():
+            for prerequisite in topic_prerequisites:
+                if prerequisite not in graph or topic not in graph:
+                    raise ValueError(f"Unknown topic in prerequisite {prerequisite} -> {topic}")
+                graph.add_edge(prerequisite, topic)
+
+        if not nx.is_directed_acyclic_graph(graph):
+            cycle = " -> ".join(edge[0] for edge in nx.find_cycle(graph))
+            raise ValueError(f"Prerequisites contain a cycle: {cycle}")
+
+        # Keep only the direct prerequisites, implied ones add nothing to the schedule
+        self.graph = nx.transitive_reduction(graph)
+        self.graph.add_nodes_from(graph.nodes(data=True))
+        self._cache_schedule()
+
+    def _cache_schedule(self):
+        """Precompute the topological order and the prerequisite count of every topic"""
+        self.topological_order = tuple(nx.lexicographical_topological_sort(
+            self.graph, key=lambda topic: self.graph.nodes[topic].get('difficulty', 0)))
+        self.topological_rank = {topic: rank for rank, topic in enumerate(self.topological_order)}
+        self.prerequisite_counts = dict(self.graph.in_degree())
+        self.entry_topics = tuple(topic for topic in self.topological_order if self.prerequisite_counts[topic] == 0)
+
+    def get_prerequisites(self, topic_name):
+        """Topics that directly have to be mastered before topic_name"""
+        return list(self.graph.predecessors(topic_name))
+
+    def get_frontier(self, mastered):
+        """
+        Topics not mastered yet whose prerequisites are all mastered, in topological order.
+        Only the entry topics and the successors of mastered topics are looked at,
+        so the cost grows with the mastered set and not with the graph.
+        """
+        if not self.topological_order and self.graph:
+            self._cache_schedule()
+
+        mastered = set(mastered)
+        satisfied = {}
+        for topic in mastered:
+            for successor in self.graph.successors(topic):
+                satisfied[successor] = satisfied.get(successor, 0) + 1
+
+        frontier = [topic for topic in self.entry_topics if topic not in mastered]
+        frontier += [topic for topic, count in satisfied.items()
+                     if count == self.prerequisite_counts[topic] and topic not in mastered]
+        frontier.sort(key=self.topological_rank.__getitem__)
+        return frontier
+
+    def get_next_topic(self, mastered):
+        """The earliest unlocked topic in topological order, None when everything is mastered"""
+        frontier = self.get_frontier(mastered)
+        return frontier[0] if frontier else None
+
     def plot_dag(self):
         nx.draw(self.graph, with_labels=True)
         plt.show()
 
     def find_first_node(self):
+        if self.topological_order:
+            return self.topological_order[0]
+
         # Find and return the first node with no incoming edges.
         for node in self.graph.nodes:
             if self.graph.in_degree(node) == 0:
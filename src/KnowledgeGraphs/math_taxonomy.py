@@ -1,17 +1,4 @@
-topic_colors = {  # Green to Red
-    "Arithmetic": "97,130,100",
-    "Algebra": "109,151,110",
-    "Geometry": "121,172,120",
-    "Trigonometry": "176,217,177",
-    "Statistics_and_Probability": "228,247,143",
-    "Pre-Calculus": "253,255,188",
-    "Calculus": "255,238,187",
-    "Advanced_Calculus": "255,220,184",
-    "Discrete_Mathematics": "255,193,182",
-    "Linear_Algebra": "250,135,127",
-    "Advanced_Statistics": "239,75,75",
-    "Mathematical_Proofs_and_Theory": "189,87,78",
-}
+from src.KnowledgeGraphs.topic_colors import topic_colors  # kept apart, so the UI colors load without the taxonomy
 
 topics_and_subtopics = {
     "Arithmetic": [
@@ -1611,3 +1598,108 @@ subsubsub_topics = {
         "Mathematical_Proofs_and_Theory->Topology->Compactness->Properties_of_Compact_Sets",
     ],
 }
+
+
+# Prerequisites between subtopics: subtopic -> subtopics that have to be mastered first.
+# Subtopics not listed have no prerequisites. Redundant (transitive) entries are allowed,
+# KnowledgeGraph.build_prerequisite_dag removes them.
+topic_prerequisites = {
+    # Arithmetic
+    "Arithmetic->Basic_Operations": ["Arithmetic->Number_Sense"],
+    "Arithmetic->Number_Properties": ["Arithmetic->Basic_Operations"],
+    "Arithmetic->Laws": ["Arithmetic->Basic_Operations"],
+    "Arithmetic->Place_Values": ["Arithmetic->Number_Sense"],
+    "Arithmetic->Time_and_Calendar": ["Arithmetic->Number_Sense"],
+    "Arithmetic->Money": ["Arithmetic->Basic_Operations", "Arithmetic->Place_Values"],
+    "Arithmetic->Estimation_and_Rounding": ["Arithmetic->Place_Values"],
+    "Arithmetic->Negative_Numbers": ["Arithmetic->Basic_Operations"],
+    "Arithmetic->Absolute_Value": ["Arithmetic->Negative_Numbers"],
+    "Arithmetic->Fractions": ["Arithmetic->Basic_Operations", "Arithmetic->Number_Sense"],
+    "Arithmetic->Decimals": ["Arithmetic->Fractions", "Arithmetic->Place_Values"],
+    "Arithmetic->Factors_and_Multiples": ["Arithmetic->Basic_Operations", "Arithmetic->Number_Properties"],
+    "Arithmetic->Exponents_and_Square_Roots": ["Arithmetic->Factors_and_Multiples"],
+    "Arithmetic->Percentages": ["Arithmetic->Decimals", "Arithmetic->Fractions"],
+    "Arithmetic->Ratios_and_Proportions": ["Arithmetic->Fractions"],
+    "Arithmetic->Measurements_and_Units": ["Arithmetic->Decimals"],
+    "Arithmetic->Graphs": ["Arithmetic->Number_Sense"],
+    "Arithmetic->Patterns_and_Sequences": ["Arithmetic->Basic_Operations"],
+
+    # Algebra
+    "Algebra->Algebraic_Expressions": ["Arithmetic->Laws", "Arithmetic->Negative_Numbers", "Arithmetic->Exponents_and_Square_Roots"],
+    "Algebra->Linear_Equations": ["Algebra->Algebraic_Expressions", "Arithmetic->Fractions"],
+    "Algebra->Inequalities": ["Algebra->Linear_Equations", "Arithmetic->Absolute_Value"],
+    "Algebra->Polynomials": ["Algebra->Algebraic_Expressions"],
+    "Algebra->Systems_of_Equations": ["Algebra->Linear_Equations"],
+    "Algebra->Functions": ["Algebra->Linear_Equations", "Arithmetic->Graphs"],
+    "Algebra->Quadratic_Equations": ["Algebra->Polynomials", "Algebra->Linear_Equations"],
+
+    # Geometry
+    "Geometry->Basic_Geometric_Shapes": ["Arithmetic->Recognizing_Shapes"],
+    "Geometry->Congruence_and_Similarity": ["Geometry->Basic_Geometric_Shapes", "Arithmetic->Ratios_and_Proportions"],
+    "Geometry->Pythagorean_Theorem": ["Geometry->Basic_Geometric_Shapes", "Arithmetic->Exponents_and_Square_Roots"],
+    "Geometry->Circles": ["Geometry->Basic_Geometric_Shapes"],
+    "Geometry->Area_and_Volume": ["Geometry->Basic_Geometric_Shapes", "Arithmetic->Measurements_and_Units"],
+    "Geometry->Coordinate_Geometry": ["Algebra->Linear_Equations", "Geometry->Pythagorean_Theorem", "Arithmetic->Graphs"],
+
+    # Trigonometry
+    "Trigonometry->Basic_Functions": ["Geometry->Pythagorean_Theorem", "Algebra->Functions"],
+    "Trigonometry->Trigonometric_Ratios": ["Trigonometry->Basic_Functions", "Geometry->Congruence_and_Similarity"],
+    "Trigonometry->Graphs_of_Trigonometric_Functions": ["Trigonometry->Trigonometric_Ratios", "Geometry->Coordinate_Geometry"],
+    "Trigonometry->Trigonometric_Identities": ["Trigonometry->Trigonometric_Ratios", "Algebra->Algebraic_Expressions"],
+    "Trigonometry->Applications": ["Trigonometry->Trigonometric_Ratios"],
+
+    # Statistics and probability
+    "Statistics_and_Probability->Descriptive_Statistics": ["Arithmetic->Graphs", "Arithmetic->Decimals"],
+    "Statistics_and_Probability->Probability_Basics": ["Arithmetic->Fractions", "Arithmetic->Percentages"],
+    "Statistics_and_Probability->Combinations_and_Permutations": ["Statistics_and_Probability->Probability_Basics", "Arithmetic->Factors_and_Multiples"],
+    "Statistics_and_Probability->Random_Variables_and_Distributions": ["Statistics_and_Probability->Probability_Basics", "Statistics_and_Probability->Descriptive_Statistics", "Algebra->Functions"],
+    "Statistics_and_Probability->Inferential_Statistics": ["Statistics_and_Probability->Random_Variables_and_Distributions"],
+
+    # Pre-calculus
+    "Pre-Calculus->Advanced_Algebra": ["Algebra->Quadratic_Equations", "Algebra->Functions"],
+    "Pre-Calculus->Complex_Numbers": ["Algebra->Quadratic_Equations"],
+    "Pre-Calculus->Exponential_and_Logarithmic_Functions": ["Algebra->Functions", "Arithmetic->Exponents_and_Square_Roots"],
+    "Pre-Calculus->Advanced_Trigonometry": ["Trigonometry->Trigonometric_Identities", "Trigonometry->Graphs_of_Trigonometric_Functions"],
+    "Pre-Calculus->Sequences_and_Series": ["Arithmetic->Patterns_and_Sequences", "Algebra->Functions"],
+    "Pre-Calculus->Matrices": ["Algebra->Systems_of_Equations"],
+
+    # Calculus
+    "Calculus->Limits": ["Pre-Calculus->Advanced_Algebra", "Pre-Calculus->Exponential_and_Logarithmic_Functions"],
+    "Calculus->Derivatives": ["Calculus->Limits", "Trigonometry->Basic_Functions"],
+    "Calculus->Integration": ["Calculus->Derivatives", "Geometry->Area_and_Volume"],
+
+    # Advanced calculus
+    "Advanced_Calculus->Series_and_Sequences": ["Calculus->Integration", "Pre-Calculus->Sequences_and_Series"],
+    "Advanced_Calculus->Multivariable_Calculus": ["Calculus->Integration", "Geometry->Coordinate_Geometry"],
+    "Advanced_Calculus->Vector_Calculus": ["Advanced_Calculus->Multivariable_Calculus", "Linear_Algebra->Vector_Spaces"],
+    "Advanced_Calculus->Differential_Equations": ["Calculus->Integration"],
+    "Advanced_Calculus->Special_Topics": ["Advanced_Calculus->Series_and_Sequences", "Advanced_Calculus->Differential_Equations", "Pre-Calculus->Complex_Numbers"],
+
+    # Discrete mathematics
+    "Discrete_Mathematics->Logic_and_Proofs": ["Algebra->Algebraic_Expressions"],
+    "Discrete_Mathematics->Set_Theory": ["Discrete_Mathematics->Logic_and_Proofs"],
+    "Discrete_Mathematics->Combinatorics": ["Discrete_Mathematics->Set_Theory", "Statistics_and_Probability->Combinations_and_Permutations"],
+    "Discrete_Mathematics->Graph_Theory": ["Discrete_Mathematics->Set_Theory"],
+    "Discrete_Mathematics->Algorithms_and_Complexity": ["Discrete_Mathematics->Graph_Theory", "Pre-Calculus->Exponential_and_Logarithmic_Functions"],
+
+    # Linear algebra
+    "Linear_Algebra->Systems_of_Linear_Equations": ["Pre-Calculus->Matrices"],
+    "Linear_Algebra->Vector_Spaces": ["Linear_Algebra->Systems_of_Linear_Equations", "Discrete_Mathematics->Set_Theory"],
+    "Linear_Algebra->Linear_Transformations": ["Linear_Algebra->Vector_Spaces", "Algebra->Functions"],
+    "Linear_Algebra->Advanced_Matrices": ["Linear_Algebra->Linear_Transformations", "Pre-Calculus->Matrices"],
+    "Linear_Algebra->Advanced_Topics": ["Linear_Algebra->Advanced_Matrices", "Pre-Calculus->Complex_Numbers"],
+
+    # Advanced statistics
+    "Advanced_Statistics->Regression_Analysis": ["Statistics_and_Probability->Inferential_Statistics", "Linear_Algebra->Systems_of_Linear_Equations"],
+    "Advanced_Statistics->ANOVA": ["Statistics_and_Probability->Inferential_Statistics"],
+    "Advanced_Statistics->Nonparametric_Tests": ["Statistics_and_Probability->Inferential_Statistics"],
+    "Advanced_Statistics->Time_Series_Analysis": ["Advanced_Statistics->Regression_Analysis"],
+    "Advanced_Statistics->Bayesian_Statistics": ["Statistics_and_Probability->Random_Variables_and_Distributions", "Calculus->Integration"],
+
+    # Mathematical proofs and theory
+    "Mathematical_Proofs_and_Theory->Introduction_to_Proofs": ["Discrete_Mathematics->Logic_and_Proofs"],
+    "Mathematical_Proofs_and_Theory->Number_Theory": ["Mathematical_Proofs_and_Theory->Introduction_to_Proofs", "Arithmetic->Factors_and_Multiples"],
+    "Mathematical_Proofs_and_Theory->Group_Theory": ["Mathematical_Proofs_and_Theory->Introduction_to_Proofs", "Discrete_Mathematics->Set_Theory"],
+    "Mathematical_Proofs_and_Theory->Real_Analysis": ["Mathematical_Proofs_and_Theory->Introduction_to_Proofs", "Calculus->Integration"],
+    "Mathematical_Proofs_and_Theory->Topology": ["Mathematical_Proofs_and_Theory->Real_Analysis", "Discrete_Mathematics->Set_Theory"],
+}
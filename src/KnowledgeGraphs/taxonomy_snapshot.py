@@ -0,0 +1,167 @@
+"""
+Binary snapshot of the math taxonomy TopicGraph.
+
+    python -m src.KnowledgeGraphs.taxonomy_snapshot [path]
+
+compiles math_taxonomy.py into a versioned file holding the node arrays, the CSR
+children and the labels. At startup the file is memory-mapped and the arrays are
+used in place, so neither math_taxonomy.py nor the tree walk of TopicGraph runs.
+The header stores a SHA-256 of math_taxonomy.py: when the taxonomy is edited the
+snapshot is stale and load_or_build_snapshot() rebuilds it.
+
+Layout (native byte order, all counts are int32):
+    header: magic, format version, byte order mark, checksum, node count, child count, label bytes
+    int32[nodes]     parents (-1 for top level topics)
+    int32[nodes]     depths
+    int32[nodes]     sibling_index
+    int32[nodes]     subtree_end
+    int32[nodes + 1] child_offsets
+    int32[children]  child_ids
+    int32[nodes + 1] label_offsets
+    bytes            UTF-8 labels
+"""
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+from src import globals
+from src.KnowledgeGraphs.topic_graph import TopicGraph, build_topic_graph
+
+MAGIC = b"VTTG"
+FORMAT_VERSION = 1
+BYTE_ORDER_MARK = 0x01020304
+HEADER = struct.Struct("=4sII32sIII")
+
+TAXONOMY_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "math_taxonomy.py")
+
+logger = logging.getLogger(__name__)
+
+
+class StaleSnapshotError(ValueError):
+    """The snapshot is missing, corrupt, of another format or built from another taxonomy"""
+
+
+def taxonomy_checksum(source: str = TAXONOMY_SOURCE) -> bytes:
+    with open(source, "rb") as f:
+        return hashlib.sha256(f.read()).digest()
+
+
+def write_snapshot(graph: TopicGraph, path: str, checksum: bytes):
+    """Write graph to path through a temporary file and an atomic rename"""
+    labels = [name.encode("utf-8") for name in graph.names]
+    label_offsets = [0]
+    for label in labels:
+        label_offsets.append(label_offsets[-1] + len(label))
+    blob = b"".join(labels)
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # A unique temporary file, so processes building the snapshot at the same time never share one
+    fd, tmp_path = tempfile.mkstemp(dir=directory or ".", prefix=os.path.basename(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, BYTE_ORDER_MARK, checksum,
+                                len(graph.names), len(graph.child_ids), len(blob)))
+            for values in (graph.parents, graph.depths, graph.sibling_index, graph.subtree_end,
+                           graph.child_offsets, graph.child_ids, label_offsets):
+                array("i", values).tofile(f)
+            f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def read_snapshot(path: str, checksum: bytes = None) -> TopicGraph:
+    """
+    Map the snapshot at path into a TopicGraph.
+    Raises StaleSnapshotError when it does not match checksum or this format version.
+    """
+    try:
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError) as e:
+        raise StaleSnapshotError(f"Cannot map {path}: {e}") from e
+
+    try:
+        graph = _graph_from_buffer(buffer, path, checksum)
+    except BaseException:
+        try:
+            buffer.close()
+        except BufferError:  # views into the mapping are still held by the traceback, they free it when released
+            pass
+        raise
+    graph._buffer = buffer  # the arrays point into the mapping
+    return graph
+
+
+def _graph_from_buffer(buffer, path: str, checksum: bytes = None) -> TopicGraph:
+    if len(buffer) < HEADER.size:
+        raise StaleSnapshotError(f"{path} is truncated")
+    magic, version, byte_order_mark, stored_checksum, nodes, children, label_bytes = HEADER.unpack_from(buffer)
+    if magic != MAGIC or version != FORMAT_VERSION or byte_order_mark != BYTE_ORDER_MARK:
+        raise StaleSnapshotError(f"{path} has another format")
+    if checksum is not None and stored_checksum != checksum:
+        raise StaleSnapshotError(f"{path} was built from another taxonomy")
+
+    itemsize = array("i").itemsize
+    sizes = (nodes, nodes, nodes, nodes, nodes + 1, children, nodes + 1)
+    if len(buffer) != HEADER.size + sum(sizes) * itemsize + label_bytes:
+        raise StaleSnapshotError(f"{path} is truncated")
+
+    view = memoryview(buffer)
+    arrays, offset = [], HEADER.size
+    for size in sizes:
+        arrays.append(view[offset:offset + size * itemsize].cast("i"))
+        offset += size * itemsize
+    parents, depths, sibling_index, subtree_end, child_offsets, child_ids, label_offsets = arrays
+
+    labels = view[offset:offset + label_bytes]
+    names = [sys.intern(str(labels[label_offsets[node]:label_offsets[node + 1]], "utf-8")) for node in range(nodes)]
+
+    return TopicGraph.from_arrays(names, parents, depths, sibling_index, child_offsets, child_ids, subtree_end)
+
+
+def build_snapshot(path: str = None, checksum: bytes = None) -> TopicGraph:
+    """Compile math_taxonomy.py into a snapshot at path"""
+    path = path or globals.TAXONOMY_SNAPSHOT_PATH
+    graph = build_topic_graph()
+    write_snapshot(graph, path, checksum or taxonomy_checksum())
+    logger.info(f"Wrote taxonomy snapshot with {len(graph)} topics to {path}")
+    return graph
+
+
+def load_or_build_snapshot(path: str = None) -> TopicGraph:
+    """The snapshot at path, rebuilt first when it is missing or math_taxonomy.py changed"""
+    path = path or globals.TAXONOMY_SNAPSHOT_PATH
+    checksum = taxonomy_checksum()
+    try:
+        return read_snapshot(path, checksum)
+    except StaleSnapshotError as e:
+        logger.info(f"Rebuilding taxonomy snapshot: {e}")
+
+    graph = build_topic_graph()
+    try:
+        write_snapshot(graph, path, checksum)
+    except OSError as e:
+        # A read-only checkout still works, it only pays for the build on every start
+        logger.warning(f"Cannot write taxonomy snapshot {path}: {e}")
+    return graph
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else globals.TAXONOMY_SNAPSHOT_PATH
+    graph = build_snapshot(path)
+    print(f"Wrote {len(graph)} topics ({os.path.getsize(path)} bytes) to {path}")
+
+
+if __name__ == "__main__":
+    main()
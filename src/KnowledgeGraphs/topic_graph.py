@@ -0,0 +1,202 @@
+from bisect import bisect_left
+from functools import lru_cache
+from types import MappingProxyType
+
+
+class TopicGraph:
+    """
+    Immutable index of the math taxonomy tree.
+
+    Every topic gets an integer id in depth-first (taxonomy) order, so the subtree
+    of a topic is the id range [id, subtree_end[id]) and the leaves come out in the
+    order the FSMs step through them. Parents, depths, sibling positions, children
+    (stored CSR style in child_offsets/child_ids) and paths to the root are computed
+    once, so navigating the taxonomy never re-scans the taxonomy dicts or splits
+    topic names on '->'. Use get_topic_graph() for the process-wide instance.
+    """
+
+    def __init__(self, roots, children_by_parent):
+        """
+        :param roots: top level topic names, in order
+        :param children_by_parent: topic name -> list of its subtopic names
+        """
+        names, parents, depths, sibling_index = [], [], [], []
+        children = []
+
+        # Iterative depth-first walk so the ids follow the taxonomy order
+        stack = [(name, -1, 0, position) for position, name in reversed(list(enumerate(roots)))]
+        while stack:
+            name, parent, depth, position = stack.pop()
+            node = len(names)
+            names.append(name)
+            parents.append(parent)
+            depths.append(depth)
+            sibling_index.append(position)
+            children.append([])
+            if parent >= 0:
+                children[parent].append(node)
+            for child_position, child in reversed(list(enumerate(children_by_parent.get(name, ())))):
+                stack.append((child, node, depth + 1, child_position))
+
+        if len(set(names)) != len(names):
+            raise ValueError("Topic names must be unique")
+
+        child_offsets, child_ids = [0], []
+        for node_children in children:
+            child_ids.extend(node_children)
+            child_offsets.append(len(child_ids))
+
+        subtree_end = list(range(1, len(names) + 1))
+        for node in reversed(range(len(names))):
+            if parents[node] >= 0:
+                subtree_end[parents[node]] = max(subtree_end[parents[node]], subtree_end[node])
+
+        self._index(names, tuple(parents), tuple(depths), tuple(sibling_index),
+                    tuple(child_offsets), tuple(child_ids), tuple(subtree_end))
+
+    def _index(self, names, parents, depths, sibling_index, child_offsets, child_ids, subtree_end):
+        """Set the node arrays and derive the lookup indexes. Arrays may be tuples or memoryviews."""
+        self.names = tuple(names)
+        self.ids = MappingProxyType({name: node for node, name in enumerate(self.names)})
+        self.parents = parents
+        self.depths = depths
+        self.sibling_index = sibling_index
+        self.child_offsets = child_offsets
+        self.child_ids = child_ids
+        self.subtree_end = subtree_end
+
+        paths = []
+        for node, parent in enumerate(parents):
+            # Parents always have smaller ids, so their path is already known
+            paths.append((node,) + (paths[parent] if parent >= 0 else ()))
+        self._paths = tuple(paths)
+
+        self.roots = tuple(node for node, parent in enumerate(parents) if parent < 0)
+        self.leaves = tuple(node for node in range(len(self.names)) if child_offsets[node] == child_offsets[node + 1])
+        self.leaf_names = tuple(self.names[node] for node in self.leaves)
+        self.leaf_positions = MappingProxyType({node: position for position, node in enumerate(self.leaves)})
+
+        # Sorted names for prefix lookups with bisect
+        self._sorted_names = tuple(sorted(self.names))
+
+    @classmethod
+    def from_arrays(cls, names, parents, depths, sibling_index, child_offsets, child_ids, subtree_end):
+        """Rebuild a TopicGraph from the arrays of another one, e.g. a taxonomy snapshot"""
+        graph = cls.__new__(cls)
+        graph._index(names, parents, depths, sibling_index, child_offsets, child_ids, subtree_end)
+        return graph
+
+    @classmethod
+    def from_taxonomy(cls, topics_and_subtopics, *deeper_levels):
+        """Build from math_taxonomy style dicts: topics_and_subtopics, subsub_topics, subsubsub_topics, ..."""
+        children_by_parent = dict(topics_and_subtopics)
+        for level in deeper_levels:
+            children_by_parent.update(level)
+        return cls(list(topics_and_subtopics), children_by_parent)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.ids
+
+    ##################################################
+    # Lookups by name
+    ##################################################
+    def id_of(self, name: str) -> int:
+        return self.ids[name]
+
+    def parent(self, name: str):
+        """Name of the parent topic, None for a top level topic"""
+        parent = self.parents[self.ids[name]]
+        return self.names[parent] if parent >= 0 else None
+
+    def children(self, name: str) -> tuple:
+        node = self.ids[name]
+        return tuple(self.names[child] for child in self.child_ids[self.child_offsets[node]:self.child_offsets[node + 1]])
+
+    def siblings(self, name: str) -> tuple:
+        """Topics sharing the parent of name, name included"""
+        parent = self.parents[self.ids[name]]
+        if parent < 0:
+            return tuple(self.names[root] for root in self.roots)
+        return self.children(self.names[parent])
+
+    def depth(self, name: str) -> int:
+        """0 for a top level topic"""
+        return self.depths[self.ids[name]]
+
+    def path_to_root(self, name: str) -> tuple:
+        """name, its parent, ... up to its top level topic"""
+        return tuple(self.names[node] for node in self._paths[self.ids[name]])
+
+    def ancestors(self, name: str) -> tuple:
+        """Parent first, top level topic last"""
+        return self.path_to_root(name)[1:]
+
+    def root(self, name: str) -> str:
+        return self.names[self._paths[self.ids[name]][-1]]
+
+    def is_ancestor(self, ancestor: str, name: str) -> bool:
+        ancestor_id, node = self.ids[ancestor], self.ids[name]
+        return ancestor_id < node < self.subtree_end[ancestor_id]
+
+    def is_leaf(self, name: str) -> bool:
+        return self.ids[name] in self.leaf_positions
+
+    def leaves_under(self, name: str) -> tuple:
+        """Leaf topics of the subtree of name, in taxonomy order"""
+        node = self.ids[name]
+        start = bisect_left(self.leaves, node)
+        end = bisect_left(self.leaves, self.subtree_end[node])
+        return self.leaf_names[start:end]
+
+    def next_sibling(self, name: str):
+        siblings = self.siblings(name)
+        position = self.sibling_index[self.ids[name]] + 1
+        return siblings[position] if position < len(siblings) else None
+
+    def next_topic(self, name: str):
+        """
+        The topic to learn after name: the next leaf in taxonomy order for a leaf,
+        the first leaf after its subtree otherwise. None after the last leaf.
+        """
+        node = self.ids[name]
+        position = self.leaf_positions.get(node)
+        position = position + 1 if position is not None else bisect_left(self.leaves, self.subtree_end[node])
+        return self.leaf_names[position] if position < len(self.leaves) else None
+
+    ##################################################
+    # Prefix lookups
+    ##################################################
+    def with_prefix(self, prefix: str) -> tuple:
+        """Names starting with prefix, in taxonomy order"""
+        return tuple(self.names[node] for node in sorted(self._prefix_ids(prefix)))
+
+    def first_leaf_position(self, prefix: str) -> int:
+        """Position in leaf_names of the first leaf starting with prefix, 0 when there is none"""
+        positions = (self.leaf_positions.get(node) for node in self._prefix_ids(prefix))
+        return min((position for position in positions if position is not None), default=0)
+
+    def _prefix_ids(self, prefix: str):
+        sorted_names = self._sorted_names
+        for index in range(bisect_left(sorted_names, prefix), len(sorted_names)):
+            if not sorted_names[index].startswith(prefix):
+                break
+            yield self.ids[sorted_names[index]]
+
+
+def build_topic_graph() -> TopicGraph:
+    """Build the TopicGraph of src/KnowledgeGraphs/math_taxonomy.py"""
+    import src.KnowledgeGraphs.math_taxonomy as mt
+    return TopicGraph.from_taxonomy(mt.topics_and_subtopics, mt.subsub_topics, mt.subsubsub_topics)
+
+
+@lru_cache(maxsize=None)
+def get_topic_graph() -> TopicGraph:
+    """
+    The TopicGraph of the math taxonomy, loaded once per process from the taxonomy
+    snapshot, which is rebuilt first when math_taxonomy.py changed.
+    """
+    from src.KnowledgeGraphs.taxonomy_snapshot import load_or_build_snapshot
+    return load_or_build_snapshot()
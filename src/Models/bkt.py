@@ -0,0 +1,230 @@
+import csv
+import logging
+import os
+import threading
+from functools import lru_cache
+
+import numpy as np
+
+from src import globals
+
+PARAMETER_NAMES = ("p_init", "p_learn", "p_guess", "p_slip")
+
+
+class BKTEngine:
+    """
+    Bayesian Knowledge Tracing for every student and skill at once.
+
+    P(known) of all students x all skills lives in one float32 array, and the four
+    BKT parameters of each skill in float arrays, so a batch of observations is
+    applied with a handful of NumPy operations. Observations of the same
+    (student, skill) pair within a batch are applied in batch order, so a batch
+    gives the same result as feeding the observations one by one.
+    """
+
+    def __init__(self, skills, p_init=None, p_learn=None, p_guess=None, p_slip=None,
+                 mastery_threshold=None, initial_students=64):
+        """
+        :param skills: skill names, e.g. the topics of the taxonomy TopicGraph
+        :param p_init: prior P(known) of a new student, a scalar or one value per skill
+        :param p_learn: P(unknown -> known) after a practice opportunity
+        :param p_guess: P(correct | unknown)
+        :param p_slip: P(incorrect | known)
+        :param mastery_threshold: P(known) at which a skill counts as mastered
+        :param initial_students: rows allocated up front, the array doubles when full
+        """
+        self.skills = tuple(skills)
+        self.skill_ids = {skill: index for index, skill in enumerate(self.skills)}
+        self.mastery_threshold = mastery_threshold if mastery_threshold is not None else globals.BKT_MASTERY_THRESHOLD
+
+        defaults = dict(zip(PARAMETER_NAMES, (globals.BKT_P_INIT, globals.BKT_P_LEARN, globals.BKT_P_GUESS, globals.BKT_P_SLIP)))
+        given = dict(zip(PARAMETER_NAMES, (p_init, p_learn, p_guess, p_slip)))
+        for name in PARAMETER_NAMES:
+            value = given[name] if given[name] is not None else defaults[name]
+            setattr(self, name, np.broadcast_to(np.asarray(value, dtype=np.float32), (len(self.skills),)).copy())
+
+        self.student_ids = {}
+        self.known = np.empty((0, len(self.skills)), dtype=np.float32)
+        self.observations = 0
+        self._lock = threading.Lock()
+        self._grow(initial_students)
+
+    ##################################################
+    # Ids
+    ##################################################
+    def student_index(self, student) -> int:
+        """Row of a student, allocating one with the prior for a new student"""
+        row = self.student_ids.get(student)
+        if row is None:
+            with self._lock:
+                row = self.student_ids.get(student)
+                if row is None:
+                    row = len(self.student_ids)
+                    if row >= len(self.known):
+                        self._grow(2 * len(self.known))
+                    self.known[row] = self.p_init
+                    self.student_ids[student] = row
+        return row
+
+    def encode(self, students, skills):
+        """Student and skill ids (or names) -> (row array, skill column array)"""
+        return self._encode(students, self.student_index), self._encode(skills, self.skill_ids.__getitem__)
+
+    @staticmethod
+    def _encode(values, lookup):
+        # Integer arrays are already rows/columns, the fast path for large batches
+        if isinstance(values, np.ndarray) and np.issubdtype(values.dtype, np.integer):
+            return values.astype(np.intp, copy=False)
+        return np.fromiter((value if isinstance(value, (int, np.integer)) else lookup(value) for value in values),
+                           dtype=np.intp)
+
+    def _grow(self, capacity: int):
+        known = np.empty((max(capacity, 1), len(self.skills)), dtype=np.float32)
+        known[:len(self.known)] = self.known
+        known[len(self.known):] = self.p_init
+        self.known = known
+
+    ##################################################
+    # Updates and queries
+    ##################################################
+    def update(self, students, skills, correct, predict=False) -> np.ndarray:
+        """
+        Apply a batch of observations.
+
+        :param students: student rows (ints) or student ids
+        :param skills: skill columns (ints) or skill names
+        :param correct: 1/True for a correct answer, 0/False otherwise
+        :param predict: return P(correct) of each observation just before it instead
+        :return: P(known) of each observed (student, skill) after its observation
+        """
+        rows, columns = self.encode(students, skills)
+        correct = np.asarray(correct, dtype=bool)
+        if not len(rows):
+            return np.empty(0, dtype=np.float32)
+
+        result = np.empty(len(rows), dtype=np.float32)
+        with self._lock:
+            for batch in self._conflict_free_batches(rows, columns):
+                result[batch] = self._apply(rows[batch], columns[batch], correct[batch], predict)
+            self.observations += len(rows)
+        return result
+
+    def _apply(self, rows, columns, correct, predict=False):
+        known = self.known[rows, columns]
+        guess, slip, learn = self.p_guess[columns], self.p_slip[columns], self.p_learn[columns]
+        prediction = known * (1 - slip) + (1 - known) * guess if predict else None
+
+        # Posterior given the answer, then the chance of learning from the opportunity
+        likelihood_known = np.where(correct, 1 - slip, slip)
+        likelihood_unknown = np.where(correct, guess, 1 - guess)
+        posterior = known * likelihood_known / (known * likelihood_known + (1 - known) * likelihood_unknown)
+        updated = posterior + (1 - posterior) * learn
+
+        self.known[rows, columns] = updated
+        return prediction if predict else updated
+
+    def _conflict_free_batches(self, rows, columns):
+        """Split a batch into index groups holding each (student, skill) pair at most once, in order"""
+        keys = rows * len(self.skills) + columns
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        group_start = np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]
+        if group_start.all():
+            yield slice(None)
+            return
+        # Occurrence number of each observation within its pair
+        start_positions = np.maximum.accumulate(np.where(group_start, np.arange(len(keys)), 0))
+        occurrence = np.empty(len(keys), dtype=np.intp)
+        occurrence[order] = np.arange(len(keys)) - start_positions
+        for index in range(occurrence.max() + 1):
+            yield np.flatnonzero(occurrence == index)
+
+    def mastery(self, students, skills) -> np.ndarray:
+        """P(known) for each (student, skill)"""
+        rows, columns = self.encode(students, skills)
+        return self.known[rows, columns]
+
+    def predict_correct(self, students, skills) -> np.ndarray:
+        """P(the next answer is correct) for each (student, skill)"""
+        rows, columns = self.encode(students, skills)
+        known = self.known[rows, columns]
+        return known * (1 - self.p_slip[columns]) + (1 - known) * self.p_guess[columns]
+
+    def is_mastered(self, students, skills) -> np.ndarray:
+        return self.mastery(students, skills) >= self.mastery_threshold
+
+    def student_mastery(self, student) -> dict:
+        """Skill -> P(known) of one student"""
+        return dict(zip(self.skills, self.known[self.student_index(student)].tolist()))
+
+    def replay(self, events: dict) -> int:
+        """
+        Apply recorded attempts, e.g. AttemptEventStore.scan(), in their order.
+        Skill ids are taken as columns, as for an engine over the TopicGraph names.
+        Returns the number of attempts applied.
+        """
+        known = (events['skill_id'] >= 0) & (events['skill_id'] < len(self.skills))
+        self.update(events['student_id'][known].tolist(), events['skill_id'][known], events['correct'][known])
+        return int(known.sum())
+
+    ##################################################
+    # Parameters
+    ##################################################
+    def set_parameters(self, table: dict):
+        """Set per-skill parameters from skill -> {p_init, p_learn, p_guess, p_slip}. Unknown skills are skipped."""
+        for skill, parameters in table.items():
+            column = self.skill_ids.get(skill)
+            if column is None:
+                continue
+            for name in PARAMETER_NAMES:
+                if name in parameters:
+                    getattr(self, name)[column] = parameters[name]
+
+    def load_parameters(self, path: str) -> int:
+        """Load a CSV parameter table (skill, p_init, p_learn, p_guess, p_slip). Returns the number of rows."""
+        table = read_parameter_table(path)
+        self.set_parameters(table)
+        return len(table)
+
+
+def read_parameter_table(path: str) -> dict:
+    with open(path, newline="", encoding="utf-8") as f:
+        return {row["skill"]: {name: float(row[name]) for name in PARAMETER_NAMES if row.get(name)}
+                for row in csv.DictReader(f)}
+
+
+def write_parameter_table(path: str, table: dict):
+    """Write skill -> parameters as CSV through a temporary file and an atomic rename"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(("skill",) + PARAMETER_NAMES)
+        for skill, parameters in table.items():
+            writer.writerow([skill] + [f"{parameters[name]:.6f}" for name in PARAMETER_NAMES])
+    os.replace(tmp_path, path)
+
+
+@lru_cache(maxsize=None)
+def get_default_tracer() -> BKTEngine:
+    """
+    Process-wide BKT engine over every taxonomy topic, with fitted parameters when a table exists.
+    The mastery of every student is rebuilt from the attempts in the event store.
+    """
+    from src.KnowledgeGraphs.topic_graph import get_topic_graph
+    from src.Tools.event_store import get_default_event_store
+    engine = BKTEngine(get_topic_graph().names)
+    if os.path.exists(globals.BKT_PARAMETERS_PATH):
+        try:
+            count = engine.load_parameters(globals.BKT_PARAMETERS_PATH)
+            logging.getLogger(__name__).info(f"Loaded BKT parameters for {count} skills")
+        except (OSError, ValueError, KeyError) as e:
+            logging.getLogger(__name__).error(f"Cannot load BKT parameters: {str(e)}")
+    try:
+        count = engine.replay(get_default_event_store().scan())
+        logging.getLogger(__name__).info(f"Replayed {count} attempt events")
+    except (OSError, ValueError, KeyError) as e:
+        logging.getLogger(__name__).error(f"Cannot replay attempt events: {str(e)}")
+    return engine
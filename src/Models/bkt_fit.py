@@ -0,0 +1,223 @@
+"""
+Fit per-skill BKT parameters from logged interactions with EM (Baum-Welch).
+
+    python -m src.Models.bkt_fit data/synthetic_student_data.csv [--output .cache/bkt_parameters.csv]
+                                 [--skill-column skill] [--processes N] [--iterations 50]
+
+The input is a CSV of (student_id, skill, outcome, date) rows, as written by
+src/KnowledgeGraphs/data_generation.py. Every skill is an independent two state
+HMM (unknown/known, no forgetting), so skills are fitted in parallel by a process
+pool. Within a skill the forward-backward passes step through time over all
+students at once: the sequences are sorted by length, so the students still
+active at step t are a prefix of the padded outcome matrix.
+
+The result is the CSV parameter table read by BKTEngine.load_parameters() and
+get_default_tracer().
+"""
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from src import globals
+from src.Models.bkt import PARAMETER_NAMES, write_parameter_table
+
+# Usual BKT bounds against degenerate fits where "known" means "answers wrong"
+MAX_GUESS = 0.3
+MAX_SLIP = 0.3
+EPSILON = 1e-6
+
+
+class SkillSequences:
+    """The outcomes of one skill as a padded (students x steps) matrix, longest sequence first"""
+
+    def __init__(self, skill, outcomes, lengths):
+        self.skill = skill
+        self.outcomes = outcomes  # int8, padded with 0 after each sequence
+        self.lengths = lengths
+        # active[t] = number of sequences that have a step t
+        self.active = np.searchsorted(-lengths, -np.arange(outcomes.shape[1]), side="left")
+
+    @classmethod
+    def from_rows(cls, skill, students, outcomes):
+        """Build from rows already ordered by (student, date)"""
+        starts = np.flatnonzero(np.r_[True, students[1:] != students[:-1]])
+        lengths = np.diff(np.r_[starts, len(students)])
+        order = np.argsort(-lengths, kind="stable")
+        starts, lengths = starts[order], lengths[order]
+
+        padded = np.zeros((len(lengths), lengths[0] if len(lengths) else 0), dtype=np.int8)
+        rows = np.repeat(np.arange(len(lengths)), lengths)
+        steps = np.arange(len(rows)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        padded[rows, steps] = outcomes[np.repeat(starts, lengths) + steps]
+        return cls(skill, padded, lengths)
+
+    def __len__(self):
+        return int(self.lengths.sum())
+
+
+def forward_backward(sequences: SkillSequences, p_init, p_learn, p_guess, p_slip):
+    """
+    Posterior state probabilities of every step.
+
+    :return: (gamma_known, xi_learn, log_likelihood) where gamma_known[i, t] is
+        P(known at step t) and xi_learn[i, t] is P(unknown at t, known at t + 1)
+    """
+    outcomes, active = sequences.outcomes, sequences.active
+    students, steps = outcomes.shape
+    correct = outcomes.astype(bool)
+    emit_known = np.where(correct, 1 - p_slip, p_slip)
+    emit_unknown = np.where(correct, p_guess, 1 - p_guess)
+
+    # Scaled forward pass, alpha[:, t] sums to 1 and scale[:, t] is P(o_t | o_<t)
+    alpha_known = np.zeros((students, steps))
+    scale = np.ones((students, steps))
+    unknown = (1 - p_init) * emit_unknown[:, 0]
+    known = p_init * emit_known[:, 0]
+    scale[:, 0] = unknown + known
+    alpha_known[:, 0] = known / scale[:, 0]
+    for t in range(1, steps):
+        n = active[t]
+        previous = alpha_known[:n, t - 1]
+        unknown = (1 - previous) * (1 - p_learn) * emit_unknown[:n, t]
+        known = (previous + (1 - previous) * p_learn) * emit_known[:n, t]
+        scale[:n, t] = unknown + known
+        alpha_known[:n, t] = known / scale[:n, t]
+
+    # Backward pass with the same scaling, beta stays 1 after the end of a sequence
+    beta_unknown = np.ones((students, steps))
+    beta_known = np.ones((students, steps))
+    xi_learn = np.zeros((students, steps))
+    for t in range(steps - 2, -1, -1):
+        n = active[t + 1]
+        next_unknown = emit_unknown[:n, t + 1] * beta_unknown[:n, t + 1] / scale[:n, t + 1]
+        next_known = emit_known[:n, t + 1] * beta_known[:n, t + 1] / scale[:n, t + 1]
+        beta_unknown[:n, t] = (1 - p_learn) * next_unknown + p_learn * next_known
+        beta_known[:n, t] = next_known
+        xi_learn[:n, t] = (1 - alpha_known[:n, t]) * p_learn * next_known
+
+    gamma_known = alpha_known * beta_known
+    return gamma_known, xi_learn, float(np.log(scale).sum())
+
+
+def fit_skill(sequences: SkillSequences, iterations: int = 50, tolerance: float = 1e-4, initial=None):
+    """
+    EM for the four BKT parameters of one skill.
+
+    :return: (skill, {p_init, p_learn, p_guess, p_slip}, log likelihood, iterations run)
+    """
+    parameters = dict(initial or zip(PARAMETER_NAMES, (globals.BKT_P_INIT, globals.BKT_P_LEARN,
+                                                       globals.BKT_P_GUESS, globals.BKT_P_SLIP)))
+    steps = sequences.outcomes.shape[1]
+    valid = np.arange(steps) < sequences.lengths[:, None]
+    has_next = np.arange(steps) < (sequences.lengths - 1)[:, None]
+    correct = sequences.outcomes.astype(bool) & valid
+
+    log_likelihood = -np.inf
+    for iteration in range(1, iterations + 1):
+        gamma_known, xi_learn, new_log_likelihood = forward_backward(sequences, **parameters)
+        gamma_unknown = np.where(valid, 1 - gamma_known, 0)
+        gamma_known = np.where(valid, gamma_known, 0)
+
+        unknown_total = gamma_unknown.sum()
+        known_total = gamma_known.sum()
+        parameters = {
+            "p_init": gamma_known[:, 0].mean(),
+            "p_learn": xi_learn.sum() / max(gamma_unknown[has_next].sum(), EPSILON),
+            "p_guess": gamma_unknown[correct].sum() / max(unknown_total, EPSILON),
+            "p_slip": (known_total - gamma_known[correct].sum()) / max(known_total, EPSILON),
+        }
+        parameters = {name: float(np.clip(value, EPSILON, 1 - EPSILON)) for name, value in parameters.items()}
+        parameters["p_guess"] = min(parameters["p_guess"], MAX_GUESS)
+        parameters["p_slip"] = min(parameters["p_slip"], MAX_SLIP)
+
+        if new_log_likelihood - log_likelihood < tolerance * len(sequences):
+            log_likelihood = new_log_likelihood
+            break
+        log_likelihood = new_log_likelihood
+    return sequences.skill, parameters, log_likelihood, iteration
+
+
+def _fit_skill_task(task):
+    sequences, iterations, tolerance = task
+    return fit_skill(sequences, iterations, tolerance)
+
+
+def split_by_skill(students, skills, outcomes, dates=None, min_observations: int = 1):
+    """
+    Group interaction rows into SkillSequences, one per skill.
+
+    :param students: student id of each row
+    :param skills: skill of each row
+    :param outcomes: 1 for a correct answer, 0 otherwise
+    :param dates: sort key within a student's sequence, the row order when None
+    :param min_observations: skills with fewer rows are skipped
+    """
+    skill_values, skill_codes = np.unique(np.asarray(skills), return_inverse=True)
+    skill_names = skill_values.tolist()
+    _, student_codes = np.unique(np.asarray(students), return_inverse=True)
+    keys = [student_codes, skill_codes]
+    if dates is not None:
+        keys.insert(0, np.asarray(dates))
+    order = np.lexsort(keys)
+
+    skill_codes, student_codes = skill_codes[order], student_codes[order]
+    outcomes = np.asarray(outcomes, dtype=np.int8)[order]
+    bounds = np.r_[0, np.flatnonzero(np.diff(skill_codes)) + 1, len(order)]
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        if end - start >= min_observations:
+            yield SkillSequences.from_rows(skill_names[skill_codes[start]],
+                                           student_codes[start:end], outcomes[start:end])
+
+
+def fit_parameters(skill_sequences, processes: int = None, iterations: int = 50, tolerance: float = 1e-4) -> dict:
+    """
+    Fit every skill, in a process pool unless processes is 1.
+
+    :return: skill -> {p_init, p_learn, p_guess, p_slip}
+    """
+    tasks = ((sequences, iterations, tolerance) for sequences in skill_sequences)
+    if processes == 1:
+        results = map(_fit_skill_task, tasks)
+        return {skill: parameters for skill, parameters, _, _ in results}
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        results = executor.map(_fit_skill_task, tasks, chunksize=8)
+        return {skill: parameters for skill, parameters, _, _ in results}
+
+
+def load_interactions(path: str, skill_column: str = "skill"):
+    """Read (student_id, skill, outcome, date) columns of an interaction CSV"""
+    import pandas as pd
+    columns = ["student_id", skill_column, "outcome", "date"]
+    frame = pd.read_csv(path, usecols=columns, parse_dates=["date"])
+    return (frame["student_id"].to_numpy(), frame[skill_column].astype(str).to_numpy(),
+            frame["outcome"].to_numpy(), frame["date"].to_numpy())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("interactions", help="CSV with student_id, skill, outcome and date columns")
+    parser.add_argument("--output", default=globals.BKT_PARAMETERS_PATH)
+    parser.add_argument("--skill-column", default="skill")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes, one per CPU by default")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--tolerance", type=float, default=1e-4, help="minimum log likelihood gain per observation")
+    parser.add_argument("--min-observations", type=int, default=10)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    start = time.perf_counter()
+    students, skills, outcomes, dates = load_interactions(args.interactions, args.skill_column)
+    table = fit_parameters(split_by_skill(students, skills, outcomes, dates, args.min_observations),
+                           processes=args.processes, iterations=args.iterations, tolerance=args.tolerance)
+    write_parameter_table(args.output, table)
+    print(f"Fitted {len(table)} skills from {len(outcomes)} interactions in "
+          f"{time.perf_counter() - start:.1f}s ({os.cpu_count()} CPUs), wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+CPU runtime of the LSTM knowledge tracer in src/Deprecated/LSTM Knowledge Tracer.
+
+The Keras model is trained there and exported with DKTModel.from_keras(model).save(path)
+to a NumPy .npz file. Inference here needs NumPy only: the LSTM and dense layers are
+evaluated with one input projection per layer and one matrix product per time step.
+
+Sequences are grouped into length buckets instead of being padded to the global
+maximum length. Padded steps are masked like the Keras Masking layer of the model does: the
+state is carried over them, so the last state of a sequence is the one after its
+own last step.
+"""
+import logging
+import os
+from functools import lru_cache
+
+import numpy as np
+
+from src import globals
+
+FEATURES = ("activity_type", "outcome", "time_spent")
+# Codes start at 1: all-zero steps are masked, so a wrong quiz answer must not encode to [0, 0, 0]
+ACTIVITY_TYPES = {'quiz': 1, 'homework': 2, 'lecture': 3}
+# Version of the feature encoding above, models exported for another one must be retrained
+FEATURE_VERSION = 2
+
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0),
+    "sigmoid": lambda x: 0.5 * (1 + np.tanh(0.5 * x)),  # no overflow for large |x|
+    "tanh": np.tanh,
+}
+
+
+def encode_history(history) -> np.ndarray:
+    """(activity_type, outcome, time_spent) rows, or dicts with those keys, -> float32 (steps, features)"""
+    rows = [[row[name] for name in FEATURES] if isinstance(row, dict) else list(row) for row in history]
+    for row in rows:
+        row[0] = ACTIVITY_TYPES.get(row[0], row[0])
+    return np.asarray(rows, dtype=np.float32).reshape(len(rows), len(FEATURES))
+
+
+def history_from_events(events: dict) -> list:
+    """
+    (activity_type, outcome, time_spent) rows of AttemptEventStore.scan() columns.
+    Only graded answers are stored, so every row is a quiz, time_spent is in minutes.
+    """
+    minutes = np.nan_to_num(events['latency_ms'].astype(np.float64), nan=0.0) / 60000
+    return [('quiz', int(correct), float(spent)) for correct, spent in zip(events['correct'], minutes)]
+
+
+def length_buckets(lengths, batch_size: int):
+    """Indices of the sequences in batches of similar length, shortest first"""
+    order = np.argsort(lengths, kind="stable")
+    return [order[start:start + batch_size] for start in range(0, len(order), batch_size)]
+
+
+def pad_batch(sequences, indices=None):
+    """Post-pad the given sequences to their longest one: (batch, steps, features) and lengths"""
+    indices = range(len(sequences)) if indices is None else indices
+    batch = [sequences[index] for index in indices]
+    lengths = np.array([len(sequence) for sequence in batch])
+    x = np.zeros((len(batch), max(lengths.max(initial=0), 1), len(FEATURES)), dtype=np.float32)
+    for row, sequence in enumerate(batch):
+        x[row, :len(sequence)] = sequence
+    return x, lengths
+
+
+class DKTModel:
+    """Stacked LSTM layers followed by dense layers, Keras weight layout (gates i, f, c, o)"""
+
+    def __init__(self, lstm_layers, dense_layers):
+        """
+        :param lstm_layers: (kernel, recurrent_kernel, bias) of each LSTM layer
+        :param dense_layers: (kernel, bias, activation name) of each dense layer
+        """
+        self.lstm_layers = [tuple(np.asarray(weight, dtype=np.float32) for weight in layer) for layer in lstm_layers]
+        self.dense_layers = [(np.asarray(kernel, dtype=np.float32), np.asarray(bias, dtype=np.float32), activation)
+                             for kernel, bias, activation in dense_layers]
+
+    @classmethod
+    def from_keras(cls, model):
+        """Take the weights of a trained Keras model. Dropout and Masking layers have none at inference."""
+        lstm_layers, dense_layers = [], []
+        for layer in model.layers:
+            kind = type(layer).__name__
+            if kind == "LSTM":
+                lstm_layers.append(layer.get_weights())
+            elif kind == "Dense":
+                kernel, bias = layer.get_weights()
+                dense_layers.append((kernel, bias, layer.get_config()["activation"]))
+        return cls(lstm_layers, dense_layers)
+
+    def save(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        arrays = {}
+        for index, (kernel, recurrent_kernel, bias) in enumerate(self.lstm_layers):
+            arrays.update({f"lstm{index}_kernel": kernel, f"lstm{index}_recurrent_kernel": recurrent_kernel,
+                           f"lstm{index}_bias": bias})
+        for index, (kernel, bias, _) in enumerate(self.dense_layers):
+            arrays.update({f"dense{index}_kernel": kernel, f"dense{index}_bias": bias})
+        arrays["dense_activations"] = np.array([activation for _, _, activation in self.dense_layers])
+        arrays["feature_version"] = np.array(FEATURE_VERSION)
+        # Write through a temporary file so a running server never loads half a model
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+        """Raises ValueError for a model trained on another feature encoding"""
+        with np.load(path) as arrays:
+            version = int(arrays["feature_version"]) if "feature_version" in arrays.files else 1
+            if version != FEATURE_VERSION:
+                raise ValueError(f"{path} was trained with feature encoding {version}, retrain it for encoding {FEATURE_VERSION}")
+            lstm_count = sum(1 for name in arrays.files if name.endswith("_recurrent_kernel"))
+            lstm_layers = [(arrays[f"lstm{index}_kernel"], arrays[f"lstm{index}_recurrent_kernel"], arrays[f"lstm{index}_bias"])
+                           for index in range(lstm_count)]
+            dense_layers = [(arrays[f"dense{index}_kernel"], arrays[f"dense{index}_bias"], str(activation))
+                            for index, activation in enumerate(arrays["dense_activations"])]
+        return cls(lstm_layers, dense_layers)
+
+    def forward(self, x: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+        """Output of the model for a padded batch (batch, steps, features), shape (batch,)"""
+        batch, steps, _ = x.shape
+        # Like Keras Masking(0.0), all-zero steps are skipped as well as the padding
+        mask = ((np.arange(steps) < lengths[:, None]) & (x != 0).any(axis=2))[..., None]
+        outputs = x
+        for kernel, recurrent_kernel, bias in self.lstm_layers:
+            units = recurrent_kernel.shape[0]
+            projected = outputs @ kernel + bias
+            h = np.zeros((batch, units), dtype=np.float32)
+            c = np.zeros((batch, units), dtype=np.float32)
+            sequence = np.empty((batch, steps, units), dtype=np.float32)
+            for t in range(steps):
+                z = projected[:, t] + h @ recurrent_kernel
+                i, f, g, o = np.split(z, 4, axis=1)
+                i, f, o = ACTIVATIONS["sigmoid"](i), ACTIVATIONS["sigmoid"](f), ACTIVATIONS["sigmoid"](o)
+                new_c = f * c + i * np.tanh(g)
+                new_h = o * np.tanh(new_c)
+                c = np.where(mask[:, t], new_c, c)
+                h = np.where(mask[:, t], new_h, h)
+                sequence[:, t] = h
+            outputs = sequence
+        # The last LSTM layer returns its final state only
+        outputs = outputs[:, -1]
+        for kernel, bias, activation in self.dense_layers:
+            outputs = ACTIVATIONS[activation](outputs @ kernel + bias)
+        return outputs[:, 0]
+
+    def predict(self, sequences, batch_size: int = 256) -> np.ndarray:
+        """P(next answer correct) for each encoded history, one forward pass per length bucket"""
+        result = np.empty(len(sequences), dtype=np.float32)
+        if not len(sequences):
+            return result
+        for indices in length_buckets([len(sequence) for sequence in sequences], batch_size):
+            result[indices] = self.forward(*pad_batch(sequences, indices))
+        return result
+
+
+@lru_cache(maxsize=None)
+def get_default_dkt_model():
+    """The exported model at globals.DKT_MODEL_PATH, None when it has not been trained"""
+    if not os.path.exists(globals.DKT_MODEL_PATH):
+        return None
+    try:
+        return DKTModel.load(globals.DKT_MODEL_PATH)
+    except (OSError, ValueError, KeyError) as e:
+        logging.getLogger(__name__).error(f"Cannot load DKT model: {str(e)}")
+        return None
@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import time
+from functools import lru_cache
+
+from src import globals
+from src.Models.dkt import encode_history, get_default_dkt_model
+
+
+class DKTInferenceServer:
+    """
+    Micro-batching front end of a DKTModel.
+
+    Callers await predict() for one student at a time. The first request of a batch
+    waits up to max_wait_ms for others to arrive, then every queued request is
+    answered by a single model.predict() call, run in a worker thread so the event
+    loop stays responsive. Requests for a student already waiting in the batch share
+    that student's prediction when the histories are equal.
+    """
+
+    def __init__(self, model, max_batch_size=None, max_wait_ms=None):
+        self.model = model
+        self.max_batch_size = max_batch_size or globals.DKT_MAX_BATCH_SIZE
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else globals.DKT_MAX_WAIT_MS) / 1000
+
+        self.requests = 0
+        self.batches = 0
+        self.inference_seconds = 0.0
+
+        self._queue = None
+        self._worker = None
+        self.logger = logging.getLogger(__name__)
+
+    async def predict(self, student_id, history) -> float:
+        """P(the student's next answer is correct) given their (activity_type, outcome, time_spent) history"""
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((student_id, encode_history(history), future))
+        return await future
+
+    async def predict_many(self, histories: dict) -> dict:
+        """student_id -> history for a whole classroom, answered by the same batch"""
+        results = await asyncio.gather(*(self.predict(student_id, history) for student_id, history in histories.items()))
+        return dict(zip(histories, results))
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            await self._answer(batch)
+
+    async def _answer(self, batch):
+        # One sequence per distinct (student, history), duplicates share the result
+        slots, sequences, targets = {}, [], []
+        for student_id, sequence, future in batch:
+            key = (student_id, sequence.tobytes())
+            if key not in slots:
+                slots[key] = len(sequences)
+                sequences.append(sequence)
+            targets.append((slots[key], future))
+
+        start = time.perf_counter()
+        try:
+            predictions = await asyncio.get_running_loop().run_in_executor(None, self.model.predict, sequences, self.max_batch_size)
+        except Exception as e:
+            self.logger.error(f"DKT inference failed: {str(e)}")
+            for _, future in targets:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.inference_seconds += time.perf_counter() - start
+        self.requests += len(batch)
+        self.batches += 1
+
+        for slot, future in targets:
+            if not future.done():
+                future.set_result(float(predictions[slot]))
+
+    async def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    def get_stats(self) -> dict:
+        return {
+            'requests': self.requests,
+            'batches': self.batches,
+            'average_batch_size': self.requests / self.batches if self.batches else 0.0,
+            'inference_seconds': self.inference_seconds,
+        }
+
+
+@lru_cache(maxsize=None)
+def get_default_dkt_server():
+    """Process-wide server of the exported DKT model, None when no model has been trained"""
+    model = get_default_dkt_model()
+    return DKTInferenceServer(model) if model is not None else None
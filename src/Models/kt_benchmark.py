@@ -0,0 +1,298 @@
+"""
+Compare knowledge tracing strategies on one interaction stream.
+
+    python -m src.Models.kt_benchmark [--input interactions.csv | --students 2000 --seed 0]
+        [--strategies bkt,threshold,window,streak,dkt] [--batch-size 1]
+        [--bkt-parameters .cache/bkt_parameters.csv] [--dkt-model .cache/dkt_model.npz]
+        [--no-memory] [--json report.json]
+
+The stream is a logged CSV (student_id, skill, outcome, date columns, as written by
+src/KnowledgeGraphs/data_generation.py) or is generated on the fly. Every strategy
+replays it in date order through the same interface: for each batch of
+--batch-size interactions it predicts P(correct) of every interaction, then
+observes the outcomes. Predictions are scored against the outcomes (AUC, RMSE);
+the replay is timed per batch (updates/second, p50/p99 latency) and replayed once
+more under tracemalloc for the peak memory.
+
+Strategies:
+    bkt        BKTEngine, the tracer behind KnowledgeTracerAgent and MasteryAgent
+    threshold  completion ratio per student and skill, what KnowledgeTracerAgent's
+               80%/50% thresholds were applied to
+    window     MasteryAgent's adaptive difficulty, moved by its 3-answer window
+    streak     the 3-in-a-row AdaptiveDifficulty levels of src/UI/Deprecated
+    dkt        the exported LSTM knowledge tracer (src/Models/dkt.py)
+"""
+import argparse
+import json
+import os
+import time
+import tracemalloc
+from collections import defaultdict, deque
+
+import numpy as np
+
+from src import globals
+
+
+class Interactions:
+    """An interaction stream in replay order with dense student and skill ids"""
+
+    def __init__(self, students, skills, skill_names, outcomes, activity_types=None, time_spent=None):
+        self.students = np.asarray(students, dtype=np.intp)
+        self.skills = np.asarray(skills, dtype=np.intp)
+        self.skill_names = tuple(skill_names)
+        self.outcomes = np.asarray(outcomes, dtype=np.int8)
+        self.activity_types = activity_types if activity_types is not None else ['quiz'] * len(self.outcomes)
+        self.time_spent = time_spent if time_spent is not None else np.zeros(len(self.outcomes))
+        self.student_count = int(self.students.max()) + 1 if len(self.students) else 0
+
+    @classmethod
+    def from_frame(cls, frame):
+        """Order a DataFrame of interactions by date, keeping the logged order within a date"""
+        if 'date' in frame:
+            frame = frame.sort_values('date', kind='stable')
+        _, students = np.unique(frame['student_id'].to_numpy(), return_inverse=True)
+        skill_names, skills = np.unique(frame['skill'].astype(str).to_numpy(), return_inverse=True)
+        return cls(students, skills, skill_names.tolist(), frame['outcome'].to_numpy(),
+                   frame['activity_type'].astype(str).tolist() if 'activity_type' in frame else None,
+                   frame['time_spent'].to_numpy() if 'time_spent' in frame else None)
+
+    def __len__(self):
+        return len(self.outcomes)
+
+
+class TracingStrategy:
+    """Common interface: prepare() allocates the state, step() predicts then observes a batch"""
+    name = None
+
+    def prepare(self, interactions: Interactions):
+        self.interactions = interactions
+        self._students = interactions.students.tolist()
+        self._skills = interactions.skills.tolist()
+        self._outcomes = interactions.outcomes.tolist()
+
+    def step(self, start: int, end: int) -> np.ndarray:
+        """P(correct) of interactions [start, end) before they are observed"""
+        return np.fromiter((self.predict_update(self._students[i], self._skills[i], self._outcomes[i])
+                            for i in range(start, end)), dtype=np.float64, count=end - start)
+
+    def predict_update(self, student: int, skill: int, correct: int) -> float:
+        raise NotImplementedError
+
+
+class BKTStrategy(TracingStrategy):
+    name = 'bkt'
+
+    def __init__(self, parameters_path=None):
+        self.parameters_path = parameters_path
+
+    def prepare(self, interactions):
+        from src.Models.bkt import BKTEngine
+        self.interactions = interactions
+        self.engine = BKTEngine(interactions.skill_names, initial_students=interactions.student_count)
+        if self.parameters_path:
+            self.engine.load_parameters(self.parameters_path)
+        # The dense student ids of the stream are used as rows, all starting from the (fitted) prior
+        self.engine.known[:] = self.engine.p_init
+
+    def step(self, start, end):
+        interactions = self.interactions
+        return self.engine.update(interactions.students[start:end], interactions.skills[start:end],
+                                  interactions.outcomes[start:end], predict=True)
+
+
+class ThresholdStrategy(TracingStrategy):
+    name = 'threshold'
+
+    def prepare(self, interactions):
+        super().prepare(interactions)
+        self.attempts = defaultdict(int)
+        self.correct = defaultdict(int)
+
+    def predict_update(self, student, skill, correct):
+        key = (student, skill)
+        # Completion ratio with one virtual right and one wrong answer, 0.5 before any attempt
+        prediction = (self.correct[key] + 1) / (self.attempts[key] + 2)
+        self.attempts[key] += 1
+        self.correct[key] += correct
+        return prediction
+
+
+class WindowStrategy(TracingStrategy):
+    """MasteryAgent._update_performance_tracking and _adjust_difficulty, one agent per student"""
+    name = 'window'
+
+    def prepare(self, interactions):
+        super().prepare(interactions)
+        self.difficulty = [1.0] * interactions.student_count
+        self.recent_scores = defaultdict(lambda: deque(maxlen=5))
+
+    def predict_update(self, student, skill, correct):
+        # adaptive_difficulty moves within [0.5, 1.5]
+        prediction = self.difficulty[student] - 0.5
+        recent_scores = self.recent_scores[(student, skill)]
+        recent_scores.append(correct)
+        if len(recent_scores) >= 3:
+            recent_performance = (recent_scores[-1] + recent_scores[-2] + recent_scores[-3]) / 3
+            if recent_performance > 0.8:
+                self.difficulty[student] = min(1.5, self.difficulty[student] + 0.1)
+            elif recent_performance < 0.6:
+                self.difficulty[student] = max(0.5, self.difficulty[student] - 0.1)
+        return prediction
+
+
+class StreakStrategy(TracingStrategy):
+    name = 'streak'
+
+    def prepare(self, interactions):
+        from src.UI.Deprecated.adaptive_difficulty import AdaptiveDifficulty
+        super().prepare(interactions)
+        self.levels = [AdaptiveDifficulty() for _ in range(interactions.student_count)]
+
+    def predict_update(self, student, skill, correct):
+        level = self.levels[student]
+        # easy, medium, hard -> 0.25, 0.5, 0.75
+        prediction = (level.current_difficulty_index + 1) / (len(level.difficulty_levels) + 1)
+        level.update_performance(bool(correct))
+        return prediction
+
+
+class DKTStrategy(TracingStrategy):
+    """The LSTM predicts from each student's whole history, one bucketed forward pass per batch"""
+    name = 'dkt'
+
+    def __init__(self, model_path=None):
+        self.model_path = model_path or globals.DKT_MODEL_PATH
+
+    def prepare(self, interactions):
+        from src.Models.dkt import ACTIVITY_TYPES, DKTModel
+        super().prepare(interactions)
+        self.model = DKTModel.load(self.model_path)
+        self.activity_codes = [ACTIVITY_TYPES.get(activity, ACTIVITY_TYPES['quiz']) for activity in interactions.activity_types]
+        self.time_spent = np.asarray(interactions.time_spent, dtype=np.float32).tolist()
+        self.histories = [[] for _ in range(interactions.student_count)]
+
+    def step(self, start, end):
+        sequences = [np.asarray(self.histories[self._students[i]], dtype=np.float32).reshape(-1, 3)
+                     for i in range(start, end)]
+        predictions = self.model.predict(sequences)
+        for i in range(start, end):
+            self.histories[self._students[i]].append((self.activity_codes[i], self._outcomes[i], self.time_spent[i]))
+        return predictions
+
+
+STRATEGIES = {strategy.name: strategy for strategy in
+              (BKTStrategy, ThresholdStrategy, WindowStrategy, StreakStrategy, DKTStrategy)}
+
+
+def auc(labels, scores) -> float:
+    """Area under the ROC curve from the ranks of the scores, ties averaged"""
+    labels = np.asarray(labels, dtype=bool)
+    positives = int(labels.sum())
+    negatives = len(labels) - positives
+    if positives == 0 or negatives == 0:
+        return float('nan')
+    _, inverse, counts = np.unique(np.asarray(scores), return_inverse=True, return_counts=True)
+    average_ranks = np.cumsum(counts) - (counts - 1) / 2
+    rank_sum = average_ranks[inverse][labels].sum()
+    return float((rank_sum - positives * (positives + 1) / 2) / (positives * negatives))
+
+
+def rmse(labels, scores) -> float:
+    return float(np.sqrt(np.mean((np.asarray(scores, dtype=np.float64) - np.asarray(labels)) ** 2)))
+
+
+def replay(strategy: TracingStrategy, interactions: Interactions, batch_size: int = 1):
+    """Run the stream through strategy, returns (predictions, nanoseconds of every batch)"""
+    strategy.prepare(interactions)
+    predictions = np.empty(len(interactions))
+    starts = range(0, len(interactions), batch_size)
+    latencies = np.empty(len(starts), dtype=np.int64)
+    clock = time.perf_counter_ns
+    for batch, start in enumerate(starts):
+        end = min(start + batch_size, len(interactions))
+        begin = clock()
+        predictions[start:end] = strategy.step(start, end)
+        latencies[batch] = clock() - begin
+    return predictions, latencies
+
+
+def benchmark(strategy: TracingStrategy, interactions: Interactions, batch_size: int = 1, memory: bool = True) -> dict:
+    predictions, latencies = replay(strategy, interactions, batch_size)
+    report = {
+        'strategy': strategy.name,
+        'auc': auc(interactions.outcomes, predictions),
+        'rmse': rmse(interactions.outcomes, predictions),
+        'updates_per_second': len(interactions) / (latencies.sum() / 1e9),
+        'p50_latency_us': float(np.percentile(latencies, 50) / 1e3),
+        'p99_latency_us': float(np.percentile(latencies, 99) / 1e3),
+    }
+    if memory:
+        # A separate run, tracemalloc slows the replay down
+        tracemalloc.start()
+        try:
+            replay(strategy, interactions, batch_size)
+            report['peak_memory_mb'] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        finally:
+            tracemalloc.stop()
+    return report
+
+
+def load_stream(path=None, students=2000, seed=0, limit=None) -> Interactions:
+    import pandas as pd
+    if path:
+        frame = pd.read_csv(path)
+    else:
+        from src.KnowledgeGraphs.data_generation import generate_chunks
+        frame = pd.concat(generate_chunks(students, seed=seed), ignore_index=True)
+    if limit:
+        frame = frame.sort_values('date', kind='stable').head(limit) if 'date' in frame else frame.head(limit)
+    return Interactions.from_frame(frame)
+
+
+def format_report(reports, batch_size: int) -> str:
+    lines = [f"{'strategy':<10} {'AUC':>6} {'RMSE':>6} {'updates/s':>12} "
+             f"{'p50 us':>9} {'p99 us':>9} {'peak MB':>8}   (latency per batch of {batch_size})"]
+    for report in reports:
+        memory = f"{report['peak_memory_mb']:8.1f}" if 'peak_memory_mb' in report else f"{'-':>8}"
+        lines.append(f"{report['strategy']:<10} {report['auc']:6.3f} {report['rmse']:6.3f} "
+                     f"{report['updates_per_second']:12,.0f} {report['p50_latency_us']:9.1f} "
+                     f"{report['p99_latency_us']:9.1f} {memory}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--input', help='interaction CSV, generated when omitted')
+    parser.add_argument('--students', type=int, default=2000, help='students of the generated stream')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--limit', type=int, default=None, help='replay only the first interactions')
+    parser.add_argument('--strategies', default=None, help=f"comma separated, from {', '.join(STRATEGIES)}")
+    parser.add_argument('--batch-size', type=int, default=1)
+    parser.add_argument('--bkt-parameters', default=None, help='fitted BKT parameter table')
+    parser.add_argument('--dkt-model', default=globals.DKT_MODEL_PATH)
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc run')
+    parser.add_argument('--json', default=None, help='also write the reports here')
+    args = parser.parse_args()
+
+    names = args.strategies.split(',') if args.strategies else \
+        [name for name in STRATEGIES if name != 'dkt' or os.path.exists(args.dkt_model)]
+    unknown = set(names) - set(STRATEGIES)
+    if unknown:
+        parser.error(f"Unknown strategies: {', '.join(sorted(unknown))}")
+    factories = {'bkt': lambda: BKTStrategy(args.bkt_parameters), 'dkt': lambda: DKTStrategy(args.dkt_model)}
+
+    interactions = load_stream(args.input, args.students, args.seed, args.limit)
+    print(f"{len(interactions)} interactions, {interactions.student_count} students, "
+          f"{len(interactions.skill_names)} skills\n")
+
+    reports = [benchmark(factories.get(name, STRATEGIES[name])(), interactions, args.batch_size, not args.no_memory)
+               for name in names]
+    print(format_report(reports, args.batch_size))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(reports, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
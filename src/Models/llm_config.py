@@ -35,3 +35,7 @@ gpt4_config = {"config_list": gpt4_config_list,
                "presence_penalty": presence_penalty,
                "seed": seed
 }
+
+def streaming_config(llm_config: dict) -> dict:
+    """Copy of llm_config whose completions stream chunk by chunk to the IOStream of the running chat"""
+    return {**llm_config, "stream": True}
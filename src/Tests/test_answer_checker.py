@@ -0,0 +1,81 @@
+import unittest
+from fractions import Fraction
+from src.Tools import answer_checker
+from src.Tools.answer_checker import (
+    check_answer,
+    extract_final_answer,
+    normalize_answer,
+    parse_number,
+    SOURCE_EXACT,
+    SOURCE_NUMERIC,
+    SOURCE_SYMBOLIC,
+)
+
+class TestAnswerChecker(unittest.TestCase):
+    def test_normalize_strips_latex_units_and_assignment(self):
+        self.assertEqual(normalize_answer("$x = \\frac{1}{2}$"), "(1)/(2)")
+        self.assertEqual(normalize_answer("12 cm^2"), "12")
+        self.assertEqual(normalize_answer("\\boxed{3}"), "3")
+        self.assertEqual(normalize_answer("1,000,000"), "1000000")
+        self.assertEqual(normalize_answer("2h"), "2h")
+
+    def test_parse_number(self):
+        self.assertEqual(parse_number("0.5"), Fraction(1, 2))
+        self.assertEqual(parse_number("3/4"), Fraction(3, 4))
+        self.assertEqual(parse_number("1 1/2"), Fraction(3, 2))
+        self.assertEqual(parse_number("25%"), Fraction(1, 4))
+        self.assertIsNone(parse_number("1/0"))
+        self.assertIsNone(parse_number("x+1"))
+
+    def test_extract_final_answer(self):
+        self.assertEqual(extract_final_answer("Work...\nFinal answer: 42"), ("42", True))
+        self.assertEqual(extract_final_answer("so \\boxed{7}"), ("7", True))
+        self.assertEqual(extract_final_answer("Step: 2x = 14\nx = 7"), ("7", False))
+
+    def test_exact_and_numeric_verdicts(self):
+        result = check_answer("7", "Step: 2x = 14\nx = 7")
+        self.assertEqual((result['is_correct'], result['source']), (True, SOURCE_EXACT))
+        result = check_answer("0.5", "Final answer: 1/2")
+        self.assertEqual((result['is_correct'], result['source']), (True, SOURCE_NUMERIC))
+        result = check_answer("0.33", "1/3")
+        self.assertTrue(result['is_correct'])
+        result = check_answer("6", "Final answer: 5")
+        self.assertEqual((result['is_correct'], result['source']), (False, SOURCE_NUMERIC))
+
+    def test_rounding_only_accepted_when_the_student_rounded(self):
+        self.assertTrue(check_answer("3.14", "Final answer: 3.14159")['is_correct'])
+        for student, expected in (("0.54", "0.5"), ("3.04", "3.0"), ("1.25", "1.2")):
+            self.assertFalse(check_answer(student, f"Final answer: {expected}")['is_correct'])
+        # Off by more than half a unit of the last place written: left to the LLM
+        self.assertIsNone(check_answer("0.34", "Final answer: 1/3")['is_correct'])
+
+    def test_units(self):
+        self.assertTrue(check_answer("5 feet", "Final answer: 5 ft")['is_correct'])
+        self.assertTrue(check_answer("12", "Final answer: 12 square cm")['is_correct'])
+        self.assertIsNone(check_answer("5 m", "Final answer: 5 s")['is_correct'])
+        self.assertIsNone(check_answer("12 cm", "Final answer: 12 cm^2")['is_correct'])
+
+    def test_undecided_without_explicit_expected_answer(self):
+        # The last equation of an unmarked solution is not trusted for a negative verdict
+        self.assertIsNone(check_answer("8", "Step: 2x = 14\nx = 7")['is_correct'])
+        self.assertIsNone(check_answer("because it doubles", "It is twice as large")['is_correct'])
+        self.assertIsNone(check_answer("", "5")['is_correct'])
+
+    @unittest.skipIf(answer_checker.sympy is None, "sympy is not installed")
+    def test_symbolic_verdicts(self):
+        result = check_answer("2(x+1)", "Final answer: 2x + 2")
+        self.assertEqual((result['is_correct'], result['source']), (True, SOURCE_SYMBOLIC))
+        self.assertFalse(check_answer("x^2", "Final answer: 2x")['is_correct'])
+
+    @unittest.skipIf(answer_checker.sympy is None, "sympy is not installed")
+    def test_symbolic_numbers_follow_the_rounding_rule(self):
+        self.assertTrue(check_answer("1.41", "Final answer: sqrt(2)")['is_correct'])
+        self.assertTrue(check_answer("sqrt(8)", "Final answer: 2sqrt(2)")['is_correct'])
+        self.assertIsNone(check_answer("1.5", "Final answer: sqrt(2)")['is_correct'])
+
+    def test_costly_expressions_are_left_to_the_llm(self):
+        for answer in ("9^9^9", "9**(9**9)", "2^1000000", "x" + "+x" * 100):
+            self.assertIsNone(check_answer(answer, "Final answer: 5")['is_correct'])
+
+if __name__ == "__main__":
+    unittest.main()
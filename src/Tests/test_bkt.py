@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from src.Models.bkt import BKTEngine, read_parameter_table, write_parameter_table
+
+class TestBKTEngine(unittest.TestCase):
+    def setUp(self):
+        self.engine = BKTEngine(["Counting", "Addition", "Subtraction"], p_init=0.2, p_learn=0.15,
+                                p_guess=0.2, p_slip=0.1, mastery_threshold=0.95, initial_students=2)
+
+    def test_single_update(self):
+        # Posterior 0.2*0.9 / (0.2*0.9 + 0.8*0.2) = 0.529..., then learning
+        posterior = 0.18 / (0.18 + 0.16)
+        result = self.engine.update(["ana"], ["Counting"], [True])
+        self.assertAlmostEqual(float(result[0]), posterior + (1 - posterior) * 0.15, places=5)
+        self.assertAlmostEqual(float(self.engine.mastery(["ana"], ["Addition"])[0]), 0.2, places=6)
+
+    def test_batch_matches_sequential(self):
+        rng = np.random.default_rng(0)
+        students = [f"student{i}" for i in rng.integers(0, 5, 200)]
+        skills = [self.engine.skills[i] for i in rng.integers(0, 3, 200)]
+        correct = rng.random(200) < 0.6
+
+        sequential = BKTEngine(self.engine.skills, initial_students=2)
+        expected = [sequential.update([s], [k], [c])[0] for s, k, c in zip(students, skills, correct)]
+        batched = BKTEngine(self.engine.skills, initial_students=2)
+        np.testing.assert_allclose(batched.update(students, skills, correct), expected, rtol=1e-6)
+        np.testing.assert_allclose(batched.known[:5], sequential.known[:5], rtol=1e-6)
+
+    def test_students_grow(self):
+        for i in range(10):
+            self.engine.update([f"student{i}"], ["Addition"], [False])
+        self.assertEqual(len(self.engine.student_ids), 10)
+        self.assertGreaterEqual(len(self.engine.known), 10)
+        self.assertEqual(self.engine.observations, 10)
+
+    def test_mastery(self):
+        self.assertFalse(self.engine.is_mastered(["ana"], ["Addition"])[0])
+        self.engine.update(["ana"] * 3, ["Addition"] * 3, [True] * 3)
+        self.assertTrue(self.engine.is_mastered(["ana"], ["Addition"])[0])
+        self.assertFalse(self.engine.is_mastered(["ana"], ["Subtraction"])[0])
+
+    def test_parameter_table(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "bkt.csv")
+            write_parameter_table(path, {"Addition": {"p_init": 0.5, "p_learn": 0.3, "p_guess": 0.25, "p_slip": 0.05},
+                                         "Unknown": {"p_init": 0.1, "p_learn": 0.1, "p_guess": 0.1, "p_slip": 0.1}})
+            self.assertAlmostEqual(read_parameter_table(path)["Addition"]["p_learn"], 0.3)
+            self.assertEqual(self.engine.load_parameters(path), 2)
+        self.assertAlmostEqual(float(self.engine.p_init[1]), 0.5)
+        self.assertAlmostEqual(float(self.engine.mastery(["new student"], ["Addition"])[0]), 0.5)
+
+if __name__ == '__main__':
+    unittest.main()
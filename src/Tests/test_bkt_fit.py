@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from src.Models.bkt import BKTEngine, write_parameter_table
+from src.Models.bkt_fit import SkillSequences, fit_parameters, fit_skill, forward_backward, split_by_skill
+
+def simulate(rng, skill, students, steps, p_init, p_learn, p_guess, p_slip):
+    rows = []
+    known = rng.random(students) < p_init
+    for step in range(steps):
+        correct = np.where(known, rng.random(students) > p_slip, rng.random(students) < p_guess)
+        rows.extend((student, skill, int(correct[student]), step) for student in range(students))
+        known |= rng.random(students) < p_learn
+    return rows
+
+class TestBKTFit(unittest.TestCase):
+    def test_sequences(self):
+        sequences = SkillSequences.from_rows("Addition", np.array([0, 0, 1, 1, 1, 2]), np.array([1, 0, 0, 1, 1, 1]))
+        self.assertEqual(sequences.outcomes.tolist(), [[0, 1, 1], [1, 0, 0], [1, 0, 0]])
+        self.assertEqual(sequences.lengths.tolist(), [3, 2, 1])
+        self.assertEqual(sequences.active.tolist(), [3, 2, 1])
+        self.assertEqual(len(sequences), 6)
+
+    def test_filtering_matches_engine(self):
+        # The forward pass of the last step is the engine's P(known) before the last learning step
+        outcomes = [1, 0, 1, 1]
+        sequences = SkillSequences.from_rows("Addition", np.zeros(4, dtype=int), np.array(outcomes))
+        gamma_known, _, _ = forward_backward(sequences, 0.2, 0.15, 0.2, 0.1)
+        engine = BKTEngine(["Addition"], 0.2, 0.15, 0.2, 0.1)
+        engine.update(["ana"] * 3, ["Addition"] * 3, outcomes[:3])
+        known = float(engine.mastery(["ana"], ["Addition"])[0])
+        posterior = known * 0.9 / (known * 0.9 + (1 - known) * 0.2)
+        self.assertAlmostEqual(gamma_known[0, -1], posterior, places=5)
+
+    def test_recovers_parameters(self):
+        rng = np.random.default_rng(0)
+        students, skills, outcomes, dates = zip(*simulate(rng, "Addition", 2000, 10, 0.3, 0.2, 0.15, 0.08))
+        sequences = next(split_by_skill(students, skills, outcomes, dates))
+        skill, parameters, _, _ = fit_skill(sequences, iterations=200, tolerance=1e-7)
+        self.assertEqual(skill, "Addition")
+        for name, expected in (("p_init", 0.3), ("p_learn", 0.2), ("p_guess", 0.15), ("p_slip", 0.08)):
+            self.assertAlmostEqual(parameters[name], expected, delta=0.05, msg=name)
+
+    def test_process_pool(self):
+        rng = np.random.default_rng(1)
+        rows = simulate(rng, "Addition", 200, 8, 0.3, 0.2, 0.15, 0.08) + simulate(rng, "Counting", 200, 8, 0.6, 0.1, 0.2, 0.1)
+        rng.shuffle(rows)
+        columns = list(zip(*rows))
+        serial = fit_parameters(split_by_skill(*columns), processes=1)
+        parallel = fit_parameters(split_by_skill(*columns), processes=2)
+        self.assertEqual(sorted(serial), ["Addition", "Counting"])
+        for skill in serial:
+            for name, value in serial[skill].items():
+                self.assertAlmostEqual(parallel[skill][name], value)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "bkt.csv")
+            write_parameter_table(path, serial)
+            engine = BKTEngine(["Addition", "Counting"])
+            self.assertEqual(engine.load_parameters(path), 2)
+            self.assertAlmostEqual(float(engine.p_init[1]), serial["Counting"]["p_init"], places=5)
+
+if __name__ == '__main__':
+    unittest.main()
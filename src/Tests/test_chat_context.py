@@ -0,0 +1,84 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from src.Agents.chat_context import ChatContextManager, SUMMARY_PREFIX, message_tokens
+
+class FakeGroupChat:
+    def __init__(self, names):
+        self.agents = [SimpleNamespace(name=name, register_hook=lambda *args: None) for name in names]
+        self.messages = []
+        self.listeners = []
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+
+    def append(self, message):
+        self.messages.append(message)
+        for listener in self.listeners:
+            listener(message)
+
+def make_message(name, content):
+    return {"role": "user", "name": name, "content": content}
+
+class TestChatContextManager(unittest.TestCase):
+    def setUp(self):
+        self.groupchat = FakeGroupChat(["TutorAgent", "ProblemGeneratorAgent", "CodeRunnerAgent", "StudentAgent"])
+        self.summaries = []
+
+    async def summarize(self, previous_summary, messages):
+        self.summaries.append(len(messages))
+        return f"{previous_summary} +{len(messages)}".strip()
+
+    def test_irrelevant_senders_are_dropped(self):
+        context = ChatContextManager(max_tokens=1000, summarize=None).attach(self.groupchat)
+        messages = [
+            make_message("TutorAgent", "Lesson on fractions"),
+            make_message("CodeRunnerAgent", "exitcode: 0 (execution succeeded)"),
+            make_message("CodeRunnerAgent", "Plot saved"),
+        ]
+        selected = context.build_context("ProblemGeneratorAgent", messages)
+        # The message being replied to is kept even from an irrelevant sender
+        self.assertEqual(selected, [messages[0], messages[2]])
+        self.assertEqual(context.build_context("TutorAgent", messages), messages)
+
+    def test_budget_keeps_newest_messages_and_adds_summary(self):
+        context = ChatContextManager(max_tokens=60, summarize=None).attach(self.groupchat)
+        context.summary = "Student is on fractions"
+        messages = [make_message("StudentAgent", "word " * 20 + str(i)) for i in range(10)]
+        selected = context.build_context("TutorAgent", messages)
+        self.assertEqual(selected[-1], messages[-1])
+        self.assertTrue(selected[0]["content"].startswith(SUMMARY_PREFIX))
+        self.assertLessEqual(sum(message_tokens(m) for m in selected), 60)
+
+    def test_tool_messages_keep_their_pairs(self):
+        context = ChatContextManager(max_tokens=1000, summarize=None).attach(self.groupchat)
+        call = {"role": "assistant", "name": "CodeRunnerAgent", "content": None,
+                "tool_calls": [{"id": "a", "type": "function"}, {"id": "b", "type": "function"}]}
+        result = {"role": "tool", "tool_call_id": "a", "content": "4"}
+        orphan = {"role": "tool", "tool_call_id": "c", "content": "5"}
+        messages = [make_message("TutorAgent", "Lesson"), call, result, orphan, make_message("StudentAgent", "Next")]
+        selected = context.build_context("ProblemGeneratorAgent", messages)
+        # The call of a selected result survives the sender filter, without its unanswered call b
+        self.assertEqual(selected[1]["tool_calls"], [{"id": "a", "type": "function"}])
+        self.assertEqual(selected[2:], [result, messages[-1]])
+        self.assertEqual(len(call["tool_calls"]), 2)
+
+        # A call whose result was truncated away is dropped with it
+        selected = context.build_context("TutorAgent", [call, make_message("StudentAgent", "Next")])
+        self.assertEqual(selected, [make_message("StudentAgent", "Next")])
+
+    def test_summary_runs_in_background(self):
+        async def run():
+            context = ChatContextManager(keep_recent=2, summarize_every=3, summarize=self.summarize).attach(self.groupchat)
+            for i in range(6):
+                self.groupchat.append(make_message("StudentAgent", f"answer {i}"))
+            await context._summary_task
+            return context
+        context = asyncio.run(run())
+        # The task folds everything outside the recent window when it runs
+        self.assertEqual(self.summaries, [4])
+        self.assertEqual(context.summarized_count, 4)
+        self.assertEqual(context.summary, "+4")
+
+if __name__ == "__main__":
+    unittest.main()
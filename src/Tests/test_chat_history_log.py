@@ -0,0 +1,99 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+from src.Tools.chat_history_log import ChatHistoryLog
+
+class TestChatHistoryLog(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp_dir.name, "progress.json")
+        self.messages = [{"content": f"message {i}", "role": "user", "name": "StudentAgent"} for i in range(5)]
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_append_and_read(self):
+        log = ChatHistoryLog(self.filename, fsync_every=2)
+        log.append(self.messages[:3])
+        log.append(self.messages[3:])
+        log.close()
+        self.assertTrue(log.path.endswith("progress.jsonl"))
+        self.assertEqual(list(ChatHistoryLog(self.filename).read()), self.messages)
+
+    def test_read_tail_pages_backwards(self):
+        log = ChatHistoryLog(self.filename)
+        log.TAIL_BLOCK_SIZE = 16  # force reads across several blocks
+        log.append(self.messages)
+        last_page, start = log.read_tail(2)
+        self.assertEqual(last_page, self.messages[3:])
+        previous_page, start = log.read_tail(2, end=start)
+        self.assertEqual(previous_page, self.messages[1:3])
+        first_page, start = log.read_tail(2, end=start)
+        self.assertEqual((first_page, start), (self.messages[:1], 0))
+
+    def test_compact_keeps_history_before_window(self):
+        log = ChatHistoryLog(self.filename)
+        log.append(self.messages)
+        window, start = log.read_tail(2)
+        log.compact(window + [{"content": "new"}], keep_bytes=start)
+        self.assertEqual(list(log.read()), self.messages + [{"content": "new"}])
+
+    def test_torn_last_line_is_skipped_and_not_glued_to_next_message(self):
+        log = ChatHistoryLog(self.filename)
+        log.append(self.messages[:2])
+        log.close()
+        with open(log.path, "a") as f:
+            f.write('{"content": "half writ')
+
+        log = ChatHistoryLog(self.filename)
+        self.assertEqual(list(log.read()), self.messages[:2])
+        self.assertTrue(log.stale_lines)
+        log.append(self.messages[2:3])
+        log.close()
+        self.assertEqual(list(ChatHistoryLog(self.filename).read()), self.messages[:3])
+
+    def test_compact_replaces_log(self):
+        log = ChatHistoryLog(self.filename)
+        log.append(self.messages)
+        log.compact(self.messages[:2])
+        self.assertEqual(list(log.read()), self.messages[:2])
+        self.assertFalse(os.path.exists(f"{log.path}.tmp"))
+
+    def test_unsynced_tail_is_synced_without_another_append(self):
+        log = ChatHistoryLog(self.filename, fsync_every=100, fsync_interval=0.05)
+        with mock.patch("src.Tools.chat_history_log.os.fsync") as fsync:
+            log.append(self.messages[:1])
+            fsync.assert_not_called()
+            deadline = time.monotonic() + 5
+            while not fsync.called and time.monotonic() < deadline:
+                time.sleep(0.01)
+            fsync.assert_called_once()
+        self.assertEqual(log._unsynced, 0)
+        log.close()
+
+    def test_compaction_waits_for_the_stale_line_threshold(self):
+        log = ChatHistoryLog(self.filename, compact_stale_lines=2)
+        log.append(self.messages[:2])
+        log.close()
+        with open(log.path, "a") as f:
+            f.write('{"content": "half writ')
+        log = ChatHistoryLog(self.filename, compact_stale_lines=2)
+        list(log.read())
+        self.assertFalse(log.needs_compaction())
+        log.append(self.messages[2:3])
+        self.assertTrue(log.needs_compaction())
+        log.close()
+
+    def test_legacy_json_history_is_migrated(self):
+        with open(self.filename, "w") as f:
+            json.dump(self.messages, f, indent=4)
+        log = ChatHistoryLog(self.filename)
+        self.assertTrue(log.exists())
+        self.assertEqual(list(log.read()), self.messages)
+        self.assertTrue(os.path.exists(log.path))
+
+if __name__ == "__main__":
+    unittest.main()
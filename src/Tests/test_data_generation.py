@@ -0,0 +1,41 @@
+import os
+import tempfile
+import unittest
+import pandas as pd
+import src.KnowledgeGraphs.data_generation as dg
+from src.KnowledgeGraphs.topic_graph import get_topic_graph
+
+class TestDataGeneration(unittest.TestCase):
+    def test_chunks(self):
+        chunks = list(dg.generate_chunks(250, chunk_students=100, seed=3))
+        self.assertEqual(len(chunks), 3)
+        frame = pd.concat(chunks, ignore_index=True)
+        self.assertEqual(list(frame.columns), dg.COLUMNS)
+        self.assertEqual(frame['student_id'].nunique(), 250)
+        self.assertEqual(chunks[2]['student_id'].min(), 200)
+
+        graph = get_topic_graph()
+        self.assertTrue(set(frame['skill']).issubset(graph.leaf_names))
+        self.assertTrue((frame['skill_id'].map(graph.names.__getitem__) == frame['skill'].astype(str)).all())
+        self.assertTrue(frame['outcome'].isin([0, 1]).all())
+        self.assertTrue(frame['date'].between(pd.Timestamp(dg.start_date), pd.Timestamp(dg.end_date)).all())
+        # Dates increase within every student's sequence
+        self.assertTrue(frame.groupby('student_id')['date'].is_monotonic_increasing.all())
+
+    def test_reproducible(self):
+        first = pd.concat(dg.generate_chunks(50, chunk_students=20, seed=7))
+        second = pd.concat(dg.generate_chunks(50, chunk_students=20, seed=7))
+        pd.testing.assert_frame_equal(first, second)
+        other = pd.concat(dg.generate_chunks(50, chunk_students=20, seed=8))
+        self.assertFalse(first['outcome'].equals(other['outcome']))
+
+    def test_write_csv(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'data', 'interactions.csv')
+            rows = dg.write_chunks(dg.generate_chunks(30, chunk_students=10), path)
+            frame = pd.read_csv(path)
+        self.assertEqual(len(frame), rows)
+        self.assertEqual(list(frame.columns), dg.COLUMNS)
+
+if __name__ == '__main__':
+    unittest.main()
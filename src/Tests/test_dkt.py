@@ -0,0 +1,106 @@
+import asyncio
+import os
+import tempfile
+import unittest
+import numpy as np
+from src.Models.dkt import DKTModel, encode_history, history_from_events, length_buckets, pad_batch
+from src.Tools.event_store import AttemptEventStore
+from src.Models.dkt_server import DKTInferenceServer
+
+def random_model(rng, features=3):
+    lstm_layers = [(rng.normal(0, 0.5, (features, 4 * 8)), rng.normal(0, 0.5, (8, 4 * 8)), rng.normal(0, 0.1, 4 * 8)),
+                   (rng.normal(0, 0.5, (8, 4 * 4)), rng.normal(0, 0.5, (4, 4 * 4)), rng.normal(0, 0.1, 4 * 4))]
+    dense_layers = [(rng.normal(0, 0.5, (4, 5)), rng.normal(0, 0.1, 5), "relu"),
+                    (rng.normal(0, 0.5, (5, 1)), rng.normal(0, 0.1, 1), "sigmoid")]
+    return DKTModel(lstm_layers, dense_layers)
+
+def reference_forward(model, sequence):
+    """Unbatched LSTM over one unpadded sequence"""
+    sigmoid = lambda x: 1 / (1 + np.exp(-x))
+    outputs = sequence.astype(np.float64)
+    for kernel, recurrent_kernel, bias in model.lstm_layers:
+        units = recurrent_kernel.shape[0]
+        h, c, states = np.zeros(units), np.zeros(units), []
+        for x in outputs:
+            i, f, g, o = np.split(x @ kernel + h @ recurrent_kernel + bias, 4)
+            c = sigmoid(f) * c + sigmoid(i) * np.tanh(g)
+            h = sigmoid(o) * np.tanh(c)
+            states.append(h)
+        outputs = np.array(states)
+    output = outputs[-1]
+    for kernel, bias, activation in model.dense_layers:
+        output = output @ kernel + bias
+        output = np.maximum(output, 0) if activation == "relu" else sigmoid(output)
+    return output[0]
+
+class TestDKT(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+        self.model = random_model(self.rng)
+        self.histories = [[(self.rng.choice(['quiz', 'homework', 'lecture']), int(self.rng.integers(0, 2)), float(self.rng.uniform(5, 60)))
+                           for _ in range(self.rng.integers(1, 20))] for _ in range(40)]
+        self.sequences = [encode_history(history) for history in self.histories]
+
+    def test_encode_and_buckets(self):
+        self.assertEqual(encode_history([('homework', 1, 12.5), {'activity_type': 'lecture', 'outcome': 0, 'time_spent': 3}]).tolist(),
+                         [[2, 1, 12.5], [3, 0, 3]])
+        buckets = length_buckets([5, 1, 3, 2], 2)
+        self.assertEqual([bucket.tolist() for bucket in buckets], [[1, 3], [2, 0]])
+        x, lengths = pad_batch(self.sequences, buckets[0])
+        self.assertEqual(x.shape, (2, max(len(self.sequences[1]), len(self.sequences[3])), 3))
+
+    def test_bucketed_matches_unpadded(self):
+        predictions = self.model.predict(self.sequences, batch_size=8)
+        expected = [reference_forward(self.model, sequence) for sequence in self.sequences]
+        np.testing.assert_allclose(predictions, expected, rtol=1e-4)
+
+    def test_wrong_quiz_answer_is_not_masked(self):
+        # A wrong quiz answer without a time is a real step, unlike the padding
+        history = encode_history([('quiz', 1, 10.0), ('quiz', 0, 0.0)])
+        self.assertNotEqual(self.model.predict([history])[0], self.model.predict([history[:1]])[0])
+
+    def test_save_load(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "dkt.npz")
+            self.model.save(path)
+            loaded = DKTModel.load(path)
+        np.testing.assert_array_equal(loaded.predict(self.sequences), self.model.predict(self.sequences))
+
+    def test_load_rejects_models_of_another_encoding(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "dkt.npz")
+            self.model.save(path)
+            with np.load(path) as arrays:
+                old_arrays = {name: arrays[name] for name in arrays.files if name != "feature_version"}
+            np.savez(path, **old_arrays)
+            with self.assertRaises(ValueError):
+                DKTModel.load(path)
+
+    def test_server_coalesces_requests(self):
+        server = DKTInferenceServer(self.model, max_batch_size=64, max_wait_ms=20)
+
+        async def run():
+            histories = {f"student{i}": history for i, history in enumerate(self.histories)}
+            results = await server.predict_many(histories)
+            await server.close()
+            return results
+
+        results = asyncio.run(run())
+        np.testing.assert_allclose([results[f"student{i}"] for i in range(40)], self.model.predict(self.sequences), rtol=1e-6)
+        self.assertEqual(server.get_stats()['batches'], 1)
+        self.assertEqual(server.get_stats()['requests'], 40)
+
+    def test_history_from_event_store(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store = AttemptEventStore(os.path.join(tmp_dir, 'events'), flush_rows=2, flush_seconds=3600)
+            store.append('ana', 'Not a topic', True, latency_ms=90000, source='KnowledgeTracerAgent', timestamp=10)
+            store.append('ana', 'Not a topic', False, source='KnowledgeTracerAgent', timestamp=20)
+            store.append('ana', 'Not a topic', False, source='KnowledgeTracerAgent', timestamp=30)
+            store.append('ben', 'Not a topic', True, source='KnowledgeTracerAgent', timestamp=15)
+            history = history_from_events(store.scan(student_id='ana', source='KnowledgeTracerAgent'))
+            self.assertEqual(history_from_events(store.scan(student_id='cleo')), [])
+        self.assertEqual(history, [('quiz', 1, 1.5), ('quiz', 0, 0.0), ('quiz', 0, 0.0)])
+        self.assertEqual(encode_history(history).shape, (3, 3))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from src.Models.bkt import BKTEngine
+from src.Tools.event_store import AttemptEventStore
+from src.KnowledgeGraphs.topic_graph import get_topic_graph
+
+DAY = 24 * 3600
+
+class TestAttemptEventStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp_dir.name, 'events')
+        self.store = AttemptEventStore(self.root, flush_rows=4, flush_seconds=3600)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_append_flush_and_scan(self):
+        skill = get_topic_graph().leaf_names[0]
+        self.store.append('ana', skill, True, latency_ms=1200, difficulty=1.0, source='MasteryAgent', timestamp=10 * DAY + 5)
+        self.store.append('ben', skill, False, timestamp=10 * DAY + 1)
+        self.store.append('ana', 'Not a topic', False, timestamp=11 * DAY + 2)
+        # Buffered events are visible before the flush
+        self.assertEqual(len(self.store.scan()['timestamp']), 3)
+        self.store.append('ana', skill, True, timestamp=10 * DAY + 9)
+
+        # The fourth event flushed the buffer into one part per day
+        days = sorted(os.listdir(self.root))
+        self.assertEqual(days, ['day=1970-01-11', 'day=1970-01-12'])
+
+        events = self.store.scan(student_id='ana')
+        self.assertEqual(events['timestamp'].tolist(), [10 * DAY + 5, 10 * DAY + 9, 11 * DAY + 2])
+        self.assertEqual(events['skill_id'].tolist(), [get_topic_graph().ids[skill], get_topic_graph().ids[skill], -1])
+        self.assertEqual(events['correct'].tolist(), [True, True, False])
+        self.assertEqual(events['source'][0], 'MasteryAgent')
+        self.assertTrue(np.isnan(events['latency_ms'][1]))
+
+        self.assertEqual(len(self.store.scan(skill=skill)['timestamp']), 3)
+        self.assertEqual(self.store.scan(start=11 * DAY)['student_id'].tolist(), ['ana'])
+        self.assertEqual(len(self.store.scan(end=10 * DAY)['timestamp']), 0)
+
+        # A new store reads the parts from disk
+        reopened = AttemptEventStore(self.root)
+        self.assertEqual(reopened.summary(), {'ana': (3, 2), 'ben': (1, 0)})
+
+    def test_compact(self):
+        for i in range(10):
+            self.store.append(f'student{i % 3}', i, i % 2 == 0, timestamp=5 * DAY + i)
+        self.store.flush()
+        self.assertEqual(self.store.compact('1970-01-06'), 3)
+        self.assertEqual(len(os.listdir(os.path.join(self.root, 'day=1970-01-06'))), 1)
+        events = AttemptEventStore(self.root).scan(student_id='student1')
+        self.assertEqual(events['skill_id'].tolist(), [1, 4, 7])
+
+    def test_part_cache_is_bounded(self):
+        store = AttemptEventStore(self.root, flush_rows=1, flush_seconds=3600, cached_parts=2)
+        for day in range(5):
+            store.append('ana', 0, True, timestamp=day * DAY)
+        self.assertEqual(len(store._parts), 2)
+        self.assertEqual(len(store.scan(student_id='ana')['timestamp']), 5)
+        self.assertEqual(len(store._parts), 2)
+
+    def test_tracer_replays_events(self):
+        engine = BKTEngine(get_topic_graph().names)
+        skill = get_topic_graph().leaf_names[0]
+        for i in range(3):
+            self.store.append('ana', skill, True, timestamp=DAY + i)
+        self.store.append('ana', 'Not a topic', False, timestamp=DAY + 3)
+        self.assertEqual(engine.replay(self.store.scan()), 3)
+        self.assertTrue(engine.is_mastered(['ana'], [skill])[0])
+
+if __name__ == '__main__':
+    unittest.main()
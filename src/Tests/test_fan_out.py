@@ -0,0 +1,65 @@
+import asyncio
+import time
+import unittest
+from src.FSMs.fan_out import gather_replies, gather_stages
+
+
+async def reply(content, delay):
+    await asyncio.sleep(delay)
+    return content
+
+
+async def fail():
+    raise RuntimeError("no reply")
+
+
+class TestGatherReplies(unittest.TestCase):
+    def test_concurrent_and_in_call_order(self):
+        start = time.perf_counter()
+        replies = asyncio.run(gather_replies([reply('model', 0.1), reply('level', 0.05), reply('motivation', 0.1)], timeout=5))
+        self.assertEqual(replies, ['model', 'level', 'motivation'])
+        self.assertLess(time.perf_counter() - start, 0.2)
+
+    def test_timeout_and_failures_give_none(self):
+        start = time.perf_counter()
+        replies = asyncio.run(gather_replies([reply('model', 0.01), reply('late', 10), fail()], timeout=0.1))
+        self.assertEqual(replies, ['model', None, None])
+        self.assertLess(time.perf_counter() - start, 1)
+
+    def test_no_calls(self):
+        self.assertEqual(asyncio.run(gather_replies([], timeout=1)), [])
+
+
+class TestGatherStages(unittest.TestCase):
+    def test_later_stages_see_earlier_replies(self):
+        published = []
+        delays = {'model': 0.05, 'level': 0.01, 'motivation': 0.01}
+
+        async def member_reply(member):
+            await asyncio.sleep(delays[member])
+            if member == 'motivation':
+                return f"motivation after {published}"
+            return member
+
+        async def publish(member, content):
+            published.append(content)
+
+        replied = asyncio.run(gather_stages([['model', 'level'], ['motivation']], member_reply, publish, timeout=5))
+        self.assertEqual(replied, ['model', 'level', 'motivation'])
+        self.assertEqual(published, ['model', 'level', "motivation after ['model', 'level']"])
+
+    def test_timeout_is_shared_by_the_stages(self):
+        published = []
+
+        async def publish(member, content):
+            published.append(content)
+
+        start = time.perf_counter()
+        replied = asyncio.run(gather_stages([['slow'], ['late']], lambda member: reply(member, 0.15), publish, timeout=0.2))
+        self.assertEqual(replied, ['slow'])
+        self.assertEqual(published, ['slow'])
+        self.assertLess(time.perf_counter() - start, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
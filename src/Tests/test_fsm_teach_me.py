@@ -0,0 +1,68 @@
+import unittest
+from unittest.mock import Mock
+from src.Agents.agents import AgentKeys
+from src.FSMs.fsm_teach_me import CompiledTeachMeFSM, FSMStates, TeachMeFSM, create_teach_me_fsm
+
+class TestCompiledTeachMeFSM(unittest.TestCase):
+    def make_fsm(self, fsm_class, agents=None, max_code_execution_attempts=1):
+        agents = agents if agents is not None else {key.value: key.value for key in AgentKeys if key is not AgentKeys.POST_ANSWER}
+        fsm = fsm_class(agents, max_code_execution_attempts=max_code_execution_attempts)
+        self.groupchat = Mock(messages=[])
+        self.groupchat.get_messages.side_effect = lambda: self.groupchat.messages
+        fsm.register_groupchat_manager(Mock(groupchat=self.groupchat))
+        return fsm
+
+    def run_turns(self, fsm, code_results):
+        """Speakers and states over a session where the code runs succeed or fail as listed"""
+        code_results = iter(code_results)
+        trace = []
+        for _ in range(25):
+            if fsm.state == FSMStates.VERIFYING_CODE.value:
+                content = '{"success": true}' if next(code_results, True) else "exitcode: 1 (execution failed)"
+                self.groupchat.messages.append({"name": "CodeRunnerVerifierAgent", "content": content})
+            speaker = fsm.next_speaker_selector(None, self.groupchat)
+            trace.append((speaker, fsm.state, fsm.run_attempts))
+        return trace
+
+    def test_same_speakers_as_transitions_backend(self):
+        for code_results in ([True], [False, True], [False, False, False, False]):
+            with self.subTest(code_results=code_results):
+                expected = self.run_turns(self.make_fsm(TeachMeFSM), code_results)
+                actual = self.run_turns(self.make_fsm(CompiledTeachMeFSM), code_results)
+                self.assertEqual(actual, expected)
+
+    def test_table_is_shared(self):
+        first = self.make_fsm(CompiledTeachMeFSM)
+        second = self.make_fsm(CompiledTeachMeFSM)
+        self.assertIs(first.TRANSITION_TABLE, second.TRANSITION_TABLE)
+        self.assertEqual(set(CompiledTeachMeFSM.TRANSITION_TABLE), {state.value for state in FSMStates})
+
+    def test_subclass_overrides_are_compiled(self):
+        class AlwaysCorrectFSM(CompiledTeachMeFSM):
+            def code_is_correct(self):
+                return True
+
+        fsm = self.make_fsm(AlwaysCorrectFSM)
+        fsm.state = FSMStates.VERIFYING_CODE.value
+        self.assertEqual(fsm.next_speaker_selector(None, self.groupchat), AgentKeys.LEARNER_MODEL.value)
+        self.assertEqual(fsm.state, FSMStates.UPDATING_MODEL.value)
+
+    def test_post_answer_stage(self):
+        for fsm_class in (TeachMeFSM, CompiledTeachMeFSM):
+            with self.subTest(fsm_class=fsm_class.__name__):
+                sequential = [speaker for speaker, _, _ in self.run_turns(self.make_fsm(fsm_class), [True])]
+                start = sequential.index(AgentKeys.LEARNER_MODEL.value)
+                self.assertEqual(sequential[start:start + 4], ['learner_model', 'level_adapter', 'motivator', 'teacher'])
+
+                agents = {key.value: key.value for key in AgentKeys}
+                fan_out = [speaker for speaker, _, _ in self.run_turns(self.make_fsm(fsm_class, agents), [False, True])]
+                start = fan_out.index(AgentKeys.POST_ANSWER.value)
+                self.assertEqual(fan_out[start:start + 2], ['post_answer', 'teacher'])
+                self.assertNotIn(AgentKeys.MOTIVATOR.value, fan_out)
+
+    def test_backend_selection(self):
+        self.assertIsInstance(create_teach_me_fsm({}, backend='compiled'), CompiledTeachMeFSM)
+        self.assertNotIsInstance(create_teach_me_fsm({}, backend='transitions'), CompiledTeachMeFSM)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import re
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+# Cumulative import time budget per entry point, in milliseconds
+IMPORT_TIME_BUDGETS_MS = {
+    "src.Agents.agents": 50,
+    "src.UI.avatar": 50,
+    "src.UI.console_knowledge_tracer": 3000,
+    "src.UI.gui_knowledge_tracer": 6000,
+    "src.UI.panel_gui_tabs21": 6000,
+}
+
+IMPORTTIME_PATTERN = re.compile(r'^import time:\s*(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)\s*$')
+
+
+def run_python(code: str, *flags):
+    return subprocess.run([sys.executable, *flags, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True)
+
+
+def measure_import_time(module: str):
+    """Cumulative import time of module in ms from `python -X importtime`, None if it cannot be imported"""
+    result = run_python(f"import {module}", "-X", "importtime")
+    if result.returncode != 0:
+        return None, result.stderr.strip().splitlines()[-1]
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_PATTERN.match(line)
+        if match and match.group(4) == module:
+            return int(match.group(2)) / 1000, None
+    return None, f"{module} not found in -X importtime output"
+
+
+class TestImportTime(unittest.TestCase):
+    def test_agents_module_builds_no_agents(self):
+        result = run_python(
+            "import sys\n"
+            "import src.Agents.agents as agents\n"
+            "import src.UI.avatar\n"
+            "assert 'tutor' in agents.agents_dict\n"
+            "heavy = {'autogen', 'openai', 'src.KnowledgeGraphs.math_taxonomy'} & set(sys.modules)\n"
+            "assert not heavy, heavy\n"
+            "assert not agents._shared_agents\n"
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+    def test_entry_point_import_budgets(self):
+        for module, budget_ms in IMPORT_TIME_BUDGETS_MS.items():
+            with self.subTest(module=module):
+                elapsed_ms, error = measure_import_time(module)
+                if elapsed_ms is None:
+                    self.skipTest(f"cannot import {module}: {error}")
+                self.assertLessEqual(elapsed_ms, budget_ms, f"{module} took {elapsed_ms:.0f} ms to import")
+
+if __name__ == "__main__":
+    unittest.main()
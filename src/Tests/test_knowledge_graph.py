@@ -1,6 +1,7 @@
 import unittest
 import sys
 import os
+import networkx as nx
 
 # Add the parent directory to sys.path to find your_module
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
@@ -36,5 +37,40 @@ class TestKnowledgeGraph(unittest.TestCase):
         for edge in expected_edges:
             self.assertIn(edge, kg.graph.edges)
 
+    def test_build_prerequisite_dag(self):
+        prerequisites = {
+            "B": ["A"],
+            "C": ["A", "B"],  # A -> C is implied by A -> B -> C
+            "D": ["A"],
+        }
+        kg = KnowledgeGraph()
+        kg.build_prerequisite_dag(prerequisites, topics=["A", "B", "C", "D", "E"])
+
+        # Transitive reduction drops the redundant edge but keeps the difficulty
+        self.assertNotIn(("A", "C"), kg.graph.edges)
+        self.assertEqual(kg.graph.nodes["C"]["difficulty"], 3)
+
+        self.assertEqual(kg.topological_order, ("A", "B", "C", "D", "E"))
+        self.assertEqual(kg.find_first_node(), "A")
+        self.assertEqual(kg.get_frontier([]), ["A", "E"])
+        self.assertEqual(kg.get_frontier(["A"]), ["B", "D", "E"])
+        self.assertEqual(kg.get_frontier(["A", "B", "E"]), ["C", "D"])
+        self.assertIsNone(kg.get_next_topic(["A", "B", "C", "D", "E"]))
+
+    def test_prerequisite_cycle_is_rejected(self):
+        kg = KnowledgeGraph()
+        with self.assertRaises(ValueError):
+            kg.build_prerequisite_dag({"A": ["B"], "B": ["A"]}, topics=["A", "B"])
+
+    def test_math_taxonomy_prerequisites(self):
+        kg = KnowledgeGraph()
+        kg.build_prerequisite_dag()
+        self.assertIn("Arithmetic->Fractions", nx.ancestors(kg.graph, "Algebra->Linear_Equations"))
+        # Every topic is reachable from an empty mastered set
+        mastered = []
+        while kg.get_next_topic(mastered) is not None:
+            mastered.append(kg.get_next_topic(mastered))
+        self.assertEqual(len(mastered), len(kg.graph.nodes))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from src.KnowledgeGraphs.data_generation import generate_chunks
+from src.Models.dkt import DKTModel
+from src.Models.kt_benchmark import STRATEGIES, BKTStrategy, DKTStrategy, Interactions, auc, benchmark, replay, rmse
+
+class TestKTBenchmark(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.interactions = Interactions.from_frame(pd.concat(generate_chunks(60, seed=1), ignore_index=True))
+
+    def test_metrics(self):
+        self.assertEqual(auc([0, 0, 1, 1], [0.1, 0.2, 0.3, 0.4]), 1.0)
+        self.assertEqual(auc([1, 1, 0, 0], [0.1, 0.2, 0.3, 0.4]), 0.0)
+        self.assertEqual(auc([0, 1, 0, 1], [0.5, 0.5, 0.5, 0.5]), 0.5)
+        self.assertAlmostEqual(auc([0, 1, 1], [0.2, 0.2, 0.9]), 0.75)
+        self.assertTrue(np.isnan(auc([1, 1], [0.1, 0.2])))
+        self.assertAlmostEqual(rmse([1, 0], [0.5, 0.5]), 0.5)
+
+    def test_interactions(self):
+        self.assertEqual(self.interactions.student_count, 60)
+        self.assertEqual(len(self.interactions.skills), len(self.interactions))
+        self.assertLess(self.interactions.skills.max(), len(self.interactions.skill_names))
+
+    def test_strategies(self):
+        for name in ('bkt', 'threshold', 'window', 'streak'):
+            report = benchmark(STRATEGIES[name](), self.interactions, batch_size=1, memory=name == 'bkt')
+            self.assertEqual(report['strategy'], name)
+            self.assertTrue(0 <= report['auc'] <= 1, name)
+            self.assertTrue(0 <= report['rmse'] <= 1, name)
+            self.assertGreater(report['updates_per_second'], 0)
+            self.assertLessEqual(report['p50_latency_us'], report['p99_latency_us'])
+            if name == 'bkt':
+                self.assertGreater(report['peak_memory_mb'], 0)
+
+    def test_batches_match_single_updates(self):
+        single, _ = replay(BKTStrategy(), self.interactions, batch_size=1)
+        batched, latencies = replay(BKTStrategy(), self.interactions, batch_size=64)
+        np.testing.assert_allclose(batched, single, rtol=1e-5)
+        self.assertEqual(len(latencies), -(-len(self.interactions) // 64))
+
+    def test_dkt(self):
+        rng = np.random.default_rng(0)
+        model = DKTModel([(rng.normal(0, 0.1, (3, 16)), rng.normal(0, 0.1, (4, 16)), np.zeros(16))],
+                         [(rng.normal(0, 0.1, (4, 1)), np.zeros(1), "sigmoid")])
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "dkt.npz")
+            model.save(path)
+            predictions, _ = replay(DKTStrategy(path), self.interactions, batch_size=32)
+        self.assertEqual(len(predictions), len(self.interactions))
+        self.assertTrue(((predictions > 0) & (predictions < 1)).all())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+from src.Tools.llm_cache import LLMResponseCache
+
+class TestLLMResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "cache.sqlite")
+        self.cache = LLMResponseCache(path=self.path, ttl=60, max_memory_entries=2, max_disk_entries=3)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp_dir.cleanup()
+
+    def test_key_depends_on_all_inputs(self):
+        key = LLMResponseCache.make_key("gpt-4", "system", "prompt", 0.7)
+        self.assertEqual(key, LLMResponseCache.make_key("gpt-4", "system", "prompt", 0.7))
+        self.assertNotEqual(key, LLMResponseCache.make_key("gpt-4", "system", "prompt", 0.0))
+        self.assertNotEqual(key, LLMResponseCache.make_key("gpt-4o", "system", "prompt", 0.7))
+
+    def test_hit_and_miss_counters(self):
+        self.assertIsNone(self.cache.get("a"))
+        self.cache.set("a", "answer")
+        self.assertEqual(self.cache.get("a"), "answer")
+        stats = self.cache.get_stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+
+    def test_memory_tier_is_lru_bounded(self):
+        for key in ("a", "b", "c"):
+            self.cache.set(key, key.upper())
+        self.assertEqual(self.cache.get_stats()['memory_entries'], 2)
+        # "a" was evicted from memory but is still on disk
+        self.assertEqual(self.cache.get("a"), "A")
+        self.assertEqual(self.cache.disk_hits, 1)
+
+    def test_disk_tier_survives_restart(self):
+        self.cache.set("a", "answer")
+        self.cache.close()
+        self.cache = LLMResponseCache(path=self.path, ttl=60)
+        self.assertEqual(self.cache.get("a"), "answer")
+
+    def test_disk_tier_is_size_bounded(self):
+        for key in ("a", "b", "c", "d"):
+            self.cache.set(key, key.upper())
+            time.sleep(0.01)
+        self.cache._memory.clear()
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.get("d"), "D")
+
+    def test_disk_hit_keeps_its_expiry(self):
+        self.cache.set("a", "answer")
+        self.cache.close()
+        self.cache = LLMResponseCache(path=self.path, ttl=3600)
+        self.assertEqual(self.cache.get("a"), "answer")
+        _, expires_at = self.cache._memory["a"]
+        self.assertLess(expires_at, time.time() + 61)
+
+    def test_disk_tier_is_read_off_the_event_loop(self):
+        self.cache.set("a", "answer")
+        self.cache._memory.clear()
+        loop_thread = []
+
+        async def create():
+            return "fresh"
+
+        def disk_get(key, now, disk_get=self.cache._disk_get):
+            loop_thread.append(threading.current_thread() is threading.main_thread())
+            return disk_get(key, now)
+
+        self.cache._disk_get = disk_get
+        self.assertEqual(asyncio.run(self.cache.get_or_create("a", create)), "answer")
+        self.assertEqual(loop_thread, [False])
+
+    def test_expired_entries_are_ignored(self):
+        self.cache.ttl = -1
+        self.cache.set("a", "answer")
+        self.assertIsNone(self.cache.get("a"))
+
+    def test_concurrent_requests_share_one_upstream_call(self):
+        calls = []
+
+        async def create():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "question"
+
+        async def run():
+            return await asyncio.gather(*(self.cache.get_or_create("q", create) for _ in range(30)))
+
+        results = asyncio.run(run())
+        self.assertEqual(results, ["question"] * 30)
+        self.assertEqual(len(calls), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -74,6 +74,18 @@ class TestMasteryAgent(unittest.TestCase):
         self.assertIsInstance(mastery_achieved, bool)
         self.assertEqual(len(results), 2)
 
+    def test_learners_keep_their_own_state(self):
+        """Test that learners sharing the agent do not move each other's difficulty"""
+        self.mastery_agent.event_store = None
+        ana, ben = self.mastery_agent.learner('ana'), self.mastery_agent.learner('ben')
+        ana.current_topic = ben.current_topic = self.test_topic
+        for _ in range(3):
+            self.mastery_agent._update_performance_tracking(True, 'ana')
+        self.assertGreater(ana.adaptive_difficulty, 1.0)
+        self.assertEqual(ben.adaptive_difficulty, 1.0)
+        self.assertEqual(ana.correct_answers, 3)
+        self.assertEqual(ben.correct_answers, 0)
+
     def test_performance_history(self):
         """Test performance history tracking"""
         self.mastery_agent._update_performance_history(self.test_topic, True)
@@ -0,0 +1,66 @@
+import json
+import os
+import tempfile
+import unittest
+import src.KnowledgeGraphs.math_taxonomy as mt
+from src.KnowledgeGraphs.mastery_frontier import FrontierIndex, MasteryFrontier, get_frontier_index, leaf_prerequisites
+from src.KnowledgeGraphs.topic_graph import get_topic_graph
+from src.Tools.progress_tracker import ProgressTracker
+
+class TestMasteryFrontier(unittest.TestCase):
+    def setUp(self):
+        # A and E are entry topics, C needs A and B
+        self.index = FrontierIndex(["A", "B", "C", "D", "E"], {"B": ["A"], "C": ["A", "B"], "D": ["A"]})
+
+    def test_topological_ids(self):
+        self.assertEqual(self.index.topics, ("A", "B", "C", "D", "E"))
+        self.assertEqual(list(self.index.prerequisite_counts), [0, 1, 2, 1, 0])
+        with self.assertRaises(ValueError):
+            FrontierIndex(["A", "B"], {"A": ["B"], "B": ["A"]})
+
+    def test_incremental_updates(self):
+        frontier = MasteryFrontier(self.index)
+        self.assertEqual(frontier.frontier(), ["A", "E"])
+        self.assertEqual(frontier.next_topic(), "A")
+
+        frontier.set_mastered("A")
+        self.assertEqual(frontier.frontier(), ["B", "D", "E"])
+        frontier.set_mastered("B")
+        self.assertEqual(frontier.next_topic(), "C")
+
+        # Forgetting A locks its successors again
+        frontier.set_mastered("A", False)
+        self.assertEqual(frontier.frontier(), ["A", "E"])
+        self.assertFalse(frontier.is_unlocked("C"))
+        self.assertFalse(frontier.set_mastered("unknown"))
+
+    def test_matches_rescan(self):
+        topics, prerequisites = leaf_prerequisites(mt.topic_prerequisites, get_topic_graph())
+        index = FrontierIndex(topics, prerequisites)
+        frontier = MasteryFrontier(index)
+        mastered = set()
+        for step in range(200):
+            topic = frontier.next_topic()
+            expected = next(topic for topic in index.topics
+                            if topic not in mastered and mastered.issuperset(prerequisites.get(topic, ())))
+            self.assertEqual(topic, expected)
+            frontier.set_mastered(topic)
+            mastered.add(topic)
+            if step % 7 == 0:
+                forgotten = sorted(mastered)[step % len(mastered)]
+                frontier.set_mastered(forgotten, False)
+                mastered.discard(forgotten)
+
+    def test_progress_tracker(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "progress.json")
+            with open(path, "w") as f:
+                json.dump({"Arithmetic->Recognizing_Shapes": True, "Arithmetic->Number_Sense": True}, f)
+
+            tracker = ProgressTracker(path, frontier_index=get_frontier_index())
+            self.assertEqual(tracker.get_next_topic(), "Arithmetic->Basic_Operations")
+            tracker.update_topic_progress("Arithmetic->Basic_Operations", True)
+            self.assertEqual(tracker.get_next_topic(), "Arithmetic->Number_Properties")
+
+if __name__ == '__main__':
+    unittest.main()
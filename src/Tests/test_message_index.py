@@ -0,0 +1,66 @@
+import unittest
+from types import SimpleNamespace
+from src.Agents.message_index import MessageIndex
+from src.FSMs.fsm_teach_me import TeachMeFSM
+
+
+def make_chat(*messages):
+    return SimpleNamespace(messages=[{'name': name, 'role': role, 'content': content} for name, role, content in messages])
+
+
+class TestMessageIndex(unittest.TestCase):
+    def setUp(self):
+        self.chat = make_chat(('Student', 'user', 'hi'), ('Tutor', 'assistant', 'one'),
+                              ('Student', 'user', 'why'), ('Tutor', 'assistant', 'two'))
+        self.index = MessageIndex(self.chat, ring_size=2)
+
+    def test_last_from(self):
+        self.assertEqual(self.index.last_from('Tutor')['content'], 'two')
+        self.assertEqual(self.index.last_from('Student')['content'], 'why')
+        self.assertIsNone(self.index.last_from('Nobody'))
+        self.assertEqual(self.index.last()['content'], 'two')
+
+    def test_counts(self):
+        self.assertEqual(self.index.message_count(), 4)
+        self.assertEqual(self.index.message_count(role='user'), 2)
+        self.assertEqual(self.index.message_count(name='Tutor'), 2)
+        self.assertEqual(self.index.message_count(name='Nobody'), 0)
+
+    def test_direct_appends_are_picked_up(self):
+        self.index.sync()
+        self.chat.messages.append({'name': 'Tutor', 'role': 'assistant', 'content': 'three'})
+        self.assertEqual(self.index.last_from('Tutor')['content'], 'three')
+        self.assertEqual([m['content'] for m in self.index.recent_from('Tutor')], ['two', 'three'])
+        self.assertEqual(self.index.message_count(), 5)
+
+    def test_reset(self):
+        self.index.sync()
+        self.chat.messages.clear()
+        self.chat.messages.append({'name': 'Student', 'role': 'user', 'content': 'again'})
+        self.assertIsNone(self.index.last_from('Tutor'))
+        self.assertEqual(self.index.message_count(), 1)
+        self.assertEqual(self.index.last_from('Student')['content'], 'again')
+
+
+class TestFSMConditions(unittest.TestCase):
+    def make_fsm(self, chat):
+        chat.message_index = MessageIndex(chat)
+        chat.get_messages = lambda: chat.messages
+        fsm = TeachMeFSM({})
+        fsm.register_groupchat_manager(SimpleNamespace(groupchat=chat))
+        return fsm
+
+    def test_conditions_use_index(self):
+        chat = make_chat(('LevelAdapterAgent', 'assistant', 'Well done.\n{"correct": true, "difficulty": "increase"}'),
+                         ('CodeRunnerVerifierAgent', 'assistant', 'The code ran.\n{"success": true}'))
+        fsm = self.make_fsm(chat)
+        self.assertTrue(fsm.adapter_agent_says_increase_difficulty())
+        self.assertTrue(fsm.code_is_correct())
+
+        chat.messages.append({'name': 'LevelAdapterAgent', 'role': 'assistant', 'content': 'keep it'})
+        self.assertFalse(fsm.adapter_agent_says_increase_difficulty())
+        self.assertFalse(fsm.code_is_correct())
+
+
+if __name__ == '__main__':
+    unittest.main()
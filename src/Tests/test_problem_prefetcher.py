@@ -0,0 +1,83 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from src.Agents.problem_prefetcher import ProblemPrefetcher
+from src.FSMs.fsm_teach_me import FSMStates, TeachMeFSM
+
+
+def level_adapter_message(difficulty):
+    return {'name': 'LevelAdapterAgent', 'content': f'{{"correct": true, "difficulty": "{difficulty}"}}'}
+
+
+class TestProblemPrefetcher(unittest.TestCase):
+    def make_prefetcher(self, delay=0.0, **kwargs):
+        self.prompts = []
+
+        async def generate(branch, messages):
+            self.prompts.append((branch, messages))
+            await asyncio.sleep(delay)
+            return f'{branch} problem'
+
+        prefetcher = ProblemPrefetcher(SimpleNamespace(name='ProblemGeneratorAgent'), generate=generate, **kwargs)
+        prefetcher.groupchat = SimpleNamespace(messages=[
+            {'name': 'TeacherAgent', 'content': 'Fractions'},
+            {'name': 'ProblemGeneratorAgent', 'content': 'What is 1/2 + 1/4?'},
+        ])
+        return prefetcher
+
+    def test_committed_branch_answers_the_next_turn(self):
+        async def run():
+            prefetcher = self.make_prefetcher()
+            prefetcher.on_problem(prefetcher.groupchat.messages[-1])
+            await asyncio.sleep(0.01)  # the student answers
+            prefetcher.on_level_adapter(level_adapter_message('increase'))
+            self.assertTrue(prefetcher.has_committed())
+            self.assertEqual(await prefetcher.a_prefetched_reply(None), (True, 'increase problem'))
+            self.assertFalse(prefetcher.has_committed())
+            return prefetcher
+
+        prefetcher = asyncio.run(run())
+        self.assertEqual(sorted(branch for branch, _ in self.prompts), ['decrease', 'increase'])
+        self.assertEqual([message['role'] for message in self.prompts[0][1]], ['user', 'assistant'])
+        self.assertEqual(prefetcher.get_stats(), {'hits': 1, 'misses': 0, 'discarded': 1})
+
+    def test_keep_discards_every_candidate(self):
+        async def run():
+            prefetcher = self.make_prefetcher(delay=10)
+            prefetcher.on_problem(prefetcher.groupchat.messages[-1])
+            prefetcher.on_level_adapter(level_adapter_message('keep'))
+            self.assertFalse(prefetcher.has_committed())
+            self.assertEqual(await prefetcher.a_prefetched_reply(None), (False, None))
+            return prefetcher
+
+        self.assertEqual(asyncio.run(run()).get_stats(), {'hits': 0, 'misses': 1, 'discarded': 2})
+
+    def test_slow_candidate_falls_back(self):
+        async def run():
+            prefetcher = self.make_prefetcher(delay=10, wait_seconds=0.05)
+            prefetcher.on_problem(prefetcher.groupchat.messages[-1])
+            prefetcher.on_level_adapter(level_adapter_message('decrease'))
+            return await prefetcher.a_prefetched_reply(None)
+
+        self.assertEqual(asyncio.run(run()), (False, None))
+
+    def test_no_prefetch_outside_an_event_loop(self):
+        prefetcher = self.make_prefetcher()
+        prefetcher.on_problem(prefetcher.groupchat.messages[-1])
+        prefetcher.on_level_adapter(level_adapter_message('increase'))
+        self.assertFalse(prefetcher.has_committed())
+
+    def test_fsm_skips_the_lesson(self):
+        fsm = TeachMeFSM({'teacher': 'teacher', 'problem_generator': 'problem_generator'})
+        fsm.register_prefetcher(SimpleNamespace(has_committed=lambda: True))
+        fsm.state = FSMStates.MOTIVATING.value
+        self.assertEqual(fsm.next_speaker_selector(None, None), 'problem_generator')
+        self.assertEqual(fsm.state, FSMStates.AWAITING_PROBLEM.value)
+
+        fsm.register_prefetcher(SimpleNamespace(has_committed=lambda: False))
+        fsm.state = FSMStates.MOTIVATING.value
+        self.assertEqual(fsm.next_speaker_selector(None, None), 'teacher')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from src.Tools.question_bank import QuestionBank
+
+class TestQuestionBank(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "bank.json")
+        self.generated = []
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    async def generate(self, topic, subtopic, difficulty):
+        self.generated.append((topic, subtopic, difficulty))
+        return f"[Question] {topic} {subtopic} {difficulty} #{len(self.generated)}"
+
+    def make_bank(self):
+        return QuestionBank(self.generate, path=self.path, target_size=3, low_watermark=2)
+
+    def test_pop_from_empty_pool_returns_none(self):
+        async def run():
+            bank = self.make_bank()
+            self.assertIsNone(bank.pop("Algebra", "Algebra->Linear_Equations", "basic"))
+            await bank.wait_for_refills()
+            return bank
+        bank = asyncio.run(run())
+        self.assertEqual(bank.size("Algebra", "Algebra->Linear_Equations", "basic"), 3)
+
+    def test_pop_refills_to_target(self):
+        async def run():
+            bank = self.make_bank()
+            await bank.refill("Algebra", None, "basic")
+            first = bank.pop("Algebra", None, "basic")
+            second = bank.pop("Algebra", None, "basic")
+            await bank.wait_for_refills()
+            return bank, first, second
+        bank, first, second = asyncio.run(run())
+        self.assertNotEqual(first, second)
+        self.assertEqual(bank.size("Algebra", None, "basic"), 3)
+        self.assertEqual(len(self.generated), 5)
+
+    def test_pools_persist_between_restarts(self):
+        async def run():
+            bank = self.make_bank()
+            await bank.refill("Geometry", "Geometry->Circles", "advanced")
+        asyncio.run(run())
+        restarted = self.make_bank()
+        self.assertEqual(restarted.size("Geometry", "Geometry->Circles", "advanced"), 3)
+
+    def test_warm_from_taxonomy(self):
+        taxonomy = {"Arithmetic": ["Arithmetic->Fractions"], "Algebra": ["Algebra->Functions"]}
+        async def run():
+            bank = self.make_bank()
+            bank.warm(taxonomy, ["basic"], topics=["Algebra"])
+            await bank.wait_for_refills()
+            return bank
+        bank = asyncio.run(run())
+        self.assertEqual(bank.size("Algebra", None, "basic"), 3)
+        self.assertEqual(bank.size("Algebra", "Algebra->Functions", "basic"), 3)
+        self.assertEqual(bank.size("Arithmetic", None, "basic"), 0)
+
+    def test_shared_bank_refills_with_the_callers_generator(self):
+        other = []
+        async def generate_other(topic, subtopic, difficulty):
+            other.append(topic)
+            return f"[Question] other #{len(other)}"
+        async def run():
+            bank = QuestionBank(path=self.path, target_size=3, low_watermark=2)
+            self.assertIsNone(bank.schedule_refill("Algebra", None, "basic"))
+            bank.pop("Algebra", None, "basic", generate=generate_other)
+            await bank.wait_for_refills()
+            return bank
+        bank = asyncio.run(run())
+        self.assertEqual(len(other), 3)
+        self.assertIsNone(bank.generate)
+
+    def test_given_generator_is_used_over_the_banks_own(self):
+        other = []
+        async def generate_other(topic, subtopic, difficulty):
+            other.append((topic, subtopic, difficulty))
+            return f"[Question] other #{len(other)}"
+        async def run():
+            bank = self.make_bank()
+            bank.pop("Algebra", None, "basic", generate=generate_other)
+            await bank.wait_for_refills()
+            bank.schedule_refill("Geometry", None, "basic", generate=generate_other)
+            await bank.wait_for_refills()
+            return bank
+        bank = asyncio.run(run())
+        self.assertEqual(other, [("Algebra", None, "basic")] * 3 + [("Geometry", None, "basic")] * 3)
+        self.assertEqual(self.generated, [])
+        self.assertEqual(bank.pop("Geometry", None, "basic"), "[Question] other #4")
+
+    def test_popped_questions_are_not_served_after_a_restart(self):
+        async def run():
+            bank = self.make_bank()
+            await bank.refill("Algebra", None, "basic")
+            return bank.pop("Algebra", None, "basic")
+        taken = asyncio.run(run())
+        restarted = self.make_bank()
+        self.assertEqual(restarted.size("Algebra", None, "basic"), 2)
+        self.assertNotIn(taken, restarted.pools[QuestionBank.make_key("Algebra", None, "basic")])
+
+if __name__ == '__main__':
+    unittest.main()
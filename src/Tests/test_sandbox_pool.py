@@ -0,0 +1,124 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from src.Tools.sandbox_pool import TIMEOUT_EXIT_CODE, SandboxPool, resource
+
+
+def is_running(pid):
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            return f.read().split(')')[-1].split()[0] not in ('Z', 'X')
+    except OSError:
+        return False
+
+
+class TestSandboxPool(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        os.environ['SANDBOX_TEST_SECRET'] = 'secret'
+        cls.pool = SandboxPool(workers=1, timeout=10, cpu_seconds=5, memory_mb=512, max_runs_per_worker=3, preload=('wave',))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+        del os.environ['SANDBOX_TEST_SECRET']
+
+    def test_output_and_exit_code(self):
+        result = self.pool.run("print(6 * 7)")
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(result.stdout, "42\n")
+
+        result = self.pool.run("import sys\nsys.exit(3)")
+        self.assertEqual(result.exit_code, 3)
+
+    def test_exception_reports_traceback(self):
+        result = self.pool.run("1 / 0")
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("ZeroDivisionError", result.stderr)
+        self.assertNotIn("sandbox_pool", result.stderr)
+
+    def test_preloaded_modules_and_fresh_namespace(self):
+        self.pool.run("leaked = 1")
+        result = self.pool.run("import sys\nprint('wave' in sys.modules, 'leaked' in globals())")
+        self.assertEqual(result.stdout, "True False\n")
+
+    def test_runs_in_own_directory_and_collects_images(self):
+        first = self.pool.run("import os\nopen('plot.png', 'wb').write(b'png')\nprint(os.getcwd())")
+        second = self.pool.run("import os\nprint(os.getcwd(), os.listdir('.'))")
+        self.assertEqual(first.figures, {'plot.png': b'png'})
+        self.assertNotEqual(first.stdout, second.stdout.split()[0])
+        self.assertIn("[]", second.stdout)
+
+    def test_network_is_disabled(self):
+        for code in ("import socket\nsocket.create_connection(('1.1.1.1', 80), timeout=1)",
+                     "import _socket\n_socket.socket(_socket.AF_INET).connect(('1.1.1.1', 80))"):
+            result = self.pool.run(code)
+            self.assertEqual(result.exit_code, 1)
+            self.assertIn("Error", result.stderr)
+
+    @unittest.skipIf(resource is None, "no rlimits on this platform")
+    def test_limits_cannot_be_raised(self):
+        result = self.pool.run("import resource\n"
+                               "resource.setrlimit(resource.RLIMIT_AS, (resource.RLIM_INFINITY, resource.RLIM_INFINITY))")
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("ValueError", result.stderr)
+
+    @unittest.skipIf(not hasattr(os, 'killpg'), "no process groups on this platform")
+    def test_started_processes_do_not_outlive_the_run(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'pid')
+            result = self.pool.run("import subprocess, time\n"
+                                   f"open({path!r}, 'w').write(str(subprocess.Popen(['sleep', '1000']).pid))\n"
+                                   "time.sleep(100)", timeout=1)
+            if not os.path.exists(path):
+                # RLIMIT_NPROC refused the fork (it does not apply to root)
+                self.assertEqual(result.exit_code, 1)
+                return
+            self.assertTrue(result.timed_out)
+            with open(path) as f:
+                pid = int(f.read())
+        time.sleep(0.2)
+        self.assertFalse(is_running(pid))
+
+    def test_timeout_replaces_worker(self):
+        result = self.pool.run("while True: pass", timeout=0.5)
+        self.assertTrue(result.timed_out)
+        self.assertEqual(result.exit_code, TIMEOUT_EXIT_CODE)
+        self.assertEqual(self.pool.run("print('again')").stdout, "again\n")
+
+    def test_crash_replaces_worker(self):
+        result = self.pool.run("import os\nos._exit(5)")
+        self.assertEqual(result.exit_code, 5)
+        self.assertEqual(self.pool.run("print('again')").stdout, "again\n")
+
+    def test_runs_do_not_leak_into_later_runs(self):
+        self.pool.run("import builtins, json\n"
+                      "builtins.print = lambda *args, **kwargs: None\n"
+                      "json.dumps = lambda *args, **kwargs: 'PWNED'")
+        result = self.pool.run("import json\nprint(json.dumps([1]))")
+        self.assertEqual(result.stdout, "[1]\n")
+        for _ in range(2):
+            self.pool.run("import builtins\nbuiltins.len = lambda x: 42")
+        self.assertEqual(self.pool.run("print(len('abc'))").stdout, "3\n")
+
+    def test_server_environment_is_not_inherited(self):
+        result = self.pool.run("import os\n"
+                               "print('SANDBOX_TEST_SECRET' in os.environ, b'SANDBOX_TEST_SECRET' in open('/proc/self/environ', 'rb').read())")
+        self.assertEqual(result.stdout, "False False\n")
+
+    def test_workers_are_recycled(self):
+        pids = {self.pool.run("import os\nprint(os.getpid())").stdout for _ in range(4)}
+        self.assertGreater(len(pids), 1)
+
+    def test_concurrent_runs_queue_for_workers(self):
+        async def run():
+            return await asyncio.gather(*(self.pool.a_run(f"print({i})") for i in range(3)))
+
+        results = asyncio.run(run())
+        self.assertEqual([result.stdout for result in results], ["0\n", "1\n", "2\n"])
+
+
+if __name__ == '__main__':
+    unittest.main()
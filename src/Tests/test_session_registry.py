@@ -0,0 +1,107 @@
+import asyncio
+import tempfile
+import unittest
+from unittest.mock import Mock
+from src.Agents.session_registry import LearnerSession, SessionRegistry, SessionLimitError
+
+class TestSessionRegistry(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.created = []
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def factory(self, session_id, history_path=None, work_dir=None):
+        manager = Mock(input_future=None, chat_task=None, filename=history_path)
+        groupchat = Mock(messages=[])
+        session = LearnerSession(session_id, {}, Mock(), groupchat, manager)
+        self.created.append(session)
+        return session
+
+    def make_registry(self, max_sessions=2, idle_timeout=60):
+        return SessionRegistry(max_sessions=max_sessions, idle_timeout=idle_timeout,
+                               history_dir=self.tmp_dir.name, factory=self.factory)
+
+    def test_sessions_are_isolated_and_reused(self):
+        registry = self.make_registry()
+        first = registry.get_or_create("alice")
+        second = registry.get_or_create("bob")
+        self.assertIsNot(first, second)
+        self.assertIsNot(first.manager, second.manager)
+        self.assertIs(registry.get_or_create("alice"), first)
+        self.assertEqual(len(self.created), 2)
+        self.assertTrue(first.manager.filename.endswith("alice.json"))
+
+    def test_session_cap(self):
+        registry = self.make_registry(max_sessions=1)
+        registry.get_or_create("alice")
+        with self.assertRaises(SessionLimitError):
+            registry.get_or_create("bob")
+
+    def test_idle_sessions_are_evicted_to_make_room(self):
+        registry = self.make_registry(max_sessions=1, idle_timeout=10)
+        alice = registry.get_or_create("alice")
+        alice.last_active -= 60
+        alice.groupchat.messages.append({"content": "hi"})
+        registry.get_or_create("bob")
+        self.assertNotIn("alice", registry)
+        alice.manager.save_messages_to_json.assert_called_once()
+
+    def test_evict_idle_cancels_pending_input(self):
+        registry = self.make_registry(idle_timeout=10)
+        alice = registry.get_or_create("alice")
+        bob = registry.get_or_create("bob")
+        loop = asyncio.new_event_loop()
+        try:
+            future = loop.create_future()
+            alice.manager.input_future = future
+            alice.last_active -= 60
+            self.assertEqual(registry.evict_idle(), ["alice"])
+            self.assertTrue(future.cancelled())
+        finally:
+            loop.close()
+        self.assertIn("bob", registry)
+        bob.manager.save_messages_to_json.assert_not_called()
+
+    def test_connected_sessions_are_not_evicted(self):
+        registry = self.make_registry(idle_timeout=10)
+        alice = registry.get_or_create("alice")
+        tab = Mock(session_context=Mock(destroyed=False))
+        alice.claim(tab)
+        alice.last_active -= 60
+        self.assertEqual(registry.evict_idle(), [])
+        tab.session_context.destroyed = True
+        self.assertEqual(registry.evict_idle(), ["alice"])
+
+    def test_close_cancels_running_chat(self):
+        registry = self.make_registry()
+        alice = registry.get_or_create("alice")
+
+        async def chat():
+            alice.manager.chat_task = asyncio.current_task()
+            await asyncio.sleep(60)
+
+        async def run():
+            task = asyncio.create_task(chat())
+            await asyncio.sleep(0)
+            registry.remove("alice")
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(run())
+
+    def test_one_document_per_session(self):
+        registry = self.make_registry()
+        alice = registry.get_or_create("alice")
+        first_tab, second_tab = object(), object()
+        self.assertTrue(alice.claim(first_tab))
+        self.assertTrue(alice.claim(first_tab))
+        self.assertFalse(alice.claim(second_tab))
+        alice.release(second_tab)
+        self.assertIs(alice.document, first_tab)
+        alice.release(first_tab)
+        self.assertTrue(alice.claim(second_tab))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import tempfile
+import mmap
+import unittest
+from unittest import mock
+from src.KnowledgeGraphs.taxonomy_snapshot import StaleSnapshotError, load_or_build_snapshot, read_snapshot, write_snapshot
+from src.KnowledgeGraphs.topic_graph import build_topic_graph
+
+class TestTaxonomySnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "taxonomy.snapshot")
+        self.graph = build_topic_graph()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_round_trip(self):
+        write_snapshot(self.graph, self.path, b"\0" * 32)
+        loaded = read_snapshot(self.path, b"\0" * 32)
+        self.assertEqual(loaded.names, self.graph.names)
+        self.assertEqual(list(loaded.parents), list(self.graph.parents))
+        self.assertEqual(loaded.leaf_names, self.graph.leaf_names)
+        leaf = self.graph.leaf_names[200]
+        self.assertEqual(loaded.ancestors(leaf), self.graph.ancestors(leaf))
+        self.assertEqual(loaded.children("Algebra"), self.graph.children("Algebra"))
+        self.assertEqual(loaded.next_topic(leaf), self.graph.next_topic(leaf))
+
+    def test_checksum_invalidates(self):
+        write_snapshot(self.graph, self.path, b"\0" * 32)
+        with self.assertRaises(StaleSnapshotError):
+            read_snapshot(self.path, b"\1" * 32)
+
+    def test_stale_snapshot_is_unmapped(self):
+        write_snapshot(self.graph, self.path, b"\0" * 32)
+        mapped = []
+        def record(*args, **kwargs):
+            mapped.append(real_mmap(*args, **kwargs))
+            return mapped[-1]
+        real_mmap = mmap.mmap
+        with mock.patch.object(mmap, "mmap", side_effect=record):
+            with self.assertRaises(StaleSnapshotError):
+                read_snapshot(self.path, b"\1" * 32)
+        self.assertTrue(mapped[0].closed)
+
+    def test_truncated_snapshot_is_rebuilt(self):
+        write_snapshot(self.graph, self.path, b"\0" * 32)
+        with open(self.path, "r+b") as f:
+            f.truncate(100)
+        with self.assertRaises(StaleSnapshotError):
+            read_snapshot(self.path)
+        self.assertEqual(load_or_build_snapshot(self.path).names, self.graph.names)
+        # The rebuilt snapshot is current
+        self.assertEqual(read_snapshot(self.path).names, self.graph.names)
+
+    def test_leftover_temporary_file_is_not_reused(self):
+        leftover = f"{self.path}.tmp"
+        with open(leftover, "wb") as f:
+            f.write(b"partial")
+        write_snapshot(self.graph, self.path, b"\0" * 32)
+        with mock.patch("src.KnowledgeGraphs.taxonomy_snapshot.array", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                write_snapshot(self.graph, self.path, b"\1" * 32)
+        self.assertEqual(sorted(os.listdir(self.tmp_dir.name)), ["taxonomy.snapshot", "taxonomy.snapshot.tmp"])
+        with open(leftover, "rb") as f:
+            self.assertEqual(f.read(), b"partial")
+        self.assertEqual(read_snapshot(self.path, b"\0" * 32).names, self.graph.names)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+import src.KnowledgeGraphs.math_taxonomy as mt
+from src.KnowledgeGraphs.topic_graph import TopicGraph, get_topic_graph
+
+class TestTopicGraph(unittest.TestCase):
+    def setUp(self):
+        self.graph = TopicGraph.from_taxonomy(
+            {"A": ["A->x", "A->y"], "B": ["B->z"]},
+            {"A->x": ["A->x->1", "A->x->2"], "A->y": ["A->y->3"], "B->z": ["B->z->4"]},
+        )
+
+    def test_structure(self):
+        self.assertEqual(len(self.graph), 9)
+        self.assertEqual(self.graph.children("A"), ("A->x", "A->y"))
+        self.assertEqual(self.graph.parent("A->x->2"), "A->x")
+        self.assertIsNone(self.graph.parent("B"))
+        self.assertEqual(self.graph.siblings("A->y"), ("A->x", "A->y"))
+        self.assertEqual(self.graph.next_sibling("A->x"), "A->y")
+        self.assertIsNone(self.graph.next_sibling("A->y"))
+        self.assertEqual(self.graph.depth("A->x->1"), 2)
+
+    def test_ancestors(self):
+        self.assertEqual(self.graph.path_to_root("A->y->3"), ("A->y->3", "A->y", "A"))
+        self.assertEqual(self.graph.ancestors("A->y->3"), ("A->y", "A"))
+        self.assertEqual(self.graph.root("B->z->4"), "B")
+        self.assertTrue(self.graph.is_ancestor("A", "A->x->2"))
+        self.assertFalse(self.graph.is_ancestor("A->x", "A->y->3"))
+        self.assertFalse(self.graph.is_ancestor("A", "A"))
+
+    def test_next_topic(self):
+        self.assertEqual(self.graph.leaf_names, ("A->x->1", "A->x->2", "A->y->3", "B->z->4"))
+        self.assertEqual(self.graph.next_topic("A->x->2"), "A->y->3")
+        self.assertEqual(self.graph.next_topic("A"), "B->z->4")
+        self.assertIsNone(self.graph.next_topic("B->z->4"))
+        self.assertEqual(self.graph.leaves_under("A->x"), ("A->x->1", "A->x->2"))
+
+    def test_prefix_lookups(self):
+        self.assertEqual(self.graph.with_prefix("A->x"), ("A->x", "A->x->1", "A->x->2"))
+        self.assertEqual(self.graph.first_leaf_position("B"), 3)
+        self.assertEqual(self.graph.first_leaf_position("C"), 0)
+
+    def test_math_taxonomy(self):
+        graph = get_topic_graph()
+        self.assertIs(graph, get_topic_graph())
+        # The FSMs step through the leaves in the order of subsubsub_topics
+        self.assertEqual(list(graph.leaf_names), [topic for topics in mt.subsubsub_topics.values() for topic in topics])
+        self.assertEqual([graph.names[root] for root in graph.roots], list(mt.topics_and_subtopics))
+        # Parents come from the taxonomy, not from the topic names
+        for parent, children in mt.subsubsub_topics.items():
+            for child in children:
+                self.assertEqual(graph.parent(child), parent)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+from src.Agents.verdicts import (VERDICT_FORMATS, attach_verdict, code_succeeded, difficulty_change, is_correct,
+                                 parse_verdict, strip_verdict, verdict_instructions)
+
+
+class TestParseVerdict(unittest.TestCase):
+    def test_trailing_json(self):
+        self.assertEqual(parse_verdict('The answer 4 is right.\n{"correct": true}'), {'correct': True})
+        self.assertEqual(parse_verdict('Not quite.\n```json\n{"correct": false, "difficulty": "decrease"}\n```'),
+                         {'correct': False, 'difficulty': 'decrease'})
+
+    def test_exit_code(self):
+        self.assertEqual(parse_verdict('exitcode: 0 (execution succeeded)\nCode output: 4'), {'success': True})
+        self.assertEqual(parse_verdict('exitcode: 1 (execution failed)\nCode output: NameError'), {'success': False})
+        # The program's output never overrides the exit code
+        self.assertEqual(parse_verdict('exitcode: 0 (execution succeeded)\nCode output: {"x": 1}'), {'success': True})
+        self.assertEqual(parse_verdict('exitcode: 1 (execution failed)\nCode output: {"success": true}'), {'success': False})
+
+    def test_no_verdict(self):
+        # Praise in free text is not a verdict
+        self.assertEqual(parse_verdict("Good job, that's right! Let's try a harder one."), {})
+        self.assertEqual(parse_verdict('The code executed successfully'), {})
+        self.assertEqual(parse_verdict(None), {})
+
+    def test_invalid_fields_are_dropped(self):
+        self.assertEqual(parse_verdict('{"correct": "yes", "difficulty": "harder", "success": true}'), {'success': True})
+        self.assertEqual(parse_verdict('{"correct": tru}'), {})
+
+    def test_strip_verdict_for_display(self):
+        self.assertEqual(strip_verdict('Well done!\n{"correct": true, "difficulty": "increase"}'), 'Well done!')
+        self.assertEqual(strip_verdict('Well done!\n```json\n{"correct": true}\n```'), 'Well done!')
+        # Other JSON and code execution output are left alone
+        self.assertEqual(strip_verdict('Use {"a": 1}'), 'Use {"a": 1}')
+        self.assertEqual(strip_verdict('exitcode: 0\nCode output: {"success": true}'), 'exitcode: 0\nCode output: {"success": true}')
+        self.assertIsNone(strip_verdict(None))
+
+    def test_instructions_name_the_format(self):
+        for name, verdict_format in VERDICT_FORMATS.items():
+            self.assertIn(verdict_format, verdict_instructions(name))
+
+
+class TestMessageVerdict(unittest.TestCase):
+    def test_parsed_once(self):
+        message = {'name': 'LevelAdapterAgent', 'content': 'Well done.\n{"correct": true, "difficulty": "increase"}'}
+        verdict = attach_verdict(message)
+        self.assertIs(message['verdict'], verdict)
+        message['content'] = 'edited'
+        self.assertIs(attach_verdict(message), verdict)
+
+    def test_helpers(self):
+        level_adapter = {'content': '{"correct": true, "difficulty": "increase"}'}
+        code_runner = {'content': 'exitcode: 0 (execution succeeded)'}
+        self.assertTrue(is_correct(level_adapter))
+        self.assertEqual(difficulty_change(level_adapter), 'increase')
+        self.assertTrue(code_succeeded(code_runner))
+        self.assertFalse(is_correct(code_runner))
+        self.assertFalse(is_correct(None))
+        self.assertIsNone(difficulty_change(None))
+
+
+if __name__ == '__main__':
+    unittest.main()
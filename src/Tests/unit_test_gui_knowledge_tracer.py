@@ -19,7 +19,7 @@ class TestFSMGraphTracerConsole(unittest.TestCase):
         }
         
         # Initialize FSMGraphTracerConsole with mock agents
-        self.fsm = fsm.FSMGraphTracerConsole(self.agents_dict)
+        self.fsm = fsm.FSMGraphTracerConsole(self.agents_dict, student_id="ana")
         self.fsm.kg = {0: "Addition", 1: "Subtraction", 2: "Multiplication", 3: "Division"}
 
     def test_initial_state(self):
@@ -55,7 +55,7 @@ class TestFSMGraphTracerConsole(unittest.TestCase):
         
         # Mock groupchat and verifier response
         self.fsm.groupchat_manager = Mock()
-        self.fsm.groupchat_manager.groupchat.get_messages.return_value = [{'content': 'Yes, the answer is correct.'}]
+        self.fsm.groupchat_manager.groupchat.get_messages.return_value = [{'content': 'Yes, the answer is correct.\n{"correct": true}'}]
         
         next_agent = self.fsm.next_speaker_selector()
         
@@ -71,13 +71,29 @@ class TestFSMGraphTracerConsole(unittest.TestCase):
         
         # Mock groupchat and verifier response
         self.fsm.groupchat_manager = Mock()
-        self.fsm.groupchat_manager.groupchat.get_messages.return_value = [{'content': 'No, the answer is incorrect.'}]
+        self.fsm.groupchat_manager.groupchat.get_messages.return_value = [{'content': 'No, the answer is incorrect.\n{"correct": false}'}]
         
         next_agent = self.fsm.next_speaker_selector()
         
         self.assertEqual(self.fsm.current_state, "GenerateQuestion")
         self.assertFalse(self.fsm.was_correct)
         self.assertEqual(next_agent, self.fsm.knowledge_tracer)
+        self.mock_knowledge_tracer.record_answer.assert_called_once_with("ana", self.fsm.kg[0], False)
+
+    def test_one_correct_answer_does_not_advance_before_mastery(self):
+        self.fsm.kg = self.fsm.topic_graph.leaf_names
+        self.fsm.current_state = "AdaptLevel"
+        self.fsm.was_correct = True
+        self.mock_knowledge_tracer.is_mastered.return_value = False
+
+        self.fsm.next_speaker_selector()
+        self.assertEqual(self.fsm.skill_level, 0)
+
+        self.fsm.current_state = "AdaptLevel"
+        self.mock_knowledge_tracer.is_mastered.return_value = True
+        self.fsm.next_speaker_selector()
+        self.assertEqual(self.fsm.skill_level, 1)
+        self.assertTrue(self.fsm.frontier.is_mastered(self.fsm.kg[0]))
         
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,278 @@
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from fractions import Fraction
+
+try:
+    import sympy
+    from sympy.parsing.sympy_parser import (
+        parse_expr,
+        standard_transformations,
+        implicit_multiplication_application,
+        convert_xor,
+    )
+    SYMPY_TRANSFORMATIONS = standard_transformations + (implicit_multiplication_application, convert_xor)
+except ImportError:  # sympy is optional, symbolic checks are skipped without it
+    sympy = None
+
+
+# Verdict sources
+SOURCE_EXACT = "exact"
+SOURCE_NUMERIC = "numeric"
+SOURCE_SYMBOLIC = "symbolic"
+SOURCE_LLM = "llm"
+
+NUMERIC_REL_TOL = 1e-9
+NUMERIC_ABS_TOL = 1e-9
+MAX_SHORT_ANSWER_LENGTH = 60
+
+# Bounds on what sympy is given, so a learner cannot stall the server with e.g. 9^9^9
+MAX_SYMBOLIC_LENGTH = 100
+MAX_SYMBOLIC_EXPONENT = 100
+SYMBOLIC_TIMEOUT_SECONDS = 2
+
+# Explicit answer markers in a step-by-step solution, most specific first
+FINAL_ANSWER_PATTERNS = [
+    re.compile(r'\\boxed\{(?P<answer>[^{}]*(?:\{[^{}]*\}[^{}]*)*)\}'),
+    re.compile(r'final answer\s*(?:is)?\s*[:=]?\s*(?P<answer>[^\n]+)', re.IGNORECASE),
+    re.compile(r'\*\*answer\*\*\s*[:=]?\s*(?P<answer>[^\n]+)', re.IGNORECASE),
+    re.compile(r'(?:the\s+)?answer\s+is\s*[:=]?\s*(?P<answer>[^\n]+)', re.IGNORECASE),
+]
+
+LATEX_REPLACEMENTS = [
+    (re.compile(r'\\(?:boxed|text|mathrm)\{([^{}]*)\}'), r'\1'),
+    (re.compile(r'\\d?frac\{([^{}]*)\}\{([^{}]*)\}'), r'(\1)/(\2)'),
+    (re.compile(r'\\sqrt\{([^{}]*)\}'), r'sqrt(\1)'),
+    (re.compile(r'\\(?:cdot|times)'), '*'),
+    (re.compile(r'\\div'), '/'),
+    (re.compile(r'\\left|\\right|\\,|\\!|\\;'), ''),
+    (re.compile(r'\\pi'), 'pi'),
+]
+
+# Single-letter units are only stripped after a space so answers like "2h" stay algebraic
+UNIT_PATTERN = re.compile(
+    r'(?:(?<=[\d)])\s*|\s+)(?P<prefix>square\s+|sq\.?\s*|cubic\s+|cu\.?\s*)?'
+    r'(?P<unit>mm|cm|km|inches|inch|ft|feet|foot|yd|yards?|miles?|mi|'
+    r'mg|kg|grams?|kilograms?|lbs?|pounds?|oz|ml|liters?|litres?|'
+    r'sec|seconds?|min|minutes?|hrs?|hours?|days?|weeks?|years?|'
+    r'dollars?|cents?|units?|degrees?|deg|°|(?<=\s)(?:m|g|l|s|h))'
+    r'(?:\s*(?P<power>\^?\s*[23]|²|³))?\s*$',
+    re.IGNORECASE,
+)
+# Spellings of the same unit -> one name, so "5 feet" and "5 ft" compare equal
+UNIT_ALIASES = {
+    'inches': 'inch', 'feet': 'ft', 'foot': 'ft', 'yard': 'yd', 'yards': 'yd', 'mile': 'mi', 'miles': 'mi',
+    'gram': 'g', 'grams': 'g', 'kilogram': 'kg', 'kilograms': 'kg', 'lbs': 'lb', 'pound': 'lb', 'pounds': 'lb',
+    'liter': 'l', 'liters': 'l', 'litre': 'l', 'litres': 'l',
+    'sec': 's', 'second': 's', 'seconds': 's', 'minute': 'min', 'minutes': 'min', 'hr': 'h', 'hrs': 'h', 'hour': 'h',
+    'hours': 'h', 'days': 'day', 'weeks': 'week', 'years': 'year',
+    'dollars': 'dollar', 'cents': 'cent', 'units': 'unit', 'degree': 'deg', 'degrees': 'deg', '°': 'deg',
+}
+NUMBER_PATTERN = re.compile(r'^[+-]?(?:\d+\.?\d*|\.\d+)(?:e[+-]?\d+)?$', re.IGNORECASE)
+FRACTION_PATTERN = re.compile(r'^([+-]?)(?:(\d+)\s+)?\(?(\d+)\)?\s*/\s*\(?(\d+)\)?$')
+ASSIGNMENT_PATTERN = re.compile(r'^[a-zA-Z]\w*\s*=\s*(?!=)')
+SYMBOLIC_PATTERN = re.compile(r'^[\w\s.+\-*/^()]+$')
+SYMBOLIC_FUNCTIONS = {'sqrt', 'pi', 'sin', 'cos', 'tan', 'log', 'ln', 'exp'}
+POWER_TOWER_PATTERN = re.compile(r'(?:\^|\*\*)[^+\-*/^]*(?:\^|\*\*)')
+EXPONENT_PATTERN = re.compile(r'(?:\^|\*\*)\s*\(?\s*(\d+(?:\.\d*)?)')
+
+_symbolic_executor = None
+
+
+def normalize_answer(text: str) -> str:
+    """Strip formatting, LaTeX, units and a leading 'x =' from an answer"""
+    return _normalize(text)[0]
+
+
+def answer_unit(text: str):
+    """The unit an answer ends with, e.g. 'cm^2' for '12 square centimeters', None without one"""
+    return _normalize(text)[1]
+
+
+def _normalize(text: str):
+    """(normalized answer, unit or None)"""
+    if text is None:
+        return "", None
+    answer = str(text).strip()
+    answer = answer.replace('$$', '').replace('$', '')
+    answer = re.sub(r'^\\\(|\\\)$|^\\\[|\\\]$', '', answer).strip()
+    for pattern, replacement in LATEX_REPLACEMENTS:
+        answer = pattern.sub(replacement, answer)
+    answer = answer.replace('{', '(').replace('}', ')').replace('−', '-')
+    answer = answer.strip().rstrip('.').strip()
+    answer = ASSIGNMENT_PATTERN.sub('', answer)
+    # Thousands separators: 1,000,000 -> 1000000
+    answer = re.sub(r'(?<=\d),(?=\d{3}\b)', '', answer)
+    match = UNIT_PATTERN.search(answer)
+    if match is None:
+        return answer.strip(), None
+    return answer[:match.start()].strip(), _canonical_unit(match)
+
+
+def _canonical_unit(match) -> str:
+    unit = match.group('unit').lower()
+    unit = UNIT_ALIASES.get(unit, unit)
+    prefix = (match.group('prefix') or '').lower()
+    power = (match.group('power') or '').strip('^ ').replace('²', '2').replace('³', '3')
+    if prefix.startswith('s'):
+        power = '2'
+    elif prefix.startswith('c'):
+        power = '3'
+    return f'{unit}^{power}' if power else unit
+
+
+def parse_number(text: str):
+    """Parse integers, decimals, fractions, mixed numbers and percentages to a Fraction"""
+    answer = text.replace('\u00a0', ' ').strip()
+    percent = answer.endswith('%')
+    if percent:
+        answer = answer[:-1].strip()
+
+    value = None
+    if NUMBER_PATTERN.match(answer):
+        value = Fraction(answer)
+    else:
+        match = FRACTION_PATTERN.match(answer)
+        if match:
+            sign, whole, numerator, denominator = match.groups()
+            if int(denominator) != 0:
+                value = Fraction(int(numerator), int(denominator)) + int(whole or 0)
+                if sign == '-':
+                    value = -value
+    if value is not None and percent:
+        value /= 100
+    return value
+
+
+def extract_final_answer(solution: str):
+    """
+    Pull the final answer out of a worked solution.
+    Returns (answer, explicit) where explicit tells whether an answer marker was found.
+    """
+    if solution is None:
+        return None, False
+    text = solution.strip()
+    for pattern in FINAL_ANSWER_PATTERNS:
+        matches = list(pattern.finditer(text))
+        if matches:
+            return matches[-1].group('answer').strip().rstrip('.'), True
+
+    # A short one-line solution is the answer itself
+    if '\n' not in text and len(text) <= MAX_SHORT_ANSWER_LENGTH:
+        return text, True
+
+    # Fall back to the right-hand side of the last equation in the solution
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if lines and '=' in lines[-1]:
+        return lines[-1].rsplit('=', 1)[1].strip(), False
+    return None, False
+
+
+def _decimal_places(text: str) -> int:
+    match = re.search(r'\.(\d+)', text)
+    return len(match.group(1)) if match else 0
+
+
+def _numbers_match(student: Fraction, expected: Fraction, student_text: str):
+    """
+    True when the numbers are equal, or when the student's answer is the expected value rounded
+    to the decimal places written. None when the student may have rounded differently, so the
+    LLM grades it, False otherwise.
+    """
+    if math.isclose(float(student), float(expected), rel_tol=NUMERIC_REL_TOL, abs_tol=NUMERIC_ABS_TOL):
+        return True
+    places = _decimal_places(student_text)
+    unit = Fraction(1, 10 ** places)
+    if (expected / unit).denominator == 1:
+        # The expected value is exact at the student's precision, there was nothing to round
+        return False
+    if places and abs(student - expected) <= unit / 2:
+        return True
+    return None
+
+
+def _looks_symbolic(expression: str) -> bool:
+    """Only single-letter variables and known functions, so prose is never parsed as algebra"""
+    if not SYMBOLIC_PATTERN.match(expression):
+        return False
+    words = re.findall(r'[A-Za-z]+', expression)
+    return all(len(word) == 1 or word.lower() in SYMBOLIC_FUNCTIONS for word in words)
+
+
+def _too_costly(expression: str) -> bool:
+    """Long expressions, power towers and large exponents can keep sympy busy for minutes"""
+    if len(expression) > MAX_SYMBOLIC_LENGTH or POWER_TOWER_PATTERN.search(expression):
+        return True
+    return any(float(exponent) > MAX_SYMBOLIC_EXPONENT for exponent in EXPONENT_PATTERN.findall(expression))
+
+
+def _symbolically_equal(student: str, expected: str):
+    """
+    True/False if sympy can decide equivalence, None otherwise.
+    The check runs in a worker thread and gives up after SYMBOLIC_TIMEOUT_SECONDS.
+    """
+    global _symbolic_executor
+    if sympy is None or not (_looks_symbolic(student) and _looks_symbolic(expected)):
+        return None
+    if _too_costly(student) or _too_costly(expected):
+        return None
+    if _symbolic_executor is None:
+        _symbolic_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="answer_checker")
+    try:
+        return _symbolic_executor.submit(_compare_expressions, student, expected).result(timeout=SYMBOLIC_TIMEOUT_SECONDS)
+    except TimeoutError:
+        return None
+
+
+def _compare_expressions(student: str, expected: str):
+    try:
+        student_expression = parse_expr(student, transformations=SYMPY_TRANSFORMATIONS, evaluate=False)
+        expected_expression = parse_expr(expected, transformations=SYMPY_TRANSFORMATIONS, evaluate=False)
+        if student_expression.is_number and expected_expression.is_number:
+            # Numbers like sqrt(2) follow the same rounding rule as plain numbers
+            return _numbers_match(Fraction(float(student_expression.evalf())),
+                                  Fraction(float(expected_expression.evalf())), student)
+        return bool(sympy.simplify(student_expression - expected_expression) == 0)
+    except Exception:
+        return None
+
+
+def check_answer(student_answer: str, correct_answer: str) -> dict:
+    """
+    Grade an answer locally without calling the LLM.
+
+    :return: dict with 'is_correct' (True, False, or None when the checker cannot decide),
+             'source' (how the verdict was reached), and the normalized 'student'/'expected' answers
+    """
+    expected_text, explicit = extract_final_answer(correct_answer)
+    student, student_unit = _normalize(student_answer)
+    expected, expected_unit = _normalize(expected_text)
+    result = {
+        'is_correct': None,
+        'source': None,
+        'student': student,
+        'expected': expected,
+    }
+    if not student or not expected:
+        return result
+    if student_unit and expected_unit and student_unit != expected_unit:
+        # "5 s" for "5 m", or minutes for hours: the LLM can tell a conversion from a mistake
+        return result
+
+    if student.replace(' ', '').lower() == expected.replace(' ', '').lower():
+        result.update(is_correct=True, source=SOURCE_EXACT)
+        return result
+
+    # Only a clearly marked expected answer is trusted for a negative verdict
+    student_number = parse_number(student)
+    expected_number = parse_number(expected)
+    if student_number is not None and expected_number is not None:
+        is_correct = _numbers_match(student_number, expected_number, student)
+        if is_correct or (is_correct is False and explicit):
+            result.update(is_correct=is_correct, source=SOURCE_NUMERIC)
+        return result
+
+    equal = _symbolically_equal(student, expected)
+    if equal or (equal is False and explicit):
+        result.update(is_correct=equal, source=SOURCE_SYMBOLIC)
+    return result
@@ -0,0 +1,214 @@
+import json
+import logging
+import os
+import threading
+import time
+
+
+def log_path_for(filename: str) -> str:
+    """The JSONL log that replaces a chat history file such as progress.json"""
+    root, ext = os.path.splitext(filename)
+    return filename if ext == ".jsonl" else f"{root}.jsonl"
+
+
+class ChatHistoryLog:
+    """
+    Append-only JSONL chat history, one message per line.
+
+    Appending a turn costs O(new messages) instead of rewriting the whole history.
+    fsync is batched: the file is synced every `fsync_every` messages, and a timer
+    syncs it `fsync_interval` seconds after the oldest unsynced message was appended.
+    A crash can only lose the unsynced tail or leave one torn last line, which the
+    reader skips. compact() rewrites the log from a message list through a temporary
+    file and an atomic rename, so a reader never sees a half-written history; the
+    owner calls it once needs_compaction() reports `compact_stale_lines` stale lines.
+    read_tail() reads backwards from a byte offset, so restoring the last page of a
+    long history costs the same as restoring a short one.
+    """
+
+    TAIL_BLOCK_SIZE = 64 * 1024
+
+    def __init__(self, filename: str, fsync_every=10, fsync_interval=5.0, compact_stale_lines=100):
+        """
+        :param filename: chat history file, the log is stored next to it with a .jsonl extension
+        :param fsync_every: number of appended messages between two fsyncs
+        :param fsync_interval: maximum seconds an appended message stays unsynced
+        :param compact_stale_lines: stale lines the log may hold before it needs compaction
+        """
+        self.legacy_path = filename if log_path_for(filename) != filename else None
+        self.path = log_path_for(filename)
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.compact_stale_lines = compact_stale_lines
+
+        # Lines in the log that are not part of the live history (torn writes, stripped messages)
+        self.stale_lines = 0
+
+        self._file = None
+        self._unsynced = 0
+        self._first_unsynced_at = None
+        self._sync_timer = None
+        # The sync timer runs in its own thread, re-entrant because compact() closes the file
+        self._lock = threading.RLock()
+        self.logger = logging.getLogger(__name__)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path) or bool(self.legacy_path and os.path.exists(self.legacy_path))
+
+    def read(self):
+        """Stream the logged messages. A history saved by the old JSON writer is migrated first."""
+        self._migrate_legacy_if_needed()
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # Torn write from a crash, dropped at the next compaction
+                    self.stale_lines += 1
+                    self.logger.warning(f"Skipping unreadable line {line_number} of {self.path}")
+
+    def read_tail(self, count: int, end: int = None):
+        """
+        The last `count` messages stored before byte offset `end` (the end of the log when None).
+        Returns (messages, start) where start is the byte offset of the first returned message,
+        so the page before it is read_tail(count, end=start).
+        """
+        self._migrate_legacy_if_needed()
+        messages = []
+        if count <= 0 or not os.path.exists(self.path):
+            return messages, 0
+
+        with open(self.path, "rb") as f:
+            position = f.seek(0, os.SEEK_END) if end is None else end
+            start = position
+            carry = b""
+            while position > 0 and len(messages) < count:
+                read_size = min(self.TAIL_BLOCK_SIZE, position)
+                position -= read_size
+                f.seek(position)
+                pieces = (f.read(read_size) + carry).split(b"\n")
+                # The first piece is a partial line unless the block starts the file
+                carry = pieces.pop(0) if position > 0 else b""
+                offset = position + len(carry) + 1 if position > 0 else 0
+                located = []
+                for piece in pieces:
+                    located.append((offset, piece))
+                    offset += len(piece) + 1
+
+                for line_start, line in reversed(located):
+                    if len(messages) == count:
+                        break
+                    if not line.strip():
+                        continue
+                    try:
+                        messages.append(json.loads(line))
+                    except ValueError:
+                        self.stale_lines += 1
+                        continue
+                    start = line_start
+
+        messages.reverse()
+        return messages, start
+
+    def append(self, messages):
+        """Append messages to the log, syncing to disk when a batch is full or old enough"""
+        if not messages:
+            return
+        with self._lock:
+            f = self._open()
+            f.write("".join(json.dumps(message, ensure_ascii=False) + "\n" for message in messages))
+            f.flush()
+
+            now = time.monotonic()
+            if self._first_unsynced_at is None:
+                self._first_unsynced_at = now
+                # Synced on time even when no other message follows
+                self._sync_timer = threading.Timer(self.fsync_interval, self.sync)
+                self._sync_timer.daemon = True
+                self._sync_timer.start()
+            self._unsynced += len(messages)
+            if self._unsynced >= self.fsync_every or now - self._first_unsynced_at >= self.fsync_interval:
+                self.sync()
+
+    def sync(self):
+        with self._lock:
+            if self._file is not None and self._unsynced:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            self._unsynced = 0
+            self._first_unsynced_at = None
+            if self._sync_timer is not None:
+                self._sync_timer.cancel()
+                self._sync_timer = None
+
+    def needs_compaction(self) -> bool:
+        """True once the log holds compact_stale_lines lines that are not part of the live history"""
+        return self.stale_lines >= self.compact_stale_lines
+
+    def compact(self, messages, keep_bytes: int = 0):
+        """
+        Atomically replace the log with messages.
+        The first keep_bytes of the current log (older history that is not loaded) are kept as they are.
+        """
+        with self._lock:
+            self.close()
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "wb") as f:
+                if keep_bytes:
+                    with open(self.path, "rb") as old:
+                        remaining = keep_bytes
+                        while remaining:
+                            block = old.read(min(self.TAIL_BLOCK_SIZE, remaining))
+                            if not block:
+                                break
+                            f.write(block)
+                            remaining -= len(block)
+                f.write("".join(json.dumps(message, ensure_ascii=False) + "\n" for message in messages).encode("utf-8"))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self.stale_lines = 0
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self.sync()
+                self._file.close()
+                self._file = None
+
+    def _open(self):
+        if self._file is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+            # Never glue a new message onto a torn last line
+            if self._file.tell() and not self._ends_with_newline():
+                self._file.write("\n")
+                self.stale_lines += 1
+        return self._file
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def _migrate_legacy_if_needed(self):
+        if os.path.exists(self.path) or not self.legacy_path or not os.path.exists(self.legacy_path):
+            return
+        try:
+            with open(self.legacy_path, "r", encoding="utf-8") as f:
+                messages = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.error(f"Cannot migrate chat history {self.legacy_path}: {str(e)}")
+            return
+        self.compact(messages)
+        self.logger.info(f"Migrated {len(messages)} messages from {self.legacy_path} to {self.path}")
@@ -0,0 +1,240 @@
+import atexit
+import glob
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+from src import globals
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional, parts are written as NumPy .npz files without it
+    pa = None
+
+# Column name -> NumPy dtype of the stored arrays
+COLUMNS = {
+    'student_id': str,
+    'skill_id': np.int32,  # TopicGraph id, -1 for skills outside the taxonomy
+    'timestamp': np.float64,  # seconds since the epoch
+    'correct': bool,
+    'latency_ms': np.float32,  # NaN when unknown
+    'difficulty': np.float32,  # NaN when unknown
+    'source': str,  # agent or tool that recorded the attempt
+}
+
+SECONDS_PER_DAY = 24 * 3600
+
+
+class AttemptEventStore:
+    """
+    Append-only columnar store of student attempts.
+
+    New events go to an in-memory buffer that is flushed every flush_rows events or
+    flush_seconds seconds (and on flush()/close()) into one immutable part file per
+    day: <root>/day=YYYY-MM-DD/part-*.parquet, or .npz without pyarrow. Rows of a
+    part are sorted by student and time, so a scan for one student binary searches
+    each part; day directories outside a time range are never opened. The most
+    recently used parts are cached, compact() merges the parts of a day.
+    """
+
+    def __init__(self, root=None, flush_rows=None, flush_seconds=None, topic_graph=None, cached_parts=None):
+        self.root = root or globals.EVENT_STORE_PATH
+        self.flush_rows = flush_rows or globals.EVENT_STORE_FLUSH_ROWS
+        self.flush_seconds = flush_seconds if flush_seconds is not None else globals.EVENT_STORE_FLUSH_SECONDS
+        self.cached_parts = cached_parts if cached_parts is not None else globals.EVENT_STORE_CACHED_PARTS
+        self.extension = '.parquet' if pa is not None else '.npz'
+        self._topic_graph = topic_graph
+        self._buffer = {name: [] for name in COLUMNS}
+        self._last_flush = time.monotonic()
+        self._parts = OrderedDict()  # path -> columns, least recently used first
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def topic_graph(self):
+        if self._topic_graph is None:
+            from src.KnowledgeGraphs.topic_graph import get_topic_graph
+            self._topic_graph = get_topic_graph()
+        return self._topic_graph
+
+    def skill_id(self, skill) -> int:
+        """TopicGraph id of a skill name, ints are taken as ids"""
+        if isinstance(skill, (int, np.integer)):
+            return int(skill)
+        return self.topic_graph.ids.get(skill, -1)
+
+    ##################################################
+    # Writes
+    ##################################################
+    def append(self, student_id, skill, correct: bool, latency_ms: float = None, difficulty: float = None,
+               source: str = None, timestamp: float = None):
+        """Record one attempt, flushing the buffer when it is due"""
+        row = (str(student_id), self.skill_id(skill), time.time() if timestamp is None else timestamp, bool(correct),
+               np.nan if latency_ms is None else latency_ms, np.nan if difficulty is None else difficulty, source or '')
+        with self._lock:
+            for column, value in zip(self._buffer.values(), row):
+                column.append(value)
+            due = (len(self._buffer['timestamp']) >= self.flush_rows
+                   or time.monotonic() - self._last_flush >= self.flush_seconds)
+        if due:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write the buffered events as one part per day, returns the number of events written"""
+        with self._lock:
+            buffer, self._buffer = self._buffer, {name: [] for name in COLUMNS}
+            self._last_flush = time.monotonic()
+        columns = _to_arrays(buffer)
+        rows = len(columns['timestamp'])
+        if not rows:
+            return 0
+
+        days = (columns['timestamp'] // SECONDS_PER_DAY).astype(np.int64)
+        for day in np.unique(days):
+            selected = days == day
+            try:
+                self._write_part(str(np.datetime64(int(day), 'D')), {name: values[selected] for name, values in columns.items()})
+            except OSError as e:
+                self.logger.error(f"Error writing events of day {np.datetime64(int(day), 'D')}: {str(e)}")
+        return rows
+
+    def close(self):
+        self.flush()
+
+    def compact(self, day: str) -> int:
+        """Merge the parts of a day (YYYY-MM-DD) into one, returns the number of parts merged"""
+        paths = self._part_paths(day)
+        if len(paths) < 2:
+            return len(paths)
+        columns = _concatenate([self._read_part(path) for path in paths])
+        self._write_part(day, columns)
+        for path in paths:
+            os.remove(path)
+            with self._lock:
+                self._parts.pop(path, None)
+        return len(paths)
+
+    def _write_part(self, day: str, columns: dict):
+        directory = os.path.join(self.root, f'day={day}')
+        os.makedirs(directory, exist_ok=True)
+        order = np.lexsort((columns['timestamp'], columns['student_id']))
+        columns = {name: values[order] for name, values in columns.items()}
+
+        path = os.path.join(directory, f'part-{time.time_ns()}-{os.getpid()}{self.extension}')
+        tmp_path = f'{path}.tmp'
+        if pa is not None:
+            pq.write_table(pa.table(columns), tmp_path)
+        else:
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, **columns)
+        os.replace(tmp_path, path)
+        self._cache_part(path, columns)
+
+    ##################################################
+    # Scans
+    ##################################################
+    def scan(self, student_id=None, skill=None, start: float = None, end: float = None, source: str = None) -> dict:
+        """
+        Events matching every given filter, flushed and buffered, in time order.
+
+        :param student_id: only this student
+        :param skill: only this skill name or id
+        :param start: only events at or after this timestamp
+        :param end: only events before this timestamp
+        :param source: only events recorded by this source
+        :return: column name -> NumPy array
+        """
+        with self._lock:
+            buffered = _to_arrays(self._buffer)
+        chunks = [self._read_part(path) for path in self._part_paths(start=start, end=end)] + [buffered]
+
+        student_id = None if student_id is None else str(student_id)
+        skill_id = None if skill is None else self.skill_id(skill)
+        selected = []
+        for columns in chunks:
+            if student_id is not None and columns is not buffered:
+                # Parts are sorted by student
+                low = np.searchsorted(columns['student_id'], student_id, side='left')
+                high = np.searchsorted(columns['student_id'], student_id, side='right')
+                columns = {name: values[low:high] for name, values in columns.items()}
+            mask = np.ones(len(columns['timestamp']), dtype=bool)
+            if student_id is not None:
+                mask &= columns['student_id'] == student_id
+            if skill_id is not None:
+                mask &= columns['skill_id'] == skill_id
+            if start is not None:
+                mask &= columns['timestamp'] >= start
+            if end is not None:
+                mask &= columns['timestamp'] < end
+            if source is not None:
+                mask &= columns['source'] == source
+            selected.append({name: values[mask] for name, values in columns.items()})
+
+        result = _concatenate(selected)
+        order = np.argsort(result['timestamp'], kind='stable')
+        return {name: values[order] for name, values in result.items()}
+
+    def summary(self, by: str = 'student_id', **filters) -> dict:
+        """key -> (attempts, correct answers) grouped by a column, e.g. for leaderboards and dashboards"""
+        events = self.scan(**filters)
+        keys, inverse = np.unique(events[by], return_inverse=True)
+        attempts = np.bincount(inverse, minlength=len(keys))
+        correct = np.bincount(inverse, weights=events['correct'], minlength=len(keys)).astype(np.int64)
+        return {key: (int(count), int(right)) for key, count, right in zip(keys.tolist(), attempts, correct)}
+
+    def _part_paths(self, day: str = None, start: float = None, end: float = None) -> list:
+        pattern = os.path.join(self.root, f'day={day or "*"}', f'part-*{self.extension}')
+        paths = []
+        for path in sorted(glob.glob(pattern)):
+            part_day = np.datetime64(os.path.basename(os.path.dirname(path))[len('day='):], 'D').astype(np.int64)
+            if start is not None and (part_day + 1) * SECONDS_PER_DAY <= start:
+                continue
+            if end is not None and part_day * SECONDS_PER_DAY >= end:
+                continue
+            paths.append(path)
+        return paths
+
+    def _read_part(self, path: str) -> dict:
+        with self._lock:
+            columns = self._parts.get(path)
+            if columns is not None:
+                self._parts.move_to_end(path)
+        if columns is None:
+            if path.endswith('.parquet'):
+                table = pq.read_table(path)
+                columns = {name: table.column(name).to_numpy() for name in COLUMNS}
+            else:
+                with np.load(path) as arrays:
+                    columns = {name: arrays[name] for name in COLUMNS}
+            columns = {name: np.asarray(values, dtype=COLUMNS[name]) for name, values in columns.items()}
+            self._cache_part(path, columns)
+        return columns
+
+    def _cache_part(self, path: str, columns: dict):
+        with self._lock:
+            self._parts[path] = columns
+            self._parts.move_to_end(path)
+            while len(self._parts) > self.cached_parts:
+                self._parts.popitem(last=False)
+
+
+def _to_arrays(buffer: dict) -> dict:
+    return {name: np.asarray(values, dtype=COLUMNS[name]) for name, values in buffer.items()}
+
+
+def _concatenate(chunks: list) -> dict:
+    return {name: np.concatenate([chunk[name] for chunk in chunks]).astype(COLUMNS[name], copy=False) for name in COLUMNS}
+
+
+@lru_cache(maxsize=None)
+def get_default_event_store() -> AttemptEventStore:
+    """Process-wide event store at globals.EVENT_STORE_PATH, flushed at exit"""
+    store = AttemptEventStore()
+    atexit.register(store.close)
+    return store
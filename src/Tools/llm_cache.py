@@ -0,0 +1,258 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class LLMResponseCache:
+    """
+    Two-tier cache for LLM completions.
+
+    Tier 1 is an in-process LRU dictionary, tier 2 is an sqlite file on disk so
+    responses survive restarts and can be shared by several worker processes.
+    Entries are keyed by a hash of everything that determines the completion
+    (model, system message, prompt and temperature) and expire after `ttl` seconds.
+    get_or_create() reads and writes the disk tier in a worker thread, so sqlite
+    never blocks the event loop.
+    """
+
+    def __init__(self, path=None, ttl=24 * 3600, max_memory_entries=512, max_disk_entries=10000):
+        self.path = path
+        self.ttl = ttl
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()  # memory tier and counters
+        self._disk_lock = threading.Lock()  # sqlite connection, held in worker threads during disk I/O
+        self._in_flight = {}
+        self._conn = None
+        self.logger = logging.getLogger(__name__)
+
+        if self.path:
+            self._open_disk_tier()
+
+    @staticmethod
+    def make_key(model: str, system_message: str, prompt: str, temperature: float) -> str:
+        """Content-address a completion request"""
+        payload = json.dumps([model, system_message, prompt, temperature], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        """Return the cached response for key, or None on a miss"""
+        now = time.time()
+        value = self._memory_get(key, now)
+        if value is None:
+            value = self._disk_lookup(key, now)
+        return value
+
+    def set(self, key: str, value: str):
+        """Store a response in both tiers"""
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._memory_put(key, value, expires_at)
+        self._disk_store(key, value, expires_at)
+
+    async def get_or_create(self, key: str, create):
+        """
+        Return the cached value for key, otherwise await create() and cache its result.
+        Concurrent callers asking for the same key share a single disk read and upstream request.
+        """
+        now = time.time()
+        value = self._memory_get(key, now)
+        if value is not None:
+            return value
+
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            value = await self._run_disk(self._disk_lookup, key, now)
+            if value is not None:
+                future.set_result(value)
+                return value
+
+            value = await create()
+            expires_at = time.time() + self.ttl
+            with self._lock:
+                self._memory_put(key, value, expires_at)
+            future.set_result(value)
+            await self._run_disk(self._disk_store, key, value, expires_at)
+            return value
+        except BaseException as e:
+            if not future.done():
+                future.set_exception(e)
+                # Mark the exception as retrieved when nobody else was waiting on it
+                future.exception()
+            raise
+        finally:
+            del self._in_flight[key]
+
+    def clear(self):
+        """Drop every cached entry from both tiers"""
+        with self._lock:
+            self._memory.clear()
+        with self._disk_lock:
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM responses")
+                self._conn.commit()
+
+    def get_stats(self) -> dict:
+        """Hit/miss counters for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'memory_entries': len(self._memory),
+        }
+
+    def close(self):
+        with self._disk_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    ##################################################
+    # Memory tier
+    ##################################################
+    def _memory_get(self, key, now):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def _memory_put(self, key, value, expires_at):
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    ##################################################
+    # Disk tier
+    ##################################################
+    def _open_disk_tier(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        try:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+            self._conn.commit()
+        except sqlite3.Error as e:
+            self.logger.error(f"Disabling disk cache at {self.path}: {str(e)}")
+            self._conn = None
+
+    async def _run_disk(self, function, *args):
+        """Run a disk tier operation in a worker thread, inline when there is no disk tier"""
+        if self._conn is None:
+            return function(*args)
+        return await asyncio.to_thread(function, *args)
+
+    def _disk_lookup(self, key, now):
+        """Read key from disk and promote it to memory with its stored expiry, counting the lookup"""
+        with self._disk_lock:
+            row = self._disk_get(key, now)
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            value, expires_at = row
+            self._memory_put(key, value, expires_at)
+            self.hits += 1
+            self.disk_hits += 1
+            return value
+
+    def _disk_store(self, key, value, expires_at):
+        with self._disk_lock:
+            self._disk_put(key, value, expires_at)
+
+    def _disk_get(self, key, now):
+        """(value, expires_at) of key, None when it is missing or expired"""
+        if self._conn is None:
+            return None
+        try:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at <= now:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return value, expires_at
+        except sqlite3.Error as e:
+            self.logger.error(f"Error reading disk cache: {str(e)}")
+            return None
+
+    def _disk_put(self, key, value, expires_at):
+        if self._conn is None:
+            return
+        now = time.time()
+        try:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, expires_at, now)
+            )
+            self._evict_disk(now)
+            self._conn.commit()
+        except sqlite3.Error as e:
+            self.logger.error(f"Error writing disk cache: {str(e)}")
+
+    def _evict_disk(self, now):
+        """Remove expired rows, then the least recently used rows above the size bound"""
+        self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        overflow = count - self.max_disk_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY accessed_at ASC LIMIT ?)",
+                (overflow,)
+            )
+
+
+_default_cache = None
+
+
+def get_default_cache() -> LLMResponseCache:
+    """Process-wide cache shared by every agent, configured from src/globals.py"""
+    global _default_cache
+    if _default_cache is None:
+        from src import globals
+        _default_cache = LLMResponseCache(
+            path=globals.LLM_CACHE_PATH,
+            ttl=globals.LLM_CACHE_TTL,
+            max_memory_entries=globals.LLM_CACHE_MEMORY_ENTRIES,
+            max_disk_entries=globals.LLM_CACHE_DISK_ENTRIES,
+        )
+    return _default_cache
@@ -1,10 +1,22 @@
 import json
 import os
 
+from src.KnowledgeGraphs.mastery_frontier import MasteryFrontier
+
+
 class ProgressTracker:
-    def __init__(self, file_path):
+    def __init__(self, file_path, frontier_index=None):
+        """
+        :param file_path: JSON file with topic -> mastered
+        :param frontier_index: optional FrontierIndex (e.g. get_frontier_index()). With it the next topic
+                               is the earliest topic whose prerequisites are mastered, kept up to date incrementally.
+        """
         self.file_path = file_path
         self.progress = self.load_progress()
+        self.frontier = None
+        if frontier_index is not None:
+            self.frontier = MasteryFrontier(frontier_index,
+                                            mastered=[topic for topic, mastered in self.progress.items() if mastered])
 
     def load_progress(self):
         if os.path.exists(self.file_path):
@@ -18,6 +30,8 @@ class ProgressTracker:
 
     def update_topic_progress(self, topic, mastered):
         self.progress[topic] = mastered
+        if self.frontier is not None:
+            self.frontier.set_mastered(topic, bool(mastered))
         self.save_progress()
 
     def get_overall_progress(self):
@@ -26,6 +40,8 @@ class ProgressTracker:
         return sum(self.progress.values()) / len(self.progress)
 
     def get_next_topic(self):
+        if self.frontier is not None:
+            return self.frontier.next_topic()
         for topic, mastered in self.progress.items():
             if not mastered:
                 return topic
@@ -0,0 +1,171 @@
+import asyncio
+import json
+import logging
+import os
+from collections import deque
+
+
+class QuestionBank:
+    """
+    Pre-generated question pools, one per (topic, subtopic, difficulty).
+
+    pop() hands out a stored question immediately; whenever a pool drops below
+    the low watermark a background asyncio task refills it up to the target size.
+    Pools are persisted to a JSON file so a restarted server starts with a warm bank.
+    A bank shared by several agents is given each agent's generator with the call
+    that may refill, so it never holds on to one of them.
+    """
+
+    def __init__(self, generate=None, path=None, target_size=5, low_watermark=2, max_concurrent_refills=4):
+        """
+        :param generate: async callable (topic, subtopic, difficulty) -> question text, used by
+            refills that are not given their own
+        :param path: JSON file used to persist the pools between restarts
+        :param target_size: number of questions a refill tops each pool up to
+        :param low_watermark: pool size below which a refill is scheduled
+        :param max_concurrent_refills: upper bound on simultaneous upstream requests
+        """
+        self.generate = generate
+        self.path = path
+        self.target_size = target_size
+        self.low_watermark = low_watermark
+        self.max_concurrent_refills = max_concurrent_refills
+
+        self.pools = {}
+        self._refill_tasks = {}
+        self._semaphore = None
+        self.logger = logging.getLogger(__name__)
+
+        self.load()
+
+    @staticmethod
+    def make_key(topic: str, subtopic: str = None, difficulty: str = None) -> str:
+        return f"{topic}|{subtopic or ''}|{difficulty or ''}"
+
+    def size(self, topic: str, subtopic: str = None, difficulty: str = None) -> int:
+        return len(self.pools.get(self.make_key(topic, subtopic, difficulty), ()))
+
+    def push(self, topic: str, subtopic: str, difficulty: str, question: str):
+        key = self.make_key(topic, subtopic, difficulty)
+        self.pools.setdefault(key, deque()).append(question)
+
+    def pop(self, topic: str, subtopic: str = None, difficulty: str = None, generate=None):
+        """
+        Take a question from the pool, or None if it is empty. Schedules a refill with generate when low.
+        The pools are saved at once, so a restarted server never serves a taken question again.
+        """
+        key = self.make_key(topic, subtopic, difficulty)
+        pool = self.pools.get(key)
+        question = pool.popleft() if pool else None
+        if question is not None:
+            self.save()
+        if len(pool or ()) < self.low_watermark:
+            self.schedule_refill(topic, subtopic, difficulty, generate=generate)
+        return question
+
+    def schedule_refill(self, topic: str, subtopic: str = None, difficulty: str = None, generate=None):
+        """Start a background refill of one pool unless one is already running"""
+        key = self.make_key(topic, subtopic, difficulty)
+        task = self._refill_tasks.get(key)
+        if task is not None and not task.done():
+            return task
+        if self.size(topic, subtopic, difficulty) >= self.target_size:
+            return None
+        if generate is None and self.generate is None:
+            self.logger.warning(f"No question generator, cannot refill question pool {key}")
+            return None
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.logger.warning(f"No running event loop, cannot refill question pool {key}")
+            return None
+        task = loop.create_task(self.refill(topic, subtopic, difficulty, generate=generate))
+        self._refill_tasks[key] = task
+        return task
+
+    async def refill(self, topic: str, subtopic: str = None, difficulty: str = None, generate=None):
+        """Generate questions with generate (the bank's own when None) until the pool reaches the target size"""
+        key = self.make_key(topic, subtopic, difficulty)
+        generate = generate or self.generate
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent_refills)
+        try:
+            while self.size(topic, subtopic, difficulty) < self.target_size:
+                async with self._semaphore:
+                    question = await generate(topic, subtopic, difficulty)
+                if not question:
+                    break
+                self.push(topic, subtopic, difficulty, question)
+            self.save()
+        except Exception as e:
+            self.logger.error(f"Error refilling question pool {key}: {str(e)}")
+        finally:
+            if self._refill_tasks.get(key) is asyncio.current_task():
+                del self._refill_tasks[key]
+
+    def warm(self, topics_and_subtopics: dict, difficulties, topics=None, generate=None):
+        """
+        Schedule refills for pools taken from the math_taxonomy hierarchy.
+
+        :param topics_and_subtopics: topic -> list of subtopics, as in math_taxonomy
+        :param difficulties: difficulty levels to pre-generate
+        :param topics: optional subset of topics to warm (all topics when None)
+        :param generate: generator of the refills, the bank's own when None
+        """
+        tasks = []
+        for topic, subtopics in topics_and_subtopics.items():
+            if topics is not None and topic not in topics:
+                continue
+            for subtopic in [None] + list(subtopics):
+                for difficulty in difficulties:
+                    task = self.schedule_refill(topic, subtopic, difficulty, generate=generate)
+                    if task is not None:
+                        tasks.append(task)
+        return tasks
+
+    async def wait_for_refills(self):
+        """Wait until every running refill task has finished"""
+        tasks = [task for task in self._refill_tasks.values() if not task.done()]
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    ##################################################
+    # Persistence
+    ##################################################
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                stored = json.load(f)
+            self.pools = {key: deque(questions) for key, questions in stored.items()}
+            self.logger.info(f"Loaded {sum(len(q) for q in self.pools.values())} questions from {self.path}")
+        except (OSError, ValueError) as e:
+            self.logger.error(f"Error loading question bank {self.path}: {str(e)}")
+
+    def save(self):
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({key: list(questions) for key, questions in self.pools.items() if questions}, f)
+        os.replace(tmp_path, self.path)
+
+
+_default_bank = None
+
+
+def get_default_question_bank() -> QuestionBank:
+    """Process-wide question bank configured from src/globals.py, callers pass their generator to pop() and refills"""
+    global _default_bank
+    if _default_bank is None:
+        from src import globals
+        _default_bank = QuestionBank(
+            path=globals.QUESTION_BANK_PATH,
+            target_size=globals.QUESTION_BANK_TARGET_SIZE,
+            low_watermark=globals.QUESTION_BANK_LOW_WATERMARK,
+        )
+    return _default_bank
@@ -0,0 +1,70 @@
+import logging
+import os
+
+from autogen.coding import CodeBlock, CodeResult, MarkdownCodeExtractor
+
+from src.Tools.sandbox_pool import get_default_sandbox_pool
+
+PYTHON_LANGUAGES = ('python', 'py', 'python3', '')
+
+
+class SandboxCodeExecutor:
+    """
+    autogen code executor running the code blocks of a reply in a SandboxPool.
+
+    Only Python blocks are run, one after the other, stopping at the first failure.
+    Figures produced by a block are saved into work_dir and listed in the output.
+    execute_code_blocks() blocks until the runs end, CodeRunnerAgent calls it from a thread.
+    """
+
+    def __init__(self, pool=None, work_dir: str = "coding"):
+        """
+        :param pool: SandboxPool, the process-wide pool when None
+        :param work_dir: directory the figures are saved to
+        """
+        self._pool = pool
+        self.work_dir = work_dir
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            self._pool = get_default_sandbox_pool()
+        return self._pool
+
+    @property
+    def code_extractor(self):
+        return MarkdownCodeExtractor()
+
+    def execute_code_blocks(self, code_blocks: list[CodeBlock]) -> CodeResult:
+        outputs = []
+        exit_code = 0
+        for code_block in code_blocks:
+            language = (code_block.language or '').lower()
+            if language not in PYTHON_LANGUAGES:
+                outputs.append(f"Only Python code can be run, not {language}.")
+                exit_code = 1
+                break
+            result = self.pool.run(code_block.code)
+            outputs.append(result.output)
+            outputs.extend(f"Figure saved to {path}" for path in self._save_figures(result.figures))
+            exit_code = result.exit_code
+            if exit_code != 0:
+                break
+        return CodeResult(exit_code=exit_code, output="\n".join(output for output in outputs if output))
+
+    def _save_figures(self, figures: dict) -> list:
+        paths = []
+        for name, data in figures.items():
+            os.makedirs(self.work_dir, exist_ok=True)
+            path = os.path.join(self.work_dir, name)
+            try:
+                with open(path, 'wb') as f:
+                    f.write(data)
+                paths.append(path)
+            except OSError as e:
+                self.logger.error(f"Error saving figure {name}: {str(e)}")
+        return paths
+
+    def restart(self):
+        """Every run is a fresh fork of a warm worker, there is nothing to restart"""
@@ -0,0 +1,493 @@
+import asyncio
+import atexit
+import base64
+import ctypes
+import importlib
+import io
+import json
+import logging
+import os
+import queue
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+from functools import lru_cache
+from multiprocessing.connection import Connection
+
+from src import globals
+
+try:
+    import resource
+except ImportError:  # resource is POSIX only, workers run without rlimits elsewhere
+    resource = None
+
+TIMEOUT_EXIT_CODE = 124  # as coreutils' timeout
+STARTUP_TIMEOUT_SECONDS = 60  # for a new worker to import its preloads
+QUEUE_TIMEOUT_SECONDS = 300  # for a run waiting for an idle worker
+MAX_OUTPUT_CHARS = 100_000  # of stdout and of stderr, per run
+MAX_FILE_MB = 64  # size of a file written by a run
+MAX_REPLY_BYTES = 256 * 1024 * 1024  # of the output and figures a run hands back to its worker
+FIGURE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.svg')
+CLONE_NEWUSER = 0x10000000
+CLONE_NEWNET = 0x40000000
+# The only variables of the server's environment workers get, API keys and other secrets stay out
+WORKER_ENVIRONMENT = ('PATH', 'LANG', 'LC_ALL', 'LC_CTYPE', 'TZ', 'TMPDIR', 'TEMP', 'TMP', 'SYSTEMROOT')
+
+
+class SandboxResult:
+    """Outcome of one run: exit code, captured output and the figures it produced (file name -> image bytes)"""
+
+    def __init__(self, exit_code: int, stdout: str = '', stderr: str = '', figures: dict = None):
+        self.exit_code = exit_code
+        self.stdout = stdout
+        self.stderr = stderr
+        self.figures = figures or {}
+        self.seconds = 0.0
+
+    @property
+    def timed_out(self) -> bool:
+        return self.exit_code == TIMEOUT_EXIT_CODE
+
+    @property
+    def output(self) -> str:
+        """stdout followed by stderr, as a terminal would show them"""
+        return self.stdout + self.stderr
+
+
+class _Worker:
+    """One warm worker process and the parent's end of its socket"""
+
+    def __init__(self, preload: tuple, memory_mb: int):
+        parent_end, child_end = socket.socketpair()
+        try:
+            # A new interpreter with a scrubbed environment, so runs never see the server's secrets
+            self.process = subprocess.Popen(
+                [sys.executable, '-c', f'from src.Tools.sandbox_pool import _worker_entry; _worker_entry({child_end.fileno()})'],
+                pass_fds=(child_end.fileno(),), env=_worker_environment(), stdin=subprocess.DEVNULL,
+                start_new_session=True)
+        finally:
+            child_end.close()
+        self.conn = Connection(parent_end.detach())
+        self.conn.send((preload, memory_mb))
+        self.ready = False
+        self.network_isolated = False
+        self.forks = False
+        self.runs = 0
+
+    def wait_ready(self, timeout: float) -> bool:
+        if not self.ready and self.conn.poll(timeout):
+            status = self.conn.recv()
+            self.network_isolated = status['network_isolated']
+            self.forks = status['forks']
+            self.ready = True
+        return self.ready
+
+    def exit_code(self) -> int:
+        """Shell style exit code of the ended process, 128 + N when killed by signal N"""
+        try:
+            code = self.process.wait(1)
+        except subprocess.TimeoutExpired:
+            return 1
+        return 128 - code if code < 0 else code
+
+    def kill(self):
+        """Kill the worker's process group, with the processes its runs started"""
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except (AttributeError, OSError):
+            # No process groups on this platform
+            if self.process.poll() is None:
+                self.process.kill()
+        try:
+            self.process.wait(1)
+        except subprocess.TimeoutExpired:
+            pass
+        self.conn.close()
+
+
+class SandboxPool:
+    """
+    Pool of warm, resource-limited Python worker processes for snippets of student-visible code.
+
+    Every worker imports the preload modules once when it starts, so a run costs a fork()
+    instead of an interpreter start plus the numpy/matplotlib imports. Runs queue for an idle
+    worker, which forks a child per run: whatever a run changes in the interpreter (builtins,
+    patched modules, globals) is gone with its child, and the next run starts from the warm
+    worker again. The child executes the code inside its own temporary directory, with stdout
+    and stderr captured and the open matplotlib figures (and images written to the directory)
+    returned, under hard limits on address space, file size, CPU time and new processes, the
+    latter stopping forks unless the server runs as root.
+
+    Workers start with only the WORKER_ENVIRONMENT variables of the server, in their own process
+    group and their own user and network namespaces (no network; when namespaces are not allowed
+    this is logged as an error and only the socket module is patched). A worker that overruns
+    the wall-clock timeout is killed with its process group and replaced, and workers are
+    recycled every max_runs_per_worker runs. Without fork() (not POSIX) the code runs in the
+    worker itself, which is then replaced after every run.
+    """
+
+    def __init__(self, workers=None, timeout=None, cpu_seconds=None, memory_mb=None, max_runs_per_worker=None,
+                 preload=None, root=None):
+        """
+        :param workers: number of worker processes
+        :param timeout: wall-clock seconds of one run
+        :param cpu_seconds: CPU seconds of one run
+        :param memory_mb: address space limit of a run
+        :param max_runs_per_worker: runs before a worker is replaced by a fresh one
+        :param preload: modules imported when a worker starts
+        :param root: directory of the per-run temporary directories, the system's temp directory when None
+        """
+        self.size = workers or globals.SANDBOX_WORKERS
+        self.timeout = timeout or globals.SANDBOX_TIMEOUT_SECONDS
+        self.cpu_seconds = cpu_seconds or globals.SANDBOX_CPU_SECONDS
+        self.memory_mb = memory_mb or globals.SANDBOX_MEMORY_MB
+        self.max_runs_per_worker = max_runs_per_worker or globals.SANDBOX_MAX_RUNS_PER_WORKER
+        self.preload = tuple(preload if preload is not None else globals.SANDBOX_PRELOAD)
+        self.root = root
+
+        # Idle workers, runs wait here when every worker is busy
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._started = False
+        self._closed = False
+        # Whether the last worker started is in its own network namespace
+        self.network_isolated = None
+        self._warned_network = False
+
+        self.runs = 0
+        self.timeouts = 0
+        self.crashes = 0
+        self.restarts = 0
+        self.run_seconds = 0.0
+        self.logger = logging.getLogger(__name__)
+
+    def start(self):
+        """Start the workers, runs call it on first use"""
+        with self._lock:
+            if self._started:
+                return self
+            self._started = True
+        for _ in range(self.size):
+            self._idle.put(self._spawn())
+        return self
+
+    def _spawn(self) -> _Worker:
+        return _Worker(self.preload, self.memory_mb)
+
+    ##################################################
+    # Runs
+    ##################################################
+    def run(self, code: str, timeout: float = None) -> SandboxResult:
+        """Execute Python code in an idle worker, waiting for one when all of them are busy"""
+        if self._closed:
+            raise RuntimeError("SandboxPool is closed")
+        self.start()
+        try:
+            worker = self._idle.get(timeout=QUEUE_TIMEOUT_SECONDS)
+        except queue.Empty:
+            self.logger.error(f"No sandbox worker became idle within {QUEUE_TIMEOUT_SECONDS}s")
+            return SandboxResult(1, stderr="The sandbox is busy, try again.")
+
+        healthy = False
+        run_dir = None
+        start = time.perf_counter()
+        try:
+            run_dir = tempfile.mkdtemp(prefix='run-', dir=self.root)
+            result, healthy = self._run_in(worker, code, run_dir, timeout or self.timeout)
+        finally:
+            if run_dir is not None:
+                shutil.rmtree(run_dir, ignore_errors=True)
+            self._release(worker, healthy)
+        result.seconds = time.perf_counter() - start
+
+        with self._lock:
+            self.runs += 1
+            self.run_seconds += result.seconds
+        return result
+
+    def _release(self, worker: _Worker, healthy: bool):
+        """Give the worker back to the idle queue, or a fresh one in its place"""
+        # A worker that cannot fork ran the code itself and keeps its state
+        if healthy and worker.forks and worker.runs < self.max_runs_per_worker and not self._closed:
+            self._idle.put(worker)
+            return
+        worker.kill()
+        if self._closed:
+            return
+        self.restarts += 1
+        try:
+            self._idle.put(self._spawn())
+        except Exception as e:
+            self.logger.error(f"Error starting a sandbox worker: {str(e)}")
+
+    async def a_run(self, code: str, timeout: float = None) -> SandboxResult:
+        """run() without blocking the event loop"""
+        return await asyncio.get_running_loop().run_in_executor(None, self.run, code, timeout)
+
+    def _run_in(self, worker: _Worker, code: str, run_dir: str, timeout: float):
+        """(result, whether the worker can take another run)"""
+        try:
+            if not worker.wait_ready(STARTUP_TIMEOUT_SECONDS):
+                self.logger.error(f"Sandbox worker did not start within {STARTUP_TIMEOUT_SECONDS}s")
+                return SandboxResult(1, stderr="The sandbox is not available, try again."), False
+            if not worker.network_isolated and not self._warned_network:
+                self._warned_network = True
+                self.logger.error("Sandbox workers could not enter a network namespace (unprivileged user namespaces are "
+                                  "disabled), runs are only kept off the network by patching the socket module, "
+                                  "which code can get around")
+            self.network_isolated = worker.network_isolated
+            worker.conn.send((code, run_dir, self.cpu_seconds))
+            if not worker.conn.poll(timeout):
+                self.timeouts += 1
+                return SandboxResult(TIMEOUT_EXIT_CODE, stderr=f"Timeout: the code ran longer than {timeout} seconds."), False
+            result = SandboxResult(**worker.conn.recv())
+            worker.runs += 1
+            return result, True
+        except (EOFError, OSError):
+            # The worker ended during the run
+            self.crashes += 1
+            exit_code = worker.exit_code()
+            return SandboxResult(exit_code, stderr=_stopped_message(exit_code, self.cpu_seconds, self.memory_mb)), False
+        except Exception as e:
+            # The code tampered with the worker (e.g. rebound a builtin) and its reply could not be read
+            self.crashes += 1
+            self.logger.error(f"Invalid reply from a sandbox worker: {str(e) or type(e).__name__}")
+            return SandboxResult(1, stderr="The code left the sandbox in a broken state, it was restarted."), False
+
+    def close(self):
+        """Stop the workers, runs in progress stop theirs when they end"""
+        self._closed = True
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            worker.kill()
+
+    def get_stats(self) -> dict:
+        return {
+            'workers': self.size,
+            'runs': self.runs,
+            'timeouts': self.timeouts,
+            'crashes': self.crashes,
+            'restarts': self.restarts,
+            'network_isolated': self.network_isolated,
+            'average_run_ms': 1000 * self.run_seconds / self.runs if self.runs else 0.0,
+        }
+
+
+##################################################
+# Worker process
+##################################################
+def _worker_environment() -> dict:
+    environment = {name: os.environ[name] for name in WORKER_ENVIRONMENT if name in os.environ}
+    environment.update(
+        # The worker imports what the server can
+        PYTHONPATH=os.pathsep.join(os.path.abspath(path or os.curdir) for path in sys.path),
+        HOME=tempfile.gettempdir(),
+        MPLBACKEND='Agg',
+        # One BLAS thread per worker, the pool is the unit of parallelism
+        OPENBLAS_NUM_THREADS='1',
+        OMP_NUM_THREADS='1',
+    )
+    return environment
+
+
+def _worker_entry(fd: int):
+    conn = Connection(fd)
+    preload, memory_mb = conn.recv()
+    _worker_main(conn, preload, memory_mb)
+
+
+def _worker_main(conn, preload: tuple, memory_mb: int):
+    network_isolated = _enter_network_namespace()
+    if not network_isolated:
+        _refuse_sockets()
+    for module in preload:
+        try:
+            importlib.import_module(module)
+        except Exception:
+            pass
+    forks = hasattr(os, 'fork')
+    conn.send({'network_isolated': network_isolated, 'forks': forks})
+
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        if request is None:
+            return
+        code, run_dir, cpu_seconds = request
+        if forks:
+            conn.send(_run_forked(conn, code, run_dir, cpu_seconds, memory_mb))
+        else:
+            _limit_run(cpu_seconds, memory_mb)
+            conn.send(_execute(code, run_dir))
+
+
+def _run_forked(conn, code: str, run_dir: str, cpu_seconds: int, memory_mb: int) -> dict:
+    """Execute the code in a child of the worker, which the run cannot change"""
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.close(read_fd)
+            conn.close()  # the code never talks to the pool
+            _limit_run(cpu_seconds, memory_mb)
+            result = _execute(code, run_dir)
+            result['figures'] = {name: base64.b64encode(data).decode('ascii') for name, data in result['figures'].items()}
+            with os.fdopen(write_fd, 'wb') as f:
+                f.write(json.dumps(result).encode('utf-8'))
+        finally:
+            os._exit(0)
+
+    os.close(write_fd)
+    with os.fdopen(read_fd, 'rb') as f:
+        reply = f.read(MAX_REPLY_BYTES)
+    _, status = os.waitpid(pid, 0)
+    exit_code = os.waitstatus_to_exitcode(status)
+    exit_code = 128 - exit_code if exit_code < 0 else exit_code
+    result = _read_reply(reply) if exit_code == 0 else None
+    if result is None:
+        # CPU or memory limit, crash or os._exit() in the code
+        return {'exit_code': exit_code or 1, 'stdout': '', 'stderr': _stopped_message(exit_code, cpu_seconds, memory_mb),
+                'figures': {}}
+    return result
+
+
+def _read_reply(reply: bytes):
+    """The result a child wrote, None when the code tampered with it"""
+    try:
+        result = json.loads(reply)
+        figures = {str(name): base64.b64decode(data) for name, data in result['figures'].items()}
+        return {'exit_code': int(result['exit_code']), 'stdout': str(result['stdout']), 'stderr': str(result['stderr']),
+                'figures': figures}
+    except Exception:
+        return None
+
+
+def _stopped_message(exit_code: int, cpu_seconds: int, memory_mb: int) -> str:
+    return (f"The code was stopped (exit code {exit_code}), it may have exceeded "
+            f"the CPU limit of {cpu_seconds}s or the memory limit of {memory_mb} MB.")
+
+
+def _enter_network_namespace() -> bool:
+    """Move the worker to new user and network namespaces, with no interface but a down loopback"""
+    flags = CLONE_NEWUSER | CLONE_NEWNET
+    try:
+        if hasattr(os, 'unshare'):
+            os.unshare(flags)
+            return True
+        libc = ctypes.CDLL(None, use_errno=True)
+        return libc.unshare(flags) == 0
+    except (OSError, AttributeError):
+        return False
+
+
+def _refuse_sockets():
+    """Fallback when namespaces are not allowed: refuse internet sockets made through the socket module"""
+    import socket
+
+    def refuse(*args, **kwargs):
+        raise PermissionError("Network access is disabled in the sandbox")
+
+    socket_init = socket.socket.__init__
+
+    def guarded_init(self, family=-1, type=-1, proto=-1, fileno=None):
+        if fileno is None and family in (-1, socket.AF_INET, socket.AF_INET6):
+            refuse()
+        socket_init(self, family, type, proto, fileno)
+
+    socket.socket.__init__ = guarded_init
+    socket.getaddrinfo = socket.create_connection = refuse
+
+
+def _limit_run(cpu_seconds: int, memory_mb: int):
+    """Hard limits, so that the run cannot raise them back"""
+    if resource is None:
+        return
+    _set_limit(resource.RLIMIT_AS, memory_mb * 1024 * 1024)
+    _set_limit(resource.RLIMIT_FSIZE, MAX_FILE_MB * 1024 * 1024)
+    _set_limit(resource.RLIMIT_NPROC, 0)  # no new processes or threads
+    _set_limit(resource.RLIMIT_CPU, cpu_seconds)
+
+
+def _set_limit(which, limit: int):
+    """Lower the soft and hard values of a resource limit"""
+    _, hard = resource.getrlimit(which)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    try:
+        resource.setrlimit(which, (limit, limit))
+    except (ValueError, OSError):
+        pass
+
+
+def _execute(code: str, run_dir: str) -> dict:
+    stdout, stderr = io.StringIO(), io.StringIO()
+    exit_code = 0
+    figures = {}
+    cwd = os.getcwd()
+    os.chdir(run_dir)
+    try:
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            try:
+                exec(compile(code, 'snippet.py', 'exec'), {'__name__': '__main__'})
+            except SystemExit as e:
+                if e.code is None or isinstance(e.code, int):
+                    exit_code = e.code or 0
+                else:
+                    print(e.code, file=sys.stderr)
+                    exit_code = 1
+            except BaseException as e:
+                # Without the frame of this function
+                traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+                exit_code = 1
+            figures = _collect_figures(run_dir)
+    finally:
+        os.chdir(cwd)
+    return {'exit_code': exit_code, 'stdout': _truncate(stdout.getvalue()), 'stderr': _truncate(stderr.getvalue()),
+            'figures': figures}
+
+
+def _collect_figures(run_dir: str) -> dict:
+    """Open pyplot figures as PNG, and the images the run saved in its directory"""
+    figures = {}
+    pyplot = sys.modules.get('matplotlib.pyplot')
+    if pyplot is not None:
+        try:
+            for number in pyplot.get_fignums():
+                buffer = io.BytesIO()
+                pyplot.figure(number).savefig(buffer, format='png')
+                figures[f'figure-{number}.png'] = buffer.getvalue()
+            pyplot.close('all')
+        except Exception as e:
+            print(f"Could not save the figures: {str(e)}", file=sys.stderr)
+    for name in sorted(os.listdir(run_dir)):
+        path = os.path.join(run_dir, name)
+        if name.lower().endswith(FIGURE_EXTENSIONS) and name not in figures and os.path.isfile(path):
+            with open(path, 'rb') as f:
+                figures[name] = f.read()
+    return figures
+
+
+def _truncate(text: str) -> str:
+    if len(text) <= MAX_OUTPUT_CHARS:
+        return text
+    return text[:MAX_OUTPUT_CHARS] + f"\n... output truncated after {MAX_OUTPUT_CHARS} characters"
+
+
+@lru_cache(maxsize=None)
+def get_default_sandbox_pool() -> SandboxPool:
+    """Process-wide sandbox pool configured by globals.SANDBOX_*, stopped at exit"""
+    pool = SandboxPool()
+    atexit.register(pool.close)
+    return pool
@@ -1,20 +1,21 @@
-from src.Agents.agents import *
+# Agent names come from the registry, so the avatars do not build any agents
+from src.Agents.agents import AgentKeys, agent_names
 
 avatar = {
-    student.name: "✏️",                 # Pencil
-    knowledge_tracer.name: "🧠",       # Brain
-    teacher.name: "👩‍🏫",                # Female teacher
-    tutor.name: "🧑‍🎓",                  # Person with graduation hat
-    problem_generator.name: "📚",  # Stack of books for problem generation
-    solution_verifier.name: "🔍",  # Magnifying glass for solution verification
-    programmer.name: "👨‍💻",       # Male programmer/coder emoji
-    code_runner.name: "▶️",        # Play button for code execution
-    learner_model.name: "🧠",      # Brain emoji for learner model
-    level_adapter.name: "📈",      # Chart with upwards trend for level adaptation
-    motivator.name: "🏆",  
+    agent_names[AgentKeys.STUDENT.value]: "✏️",                 # Pencil
+    agent_names[AgentKeys.KNOWLEDGE_TRACER.value]: "🧠",       # Brain
+    agent_names[AgentKeys.TEACHER.value]: "👩‍🏫",                # Female teacher
+    agent_names[AgentKeys.TUTOR.value]: "🧑‍🎓",                  # Person with graduation hat
+    agent_names[AgentKeys.PROBLEM_GENERATOR.value]: "📚",  # Stack of books for problem generation
+    agent_names[AgentKeys.SOLUTION_VERIFIER.value]: "🔍",  # Magnifying glass for solution verification
+    agent_names[AgentKeys.PROGRAMMER.value]: "👨‍💻",       # Male programmer/coder emoji
+    agent_names[AgentKeys.CODE_RUNNER.value]: "▶️",        # Play button for code execution
+    agent_names[AgentKeys.LEARNER_MODEL.value]: "🧠",      # Brain emoji for learner model
+    agent_names[AgentKeys.LEVEL_ADAPTER.value]: "📈",      # Chart with upwards trend for level adaptation
+    agent_names[AgentKeys.MOTIVATOR.value]: "🏆",  
     "MasteryAgent": "📚", 
     "Math Master": "📚", 
-    gamification.name: "🎮",        # Trophy emoji for motivation
+    agent_names[AgentKeys.GAMIFICATION.value]: "🎮",        # Trophy emoji for motivation
  }
 
 avatar2 = {
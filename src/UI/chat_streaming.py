@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import re
+import threading
+import time
+
+from autogen.io import IOStreamConsole
+
+ANSI_ESCAPE_PATTERN = re.compile(r'\x1b\[[0-9;]*m')
+
+
+class ChatStreamWriter:
+    """
+    Streams completion chunks into a single updating message of a Panel ChatInterface.
+
+    Chunks may arrive from autogen's worker threads at token rate. They are buffered
+    and pushed to the UI at most once per flush interval on the event loop, so a fast
+    model never queues more than one pending UI update.
+    """
+
+    def __init__(self, chat_interface, avatars=None, flush_interval_ms=50):
+        """
+        :param chat_interface: pn.chat.ChatInterface that receives the streamed messages
+        :param avatars: agent name -> avatar, as in src/UI/avatar.py
+        :param flush_interval_ms: minimum time between two UI updates
+        """
+        self.chat_interface = chat_interface
+        self.avatars = avatars or {}
+        self.flush_interval = flush_interval_ms / 1000
+
+        self.user = None
+        self.message = None
+        self.time_to_first_token = None
+
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._flush_scheduled = False
+        self._loop = None
+        self._started_at = None
+
+    def begin(self, user: str):
+        """Expect the next chunks to belong to a reply from user. Call from the event loop."""
+        self.flush()
+        self.user = user
+        self.message = None
+        self.time_to_first_token = None
+        self._started_at = time.perf_counter()
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._loop = None
+
+    def write(self, text: str):
+        """Buffer a chunk. Safe to call from any thread."""
+        if not text:
+            return
+        with self._lock:
+            self._buffer.append(text)
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+
+        if self._loop is None or self._loop.is_closed():
+            self.flush()
+        else:
+            self._loop.call_soon_threadsafe(self._loop.call_later, self.flush_interval, self.flush)
+
+    def flush(self):
+        """Push buffered chunks to the chat interface"""
+        with self._lock:
+            text = "".join(self._buffer)
+            self._buffer.clear()
+            self._flush_scheduled = False
+        if not text or self.user is None:
+            return
+
+        if self.message is None:
+            self.message = self.chat_interface.stream(text, user=self.user, avatar=self.avatars.get(self.user))
+            if self._started_at is not None:
+                self.time_to_first_token = time.perf_counter() - self._started_at
+                logging.info(f"First streamed tokens from {self.user} after {self.time_to_first_token:.3f}s")
+        else:
+            self.chat_interface.stream(text, message=self.message)
+
+    def finalize(self, content: str, user: str) -> bool:
+        """
+        Replace the streamed text with the final message content.
+        Returns False when nothing was streamed for user, so the caller sends the message itself.
+        """
+        self.flush()
+        message, streamed_user = self.message, self.user
+        self.message = None
+        self.user = None
+        if message is None or streamed_user != user:
+            return False
+        self.chat_interface.stream(content, message=message, replace=True)
+        return True
+
+
+class PaneStreamWriter(ChatStreamWriter):
+    """
+    Streams completion chunks into a Panel pane, e.g. the feedback Markdown of the mastery tab.
+    Buffering and flush intervals are the same as ChatStreamWriter.
+    """
+
+    def __init__(self, pane, flush_interval_ms=50):
+        """
+        :param pane: pane whose object shows the streamed text
+        :param flush_interval_ms: minimum time between two UI updates
+        """
+        super().__init__(None, flush_interval_ms=flush_interval_ms)
+        self.pane = pane
+
+    def flush(self):
+        with self._lock:
+            text = "".join(self._buffer)
+            self._buffer.clear()
+            self._flush_scheduled = False
+        if not text or self.user is None:
+            return
+
+        if self.message is None:
+            self.message = ""
+            if self._started_at is not None:
+                self.time_to_first_token = time.perf_counter() - self._started_at
+                logging.info(f"First streamed tokens from {self.user} after {self.time_to_first_token:.3f}s")
+        self.message += text
+        self.pane.object = self.message
+
+    def finalize(self, content: str, user: str) -> bool:
+        """Replace the streamed text with content. Returns False when nothing was streamed for user."""
+        self.flush()
+        streamed, streamed_user = self.message, self.user
+        self.message = None
+        self.user = None
+        if streamed is None or streamed_user != user:
+            return False
+        self.pane.object = content
+        return True
+
+
+class PanelIOStream(IOStreamConsole):
+    """
+    autogen IOStream that forwards streamed completion chunks to a ChatStreamWriter.
+    Everything else autogen prints still goes to the console.
+    """
+
+    def __init__(self, writer: ChatStreamWriter):
+        self.writer = writer
+
+    def print(self, *objects, sep=" ", end="\n", flush=False):
+        # Streaming clients print each chunk with end="" and flush=True
+        if end == "" and flush:
+            self.writer.write(ANSI_ESCAPE_PATTERN.sub('', sep.join(map(str, objects))))
+        else:
+            super().print(*objects, sep=sep, end=end, flush=flush)
+
+    def send(self, message):
+        if type(message).__name__.startswith("StreamMessage"):
+            content = getattr(message, "content", None)
+            # Wrapped messages keep the payload one level down
+            content = getattr(content, "content", content)
+            if isinstance(content, str):
+                self.writer.write(content)
+                return
+        super().send(message)
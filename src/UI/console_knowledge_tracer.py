@@ -7,7 +7,8 @@ import asyncio
 from typing import List, Dict
 import logging
 from src import globals
-from src.Agents.agents import *
+# Only the four agents the knowledge tracer talks to are built
+from src.Agents.agents import student, knowledge_tracer, problem_generator, solution_verifier
 from src.Agents.group_chat_manager_agent import CustomGroupChatManager, CustomGroupChat
 from src.Agents import chat_manager_fsms as fsm
 from src.UI.avatar import avatar
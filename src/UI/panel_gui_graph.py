@@ -66,6 +66,8 @@ reactive_chat.graph_tab_interface.send("Time to find out what you know!", user="
 
 # --- Panel Interface ---
 def create_app():    
+    # The learner of this browser session, answers are traced for them
+    fsm.student_id = pn.state.user or pn.state.curdoc.session_context.id
     return reactive_chat.draw_view()
 
 if __name__ == "__main__":    
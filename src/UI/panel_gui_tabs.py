@@ -17,7 +17,7 @@ from src.Agents.chat_manager_fsms import FSM
 from src.Agents.group_chat_manager_agent import CustomGroupChatManager, CustomGroupChat
 from src.UI.reactive_chat16 import ReactiveChat
 from src.UI.avatar import avatar
-from src.KnowledgeGraphs.math_taxonomy import topic_colors
+from src.KnowledgeGraphs.topic_colors import topic_colors
 import pandas as pd
 
 
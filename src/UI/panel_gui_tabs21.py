@@ -3,12 +3,11 @@ import panel as pn
 import openai
 import os
 import asyncio
+import re
 import speech_recognition as sr
 from typing import List, Dict
 from src import globals
-from src.Agents.agents import *
-from src.Agents.chat_manager_fsms import FSM
-from src.Agents.group_chat_manager_agent import CustomGroupChatManager, CustomGroupChat
+from src.Agents.session_registry import SessionRegistry, SessionLimitError
 from src.UI.reactive_chat21 import ReactiveChat
 from src.UI.avatar import avatar
 
@@ -40,46 +39,67 @@ def recognize_speech_from_mic():
 ##############################################
 # Main Adaptive Learning Application
 ##############################################
-globals.input_future = None
-script_dir = os.path.dirname(os.path.abspath(__file__))
-progress_file_path = os.path.join(script_dir, '../../progress.json')
+# Every learner session gets its own agents, FSM, group chat and manager
+session_registry = SessionRegistry()
 
-fsm = FSM(agents_dict)
 
-groupchat = CustomGroupChat(agents=list(agents_dict.values()), 
-                              messages=[],
-                              max_round=globals.MAX_ROUNDS,
-                              send_introductions=True,
-                              speaker_selection_method=fsm.next_speaker_selector
-                              )
+def get_session_id():
+    # Only a learner signed in through Panel's authentication (panel serve --oauth-provider/--basic-auth)
+    # comes back to their session, anonymous learners get one session per browser tab
+    if pn.state.user:
+        return re.sub(r'[^\w-]', '_', pn.state.user)
+    return pn.state.curdoc.session_context.id
 
-manager = CustomGroupChatManager(groupchat=groupchat,
-                                filename=progress_file_path, 
-                                is_termination_msg=lambda x: x.get("content", "").rstrip().find("TERMINATE") >= 0 )    
 
-# Begin GUI components
-reactive_chat = ReactiveChat(groupchat_manager=manager)
+def init_session_view(session):
+    reactive_chat = ReactiveChat(groupchat_manager=session.manager, agents_dict=session.agents_dict)
 
-# Register groupchat_manager and reactive_chat GUI interface with ConversableAgents
-for agent in groupchat.agents:
-    agent.groupchat_manager = manager
-    agent.reactive_chat = reactive_chat
-    agent.register_reply([autogen.Agent, None], reply_func=agent.autogen_reply_func, config={"callback": None})
+    # Register groupchat_manager and reactive_chat GUI interface with ConversableAgents
+    for agent in session.groupchat.agents:
+        agent.reactive_chat = reactive_chat
+        agent.register_reply([autogen.Agent, None], reply_func=agent.autogen_reply_func, config={"callback": None})
 
-# Load chat history on startup
-manager.get_chat_history_and_initialize_chat(filename=progress_file_path, chat_interface=reactive_chat.learn_tab_interface)
-reactive_chat.update_dashboard()    # Call after history loaded
+    # Load the end of the chat history on startup, the learn tab pages in older messages
+    session.manager.get_chat_history_and_initialize_chat(filename=session.manager.filename, chat_interface=reactive_chat.learn_tab_interface,
+                                                         window=globals.CHAT_RESTORE_WINDOW)
+    reactive_chat.update_dashboard()    # Call after history loaded
+    reactive_chat.update_history_pager()
 
+    # Any new chat message counts as activity for idle eviction
+    reactive_chat.learn_tab_interface.param.watch(lambda event: session.touch(), 'objects')
+    session.view = reactive_chat
+    return reactive_chat
+
+
+def start_session_eviction():
+    # A named task is scheduled once per process, however many sessions call this
+    pn.state.schedule_task("evict_idle_sessions", session_registry.evict_idle, period=f"{globals.SESSION_EVICTION_INTERVAL}s")
 
-# --- Speech Capture and Processing ---
-def handle_audio_submission(event):
-    transcript = recognize_speech_from_mic()
-    # Display the transcribed text in the chat interface
-    reactive_chat.learn_tab_interface.send(transcript, user="User", avatar="🎤")
-    
 
 # Create app with speech recognition button
 def create_app():    
+    # Also runs under panel serve, where __main__ is never executed
+    start_session_eviction()
+    session_id = get_session_id()
+    try:
+        session = session_registry.get_or_create(session_id)
+    except SessionLimitError as e:
+        return pn.pane.Alert(f"{e}. Please try again later.", alert_type="warning")
+    # Panel widgets belong to one Bokeh document, so a session is shown in one tab at a time
+    document = pn.state.curdoc
+    if not session.claim(document):
+        return pn.pane.Alert("Your tutor is already open in another browser tab. Please continue there.", alert_type="warning")
+    reactive_chat = init_session_view(session)
+
+    # The session ends with its tab, its history is saved and restored when the learner signs in again
+    pn.state.on_session_destroyed(lambda session_context: session_registry.remove(session_id))
+
+    # --- Speech Capture and Processing ---
+    def handle_audio_submission(event):
+        transcript = recognize_speech_from_mic()
+        # Display the transcribed text in the chat interface
+        reactive_chat.learn_tab_interface.send(transcript, user="User", avatar="🎤")
+
     record_button = pn.widgets.Button(name="Record Audio", button_type="primary")
     record_button.on_click(handle_audio_submission)  # Call when button is clicked
     return pn.Column(
@@ -88,5 +108,4 @@ def create_app():
     )
 
 if __name__ == "__main__":    
-    app = create_app()
-    pn.serve(app, callback_exception='verbose')
+    pn.serve(create_app, callback_exception='verbose')
@@ -12,7 +12,9 @@ from src.Agents.chat_manager_fsms import FSM
 from src.Agents.group_chat_manager_agent import CustomGroupChatManager, CustomGroupChat
 from src.UI.reactive_chat22 import ReactiveChat
 from src.UI.avatar import avatar
-from src.KnowledgeGraphs.math_taxonomy import topic_colors
+from src.UI.chat_streaming import PaneStreamWriter, PanelIOStream
+from autogen.io import IOStream
+from src.KnowledgeGraphs.topic_colors import topic_colors
 import pandas as pd
 import logging
 
@@ -53,6 +55,9 @@ class MathMasteryInterface:
         self.logger.info("Initializing MathMasteryInterface")
         # Initialize components and state
         self._init_ui_components()
+        # LLM grading streams into the feedback card while it is generated
+        self.stream_writer = PaneStreamWriter(self.feedback_display, flush_interval_ms=globals.STREAM_FLUSH_INTERVAL_MS)
+        self.iostream = PanelIOStream(self.stream_writer) if globals.STREAM_RESPONSES else IOStream.get_default()
         self._init_state()
         self._setup_event_handlers()
 
@@ -166,6 +171,17 @@ class MathMasteryInterface:
         )
 
     
+    def _student_id(self):
+        """Learner of the browser session handling the current event, None outside a Panel server"""
+        if pn.state.user:
+            return pn.state.user
+        document = pn.state.curdoc
+        return document.session_context.id if document is not None and document.session_context else None
+
+    def _learner(self):
+        """Question state the shared MasteryAgent keeps for the learner of this session"""
+        return self.mastery_agent.learner(self._student_id())
+
     def _init_state(self):
         """Initialize state variables"""
         self.current_question = None
@@ -198,7 +214,8 @@ class MathMasteryInterface:
             self.logger.info("Requesting first question")
             question_data = await self.mastery_agent.ask_question(
                 self.current_topic,
-                self.current_subtopic
+                self.current_subtopic,
+                student_id=self._student_id()
             )
             
             if not question_data or '[Question]' not in question_data:
@@ -244,11 +261,15 @@ class MathMasteryInterface:
             
             # Evaluate answer
             self.logger.info("Evaluating answer")
-            is_correct, feedback = await self.mastery_agent.evaluate_answer(
-                self.current_question['question'],
-                answer,
-                self.current_question['correct_answer']
-            )
+            self.stream_writer.begin(self.mastery_agent.name)
+            with IOStream.set_default(self.iostream):
+                is_correct, feedback = await self.mastery_agent.evaluate_answer(
+                    self.current_question['question'],
+                    answer,
+                    self.current_question['correct_answer'],
+                    student_id=self._student_id()
+                )
+            self.stream_writer.finalize(feedback, user=self.mastery_agent.name)
             
             self.logger.info(f"Answer evaluation complete. Correct: {is_correct}")
             
@@ -256,7 +277,7 @@ class MathMasteryInterface:
             self._process_answer_result(is_correct, feedback, answer)
             
             # Continue test or end
-            if self.mastery_agent.questions_asked < 5:
+            if self._learner().questions_asked < 5:
                 self.logger.info("Getting next question")
                 await self._get_next_question()
             else:
@@ -300,13 +321,13 @@ class MathMasteryInterface:
     def _update_progress_display(self):
         """Update progress displays with integer values"""
         try:
-            if not self.mastery_agent or self.mastery_agent.questions_asked == 0:
+            if not self.mastery_agent or self._learner().questions_asked == 0:
                 self.progress_bar.value = 0
                 return
             
             # Calculate progress as integer
-            questions = max(1, self.mastery_agent.questions_asked)  # Prevent division by zero
-            correct = self.mastery_agent.correct_answers
+            questions = max(1, self._learner().questions_asked)  # Prevent division by zero
+            correct = self._learner().correct_answers
             progress = int((correct * 100) / questions)
             
             self.logger.info(f"Updating progress: {correct}/{questions} = {progress}%")
@@ -315,7 +336,7 @@ class MathMasteryInterface:
             self.progress_bar.value = progress
             
             # Update feedback display
-            mastery_status = self.mastery_agent.get_mastery_status()
+            mastery_status = self.mastery_agent.get_mastery_status(student_id=self._student_id())
             if isinstance(mastery_status, dict):
                 feedback_text = f"""
                 ### Current Progress
@@ -354,12 +375,12 @@ class MathMasteryInterface:
             
             {feedback}
             
-            **Score:** {self.mastery_agent.correct_answers}/{self.mastery_agent.questions_asked}
+            **Score:** {self._learner().correct_answers}/{self._learner().questions_asked}
             """
             
             # Update progress with integer value
-            if self.mastery_agent.questions_asked > 0:
-                progress = int((self.mastery_agent.correct_answers * 100) / self.mastery_agent.questions_asked)
+            if self._learner().questions_asked > 0:
+                progress = int((self._learner().correct_answers * 100) / self._learner().questions_asked)
                 self.logger.info(f"Setting progress bar to {progress}")
                 self.progress_bar.value = progress
                 
@@ -376,7 +397,7 @@ class MathMasteryInterface:
         try:
             # Format question display with consistent styling and LaTeX support
             question_text = f"""
-            # Question {self.mastery_agent.questions_asked}
+            # Question {self._learner().questions_asked}
             
             **Topic:** {self.current_topic}
             {f'**Subtopic:** {self.current_subtopic}' if self.current_subtopic else ''}
@@ -410,7 +431,8 @@ class MathMasteryInterface:
         try:
             question_data = await self.mastery_agent.ask_question(
                 self.current_topic,
-                self.current_subtopic
+                self.current_subtopic,
+                student_id=self._student_id()
             )
             
             self._process_question(question_data)
@@ -422,7 +444,7 @@ class MathMasteryInterface:
     async def _end_test(self):
         """Handle end of test"""
         self.test_in_progress = False
-        mastery_status = self.mastery_agent.get_mastery_status()
+        mastery_status = self.mastery_agent.get_mastery_status(student_id=self._student_id())
         
         if isinstance(mastery_status, dict):
             self.question_display.object = f"""
@@ -461,12 +483,12 @@ class MathMasteryInterface:
             
             {feedback}
             
-            **Score:** {self.mastery_agent.correct_answers}/{self.mastery_agent.questions_asked}
+            **Score:** {self._learner().correct_answers}/{self._learner().questions_asked}
             """
             
             # Update progress bar with integer value
-            if self.mastery_agent.questions_asked > 0:
-                progress = int((self.mastery_agent.correct_answers / self.mastery_agent.questions_asked) * 100)
+            if self._learner().questions_asked > 0:
+                progress = int((self._learner().correct_answers / self._learner().questions_asked) * 100)
                 self.logger.info(f"Setting progress bar to {progress}")
                 self.progress_bar.value = progress
                 
@@ -504,8 +526,8 @@ class MathMasteryInterface:
             self.question_history = []
             
             # Reset agent state
-            self.mastery_agent.questions_asked = 0
-            self.mastery_agent.correct_answers = 0
+            self._learner().questions_asked = 0
+            self._learner().correct_answers = 0
             
             self.logger.info("Test state reset completed")
             
@@ -588,6 +610,8 @@ class MathMasteryInterface:
         if event.new:
             subsubtopics = self.mastery_agent.get_subsubtopics_for_subtopic(event.new)
             self._update_topic_hierarchy_display(subsubtopics)
+            # Fill the question pool while the student is still choosing
+            self.mastery_agent.prefetch_questions(self.topic_selector.value, event.new, student_id=self._student_id())
 
     def _handle_answer_change(self, event):
         """Handle answer input changes"""
@@ -8,8 +8,9 @@ from typing import List, Dict
 import logging
 from src import globals
 #from src.Agents.agents import agents_dict
-from src.FSMs.fsm_teach_me import TeachMeFSM
+from src.FSMs.fsm_teach_me import create_teach_me_fsm
 from src.Agents.group_chat_manager_agent import CustomGroupChatManager, CustomGroupChat
+from src.Agents.chat_context import ChatContextManager
 from src.UI.reactive_chat_jg import ReactiveChat
 from src.UI.avatar import avatar
 from enum import Enum
@@ -75,7 +76,10 @@ from src.Agents.code_runner_agent import CodeRunnerAgent
 from src.Agents.learner_model_agent import LearnerModelAgent
 from src.Agents.level_adapter_agent import LevelAdapterAgent
 from src.Agents.motivator_agent import MotivatorAgent
+from src.Agents.fan_out_stage import FanOutStage
+from src.Agents.problem_prefetcher import ProblemPrefetcher
 from src.Agents.agents import AgentKeys
+from src.Agents.verdicts import verdict_instructions
 
 
 class CodeRunnerVerifierAgent(MyConversableAgent):  
@@ -84,7 +88,7 @@ class CodeRunnerVerifierAgent(MyConversableAgent):
             """            
     system_message = """
             You are CodeRunnerVerifierAgent, a proficient and efficient assistant specialized in making sure that code executed by CodeRunnerAgent completed successfully. 
-            """            
+            """ + verdict_instructions("CodeRunnerVerifierAgent")            
     def __init__(self, **kwargs):
         super().__init__(
             name="CodeRunnerVerifierAgent",
@@ -152,6 +156,10 @@ level_adapter = LevelAdapterAgent(llm_config=llm,
                                   description=level_adapter_system_message)
 motivator = MotivatorAgent(llm_config=llm)
 
+# After each answer the learner model and level adapter reply at the same time,
+# the motivator then encourages the learner at the level the adapter chose
+post_answer = FanOutStage("PostAnswerStage", [[learner_model, level_adapter], motivator])
+
 
 
 
@@ -168,6 +176,7 @@ agents_dict = {
     AgentKeys.LEARNER_MODEL.value: learner_model,
     AgentKeys.LEVEL_ADAPTER.value: level_adapter,
     AgentKeys.MOTIVATOR.value: motivator,
+    AgentKeys.POST_ANSWER.value: post_answer,
 }
 
 
@@ -184,6 +193,7 @@ avatars = {
     learner_model.name: "🧠",      # Brain emoji for learner model
     level_adapter.name: "📈",      # Chart with upwards trend for level adaptation
     motivator.name: "🏆",  
+    post_answer.name: "⚡",
  }
 
 ##############################################
@@ -193,13 +203,14 @@ globals.input_future = None
 script_dir = os.path.dirname(os.path.abspath(__file__))
 progress_file_path = os.path.join(script_dir, '../../progress.json')
    
-fsm = TeachMeFSM(agents_dict)
+fsm = create_teach_me_fsm(agents_dict)
 
 groupchat = CustomGroupChat(agents=list(agents_dict.values()), 
                               messages=[],
                               max_round=globals.MAX_ROUNDS,
                               send_introductions=True,
-                              speaker_selection_method=fsm.next_speaker_selector
+                              speaker_selection_method=fsm.next_speaker_selector,
+                              context_manager=ChatContextManager()
                               )
 
 
@@ -210,6 +221,10 @@ manager = CustomGroupChatManager(groupchat=groupchat,
 # Allow the fsm to get the groupchat history
 fsm.register_groupchat_manager(manager)
 
+# While the student answers, the next problem is drafted for both difficulty branches
+prefetcher = ProblemPrefetcher(problem_generator).attach(groupchat)
+fsm.register_prefetcher(prefetcher)
+
 
 # Begin GUI components
 reactive_chat = ReactiveChat(agents_dict=agents_dict, avatars=avatars, groupchat_manager=manager)
@@ -13,6 +13,7 @@ from src.UI.reactive_chat16 import ReactiveChat
 from src.UI.avatar import avatar
 from src.UI.user_interface import UserInterface
 from src.Tools.progress_tracker import ProgressTracker
+from src.KnowledgeGraphs.mastery_frontier import get_frontier_index
 from src.Agents.mastery_agent import MasteryAgent
 
 os.environ["AUTOGEN_USE_DOCKER"] = "False"
@@ -92,7 +93,7 @@ class MathMasteryInterface:
         result_text += f"\n**Overall Result:** {'Mastery Achieved!' if mastery_achieved else 'Keep practicing!'}"
         self.feedback_display.object = result_text
         
-        progress = self.mastery_agent.get_mastery_status()
+        progress = self.mastery_agent.get_mastery_status(student_id=pn.state.user or pn.state.curdoc.session_context.id)
         self.progress_display.object = f"**Progress:** {progress}"
         
     def create_layout(self):
@@ -126,7 +127,9 @@ manager = CustomGroupChatManager(groupchat=groupchat,
 
 # Initialize UserInterface and ProgressTracker
 user_interface = UserInterface()
-progress_tracker = ProgressTracker(progress_file_path)
+# Topic mastery is kept apart from the chat history, the next topic comes from the prerequisite frontier
+topic_progress_file_path = os.path.join(script_dir, '../../topic_progress.json')
+progress_tracker = ProgressTracker(topic_progress_file_path, frontier_index=get_frontier_index())
 
 # Begin GUI components
 reactive_chat = ReactiveChat(groupchat_manager=manager)
@@ -5,7 +5,7 @@ import param
 
 
 import asyncio
-import re
+from src.Agents.verdicts import is_correct, strip_verdict
 import autogen as autogen
 from src.UI.avatar import avatar
 import src.Agents.agents as agents
@@ -131,6 +131,8 @@ class ReactiveChat(param.Parameterized):
         self.max_questions = 10
         self.progress_bar = pn.widgets.Progress(name='Progress', value=self.progress, max=self.max_questions)        
         self.progress_info = pn.pane.Markdown(f"{self.progress} out of {self.max_questions}", width=60)
+        # Progress follows the verdicts of the LevelAdapterAgent
+        self.groupchat_manager.groupchat.subscribe(self.update_progress, sender="LevelAdapterAgent")
 
         # Model tab. Capabilities for the LearnerModel
         self.MODEL_TAB_NAME = "ModelTab"
@@ -161,7 +163,7 @@ class ReactiveChat(param.Parameterized):
     
     def update_learn_tab(self, recipient, messages, sender, config):
         if self.groupchat_manager.chat_interface.name is not self.LEARN_TAB_NAME: return
-        last_content = messages[-1]['content'] 
+        last_content = strip_verdict(messages[-1]['content']) 
         if all(key in messages[-1] for key in ['name']):
             self.learn_tab_interface.send(last_content, user=messages[-1]['name'], avatar=avatar[messages[-1]['name']], respond=False)
         else:
@@ -169,23 +171,19 @@ class ReactiveChat(param.Parameterized):
         
     ########## tab2: Dashboard
     def update_dashboard(self):
-        self.dashboard_view.object = f"Total messages: {len(self.groupchat_manager.groupchat.get_messages())}"
+        self.dashboard_view.object = f"Total messages: {self.groupchat_manager.groupchat.message_count()}"
 
     ########### tab3: Progress
-    def update_progress(self, contents, user):
-        # Parse the agent's output for keywords                 
-        if user == "LevelAdapterAgent":            
-            pattern = re.compile(r'\b(correct|correctly|verified|yes|well done|excellent|successfully|that\'s right|good job|excellent|right|good|affirmative)\b', re.IGNORECASE)            
-            is_correct = pattern.search(contents)
-            if is_correct:
-               print("################ CORRECT ANSWER #################")
-               if self.progress < self.max_questions:  
-                    self.progress += 1
-                    self.progress_bar.value = self.progress
-                    self.progress_info.object = f"**{self.progress} out of {self.max_questions}**"
-
-            else:
-                print("################ WRONG ANSWER #################")
+    def update_progress(self, message):
+        # Called with every LevelAdapterAgent message, its verdict was parsed when it was appended to the chat
+        if is_correct(message):
+            print("################ CORRECT ANSWER #################")
+            if self.progress < self.max_questions:
+                self.progress += 1
+                self.progress_bar.value = self.progress
+                self.progress_info.object = f"**{self.progress} out of {self.max_questions}**"
+        else:
+            print("################ WRONG ANSWER #################")
 
     ########## Model Tab
     async def handle_button_update_model(self, event=None):
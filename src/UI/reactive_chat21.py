@@ -7,24 +7,40 @@ import param
 import src.Agents.agents as agents
 from src import globals as globals
 from src.UI.avatar import avatar
+from src.UI.chat_streaming import ChatStreamWriter, PanelIOStream
+from autogen.io import IOStream
 
 
 
 import asyncio
-import re
+from src.Agents.verdicts import is_correct, strip_verdict
 
 
 class ReactiveChat(param.Parameterized):
-    def __init__(self, groupchat_manager=None, **params):
+    def __init__(self, groupchat_manager=None, agents_dict=None, **params):
         super().__init__(**params)
         
         pn.extension(design="material")
 
         self.groupchat_manager = groupchat_manager
+        # Agents of this learner session, the shared module-level agents by default
+        self.agents_dict = agents_dict if agents_dict is not None else agents.agents_dict
+        self.tutor = self.agents_dict[agents.AgentKeys.TUTOR.value]
+        self.learner_model = self.agents_dict[agents.AgentKeys.LEARNER_MODEL.value]
  
         # Learn tab
         self.LEARN_TAB_NAME = "LearnTab"
         self.learn_tab_interface = pn.chat.ChatInterface(callback=self.a_learn_tab_callback, name=self.LEARN_TAB_NAME)
+        self.stream_writer = ChatStreamWriter(self.learn_tab_interface, avatars=avatar, flush_interval_ms=globals.STREAM_FLUSH_INTERVAL_MS)
+        self.iostream = PanelIOStream(self.stream_writer) if globals.STREAM_RESPONSES else IOStream.get_default()
+        if globals.STREAM_RESPONSES:
+            # Only the agents of this chat stream, the shared llm configs stay unstreamed
+            for agent in self.groupchat_manager.groupchat.agents:
+                if hasattr(agent, 'enable_streaming'):
+                    agent.enable_streaming()
+        # Older history is only loaded when the student asks for it
+        self.button_load_earlier = pn.widgets.Button(name='Load earlier messages', button_type='light', visible=False)
+        self.button_load_earlier.on_click(self.handle_button_load_earlier)
 
         # Dashboard tab
         self.dashboard_view = pn.pane.Markdown(f"Total messages: {len(self.groupchat_manager.groupchat.messages)}")
@@ -35,6 +51,8 @@ class ReactiveChat(param.Parameterized):
         self.max_questions = 10
         self.progress_bar = pn.widgets.Progress(name='Progress', value=self.progress, max=self.max_questions)        
         self.progress_info = pn.pane.Markdown(f"{self.progress} out of {self.max_questions}", width=60)
+        # Progress follows the verdicts of the LevelAdapterAgent
+        self.groupchat_manager.groupchat.subscribe(self.update_progress, sender="LevelAdapterAgent")
 
         # Model tab. Capabilities for the LearnerModel
         self.MODEL_TAB_NAME = "ModelTab"
@@ -43,7 +61,7 @@ class ReactiveChat(param.Parameterized):
         self.button_update_learner_model.on_click(self.handle_button_update_model)
         self.is_model_tab = False
         
-        self.promptC=PromptBasedLearning(groupchat_manager=groupchat_manager)
+        self.promptC=PromptBasedLearning(groupchat_manager=groupchat_manager, tutor=self.tutor)
 
         # TODO: Consider whether groupchat_manager or this class should manage the chat_interface
         #       Currently, I have placed it in CustomGroupChatManager
@@ -57,41 +75,51 @@ class ReactiveChat(param.Parameterized):
             Then, when update is called, check the instance name
         '''                      
         self.groupchat_manager.chat_interface = instance
-        if not globals.initiate_chat_task_created:
-            asyncio.create_task(self.groupchat_manager.delayed_initiate_chat(agents.tutor, self.groupchat_manager, contents))  
+        if not self.groupchat_manager.initiate_chat_task_created:
+            # The chat task inherits the IOStream, so streamed completions reach the learn tab
+            with IOStream.set_default(self.iostream):
+                asyncio.create_task(self.groupchat_manager.delayed_initiate_chat(self.tutor, self.groupchat_manager, contents))  
         else:
-            if globals.input_future and not globals.input_future.done():                
-                globals.input_future.set_result(contents)                 
+            if self.groupchat_manager.input_future and not self.groupchat_manager.input_future.done():                
+                self.groupchat_manager.input_future.set_result(contents)                 
             else:
                 print("No input being awaited.")
     
     def update_learn_tab(self, recipient, messages, sender, config):
         if self.groupchat_manager.chat_interface.name is not self.LEARN_TAB_NAME: return
-        last_content = messages[-1]['content'] 
+        last_content = strip_verdict(messages[-1]['content']) 
         if all(key in messages[-1] for key in ['name']):
-            self.learn_tab_interface.send(last_content, user=messages[-1]['name'], avatar=avatar[messages[-1]['name']], respond=False)
+            user = messages[-1]['name']
         else:
-            self.learn_tab_interface.send(last_content, user=recipient.name, avatar=avatar[recipient.name], respond=False)
+            user = recipient.name
+        # A streamed reply is already on screen, only its final text is swapped in
+        if not self.stream_writer.finalize(last_content, user=user):
+            self.learn_tab_interface.send(last_content, user=user, avatar=avatar[user], respond=False)
+        # recipient generates its reply next, its chunks stream into a new message
+        self.stream_writer.begin(recipient.name)
         
+    def handle_button_load_earlier(self, event=None):
+        self.groupchat_manager.load_earlier_messages(self.learn_tab_interface)
+        self.update_history_pager()
+
+    def update_history_pager(self):
+        self.button_load_earlier.visible = self.groupchat_manager.has_earlier_messages
+
     ########## tab2: Dashboard
     def update_dashboard(self):
-        self.dashboard_view.object = f"Total messages: {len(self.groupchat_manager.groupchat.get_messages())}"
+        self.dashboard_view.object = f"Total messages: {self.groupchat_manager.groupchat.message_count()}"
 
     ########### tab3: Progress
-    def update_progress(self, contents, user):
-        # Parse the agent's output for keywords                 
-        if user == "LevelAdapterAgent":            
-            pattern = re.compile(r'\b(correct|correctly|verified|yes|well done|excellent|successfully|that\'s right|good job|excellent|right|good|affirmative)\b', re.IGNORECASE)            
-            is_correct = pattern.search(contents)
-            if is_correct:
-               print("################ CORRECT ANSWER #################")
-               if self.progress < self.max_questions:  
-                    self.progress += 1
-                    self.progress_bar.value = self.progress
-                    self.progress_info.object = f"**{self.progress} out of {self.max_questions}**"
-
-            else:
-                print("################ WRONG ANSWER #################")
+    def update_progress(self, message):
+        # Called with every LevelAdapterAgent message, its verdict was parsed when it was appended to the chat
+        if is_correct(message):
+            print("################ CORRECT ANSWER #################")
+            if self.progress < self.max_questions:
+                self.progress += 1
+                self.progress_bar.value = self.progress
+                self.progress_info.object = f"**{self.progress} out of {self.max_questions}**"
+        else:
+            print("################ WRONG ANSWER #################")
 
     ########## Model Tab
     async def handle_button_update_model(self, event=None):
@@ -105,10 +133,10 @@ class ReactiveChat(param.Parameterized):
         if self.groupchat_manager.chat_interface.name is not self.MODEL_TAB_NAME: return
         messages = self.groupchat_manager.groupchat.get_messages()
         for m in messages:
-            agents.learner_model.send(m, recipient=agents.learner_model, request_reply=False)
-        await agents.learner_model.a_send("What is the student's current capabilities", recipient=agents.learner_model, request_reply=True)
-        response = agents.learner_model.last_message(agent=agents.learner_model)["content"]
-        self.model_tab_interface.send(response, user=agents.learner_model.name,avatar=avatar[agents.learner_model.name])
+            self.learner_model.send(m, recipient=self.learner_model, request_reply=False)
+        await self.learner_model.a_send("What is the student's current capabilities", recipient=self.learner_model, request_reply=True)
+        response = self.learner_model.last_message(agent=self.learner_model)["content"]
+        self.model_tab_interface.send(response, user=self.learner_model.name,avatar=avatar[self.learner_model.name])
 
 
     async def a_model_tab_callback(self, contents: str, user: str, instance: pn.chat.ChatInterface):
@@ -117,14 +145,14 @@ class ReactiveChat(param.Parameterized):
         '''
         self.groupchat_manager.chat_interface = instance
         if user == "System" or user == "User":
-            response = agents.learner_model.last_message(agent=agents.learner_model)["content"]
-            self.learn_tab_interface.send(response, user=agents.learner_model.name,avatar=avatar[agents.learner_model.name])
+            response = self.learner_model.last_message(agent=self.learner_model)["content"]
+            self.learn_tab_interface.send(response, user=self.learner_model.name,avatar=avatar[self.learner_model.name])
     
 
     ########## Create the "windows" and draw the tabs
     def draw_view(self):         
         tabs = pn.Tabs(  
-            ("Learn", pn.Column(self.learn_tab_interface)
+            ("Learn", pn.Column(self.button_load_earlier, self.learn_tab_interface)
                     ),
             ("Dashboard", pn.Column(self.dashboard_view)
                     ),
@@ -154,8 +182,9 @@ class ReactiveChat(param.Parameterized):
 
 
 class PromptBasedLearning(param.Parameterized):
-    def __init__(self, groupchat_manager=None, **params):
+    def __init__(self, groupchat_manager=None, tutor=None, **params):
         super().__init__(**params)
+        self.tutor = tutor if tutor is not None else agents.tutor
         self.groupchat_manager = groupchat_manager
         
         self.PROMPT_TAB_NAME="PromptTab"
@@ -176,6 +205,8 @@ class PromptBasedLearning(param.Parameterized):
         self.progress = 0  # Track the student's progress
         self.progress_display = pn.widgets.Progress(name="Learning Progress", value=self.progress, max=100)
         self.progress_info = pn.pane.Markdown(f"{self.progress} out of 100", width=60)
+        # Progress follows the verdicts of the LevelAdapterAgent
+        self.groupchat_manager.groupchat.subscribe(self.track_decision, sender="LevelAdapterAgent")
 
 
         # Layout: Combine the text input, button, progress tracker, and chat interface
@@ -184,45 +215,35 @@ class PromptBasedLearning(param.Parameterized):
     async def a_prompt_tab_callback(self, contents: str, user: str, instance: pn.chat.ChatInterface):
         """Handle chat interactions, including decision tracking."""
         self.groupchat_manager.chat_interface = instance
-        if not globals.initiate_chat_task_created:
-            asyncio.create_task(self.groupchat_manager.delayed_initiate_chat(agents.tutor, self.groupchat_manager, contents))
+        if not self.groupchat_manager.initiate_chat_task_created:
+            asyncio.create_task(self.groupchat_manager.delayed_initiate_chat(self.tutor, self.groupchat_manager, contents))
         else:
-            if globals.input_future and not globals.input_future.done():
-                globals.input_future.set_result(contents)
+            if self.groupchat_manager.input_future and not self.groupchat_manager.input_future.done():
+                self.groupchat_manager.input_future.set_result(contents)
             else:
                 print("No input being awaited.")
                 
-        # Track user decision and response
-        self.track_decision(contents,user)
+        # Adapt future questions based on progress
+        self.adapt_learning_path()
 
     def update_prompt_tab(self, recipient, messages, sender, config):
         if self.groupchat_manager.chat_interface.name is not self.PROMPT_TAB_NAME: return
-        last_content = messages[-1]['content'] 
+        last_content = strip_verdict(messages[-1]['content']) 
         if all(key in messages[-1] for key in ['name']):
             self.learn_tab_interface.send(last_content, user=messages[-1]['name'], avatar=avatar[messages[-1]['name']], respond=False)
         else:
             self.learn_tab_interface.send(last_content, user=recipient.name, avatar=avatar[recipient.name], respond=False)
 
-    def track_decision(self, user_response: str,user):
-        """Track user decisions and adapt future prompts."""
-        # Example decision tracking logic
-        # Here, we simulate checking the user's response and adjusting progress
-        if user == "LevelAdapterAgent":            
-            pattern = re.compile(r'\b(correct|correctly|verified|yes|well done|excellent|successfully|that\'s right|good job|excellent|right|good|affirmative)\b', re.IGNORECASE)            
-            is_correct = pattern.search(user_response)
-            if is_correct:
-               print("################ CCORRECT ANSWER #################")
-               if self.progress < 100:
-                    self.progress += 10
-                    self.progress_display.value = self.progress
-                    self.progress_info.object = f"**{self.progress} out of 100**"
-
-            else:
-                print("################ WRONG ANSWER #################")
-
-
-        # Adapt future questions based on progress
-        self.adapt_learning_path()
+    def track_decision(self, message):
+        """Track the LevelAdapterAgent's verdicts on the student's answers."""
+        if is_correct(message):
+            print("################ CORRECT ANSWER #################")
+            if self.progress < 100:
+                self.progress += 10
+                self.progress_display.value = self.progress
+                self.progress_info.object = f"**{self.progress} out of 100**"
+        else:
+            print("################ WRONG ANSWER #################")
 
     def adapt_learning_path(self):
         """Adjust future prompts based on the student's performance."""
@@ -240,7 +261,7 @@ class PromptBasedLearning(param.Parameterized):
 
         # Initiate adapted chat based on learning path
         self.groupchat_manager.chat_interface = self.prompt_chat_interface
-        asyncio.create_task(self.groupchat_manager.delayed_initiate_chat(agents.tutor, self.groupchat_manager, con))
+        asyncio.create_task(self.groupchat_manager.delayed_initiate_chat(self.tutor, self.groupchat_manager, con))
 
     def on_topic_select(self, event):
         """Handle topic selection."""
@@ -250,7 +271,7 @@ class PromptBasedLearning(param.Parameterized):
             print(f"Topic selected: {topic}")
             con = "Ask question to student in the fill-in-the-blank format on topic " + topic + ". Also consider the student's skill to give better questions."
             self.groupchat_manager.chat_interface = self.prompt_chat_interface
-            asyncio.create_task(self.groupchat_manager.delayed_initiate_chat(agents.tutor, self.groupchat_manager, con))
+            asyncio.create_task(self.groupchat_manager.delayed_initiate_chat(self.tutor, self.groupchat_manager, con))
         
             # Clear the input field after selecting the topic
             self.topic_input.value = ""
@@ -259,7 +280,7 @@ class PromptBasedLearning(param.Parameterized):
         """Update chat with new messages."""
         if self.groupchat_manager.chat_interface.name is not self.prompt_chat_name:
             return
-        last_content = messages[-1]['content'] 
+        last_content = strip_verdict(messages[-1]['content']) 
         if all(key in messages[-1] for key in ['name']):
             self.prompt_chat_interface.send(last_content, user=messages[-1]['name'], avatar=avatar[messages[-1]['name']], respond=False)
         else:
@@ -287,24 +308,40 @@ import param
 import src.Agents.agents as agents
 from src import globals as globals
 from src.UI.avatar import avatar
+from src.UI.chat_streaming import ChatStreamWriter, PanelIOStream
+from autogen.io import IOStream
 
 
 
 import asyncio
-import re
+from src.Agents.verdicts import is_correct, strip_verdict
 
 
 class ReactiveChat(param.Parameterized):
-    def __init__(self, groupchat_manager=None, **params):
+    def __init__(self, groupchat_manager=None, agents_dict=None, **params):
         super().__init__(**params)
         
         pn.extension(design="material")
 
         self.groupchat_manager = groupchat_manager
+        # Agents of this learner session, the shared module-level agents by default
+        self.agents_dict = agents_dict if agents_dict is not None else agents.agents_dict
+        self.tutor = self.agents_dict[agents.AgentKeys.TUTOR.value]
+        self.learner_model = self.agents_dict[agents.AgentKeys.LEARNER_MODEL.value]
  
         # Learn tab
         self.LEARN_TAB_NAME = "LearnTab"
         self.learn_tab_interface = pn.chat.ChatInterface(callback=self.a_learn_tab_callback, name=self.LEARN_TAB_NAME)
+        self.stream_writer = ChatStreamWriter(self.learn_tab_interface, avatars=avatar, flush_interval_ms=globals.STREAM_FLUSH_INTERVAL_MS)
+        self.iostream = PanelIOStream(self.stream_writer) if globals.STREAM_RESPONSES else IOStream.get_default()
+        if globals.STREAM_RESPONSES:
+            # Only the agents of this chat stream, the shared llm configs stay unstreamed
+            for agent in self.groupchat_manager.groupchat.agents:
+                if hasattr(agent, 'enable_streaming'):
+                    agent.enable_streaming()
+        # Older history is only loaded when the student asks for it
+        self.button_load_earlier = pn.widgets.Button(name='Load earlier messages', button_type='light', visible=False)
+        self.button_load_earlier.on_click(self.handle_button_load_earlier)
 
         # Dashboard tab
         self.dashboard_view = pn.pane.Markdown(f"Total messages: {len(self.groupchat_manager.groupchat.messages)}")
@@ -315,6 +352,8 @@ class ReactiveChat(param.Parameterized):
         self.max_questions = 10
         self.progress_bar = pn.widgets.Progress(name='Progress', value=self.progress, max=self.max_questions)        
         self.progress_info = pn.pane.Markdown(f"{self.progress} out of {self.max_questions}", width=60)
+        # Progress follows the verdicts of the LevelAdapterAgent
+        self.groupchat_manager.groupchat.subscribe(self.update_progress, sender="LevelAdapterAgent")
 
         # Model tab. Capabilities for the LearnerModel
         self.MODEL_TAB_NAME = "ModelTab"
@@ -323,7 +362,7 @@ class ReactiveChat(param.Parameterized):
         self.button_update_learner_model.on_click(self.handle_button_update_model)
         self.is_model_tab = False
         
-        self.promptC=PromptBasedLearning(groupchat_manager=groupchat_manager)
+        self.promptC=PromptBasedLearning(groupchat_manager=groupchat_manager, tutor=self.tutor)
 
         # TODO: Consider whether groupchat_manager or this class should manage the chat_interface
         #       Currently, I have placed it in CustomGroupChatManager
@@ -337,41 +376,51 @@ class ReactiveChat(param.Parameterized):
             Then, when update is called, check the instance name
         '''                      
         self.groupchat_manager.chat_interface = instance
-        if not globals.initiate_chat_task_created:
-            asyncio.create_task(self.groupchat_manager.delayed_initiate_chat(agents.tutor, self.groupchat_manager, contents))  
+        if not self.groupchat_manager.initiate_chat_task_created:
+            # The chat task inherits the IOStream, so streamed completions reach the learn tab
+            with IOStream.set_default(self.iostream):
+                asyncio.create_task(self.groupchat_manager.delayed_initiate_chat(self.tutor, self.groupchat_manager, contents))  
         else:
-            if globals.input_future and not globals.input_future.done():                
-                globals.input_future.set_result(contents)                 
+            if self.groupchat_manager.input_future and not self.groupchat_manager.input_future.done():                
+                self.groupchat_manager.input_future.set_result(contents)                 
             else:
                 print("No input being awaited.")
     
     def update_learn_tab(self, recipient, messages, sender, config):
         if self.groupchat_manager.chat_interface.name is not self.LEARN_TAB_NAME: return
-        last_content = messages[-1]['content'] 
+        last_content = strip_verdict(messages[-1]['content']) 
         if all(key in messages[-1] for key in ['name']):
-            self.learn_tab_interface.send(last_content, user=messages[-1]['name'], avatar=avatar[messages[-1]['name']], respond=False)
+            user = messages[-1]['name']
         else:
-            self.learn_tab_interface.send(last_content, user=recipient.name, avatar=avatar[recipient.name], respond=False)
+            user = recipient.name
+        # A streamed reply is already on screen, only its final text is swapped in
+        if not self.stream_writer.finalize(last_content, user=user):
+            self.learn_tab_interface.send(last_content, user=user, avatar=avatar[user], respond=False)
+        # recipient generates its reply next, its chunks stream into a new message
+        self.stream_writer.begin(recipient.name)
         
+    def handle_button_load_earlier(self, event=None):
+        self.groupchat_manager.load_earlier_messages(self.learn_tab_interface)
+        self.update_history_pager()
+
+    def update_history_pager(self):
+        self.button_load_earlier.visible = self.groupchat_manager.has_earlier_messages
+
     ########## tab2: Dashboard
     def update_dashboard(self):
-        self.dashboard_view.object = f"Total messages: {len(self.groupchat_manager.groupchat.get_messages())}"
+        self.dashboard_view.object = f"Total messages: {self.groupchat_manager.groupchat.message_count()}"
 
     ########### tab3: Progress
-    def update_progress(self, contents, user):
-        # Parse the agent's output for keywords                 
-        if user == "LevelAdapterAgent":            
-            pattern = re.compile(r'\b(correct|correctly|verified|yes|well done|excellent|successfully|that\'s right|good job|excellent|right|good|affirmative)\b', re.IGNORECASE)            
-            is_correct = pattern.search(contents)
-            if is_correct:
-               print("################ CORRECT ANSWER #################")
-               if self.progress < self.max_questions:  
-                    self.progress += 1
-                    self.progress_bar.value = self.progress
-                    self.progress_info.object = f"**{self.progress} out of {self.max_questions}**"
-
-            else:
-                print("################ WRONG ANSWER #################")
+    def update_progress(self, message):
+        # Called with every LevelAdapterAgent message, its verdict was parsed when it was appended to the chat
+        if is_correct(message):
+            print("################ CORRECT ANSWER #################")
+            if self.progress < self.max_questions:
+                self.progress += 1
+                self.progress_bar.value = self.progress
+                self.progress_info.object = f"**{self.progress} out of {self.max_questions}**"
+        else:
+            print("################ WRONG ANSWER #################")
 
     ########## Model Tab
     async def handle_button_update_model(self, event=None):
@@ -385,10 +434,10 @@ class ReactiveChat(param.Parameterized):
         if self.groupchat_manager.chat_interface.name is not self.MODEL_TAB_NAME: return
         messages = self.groupchat_manager.groupchat.get_messages()
         for m in messages:
-            agents.learner_model.send(m, recipient=agents.learner_model, request_reply=False)
-        await agents.learner_model.a_send("What is the student's current capabilities", recipient=agents.learner_model, request_reply=True)
-        response = agents.learner_model.last_message(agent=agents.learner_model)["content"]
-        self.model_tab_interface.send(response, user=agents.learner_model.name,avatar=avatar[agents.learner_model.name])
+            self.learner_model.send(m, recipient=self.learner_model, request_reply=False)
+        await self.learner_model.a_send("What is the student's current capabilities", recipient=self.learner_model, request_reply=True)
+        response = self.learner_model.last_message(agent=self.learner_model)["content"]
+        self.model_tab_interface.send(response, user=self.learner_model.name,avatar=avatar[self.learner_model.name])
 
 
     async def a_model_tab_callback(self, contents: str, user: str, instance: pn.chat.ChatInterface):
@@ -397,14 +446,14 @@ class ReactiveChat(param.Parameterized):
         '''
         self.groupchat_manager.chat_interface = instance
         if user == "System" or user == "User":
-            response = agents.learner_model.last_message(agent=agents.learner_model)["content"]
-            self.learn_tab_interface.send(response, user=agents.learner_model.name,avatar=avatar[agents.learner_model.name])
+            response = self.learner_model.last_message(agent=self.learner_model)["content"]
+            self.learn_tab_interface.send(response, user=self.learner_model.name,avatar=avatar[self.learner_model.name])
     
 
     ########## Create the "windows" and draw the tabs
     def draw_view(self):         
         tabs = pn.Tabs(  
-            ("Learn", pn.Column(self.learn_tab_interface)
+            ("Learn", pn.Column(self.button_load_earlier, self.learn_tab_interface)
                     ),
             ("Dashboard", pn.Column(self.dashboard_view)
                     ),
@@ -434,8 +483,9 @@ class ReactiveChat(param.Parameterized):
 
 
 class PromptBasedLearning(param.Parameterized):
-    def __init__(self, groupchat_manager=None, **params):
+    def __init__(self, groupchat_manager=None, tutor=None, **params):
         super().__init__(**params)
+        self.tutor = tutor if tutor is not None else agents.tutor
         self.groupchat_manager = groupchat_manager
         
         self.PROMPT_TAB_NAME="PromptTab"
@@ -456,6 +506,8 @@ class PromptBasedLearning(param.Parameterized):
         self.progress = 0  # Track the student's progress
         self.progress_display = pn.widgets.Progress(name="Learning Progress", value=self.progress, max=100)
         self.progress_info = pn.pane.Markdown(f"{self.progress} out of 100", width=60)
+        # Progress follows the verdicts of the LevelAdapterAgent
+        self.groupchat_manager.groupchat.subscribe(self.track_decision, sender="LevelAdapterAgent")
 
 
         # Layout: Combine the text input, button, progress tracker, and chat interface
@@ -464,45 +516,35 @@ class PromptBasedLearning(param.Parameterized):
     async def a_prompt_tab_callback(self, contents: str, user: str, instance: pn.chat.ChatInterface):
         """Handle chat interactions, including decision tracking."""
         self.groupchat_manager.chat_interface = instance
-        if not globals.initiate_chat_task_created:
-            asyncio.create_task(self.groupchat_manager.delayed_initiate_chat(agents.tutor, self.groupchat_manager, contents))
+        if not self.groupchat_manager.initiate_chat_task_created:
+            asyncio.create_task(self.groupchat_manager.delayed_initiate_chat(self.tutor, self.groupchat_manager, contents))
         else:
-            if globals.input_future and not globals.input_future.done():
-                globals.input_future.set_result(contents)
+            if self.groupchat_manager.input_future and not self.groupchat_manager.input_future.done():
+                self.groupchat_manager.input_future.set_result(contents)
             else:
                 print("No input being awaited.")
                 
-        # Track user decision and response
-        self.track_decision(contents,user)
+        # Adapt future questions based on progress
+        self.adapt_learning_path()
 
     def update_prompt_tab(self, recipient, messages, sender, config):
         if self.groupchat_manager.chat_interface.name is not self.PROMPT_TAB_NAME: return
-        last_content = messages[-1]['content'] 
+        last_content = strip_verdict(messages[-1]['content']) 
         if all(key in messages[-1] for key in ['name']):
             self.learn_tab_interface.send(last_content, user=messages[-1]['name'], avatar=avatar[messages[-1]['name']], respond=False)
         else:
             self.learn_tab_interface.send(last_content, user=recipient.name, avatar=avatar[recipient.name], respond=False)
 
-    def track_decision(self, user_response: str,user):
-        """Track user decisions and adapt future prompts."""
-        # Example decision tracking logic
-        # Here, we simulate checking the user's response and adjusting progress
-        if user == "LevelAdapterAgent":            
-            pattern = re.compile(r'\b(correct|correctly|verified|yes|well done|excellent|successfully|that\'s right|good job|excellent|right|good|affirmative)\b', re.IGNORECASE)            
-            is_correct = pattern.search(user_response)
-            if is_correct:
-               print("################ CCORRECT ANSWER #################")
-               if self.progress < 100:
-                    self.progress += 10
-                    self.progress_display.value = self.progress
-                    self.progress_info.object = f"**{self.progress} out of 100**"
-
-            else:
-                print("################ WRONG ANSWER #################")
-
-
-        # Adapt future questions based on progress
-        self.adapt_learning_path()
+    def track_decision(self, message):
+        """Track the LevelAdapterAgent's verdicts on the student's answers."""
+        if is_correct(message):
+            print("################ CORRECT ANSWER #################")
+            if self.progress < 100:
+                self.progress += 10
+                self.progress_display.value = self.progress
+                self.progress_info.object = f"**{self.progress} out of 100**"
+        else:
+            print("################ WRONG ANSWER #################")
 
     def adapt_learning_path(self):
         """Adjust future prompts based on the student's performance."""
@@ -520,7 +562,7 @@ class PromptBasedLearning(param.Parameterized):
 
         # Initiate adapted chat based on learning path
         self.groupchat_manager.chat_interface = self.prompt_chat_interface
-        asyncio.create_task(self.groupchat_manager.delayed_initiate_chat(agents.tutor, self.groupchat_manager, con))
+        asyncio.create_task(self.groupchat_manager.delayed_initiate_chat(self.tutor, self.groupchat_manager, con))
 
     def on_topic_select(self, event):
         """Handle topic selection."""
@@ -530,7 +572,7 @@ class PromptBasedLearning(param.Parameterized):
             print(f"Topic selected: {topic}")
             con = "Ask question to student in the fill-in-the-blank format on topic " + topic + ". Also consider the student's skill to give better questions."
             self.groupchat_manager.chat_interface = self.prompt_chat_interface
-            asyncio.create_task(self.groupchat_manager.delayed_initiate_chat(agents.tutor, self.groupchat_manager, con))
+            asyncio.create_task(self.groupchat_manager.delayed_initiate_chat(self.tutor, self.groupchat_manager, con))
         
             # Clear the input field after selecting the topic
             self.topic_input.value = ""
@@ -539,7 +581,7 @@ class PromptBasedLearning(param.Parameterized):
         """Update chat with new messages."""
         if self.groupchat_manager.chat_interface.name is not self.prompt_chat_name:
             return
-        last_content = messages[-1]['content'] 
+        last_content = strip_verdict(messages[-1]['content']) 
         if all(key in messages[-1] for key in ['name']):
             self.prompt_chat_interface.send(last_content, user=messages[-1]['name'], avatar=avatar[messages[-1]['name']], respond=False)
         else:
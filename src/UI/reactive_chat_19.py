@@ -1,7 +1,7 @@
 import param
 import panel as pn
 import asyncio
-import re
+from src.Agents.verdicts import is_correct, strip_verdict
 import pandas as pd
 import autogen as autogen
 from src.UI.avatar import avatar
@@ -44,6 +44,8 @@ class ReactiveChat(param.Parameterized):
         self.max_questions = 10
         self.progress_bar = pn.widgets.Progress(name='Progress', value=self.progress, max=self.max_questions)        
         self.progress_info = pn.pane.Markdown(f"{self.progress} out of {self.max_questions}", width=60)
+        # Progress follows the verdicts of the LevelAdapterAgent
+        self.groupchat_manager.groupchat.subscribe(self.update_progress, sender="LevelAdapterAgent")
 
         # Question and answer details for tracking
         self.question_details = pn.widgets.Tabulator(
@@ -108,7 +110,7 @@ class ReactiveChat(param.Parameterized):
 
     def update_learn_tab(self, recipient, messages, sender, config):
         if self.groupchat_manager.chat_interface.name is not self.LEARN_TAB_NAME: return
-        last_content = messages[-1]['content'] 
+        last_content = strip_verdict(messages[-1]['content']) 
         if all(key in messages[-1] for key in ['name']):
             self.learn_tab_interface.send(last_content, user=messages[-1]['name'], avatar=avatar[messages[-1]['name']], respond=False)
         else:
@@ -116,44 +118,32 @@ class ReactiveChat(param.Parameterized):
 
     ########## tab2: Dashboard
     def update_dashboard(self):
-        self.dashboard_view.object = f"Total messages: {len(self.groupchat_manager.groupchat.get_messages())}"
+        self.dashboard_view.object = f"Total messages: {self.groupchat_manager.groupchat.message_count()}"
 
     ########### tab3: Progress
-    def update_progress(self, contents, user):
-        # chat_manager -> LearnerModelAgent has contents from CodeRunnerAgent
-        # chat_manager -> LevelAdapterAgent has contents from LearnerModelAgent        
-        if user == "LevelAdapterAgent":    # Get response from LearnerModelAgent
-            logging.info(f"update_progress(). User= {user}. contents=\n{contents}")
-
-            # Find original question
-            all_messages = self.groupchat_manager.groupchat.get_messages()
-            for message in list(reversed(all_messages)):
-                if message['name'] == 'ProblemGeneratorAgent':
-                    question = message['content']
-                    break
-
-            # Find Student's answer
-            for message in list(reversed(all_messages)):
-                if message['name'] == 'StudentAgent':
-                    student_answer = message['content']
-                    break
-            
-            # Is Student's answer correct?
-            pattern_correct = re.compile(r"StudentAgent's answer is correct", re.IGNORECASE)
-            is_correct = bool(pattern_correct.search(contents))
-
-            if is_correct:
-                print("################ CORRECT ANSWER #################")
-                if self.progress < self.max_questions:  
-                    self.progress += 1
-                    self.progress_bar.value = self.progress
-                    self.progress_info.object = f"{self.progress} out of {self.max_questions}"
-            else:
-                print("################ WRONG ANSWER #################")               
-                
-            # Update panel tab with history
-            new_row = pd.DataFrame({'Question': [question], 'Student Answer': [student_answer], 'Correct': [is_correct]})
-            self.question_details.value = pd.concat([self.question_details.value, new_row], ignore_index=True)
+    def update_progress(self, message):
+        # Called with every LevelAdapterAgent message, its verdict was parsed when it was appended to the chat
+        logging.info(f"update_progress(). verdict= {message.get('verdict')}")
+
+        # Original question and the Student's answer
+        groupchat = self.groupchat_manager.groupchat
+        question = (groupchat.last_message_from('ProblemGeneratorAgent') or {}).get('content')
+        student_answer = (groupchat.last_message_from('StudentAgent') or {}).get('content')
+
+        # Is Student's answer correct?
+        correct = is_correct(message)
+        if correct:
+            print("################ CORRECT ANSWER #################")
+            if self.progress < self.max_questions:
+                self.progress += 1
+                self.progress_bar.value = self.progress
+                self.progress_info.object = f"{self.progress} out of {self.max_questions}"
+        else:
+            print("################ WRONG ANSWER #################")
+
+        # Update panel tab with history
+        new_row = pd.DataFrame({'Question': [question], 'Student Answer': [student_answer], 'Correct': [correct]})
+        self.question_details.value = pd.concat([self.question_details.value, new_row], ignore_index=True)
 
         
     ########## Model Tab
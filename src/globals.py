@@ -11,7 +11,82 @@ MASTERY_THRESHOLD = 0.8
 MIN_QUESTIONS_PER_TOPIC = 3
 MAX_QUESTIONS_PER_TOPIC = 5
 MASTERY_TEST_TIMEOUT = 1800  # 30 minutes in seconds
+MASTERY_MAX_LEARNERS = 1000  # learners whose question state the shared MasteryAgent keeps
 
 # Progress tracking configurations
 PROGRESS_FILE_PATH = 'progress.json'
-SAVE_INTERVAL = 300  
\ No newline at end of file
+SAVE_INTERVAL = 300  
+
+# LLM response cache configurations
+LLM_CACHE_PATH = '.cache/llm_responses.sqlite'
+LLM_CACHE_TTL = 24 * 3600  # 1 day in seconds
+LLM_CACHE_MEMORY_ENTRIES = 512
+LLM_CACHE_DISK_ENTRIES = 10000
+
+# Question bank configurations
+QUESTION_BANK_PATH = '.cache/question_bank.json'
+QUESTION_BANK_TARGET_SIZE = 5
+QUESTION_BANK_LOW_WATERMARK = 2
+
+# Taxonomy snapshot configurations
+TAXONOMY_SNAPSHOT_PATH = '.cache/math_taxonomy.snapshot'  # rebuilt when math_taxonomy.py changes
+
+# Streaming configurations
+STREAM_RESPONSES = True
+STREAM_FLUSH_INTERVAL_MS = 50  # minimum time between two chat UI updates
+
+# Multi-session server configurations
+MAX_SESSIONS = 30
+SESSION_IDLE_TIMEOUT = 1800  # 30 minutes in seconds
+SESSION_EVICTION_INTERVAL = 60  # seconds between idle session sweeps
+SESSION_HISTORY_DIR = 'sessions'
+
+# Chat history log configurations
+CHAT_LOG_FSYNC_EVERY = 10  # appended messages between two fsyncs
+CHAT_LOG_FSYNC_INTERVAL = 5  # max seconds an appended message stays unsynced
+CHAT_LOG_COMPACT_STALE_LINES = 100  # unreadable or stripped lines tolerated before the log is rewritten
+
+# Chat history restore configurations
+CHAT_RESTORE_WINDOW = 20  # most recent messages restored when a session resumes, in apps that page in older history
+CHAT_RESTORE_SUMMARY_MESSAGES = 10  # messages before the window summarized for the agents
+CHAT_RESTORE_SUMMARY_CHARS = 200  # characters kept per summarized message
+CHAT_HISTORY_PAGE_SIZE = 20  # messages per "load earlier" page
+
+# Agent context budget configurations
+CONTEXT_MAX_TOKENS = 3000  # prompt tokens per agent turn, excluding the system message
+CONTEXT_KEEP_RECENT = 20  # newest messages never folded into the summary
+CONTEXT_SUMMARIZE_EVERY = 10  # messages that pile up before the summary is updated
+CONTEXT_SUMMARY_MAX_WORDS = 200
+
+# FSM configurations
+FSM_BACKEND = 'transitions'  # 'transitions' or 'compiled' (precompiled transition table)
+FSM_FAN_OUT_TIMEOUT_SECONDS = 60  # per fan-out stage, members still running then are cancelled
+PREFETCH_WAIT_SECONDS = 30  # longest wait for a prefetched next problem before generating it the usual way
+
+# Bayesian Knowledge Tracing configurations
+BKT_P_INIT = 0.2  # prior probability that a skill is known
+BKT_P_LEARN = 0.15  # probability of learning the skill at each practice opportunity
+BKT_P_GUESS = 0.2  # probability of a correct answer without knowing the skill
+BKT_P_SLIP = 0.1  # probability of a wrong answer despite knowing the skill
+BKT_MASTERY_THRESHOLD = 0.95
+BKT_PARAMETERS_PATH = '.cache/bkt_parameters.csv'  # fitted per-skill parameters, defaults above when missing
+
+# Deep Knowledge Tracing configurations
+DKT_MODEL_PATH = '.cache/dkt_model.npz'  # exported by src/Deprecated/LSTM Knowledge Tracer/train.py
+DKT_MAX_BATCH_SIZE = 256  # requests coalesced into one forward pass
+DKT_MAX_WAIT_MS = 5  # how long the first request of a batch waits for others
+
+# Attempt event store configurations
+EVENT_STORE_PATH = '.cache/events'  # one directory per day of part files
+EVENT_STORE_FLUSH_ROWS = 1000  # buffered events written as soon as there are this many
+EVENT_STORE_FLUSH_SECONDS = 60  # or when the oldest flush is this old
+EVENT_STORE_CACHED_PARTS = 64  # part files kept in memory once read, least recently used are dropped
+
+# Code sandbox configurations
+CODE_EXECUTOR = 'sandbox'  # 'sandbox' (pool of warm worker processes) or 'local' (autogen, one interpreter per snippet)
+SANDBOX_WORKERS = 2  # worker processes shared by every learner session
+SANDBOX_TIMEOUT_SECONDS = 30  # wall-clock limit of one run, the worker is replaced when it is exceeded
+SANDBOX_CPU_SECONDS = 20  # CPU time limit of one run
+SANDBOX_MEMORY_MB = 1024  # address space limit of a run
+SANDBOX_MAX_RUNS_PER_WORKER = 100  # runs before a worker is recycled, each run is a fork that leaves the worker as it was
+SANDBOX_PRELOAD = ('numpy', 'matplotlib.pyplot')  # imported once when a worker starts